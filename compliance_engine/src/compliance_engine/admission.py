@@ -0,0 +1,239 @@
+"""Admission control of the validation endpoints.
+
+Before any graph is built, the parsed rooms of a request are checked against
+the ``Settings`` limits and its cost is estimated from the equipment lines:
+
+- ``max_rooms_per_validation`` rooms and ``max_equipment_per_room`` equipment
+  units per room;
+- the expected CPU time of the SHACL passes, ``validation_pass_base_ms`` plus
+  ``validation_pass_triple_ms`` per triple and pass, at most
+  ``max_validation_cpu_ms``;
+- the triples of the room-equipment graph
+  (:meth:`InstallationGraphBuilder.estimate_triples`), at most
+  :func:`graph_triples_budget`: ``max_graph_triples``, by default the triples
+  of the largest graph one pass validates within the CPU budget.  One-pass
+  requests are thus stopped by the size of their graph, requests with more
+  passes by their CPU time.
+
+A request over the graph budgets that did not ask for an equipment encoding is
+switched to the compact encoding when its compact graph fits (the size of a
+compact graph does not depend on quantities); otherwise, and for the room and
+equipment limits, :class:`AdmissionError` is raised and answered 413.  The
+estimate is returned to the client in the ``X-Validation-Cost`` header.
+
+JSON-LD documents (``/validate``) get a cost estimate, their triples counted
+from the property values of the document (:func:`jsonld_triples`); they are
+only limited when ``max_jsonld_triples`` is set.  Batches are limited to
+``max_batch_size`` items.
+"""
+
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+
+from .compact_model import AnyRoom
+from .config import Settings, get_settings
+from .ruleset import COMPACT_ENCODING
+
+if TYPE_CHECKING:
+    from .validators import NFC15100Validator
+
+logger = logging.getLogger(__name__)
+
+COST_HEADER = "X-Validation-Cost"
+
+# ``encoding`` of the estimate of a JSON-LD document
+JSONLD_ENCODING = "jsonld"
+
+# French messages of the admission reasons
+ADMISSION_MESSAGES = {
+    "rooms": "Trop de pièces dans l'installation",
+    "equipment_per_room": "Trop d'équipements dans la pièce {room_id}",
+    "graph_triples": "Installation trop volumineuse pour être validée",
+    "cpu_ms": "Temps de validation estimé trop long",
+    "batch_size": "Trop d'installations dans le lot",
+}
+
+
+class CostEstimate(NamedTuple):
+    """Predicted size and cost of the validation of a request."""
+
+    rooms: int
+    units: int  # equipment units, all rooms
+    triples: int  # room-equipment graph (0 when no graph is built)
+    cpu_ms: float  # all SHACL passes
+    encoding: str
+
+    def header(self) -> str:
+        """Value of the ``X-Validation-Cost`` response header."""
+        return f"triples={self.triples}; cpu-ms={self.cpu_ms:.0f}; encoding={self.encoding}"
+
+
+class AdmissionError(ValueError):
+    """Raised when a request exceeds an admission limit."""
+
+    def __init__(
+        self,
+        reason: str,
+        limit: float,
+        value: float,
+        estimate: Optional[CostEstimate] = None,
+        room_id: Optional[str] = None,
+    ):
+        super().__init__(f"{reason}: {value} > {limit}")
+        self.reason = reason
+        self.limit = limit
+        self.value = value
+        self.estimate = estimate
+        self.room_id = room_id
+
+    def detail(self) -> Dict[str, Any]:
+        """Structured ``detail`` of the 413 response."""
+        detail = {
+            "message": ADMISSION_MESSAGES[self.reason].format(room_id=self.room_id),
+            "reason": self.reason,
+            "limit": self.limit,
+            "value": self.value,
+        }
+        if self.estimate is not None:
+            detail["estimate"] = self.estimate._asdict()
+        if self.room_id is not None:
+            detail["room_id"] = self.room_id
+        return detail
+
+
+def room_units(room: AnyRoom) -> int:
+    """Equipment units of ``room``."""
+    return sum(quantity for _type, quantity, _specifications in room.equipment_items())
+
+
+def jsonld_triples(document: Any) -> int:
+    """Triples of a JSON-LD document, one per property value (``@type``
+    included); an upper bound for the documents of the API, which use no
+    ``@reverse`` or ``@included`` nodes."""
+    triples = 0
+    # Iterative walk: the nesting of a request body is not bounded
+    nodes = [document]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, list):
+            nodes.extend(node)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if key == "@context":
+                    continue
+                values = value if isinstance(value, list) else [value]
+                if key == "@type" or not key.startswith("@"):
+                    triples += len(values)
+                nodes.extend(values)
+    return triples
+
+
+def _cpu_ms(triples: int, passes: int, settings: Settings) -> float:
+    return passes * (settings.validation_pass_base_ms + settings.validation_pass_triple_ms * triples)
+
+
+def estimate_cost(
+    validator: "NFC15100Validator",
+    rooms: List[AnyRoom],
+    encoding: Optional[str],
+    passes: int,
+    settings: Optional[Settings] = None,
+) -> CostEstimate:
+    """Cost of ``passes`` SHACL passes over the room-equipment graph of ``rooms``
+    (``passes=0``: no graph is built)."""
+    settings = settings or get_settings()
+    builder = validator.graph_builder(encoding=encoding)
+    triples = builder.estimate_triples(rooms) if passes else 0
+    return CostEstimate(
+        rooms=len(rooms),
+        units=sum(room_units(room) for room in rooms),
+        triples=triples,
+        cpu_ms=_cpu_ms(triples, passes, settings),
+        encoding=builder.encoding,
+    )
+
+
+def graph_triples_budget(settings: Settings) -> int:
+    """Triple budget of the room-equipment graph (0: no limit), see module docstring."""
+    if settings.max_graph_triples is not None:
+        return settings.max_graph_triples
+    if not settings.max_validation_cpu_ms or not settings.validation_pass_triple_ms:
+        return 0
+    one_pass_triples = (settings.max_validation_cpu_ms - settings.validation_pass_base_ms) / settings.validation_pass_triple_ms
+    return max(1, int(one_pass_triples))
+
+
+def _over_budget(estimate: CostEstimate, settings: Settings) -> Optional[AdmissionError]:
+    max_triples = graph_triples_budget(settings)
+    if max_triples and estimate.triples > max_triples:
+        return AdmissionError("graph_triples", max_triples, estimate.triples, estimate)
+    if settings.max_validation_cpu_ms and estimate.cpu_ms > settings.max_validation_cpu_ms:
+        return AdmissionError("cpu_ms", settings.max_validation_cpu_ms, round(estimate.cpu_ms), estimate)
+    return None
+
+
+def admit(
+    validator: "NFC15100Validator",
+    rooms: List[AnyRoom],
+    encoding: Optional[str],
+    passes: int,
+    settings: Optional[Settings] = None,
+) -> CostEstimate:
+    """Estimate of a request within the limits, possibly with the compact
+    encoding when ``encoding`` is None (see module docstring).
+
+    Raises:
+        AdmissionError: a limit is exceeded
+    """
+    settings = settings or get_settings()
+    estimate = estimate_cost(validator, rooms, encoding, passes, settings)
+    if settings.max_rooms_per_validation and len(rooms) > settings.max_rooms_per_validation:
+        raise AdmissionError("rooms", settings.max_rooms_per_validation, len(rooms), estimate)
+    if settings.max_equipment_per_room:
+        for room in rooms:
+            units = room_units(room)
+            if units > settings.max_equipment_per_room:
+                raise AdmissionError(
+                    "equipment_per_room", settings.max_equipment_per_room, units, estimate, room_id=room.room_id
+                )
+
+    error = _over_budget(estimate, settings)
+    if error is None:
+        return estimate
+    if encoding is None and estimate.encoding != COMPACT_ENCODING:
+        compact = estimate_cost(validator, rooms, COMPACT_ENCODING, passes, settings)
+        if compact.encoding == COMPACT_ENCODING and _over_budget(compact, settings) is None:
+            logger.info(
+                f"🔀 Switching to the compact encoding: {estimate.triples} triples estimated, "
+                f"{compact.triples} once compact"
+            )
+            return compact
+    raise error
+
+
+def admit_jsonld(document: Dict[str, Any], settings: Optional[Settings] = None) -> CostEstimate:
+    """Estimate of the validation of a JSON-LD document, at most
+    ``max_jsonld_triples`` triples when that opt-in limit is set.
+
+    Raises:
+        AdmissionError: the document has more triples than ``max_jsonld_triples``
+    """
+    settings = settings or get_settings()
+    triples = jsonld_triples(document)
+    estimate = CostEstimate(
+        rooms=0, units=0, triples=triples, cpu_ms=_cpu_ms(triples, 1, settings), encoding=JSONLD_ENCODING
+    )
+    if settings.max_jsonld_triples and triples > settings.max_jsonld_triples:
+        raise AdmissionError("graph_triples", settings.max_jsonld_triples, triples, estimate)
+    return estimate
+
+
+def admit_batch(size: int, settings: Optional[Settings] = None) -> None:
+    """Check the number of items of a batch request.
+
+    Raises:
+        AdmissionError: more than ``max_batch_size`` items
+    """
+    settings = settings or get_settings()
+    if settings.max_batch_size and size > settings.max_batch_size:
+        raise AdmissionError("batch_size", settings.max_batch_size, size)
@@ -0,0 +1,552 @@
+"""Vectorised dimensioning of batches of installations.
+
+Quoting a housing programme means dimensioning thousands of dwelling variants.
+:class:`DimensioningBatch` encodes a batch as NumPy arrays: the equipment
+counts per (installation, room, equipment type) (the ``counts`` of the compact
+rooms), the room areas and room types per (installation, room) and the
+occupants per installation, plus the flat table of the equipment lines of all
+rooms for the outputs that follow the request order (heating and dedicated
+circuits).  :func:`dimension_batch` computes the circuit breaker counts and
+ratings, the heating and water heater ratings, the panel modules and the cable
+lengths of every installation as array operations; only the result models are
+built per installation.
+
+The results are those of :meth:`NFC15100Validator.calculate_dimensioning`
+(same specifications in the same order, same notes).  Areas are summed room after room
+(``cumsum``, ``add.at``) like the inventory does, so that the floating point
+sums, and the thresholds and descriptions depending on them, are identical.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .compact_model import EQUIPMENT_ORDINALS, EQUIPMENT_TYPES, AnyRoom, CompactRoom, compact_room
+from .inventory import (
+    INDIVIDUAL_CIRCUIT_HEATING_TYPES,
+    KITCHEN_ROOM_TYPES,
+    NON_LIVING_ROOM_TYPES,
+    OWN_CIRCUIT_TYPES,
+    PARENT_EQUIPMENT_TYPES,
+    REGULAR_SOCKET_ROOM_TYPES,
+    SPECIALISED_20A_TYPES,
+    SPECIALISED_SOCKET_TYPES,
+    VMC_TYPES,
+    WATER_HEATER_TYPES,
+    specified_power,
+)
+from .models import (
+    CableSpec,
+    CircuitBreakerSpec,
+    CircuitKind,
+    DimensioningResult,
+    ElectricalPanelSpec,
+    EquipmentType,
+    RoomType,
+    SurgeProtectorSpec,
+)
+from .validators import NFC15100Validator
+
+ROOM_TYPES: Tuple[RoomType, ...] = tuple(RoomType)
+ROOM_TYPE_ORDINALS: Dict[RoomType, int] = {room_type: ordinal for ordinal, room_type in enumerate(ROOM_TYPES)}
+# Room type code of the padding of installations with fewer rooms than the largest one
+_NO_ROOM = len(ROOM_TYPES)
+
+
+def _equipment_mask(predicate) -> np.ndarray:
+    """Boolean vector over the equipment type ordinals."""
+    return np.array([bool(predicate(equipment_type)) for equipment_type in EQUIPMENT_TYPES])
+
+
+def _room_mask(room_types) -> np.ndarray:
+    """Boolean vector over the room type codes (padding included, never set)."""
+    return np.array([room_type in room_types for room_type in ROOM_TYPES] + [False])
+
+
+def _parent_is(parent: EquipmentType):
+    return lambda equipment_type: PARENT_EQUIPMENT_TYPES[equipment_type] == parent
+
+
+_LIGHTING = _equipment_mask(_parent_is(EquipmentType.LIGHTING_POINT))
+_NETWORK = _equipment_mask(_parent_is(EquipmentType.NETWORK_SOCKET))
+_TV = _equipment_mask(lambda t: t in (EquipmentType.TV_SOCKET, EquipmentType.COAX_SOCKET))
+# Sockets counted on the kitchen / regular socket circuits
+_STANDARD_SOCKETS = _equipment_mask(
+    lambda t: PARENT_EQUIPMENT_TYPES[t] == EquipmentType.SOCKET and t not in SPECIALISED_SOCKET_TYPES
+)
+_SPECIALISED_20A = _equipment_mask(lambda t: t in SPECIALISED_20A_TYPES)
+_WATER_HEATERS = _equipment_mask(lambda t: t in WATER_HEATER_TYPES)
+_VMC = _equipment_mask(lambda t: t in VMC_TYPES)
+_HEATING = _equipment_mask(lambda t: t in NFC15100Validator.HEATING_AREA_RATING_MAP)
+_INDIVIDUAL_HEATING = _equipment_mask(lambda t: t in INDIVIDUAL_CIRCUIT_HEATING_TYPES)
+# Other specialised equipment, on a dedicated circuit per unit
+_DEDICATED = _equipment_mask(
+    lambda t: PARENT_EQUIPMENT_TYPES[t] == EquipmentType.SPECIALIZED_EQUIPMENT
+    and t not in OWN_CIRCUIT_TYPES
+    and t not in NFC15100Validator.HEATING_AREA_RATING_MAP
+)
+
+_KITCHEN_ROOMS = _room_mask(KITCHEN_ROOM_TYPES)
+_REGULAR_ROOMS = _room_mask(REGULAR_SOCKET_ROOM_TYPES)
+_LIVING_ROOMS = _room_mask(frozenset(ROOM_TYPES) - NON_LIVING_ROOM_TYPES)
+_KITCHENS = _room_mask({RoomType.KITCHEN})
+
+_COOKING_HOB = EQUIPMENT_ORDINALS[EquipmentType.COOKING_HOB]
+_OVEN_SOCKET = EQUIPMENT_ORDINALS[EquipmentType.OVEN_SOCKET]
+_CONVECTOR = EQUIPMENT_ORDINALS[EquipmentType.CONVECTOR]
+_INERTIA_RADIATOR = EQUIPMENT_ORDINALS[EquipmentType.INERTIA_RADIATOR]
+_DOUBLE_FLOW_VMC = EQUIPMENT_ORDINALS[EquipmentType.DOUBLE_FLOW_VMC]
+_SIMPLE_FLOW_VMC = EQUIPMENT_ORDINALS[EquipmentType.SIMPLE_FLOW_VMC]
+_GENERIC_VMC = EQUIPMENT_ORDINALS[EquipmentType.VMC]
+
+
+class DimensioningBatch:
+    """Array encoding of the rooms of a batch of installations.
+
+    ``counts[i, r, t]`` are the units of equipment type ordinal ``t`` in room
+    ``r`` of installation ``i``, ``areas`` and ``room_types`` the area (0 when
+    unknown) and room type code of the rooms, padded with empty rooms up to
+    the largest installation, and ``occupants`` the number of people of each
+    installation (0 and ``occupants_known`` false when unknown).  The
+    ``line_*`` vectors describe every equipment line of every room, in
+    request order.
+    """
+
+    def __init__(
+        self,
+        installations: Sequence[Sequence[AnyRoom]],
+        numbers_of_people: Optional[Sequence[Optional[int]]] = None,
+    ):
+        installations = [[compact_room(room) for room in rooms] for rooms in installations]
+        self.rooms: List[CompactRoom] = [room for rooms in installations for room in rooms]
+        room_counts = np.array([len(rooms) for rooms in installations], dtype=np.intp)
+        installation_count = len(installations)
+        width = max(1, int(room_counts.max(initial=0)))
+
+        # Installation and position of every room
+        self.room_installation = np.repeat(np.arange(installation_count), room_counts)
+        room_position = np.arange(len(self.rooms)) - np.repeat(np.cumsum(room_counts) - room_counts, room_counts)
+        self.room_areas = np.array([room.room_area or 0.0 for room in self.rooms], dtype=np.float64)
+
+        self.counts = np.zeros((installation_count, width, len(EQUIPMENT_TYPES)), dtype=np.int64)
+        self.counts[self.room_installation, room_position] = np.frombuffer(
+            b"".join(room.counts.tobytes() for room in self.rooms), dtype=np.intc
+        ).reshape(len(self.rooms), len(EQUIPMENT_TYPES))
+        self.areas = np.zeros((installation_count, width), dtype=np.float64)
+        self.areas[self.room_installation, room_position] = self.room_areas
+        self.room_types = np.full((installation_count, width), _NO_ROOM, dtype=np.intp)
+        self.room_types[self.room_installation, room_position] = [
+            ROOM_TYPE_ORDINALS[room.room_type] for room in self.rooms
+        ]
+        numbers_of_people = numbers_of_people if numbers_of_people is not None else [None] * installation_count
+        self.occupants = np.array([number or 0 for number in numbers_of_people], dtype=np.int64)
+        self.occupants_known = np.array([number is not None for number in numbers_of_people], dtype=bool)
+
+        # Equipment lines: type ordinal, quantity, room and index in the room
+        line_counts = np.array([len(room.kinds) for room in self.rooms], dtype=np.intp)
+        self.line_kinds = np.frombuffer(b"".join(room.kinds for room in self.rooms), dtype=np.uint8).astype(np.intp)
+        self.line_quantities = np.frombuffer(
+            b"".join(room.quantities.tobytes() for room in self.rooms), dtype=np.intc
+        ).astype(np.int64)
+        self.line_rooms = np.repeat(np.arange(len(self.rooms)), line_counts)
+        self.line_index = np.arange(len(self.line_kinds)) - np.repeat(np.cumsum(line_counts) - line_counts, line_counts)
+
+    def __len__(self) -> int:
+        return self.counts.shape[0]
+
+
+def _heating_ratings(validator: NFC15100Validator, kinds: np.ndarray, areas: np.ndarray) -> np.ndarray:
+    """Breaker rating of heating equipment from the area it heats (20 A without area)."""
+    ratings = np.full(len(kinds), 20, dtype=np.int64)
+    for equipment_type, thresholds in validator.HEATING_AREA_RATING_MAP.items():
+        selected = (kinds == EQUIPMENT_ORDINALS[equipment_type]) & (areas > 0)
+        max_areas = np.array([max_area for max_area, _ in thresholds], dtype=np.float64)
+        rating_table = np.array([rating for _, rating in thresholds], dtype=np.int64)
+        # First threshold covering the area, the largest rating above them all
+        ratings[selected] = rating_table[
+            np.minimum(np.searchsorted(max_areas, areas[selected], side="left"), len(thresholds) - 1)
+        ]
+    return ratings
+
+
+def _max_heated_areas(validator: NFC15100Validator) -> np.ndarray:
+    """Largest area of the rating table of every heating type (60 m² otherwise)."""
+    return np.array([
+        validator.HEATING_AREA_RATING_MAP[t][-1][0] if t in validator.HEATING_AREA_RATING_MAP else 60
+        for t in EQUIPMENT_TYPES
+    ])
+
+
+def _by_installation(installations: np.ndarray, count: int) -> List[List[int]]:
+    """Positions of the entries of each installation (entries sorted by installation)."""
+    bounds = np.searchsorted(installations, np.arange(count + 1), side="left").tolist()
+    return [list(range(bounds[i], bounds[i + 1])) for i in range(count)]
+
+
+def _ceil_lengths(lengths: np.ndarray) -> List[int]:
+    return np.ceil(lengths).astype(np.int64).tolist()
+
+
+def dimension_batch(
+    validator: NFC15100Validator,
+    installations: Sequence[Sequence[AnyRoom]],
+    postal_codes: Optional[Sequence[Optional[str]]] = None,
+    numbers_of_people: Optional[Sequence[Optional[int]]] = None,
+    compliant: Optional[Sequence[bool]] = None,
+) -> List[DimensioningResult]:
+    """Dimensioning of each installation of ``installations`` (lists of rooms).
+
+    ``compliant`` gives the compliance of the installations when it is known:
+    non-compliant ones get the "Corrigez les non-conformités" note, as in
+    :meth:`NFC15100Validator.calculate_dimensioning`.  Without it no note is
+    added (compliance is not checked here).
+
+    Specifications with the same content are shared between the results.
+    """
+    count = len(installations)
+    postal_codes = postal_codes if postal_codes is not None else [None] * count
+    numbers_of_people = numbers_of_people if numbers_of_people is not None else [None] * count
+    batch = DimensioningBatch(installations, numbers_of_people)
+    rooms = batch.rooms
+
+    # ------------------------------------------------------------------
+    #  Per-installation counts and areas
+    # ------------------------------------------------------------------
+    totals = batch.counts.sum(axis=1)
+    lighting_points = totals[:, _LIGHTING].sum(axis=1)
+    network_sockets = totals[:, _NETWORK].sum(axis=1)
+    tv_points = totals[:, _TV].sum(axis=1)
+    specialised_20a = totals[:, _SPECIALISED_20A].sum(axis=1)
+    cooking_hobs = totals[:, _COOKING_HOB]
+    oven_sockets = totals[:, _OVEN_SOCKET]
+    water_heaters = totals[:, _WATER_HEATERS].sum(axis=1)
+    standard_sockets = batch.counts[:, :, _STANDARD_SOCKETS].sum(axis=2)
+    kitchen_sockets = (standard_sockets * _KITCHEN_ROOMS[batch.room_types]).sum(axis=1)
+    regular_sockets = (standard_sockets * _REGULAR_ROOMS[batch.room_types]).sum(axis=1)
+
+    # Accumulated room by room, as in the inventory (padding adds 0.0)
+    total_area = np.cumsum(batch.areas, axis=1)[:, -1]
+    living_area = np.cumsum(np.where(_LIVING_ROOMS[batch.room_types], batch.areas, 0.0), axis=1)[:, -1]
+    kitchen_area = np.cumsum(np.where(_KITCHENS[batch.room_types], batch.areas, 0.0), axis=1)[:, -1]
+    has_kitchen = _KITCHENS[batch.room_types].any(axis=1)
+
+    # VMC types present, whatever their quantity
+    vmc_lines = _VMC[batch.line_kinds]
+    vmc_present = np.zeros((count, len(EQUIPMENT_TYPES)), dtype=bool)
+    vmc_present[batch.room_installation[batch.line_rooms[vmc_lines]], batch.line_kinds[vmc_lines]] = True
+
+    # ------------------------------------------------------------------
+    #  Circuit breakers
+    # ------------------------------------------------------------------
+    lighting_circuits = (lighting_points + 7) // 8
+    regular_circuits = (regular_sockets + 7) // 8
+    kitchen_circuits = np.where(kitchen_sockets > 0, np.maximum(1, (kitchen_sockets + 5) // 6), 0)
+    specialised_circuits = np.maximum(3, specialised_20a)
+    hob_circuits = np.where((oven_sockets == 0) & (cooking_hobs > 0), np.maximum(1, cooking_hobs), 0)
+    large_dwelling = living_area >= 120
+    vmc_ratings = np.where(
+        vmc_present[:, _DOUBLE_FLOW_VMC],
+        np.where(large_dwelling, 10, 6),
+        np.where(vmc_present[:, _SIMPLE_FLOW_VMC] | vmc_present[:, _GENERIC_VMC], np.where(large_dwelling, 6, 2), 0),
+    )
+    vmc_labels = np.where(vmc_present[:, _DOUBLE_FLOW_VMC], "Double Flux", "Simple Flux")
+    water_heater_ratings = np.select(
+        [
+            ~batch.occupants_known,
+            batch.occupants <= 2,
+            batch.occupants == 3,
+            batch.occupants == 4,
+        ],
+        [
+            20,
+            16,
+            np.where(living_area > 90, 20, 16),
+            np.where(living_area > 110, 25, 20),
+        ],
+        25,
+    )
+
+    # Heating lines with units, in request order
+    heating_lines = np.flatnonzero(_HEATING[batch.line_kinds] & (batch.line_quantities > 0))
+    heating_kinds = batch.line_kinds[heating_lines]
+    heating_rooms = batch.line_rooms[heating_lines]
+    heating_installations = batch.room_installation[heating_rooms]
+    individual = _INDIVIDUAL_HEATING[heating_kinds]
+
+    # Aggregated heating: area heated per (installation, type), types in order of appearance
+    aggregated_keys = heating_installations[~individual] * len(EQUIPMENT_TYPES) + heating_kinds[~individual]
+    heated_areas = np.zeros(count * len(EQUIPMENT_TYPES), dtype=np.float64)
+    np.add.at(heated_areas, aggregated_keys, batch.room_areas[heating_rooms[~individual]])
+    keys, first_lines = np.unique(aggregated_keys, return_index=True)
+    keys = keys[np.argsort(first_lines, kind="stable")]
+    keys = keys[np.argsort(keys // len(EQUIPMENT_TYPES), kind="stable")]
+    aggregated_installations = keys // len(EQUIPMENT_TYPES)
+    aggregated_kinds = keys % len(EQUIPMENT_TYPES)
+    aggregated_areas = heated_areas[keys]
+    aggregated_ratings = _heating_ratings(validator, aggregated_kinds, aggregated_areas)
+    max_heated_areas = _max_heated_areas(validator)
+
+    # Individual heating: one circuit per unit, numbered per type within an installation
+    unit_lines = np.repeat(heating_lines[individual], batch.line_quantities[heating_lines[individual]])
+    unit_kinds = batch.line_kinds[unit_lines]
+    unit_areas = batch.room_areas[batch.line_rooms[unit_lines]]
+    unit_installations = batch.room_installation[batch.line_rooms[unit_lines]]
+    unit_ratings = _heating_ratings(validator, unit_kinds, unit_areas)
+    unit_keys = unit_installations * len(EQUIPMENT_TYPES) + unit_kinds
+    order = np.argsort(unit_keys, kind="stable")
+    sorted_keys = unit_keys[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(order) else order
+    unit_numbers = np.empty(len(order), dtype=np.int64)
+    unit_numbers[order] = np.arange(len(order)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(order)])) + 1
+    convector_units = np.bincount(unit_installations[unit_kinds == _CONVECTOR], minlength=count)
+    radiator_units = np.bincount(unit_installations[unit_kinds == _INERTIA_RADIATOR], minlength=count)
+    large_room_units = np.bincount(
+        unit_installations[unit_areas > np.where(unit_kinds == _CONVECTOR, 90, 60)], minlength=count
+    )
+
+    # Dedicated equipment: rating from the specified or typical power of each line
+    dedicated_lines = np.flatnonzero(_DEDICATED[batch.line_kinds])
+    dedicated_kinds = batch.line_kinds[dedicated_lines]
+    powers = np.array(
+        [validator._get_typical_power_consumption(t) for t in EQUIPMENT_TYPES], dtype=np.float64
+    )[dedicated_kinds]
+    for position, line in enumerate(dedicated_lines.tolist()):
+        room = rooms[batch.line_rooms[line]]
+        if room.specifications:
+            power = specified_power(room.specifications.get(int(batch.line_index[line])))
+            if power is not None:
+                powers[position] = power
+    distinct_powers, power_index = np.unique(powers, return_inverse=True)
+    dedicated_ratings = np.array(
+        [validator._determine_breaker_rating(power) for power in distinct_powers.tolist()], dtype=np.int64
+    )[power_index.reshape(-1)]
+    dedicated_quantities = batch.line_quantities[dedicated_lines]
+    dedicated_installations = batch.room_installation[batch.line_rooms[dedicated_lines]]
+
+    breaker_counts = (
+        lighting_circuits + regular_circuits + kitchen_circuits + specialised_circuits + oven_sockets
+        + hob_circuits + (vmc_ratings > 0)
+        + np.bincount(aggregated_installations[aggregated_areas > 0], minlength=count)
+        + np.bincount(unit_installations, minlength=count)
+        + np.bincount(dedicated_installations, weights=dedicated_quantities, minlength=count).astype(np.int64)
+        + water_heaters
+    )
+    # NF C 15-100: 20% de réserve minimum, 13 modules minimum
+    panel_modules = np.maximum(13, np.ceil(breaker_counts / 0.8).astype(np.int64))
+
+    # ------------------------------------------------------------------
+    #  Cables (lengths rounded up to the metre)
+    # ------------------------------------------------------------------
+    has_area = total_area > 0
+    lighting_lengths = _ceil_lengths(
+        np.where(has_area, np.maximum(lighting_points * 15.0, total_area * 0.8), lighting_points * 15.0)
+    )
+    kitchen_socket_lengths = _ceil_lengths(
+        kitchen_sockets * 3.0 + np.maximum(1, np.ceil(kitchen_sockets / 6)) * 25.0
+    )
+    regular_socket_lengths = _ceil_lengths(
+        regular_sockets * 2.5 + np.maximum(1, np.ceil(regular_sockets / 8)) * 20.0
+    )
+    network_lengths = _ceil_lengths(
+        np.where(has_area, np.maximum(network_sockets * 25.0, total_area * 0.5), network_sockets * 25.0)
+    )
+    tv_lengths = _ceil_lengths(np.where(has_area, np.maximum(tv_points * 20.0, total_area * 0.4), tv_points * 20.0))
+    kitchen_circuit_lengths = _ceil_lengths(
+        np.where(kitchen_area > 0, np.maximum(60.0, kitchen_area * 4.0), 60.0)
+    )
+
+    # ------------------------------------------------------------------
+    #  Result models
+    # ------------------------------------------------------------------
+    shared: Dict[Tuple, object] = {}
+
+    def breaker(rating: int, description: str, kind: CircuitKind, detail: Optional[str] = None) -> CircuitBreakerSpec:
+        key = (rating, description, kind, detail)
+        spec = shared.get(key)
+        if spec is None:
+            spec = shared[key] = CircuitBreakerSpec(
+                rating=rating, type="Type C", quantity=1, description=description,
+                circuit_kind=kind, circuit_detail=detail,
+            )
+        return spec
+
+    def cable(cable_type: str, section: float, length: int, description: str) -> CableSpec:
+        key = ("cable", cable_type, section, length, description)
+        spec = shared.get(key)
+        if spec is None:
+            spec = shared[key] = CableSpec(section=section, type=cable_type, length_estimate=length, description=description)
+        return spec
+
+    def panel(modules: int) -> ElectricalPanelSpec:
+        key = ("panel", modules)
+        spec = shared.get(key)
+        if spec is None:
+            spec = shared[key] = ElectricalPanelSpec(
+                type="Tableau électrique",
+                modules=modules,
+                quantity=1,
+                description=f"Tableau électrique principal avec {modules} modules (NF C 15-100: 20% réserve minimum)",
+            )
+        return spec
+
+    surge_protector = SurgeProtectorSpec(
+        type="Parafoudre Type 2",
+        rating="10kA",
+        quantity=1,
+        description="Parafoudre du tableau électrique principal",
+    )
+
+    (
+        lighting_points, regular_sockets, kitchen_sockets, oven_sockets, network_sockets, tv_points, water_heaters,
+        lighting_circuits, regular_circuits, kitchen_circuits, specialised_circuits, hob_circuits,
+        vmc_ratings, vmc_labels, water_heater_ratings, panel_modules, total_area, living_area, has_kitchen,
+        convector_units, radiator_units, large_room_units,
+    ) = (
+        values.tolist() for values in (
+            lighting_points, regular_sockets, kitchen_sockets, oven_sockets, network_sockets, tv_points,
+            water_heaters, lighting_circuits, regular_circuits, kitchen_circuits, specialised_circuits,
+            hob_circuits, vmc_ratings, vmc_labels, water_heater_ratings, panel_modules, total_area, living_area,
+            has_kitchen, convector_units, radiator_units, large_room_units,
+        )
+    )
+    aggregated = _by_installation(aggregated_installations, count)
+    aggregated_kinds, aggregated_areas, aggregated_ratings = (
+        aggregated_kinds.tolist(), aggregated_areas.tolist(), aggregated_ratings.tolist()
+    )
+    units = _by_installation(unit_installations, count)
+    unit_kinds, unit_areas, unit_ratings, unit_numbers, unit_rooms = (
+        unit_kinds.tolist(), unit_areas.tolist(), unit_ratings.tolist(), unit_numbers.tolist(),
+        batch.line_rooms[unit_lines].tolist(),
+    )
+    max_heated_areas = max_heated_areas.tolist()
+    dedicated = _by_installation(dedicated_installations, count)
+    dedicated_kinds, dedicated_ratings, dedicated_quantities = (
+        dedicated_kinds.tolist(), dedicated_ratings.tolist(), dedicated_quantities.tolist()
+    )
+
+    # Numbered circuits, built once up to the largest count of the batch
+    def numbered(counts: List[int], rating: int, description: str, kind: CircuitKind) -> List[CircuitBreakerSpec]:
+        return [breaker(rating, description.format(idx + 1), kind) for idx in range(max(counts, default=0))]
+
+    lighting_breakers = numbered(
+        lighting_circuits, 16, "Disjoncteur éclairage 16A {} (max 8 points lumineux)", CircuitKind.LIGHTING
+    )
+    regular_breakers = numbered(
+        regular_circuits, 16, "Disjoncteur prises classiques 16A {} (max 8 prises, section 1,5 mm²)",
+        CircuitKind.SOCKETS,
+    )
+    kitchen_breakers = numbered(
+        kitchen_circuits, 20, "Disjoncteur prises cuisine {} (max 6 prises)", CircuitKind.KITCHEN_SOCKETS
+    )
+    specialised_breakers = numbered(
+        specialised_circuits, 20, "Circuit spécialisé 20A {}", CircuitKind.SPECIALISED_20A
+    )
+    oven_socket_breakers = numbered(oven_sockets, 32, "Circuit dédié prise plaque 32A {}", CircuitKind.OVEN_SOCKET)
+    hob_breakers = numbered(hob_circuits, 32, "Circuit dédié plaque de cuisson {}", CircuitKind.COOKING_HOB)
+
+    results: List[DimensioningResult] = []
+    for i in range(count):
+        breakers: List[CircuitBreakerSpec] = []
+        breakers.extend(lighting_breakers[:lighting_circuits[i]])
+        breakers.extend(regular_breakers[:regular_circuits[i]])
+        breakers.extend(kitchen_breakers[:kitchen_circuits[i]])
+        breakers.extend(specialised_breakers[:specialised_circuits[i]])
+        breakers.extend(oven_socket_breakers[:oven_sockets[i]])
+        breakers.extend(hob_breakers[:hob_circuits[i]])
+        if vmc_ratings[i] > 0:
+            breakers.append(breaker(
+                vmc_ratings[i], f"Circuit VMC {vmc_labels[i]} - {vmc_ratings[i]}A", CircuitKind.VMC, vmc_labels[i]
+            ))
+        for position in aggregated[i]:
+            if aggregated_areas[position] > 0:
+                rating, value = aggregated_ratings[position], EQUIPMENT_TYPES[aggregated_kinds[position]].value
+                breakers.append(breaker(rating, f"Circuit {value} - {rating}A", CircuitKind.HEATING, value))
+        for position in units[i]:
+            kind, area, rating = unit_kinds[position], unit_areas[position], unit_ratings[position]
+            max_area = max_heated_areas[kind]
+            alert = f" ⚠️ (superficie {area:.0f}m² > {max_area:.0f}m² recommandés)" if area > max_area else ""
+            label = "Convecteur" if kind == _CONVECTOR else "Radiateur inertie"
+            breakers.append(breaker(
+                rating, f"Circuit {label} {unit_numbers[position]} - {rating}A{alert}",
+                CircuitKind.INDIVIDUAL_HEATING, f"{label} {rooms[unit_rooms[position]].room_id}{alert}",
+            ))
+        for position in dedicated[i]:
+            rating, value = dedicated_ratings[position], EQUIPMENT_TYPES[dedicated_kinds[position]].value
+            spec = breaker(rating, f"Circuit dédié {value} ({rating}A)", CircuitKind.DEDICATED, value)
+            breakers.extend([spec] * dedicated_quantities[position])
+        if water_heaters[i]:
+            rating = water_heater_ratings[i]
+            households = f"{numbers_of_people[i] or '?'} pers. et {living_area[i]:.0f}m²"
+            spec = breaker(rating, f"Circuit chauffe-eau ({rating}A) pour {households}", CircuitKind.WATER_HEATER, households)
+            breakers.extend([spec] * water_heaters[i])
+
+        # Cables aggregated by (type, section), in order of first appearance
+        cable_parts: Dict[Tuple[str, float], List] = {}
+
+        def add_cable(cable_type: str, section: float, length: int, description: str) -> None:
+            parts = cable_parts.setdefault((cable_type, section), [0, []])
+            parts[0] += length
+            parts[1].append(description)
+
+        if lighting_points[i] > 0:
+            add_cable("H07V-U", 1.5, lighting_lengths[i], f"circuits éclairage – {lighting_points[i]} point(s)")
+        if kitchen_sockets[i] > 0:
+            add_cable(
+                "H07V-U", 2.5, kitchen_socket_lengths[i],
+                f"circuits prises cuisine 20A – {kitchen_sockets[i]} prise(s)",
+            )
+        if regular_sockets[i] > 0:
+            add_cable(
+                "H07V-U", 1.5, regular_socket_lengths[i],
+                f"circuits prises classiques 16A – {regular_sockets[i]} prise(s)",
+            )
+        if network_sockets[i] > 0:
+            add_cable("RJ45 Cat6 UTP", 0.0, network_lengths[i], f"réseau – {network_sockets[i]} prise(s) réseau")
+        if tv_points[i] > 0:
+            add_cable("Coaxial RG6", 0.0, tv_lengths[i], f"coaxiaux TV – {tv_points[i]} prise(s) TV/coaxiale")
+        if has_kitchen[i]:
+            add_cable(
+                "H07V-U", 4.0, kitchen_circuit_lengths[i], "circuits dédiés cuisine (four, lave-vaisselle, plaque)"
+            )
+        if oven_sockets[i] > 0:
+            add_cable(
+                "H07V-U", 6.0, oven_sockets[i] * 25,
+                f"circuits dédiés prises plaque 32A – {oven_sockets[i]} prise(s)",
+            )
+        cables = []
+        area_suffix = f" / {total_area[i]:.0f} m²" if total_area[i] > 0 else ""
+        for (cable_type, section), (length, descriptions) in cable_parts.items():
+            if section == 0.0:
+                description = f"Câbles {descriptions[0]}"
+            else:
+                description = f"Câble {cable_type} {section}mm² – " + " + ".join(descriptions)
+            cables.append(cable(cable_type, section, length, description + area_suffix))
+
+        notes: List[str] = []
+        for position in aggregated[i]:
+            kind, heated_area = aggregated_kinds[position], aggregated_areas[position]
+            max_surface_single = validator.HEATING_AREA_RATING_MAP[EQUIPMENT_TYPES[kind]][-1][0]
+            if heated_area > max_surface_single:
+                human_label = EQUIPMENT_TYPES[kind].value.replace("_", " ").capitalize()
+                notes.append(
+                    f"⚠️ La surface totale pour {human_label} ({heated_area:.1f} m²) dépasse le maximum de {max_surface_single} m² pour un circuit unique. Un seul disjoncteur est proposé mais une étude plus approfondie ou une répartition sur plusieurs circuits est recommandée."
+                )
+        if convector_units[i]:
+            notes.append(f"✓ {convector_units[i]} circuit(s) dédié(s) pour convecteurs (un circuit par équipement)")
+        if radiator_units[i]:
+            notes.append(f"✓ {radiator_units[i]} circuit(s) dédié(s) pour radiateurs à inertie (un circuit par équipement)")
+        if large_room_units[i]:
+            notes.append("⚠️ Certains équipements de chauffage sont installés dans des pièces de grande superficie. Vérifiez que la puissance est adaptée.")
+        notes.extend(validator.INSTALLATION_NOTES)
+        if compliant is not None and not compliant[i]:
+            notes.append(validator.NON_COMPLIANT_NOTE)
+
+        results.append(DimensioningResult(
+            circuit_breakers=breakers,
+            surge_protectors=[surge_protector] if validator._surge_protector_required(postal_codes[i]) else [],
+            electrical_panels=[panel(panel_modules[i])],
+            cables=cables,
+            total_estimated_cost=None,
+            installation_notes=notes,
+        ))
+    return results
@@ -0,0 +1,171 @@
+"""Compact internal model of the rooms of an installation.
+
+Requests are validated into ``RoomEquipment`` / ``EquipmentItem`` models
+(``extra = "allow"``, free-form ``specifications``): a few pydantic objects and
+dicts per equipment line.  Right after validation the endpoints turn the rooms
+into :class:`CompactRoom` records, which the validation stages, the graph
+builder and the dimensioning read instead (and which the process executor
+pickles):
+
+* a room is a ``__slots__`` record;
+* its equipment lines are a ``bytes`` of ``EquipmentType`` ordinals and an
+  integer array of quantities, in request order (order-dependent outputs such
+  as the numbering of dedicated circuits are unchanged);
+* ``counts`` holds its units per ``EquipmentType`` ordinal, a fixed-length
+  integer array;
+* specifications and extra fields, which most lines do not have, are kept in
+  sparse per-line dicts.
+
+Both models expose the same reading interface (``room_id``, ``room_type``,
+``room_area`` and :meth:`CompactRoom.equipment_items`), so internal callers may
+still pass ``RoomEquipment`` lists.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .models import EquipmentType, RoomEquipment, RoomType
+
+# Equipment types by ordinal (position in the enum)
+EQUIPMENT_TYPES: Tuple[EquipmentType, ...] = tuple(EquipmentType)
+EQUIPMENT_ORDINALS: Dict[EquipmentType, int] = {
+    equipment_type: ordinal for ordinal, equipment_type in enumerate(EQUIPMENT_TYPES)
+}
+
+# Specifications of the lines without any (shared, never mutated)
+_NO_SPECIFICATIONS: Dict[str, Any] = {}
+
+_ROOM_FIELDS = frozenset({"room_id", "room_type", "room_area", "equipment"})
+_ITEM_FIELDS = frozenset({"equipment_type", "quantity", "specifications"})
+
+
+class CompactRoom:
+    """Room and equipment lines of an installation (see module docstring)."""
+
+    __slots__ = (
+        "room_id",
+        "room_type",
+        "room_area",
+        "kinds",
+        "quantities",
+        "counts",
+        "specifications",
+        "extra",
+    )
+
+    def __init__(
+        self,
+        room_id: str,
+        room_type: RoomType,
+        room_area: Optional[float],
+        kinds: bytes,
+        quantities: array,
+        specifications: Optional[Dict[int, Any]] = None,
+        extra: Optional[Tuple[Dict[str, Any], Dict[int, Dict[str, Any]]]] = None,
+    ):
+        self.room_id = room_id
+        self.room_type = room_type
+        self.room_area = room_area
+        # Ordinal and quantity of every equipment line
+        self.kinds = kinds
+        self.quantities = quantities
+        # Units per equipment type ordinal
+        counts = array("i", bytes(4 * len(EQUIPMENT_TYPES)))
+        for ordinal, quantity in zip(kinds, quantities):
+            counts[ordinal] += quantity
+        self.counts = counts
+        # Line index -> specifications, for lines with non-empty specifications
+        self.specifications = specifications or None
+        # JSON extra fields of the room and of its lines (line index -> fields), if any
+        self.extra = extra
+
+    @classmethod
+    def from_model(cls, room: RoomEquipment) -> "CompactRoom":
+        kinds = bytearray()
+        quantities = array("i")
+        specifications: Dict[int, Any] = {}
+        item_extra: Dict[int, Dict[str, Any]] = {}
+        for index, item in enumerate(room.equipment):
+            kinds.append(EQUIPMENT_ORDINALS[EquipmentType(item.equipment_type)])
+            quantities.append(item.quantity)
+            if item.specifications != {}:
+                specifications[index] = item.specifications
+            if item.model_extra:
+                item_extra[index] = _extra_fields(item.model_dump(mode="json"), _ITEM_FIELDS)
+        room_extra = _extra_fields(room.model_dump(mode="json"), _ROOM_FIELDS) if room.model_extra else {}
+        return cls(
+            room.room_id,
+            RoomType(room.room_type),
+            room.room_area,
+            bytes(kinds),
+            quantities,
+            specifications,
+            (room_extra, item_extra) if room_extra or item_extra else None,
+        )
+
+    def equipment_items(self) -> Iterator[Tuple[EquipmentType, int, Any]]:
+        """``(type, quantity, specifications)`` of every equipment line, in order."""
+        specifications = self.specifications
+        for index, (ordinal, quantity) in enumerate(zip(self.kinds, self.quantities)):
+            yield (
+                EQUIPMENT_TYPES[ordinal],
+                quantity,
+                specifications.get(index, _NO_SPECIFICATIONS) if specifications else _NO_SPECIFICATIONS,
+            )
+
+    def count(self, equipment_type: EquipmentType) -> int:
+        """Units of ``equipment_type`` in the room."""
+        return self.counts[EQUIPMENT_ORDINALS[equipment_type]]
+
+    def as_json(self) -> Dict[str, Any]:
+        """JSON view of the room, as ``RoomEquipment.model_dump(mode="json")``."""
+        room_extra, item_extra = self.extra or ({}, {})
+        equipment = []
+        for index, (equipment_type, quantity, specifications) in enumerate(self.equipment_items()):
+            item = {"equipment_type": equipment_type.value, "quantity": quantity, "specifications": specifications}
+            item.update(item_extra.get(index, ()))
+            equipment.append(item)
+        data = {
+            "room_id": self.room_id,
+            "room_type": self.room_type.value,
+            "room_area": self.room_area,
+            "equipment": equipment,
+        }
+        data.update(room_extra)
+        return data
+
+    def to_model(self) -> RoomEquipment:
+        """``RoomEquipment`` holding the same data."""
+        return RoomEquipment(**self.as_json())
+
+    def __reduce__(self):
+        # ``counts`` is derived: rebuilt when unpickled (process executor)
+        return (
+            CompactRoom,
+            (self.room_id, self.room_type, self.room_area, self.kinds, self.quantities, self.specifications, self.extra),
+        )
+
+    def __repr__(self) -> str:
+        return f"CompactRoom({self.room_id!r}, {self.room_type.value}, {len(self.kinds)} lines)"
+
+
+AnyRoom = Union[RoomEquipment, CompactRoom]
+
+
+def _extra_fields(data: Dict[str, Any], fields: frozenset) -> Dict[str, Any]:
+    return {key: value for key, value in data.items() if key not in fields}
+
+
+def compact_room(room: AnyRoom) -> CompactRoom:
+    """Compact version of ``room`` (``room`` itself if already compact)."""
+    return room if isinstance(room, CompactRoom) else CompactRoom.from_model(room)
+
+
+def compact_rooms(rooms: Iterable[AnyRoom]) -> List[CompactRoom]:
+    """Compact versions of ``rooms``, in order."""
+    return [compact_room(room) for room in rooms]
+
+
+def room_json(room: AnyRoom) -> Dict[str, Any]:
+    """JSON view of a room of either model."""
+    return room.as_json() if isinstance(room, CompactRoom) else room.model_dump(mode="json")
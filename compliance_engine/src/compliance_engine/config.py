@@ -1,10 +1,14 @@
 """Configuration settings for the NF C 15-100 Compliance Engine."""
 
 from functools import lru_cache
+from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
+# Directory holding ontologies/ and shapes/ (src/compliance_engine/ is two levels below)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -23,16 +27,71 @@ class Settings(BaseSettings):
     
     # Security settings
     production_mode: bool = os.getenv("NODE_ENV") == "production"
+    # Token expected in the X-Admin-Token header of the admin endpoints (POST /rules/reload);
+    # without one they only answer requests from the loopback interface
+    admin_token: str = ""
     
-    # File paths
+    # File paths (relative ones: working directory first, then the project root)
     ontology_path: str = "ontologies/nfc15100_ontology.ttl"
     shapes_path: str = "shapes/nfc15100_shapes.ttl"
+    count_shapes_path: str = "shapes/nfc15100_count_shapes.ttl"
     
     # Validation settings
-    validation_timeout: int = 60  # seconds
+    validation_timeout: int = 60  # seconds per executor stage before answering 504 (0: no limit)
+    # Admission control of the validation endpoints (see ``admission``): larger
+    # requests are answered 413, or switched to the compact encoding when it fits
     max_rooms_per_validation: int = 50
-    max_equipment_per_room: int = 100
-    
+    max_equipment_per_room: int = 100  # equipment units of one room
+    max_validation_cpu_ms: int = 5_000  # estimated CPU time of the SHACL passes of a request
+    # Estimated triples of the room-equipment graph; by default (None) the triples
+    # one pass validates within max_validation_cpu_ms (9 063 with the defaults), so
+    # one-pass requests are bounded by their graph and two-pass ones by their CPU time
+    max_graph_triples: Optional[int] = None
+    # CPU time of one SHACL pass: fixed part and part per triple, measured on the
+    # reference installations scaled up to ~1 300 triples (one core, native rules
+    # and persistent shapes enabled)
+    validation_pass_base_ms: float = 15.0
+    validation_pass_triple_ms: float = 0.55
+    # Opt-in limit of the JSON-LD documents of /validate and /validate/batch (0: no limit)
+    max_jsonld_triples: int = 0
+    max_batch_size: int = 100  # items of a /validate/batch or /dimensioning/batch request
+    # "none": RDFS closure precomputed at ruleset load and materialised by the builders
+    # "rdfs": let pyshacl expand the data graph with the ontology on every request
+    validation_inference: str = "none"
+    # "nodes": one RDF node per equipment unit
+    # "compact": per-room count literals, graph size independent of quantities
+    equipment_encoding: str = "nodes"
+    # Evaluate the room cardinality rules in Python, pyshacl only runs the other shapes
+    native_rules: bool = True
+    # Reuse the pyshacl shapes harvested at ruleset load and the parsed SPARQL queries
+    persistent_shapes: bool = True
+    # Global validation: reuse the step-1 results of the shapes reading only rooms and
+    # their equipment, the second pass evaluates the other shapes only
+    incremental_global_validation: bool = True
+    # Dimensioning circuit breakers: "verbose" (one entry per circuit) or "grouped"
+    # (grouped by rating, type and circuit kind, see ``circuit_breaker_groups``)
+    circuit_breaker_output: str = "verbose"
+
+    # Executor for blocking stages (SHACL, dimensioning, JSON-LD): "inline", "thread" or "process"
+    executor_mode: str = "thread"
+    executor_workers: int = 4
+    executor_max_queue: int = 64  # stages queued or running before answering 503
+    batch_concurrency: int = 4  # items of a /validate/batch request validated at once
+    # Process executor: from this many rooms, room-local shapes are validated per chunk
+    # of rooms on separate workers, alongside the installation shapes (0 disables it)
+    parallel_room_threshold: int = 12
+
+    # Response cache of the room-equipment / global validation endpoints (0 disables it)
+    result_cache_size: int = 256
+    result_cache_ttl: int = 300  # seconds
+    # Memo of room-local verdicts, keyed by room type, area bucket and equipment counts (0 disables it)
+    room_verdict_cache_size: int = 4096
+
+    # Installation sessions of the PATCH /sessions API (0 disables them)
+    session_max_count: int = 128
+    session_max_triples: int = 2_000_000  # data graph triples kept by all sessions
+    session_idle_timeout: int = 1800  # seconds
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -41,4 +100,12 @@ class Settings(BaseSettings):
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached settings instance."""
-    return Settings() 
\ No newline at end of file
+    return Settings() 
+
+def resolve_path(path: str) -> Path:
+    """``path`` as configured, or under the project root when it is relative and
+    missing from the working directory (e.g. tools run from another directory)."""
+    resolved = Path(path)
+    if not resolved.is_absolute() and not resolved.exists() and (PROJECT_ROOT / resolved).exists():
+        return PROJECT_ROOT / resolved
+    return resolved
@@ -0,0 +1,207 @@
+"""Executor backends for the CPU-bound validation stages.
+
+pyshacl, the dimensioning calculation and the JSON-LD construction are plain
+blocking Python.  Running them directly inside an ``async`` endpoint freezes the
+whole uvicorn worker (``/health`` included) for the duration of a validation.
+:class:`StageExecutor` moves these stages off the event loop:
+
+- ``inline``: run in the calling coroutine (legacy behaviour, useful for debugging)
+- ``thread``: run in a bounded thread pool
+- ``process``: run in a process pool whose workers pre-load the compiled ruleset
+
+The number of stages waiting or running is capped by ``executor_max_queue``;
+beyond that :class:`ExecutorSaturatedError` is raised so the API can answer 503
+instead of piling up work.  A stage of :meth:`StageExecutor.run` still running
+after ``validation_timeout`` seconds raises :class:`StageTimeoutError`; it
+cannot be interrupted and keeps its queue slot until it actually finishes.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence, Tuple, TypeVar
+
+from .config import Settings, get_settings
+from .ruleset import get_ruleset
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+A = TypeVar("A")
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when too many stages are already queued on the executor."""
+
+
+class StageTimeoutError(TimeoutError):
+    """Raised when a stage is still running after the executor timeout."""
+
+
+def _init_process_worker() -> None:
+    """Process pool initializer: compile the ruleset before the first task arrives."""
+    ruleset = get_ruleset()
+    logger.info(f"🧵 Process worker ready with ruleset {ruleset.version}")
+
+
+class StageExecutor:
+    """Run blocking validation stages according to the configured backend."""
+
+    def __init__(self, mode: str = "thread", max_workers: int = 4, max_queue: int = 64, timeout: float = 0):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(1, max_queue)
+        # Seconds a stage of ``run`` may take before StageTimeoutError (0: no limit)
+        self.timeout = max(0, timeout)
+        self._pending = 0
+        self._pool: Optional[Executor] = self._create_pool()
+        # Threads of the ``process`` mode for stages that must see the API process state
+        self._local_pool: Optional[Executor] = None
+        logger.info(
+            f"⚙️ Stage executor: mode={mode}, workers={self.max_workers}, "
+            f"max_queue={self.max_queue}, timeout={self.timeout or 'none'}"
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Settings] = None) -> "StageExecutor":
+        settings = settings or get_settings()
+        return cls(
+            mode=settings.executor_mode,
+            max_workers=settings.executor_workers,
+            max_queue=settings.executor_max_queue,
+            timeout=settings.validation_timeout,
+        )
+
+    def _create_pool(self) -> Optional[Executor]:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nfc-stage")
+        if self.mode == "process":
+            # Workers are started lazily, possibly while ``run_local`` threads hold
+            # locks: fork them from a clean server process rather than from this one
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_process_worker,
+            )
+        return None
+
+    @property
+    def pending(self) -> int:
+        """Number of stages currently queued or running."""
+        return self._pending
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func(*args, **kwargs)`` on the configured backend.
+
+        In ``process`` mode ``func`` and its arguments must be picklable (module
+        level functions or bound methods of picklable objects such as the validator).
+        Raises :class:`StageTimeoutError` after ``timeout`` seconds (not in
+        ``inline`` mode, where the stage blocks the caller).
+        """
+        if self._pool is None:
+            return func(*args, **kwargs)
+        return await self._submit(self._pool, self.timeout, func, *args, **kwargs)
+
+    async def run_local(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``func(*args, **kwargs)`` in the API process.
+
+        For stages reading or mutating process-local state (e.g. the data graph
+        of a session): a thread of the pool in ``thread`` mode, of a separate
+        thread pool in ``process`` mode.  Counts against the same queue limit;
+        not subject to the timeout (the caller's state must not be abandoned
+        half updated).
+        """
+        if self._pool is None:
+            return func(*args, **kwargs)
+        if self.mode == "thread":
+            return await self._submit(self._pool, 0, func, *args, **kwargs)
+        if self._local_pool is None:
+            self._local_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nfc-local")
+        return await self._submit(self._local_pool, 0, func, *args, **kwargs)
+
+    async def _submit(self, pool: Executor, timeout: float, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._pending >= self.max_queue:
+            raise ExecutorSaturatedError(
+                f"Executor queue full ({self._pending}/{self.max_queue} stages pending)"
+            )
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+        # The slot is released when the stage finishes, not when its caller gives up
+        self._pending += 1
+        future.add_done_callback(self._release)
+        if not timeout:
+            return await future
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise StageTimeoutError(
+                f"Stage {getattr(func, '__name__', func)} still running after {timeout} s"
+            ) from None
+
+    def _release(self, future: "asyncio.Future[Any]") -> None:
+        self._pending -= 1
+        if not future.cancelled():
+            # Retrieved so that abandoned stages do not log "exception was never retrieved"
+            future.exception()
+
+    def restart(self) -> None:
+        """Replace the worker pool (process workers then re-load the ruleset from disk)."""
+        previous = self._pool
+        self._pool = self._create_pool()
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        for pool in (self._pool, self._local_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._local_pool = None
+
+
+async def map_unordered(
+    func: Callable[[int, A], Awaitable[T]],
+    items: Sequence[A],
+    concurrency: int,
+) -> AsyncIterator[Tuple[int, T]]:
+    """Await ``func(index, item)`` for every item, at most ``concurrency`` at once,
+    and yield ``(index, result)`` as each one finishes (completion order).
+
+    At most ``concurrency`` finished results wait for the consumer, so a slow
+    consumer (streamed response) slows the workers down instead of piling up
+    results.  An exception raised by ``func`` stops the iteration.
+    """
+    queue: "asyncio.Queue[Tuple[int, Any, Optional[BaseException]]]" = asyncio.Queue(maxsize=max(1, concurrency))
+    indices = iter(range(len(items)))
+
+    async def worker() -> None:
+        # The index iterator is shared: each item is taken by exactly one worker
+        for index in indices:
+            try:
+                await queue.put((index, await func(index, items[index]), None))
+            except Exception as e:
+                await queue.put((index, None, e))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(max(1, concurrency), len(items)))]
+    try:
+        for _ in range(len(items)):
+            index, result, error = await queue.get()
+            if error is not None:
+                raise error
+            yield index, result
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+@lru_cache()
+def get_executor() -> StageExecutor:
+    """Get the process-wide stage executor."""
+    return StageExecutor.from_settings()
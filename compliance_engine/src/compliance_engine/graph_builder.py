@@ -0,0 +1,618 @@
+"""Direct RDF graph construction for NF C 15-100 installations.
+
+The endpoints used to build a JSON-LD dict, serialise it and parse it back with
+rdflib's JSON-LD parser (context expansion, IRI resolution, blank-node
+relabelling) before every validation.  The builder below produces the very same
+triples straight from the rooms (``RoomEquipment`` models or ``CompactRoom``
+records), using interned ``URIRef``s for the ``nfc:`` vocabulary.  JSON-LD is only produced on demand as a debug
+export (:func:`graph_to_jsonld`).
+
+Two equipment encodings are supported.  The per-node encoding creates one node
+per equipment unit.  The compact encoding gives each room one count literal per
+equipment category and a single node per distinct kind of equipment, so the
+graph size no longer depends on quantities; it is validated by the count-reading
+variants of the shapes, generated at ruleset load (see ``ruleset._compact_shapes``).
+"""
+
+import json
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.namespace import RDF
+from rdflib.plugins.shared.jsonld.util import norm_url
+
+from .compact_model import AnyRoom
+from .models import CircuitKind, DimensioningResult, EquipmentType, PlannedCircuit
+from .result_cache import installation_uuid
+from .ruleset import COMPACT_ENCODING, NFC, NODES_ENCODING, CompiledRuleset
+
+# Interned vocabulary
+HAS_ROOM = NFC.hasRoom
+HAS_CIRCUIT = NFC.hasCircuit
+HAS_PROTECTION = NFC.hasProtection
+HAS_GROUNDING_SYSTEM = NFC.hasGroundingSystem
+HAS_SURGE_PROTECTOR = NFC.hasSurgeProtector
+ROOM_AREA = NFC.roomArea
+CURRENT = NFC.current
+SOCKET_TYPE = NFC.socketType
+CIRCUIT_TYPE = NFC.circuitType
+SUPPLIED_BY_CIRCUIT = NFC.suppliedByCircuit
+TYPE = NFC.type
+GROUND_RESISTANCE = NFC.groundResistance
+LIGHTNING_RISK_ASSESSMENT = NFC.lightningRiskAssessment
+PROTECTION_TYPE = NFC.protectionType
+RATING = NFC.rating
+POSTAL_CODE = NFC.postalCode
+PRINCIPAL_REFERENCE = NFC.principalReference
+ENCLOSURE_BOX = NFC.enclosureBox
+CABLE_TYPE = NFC.cableType
+
+# Per-room equipment counts of the compact encoding
+SOCKET_COUNT = NFC.socketCount
+STANDARD_SOCKET_COUNT = NFC.standardSocketCount
+SOCKET_20A_COUNT = NFC.socket20ACount
+SPECIALIZED_20A_SOCKET_COUNT = NFC.specialized20ASocketCount
+SPECIALIZED_SOCKET_COUNT = NFC.specializedSocketCount
+COOKTOP_SOCKET_COUNT = NFC.cooktopSocketCount
+LIGHTING_POINT_COUNT = NFC.lightingPointCount
+SWITCH_COUNT = NFC.switchCount
+NETWORK_SOCKET_COUNT = NFC.networkSocketCount
+
+ROOM_COUNT_PROPERTIES: Tuple[URIRef, ...] = (
+    SOCKET_COUNT,
+    STANDARD_SOCKET_COUNT,
+    SOCKET_20A_COUNT,
+    SPECIALIZED_20A_SOCKET_COUNT,
+    SPECIALIZED_SOCKET_COUNT,
+    COOKTOP_SOCKET_COUNT,
+    LIGHTING_POINT_COUNT,
+    SWITCH_COUNT,
+    NETWORK_SOCKET_COUNT,
+)
+
+EQUIPMENT_COUNT_PROPERTIES: Dict[EquipmentType, URIRef] = {
+    EquipmentType.LIGHTING_POINT: LIGHTING_POINT_COUNT,
+    EquipmentType.SWITCH: SWITCH_COUNT,
+    EquipmentType.NETWORK_SOCKET: NETWORK_SOCKET_COUNT,
+}
+
+# Literals matched by the socket counting shapes (RDF term equality, as in SPARQL)
+CURRENT_20 = Literal(20)
+CURRENT_32 = Literal(32)
+SOCKET_TYPE_20A = Literal("20A")
+SOCKET_TYPE_32A = Literal("32A")
+SOCKET_TYPE_SPECIALIZED = Literal("specialized")
+
+EQUIPMENT_PROPERTIES: Dict[EquipmentType, URIRef] = {
+    EquipmentType.SOCKET: NFC.hasSocket,
+    EquipmentType.NETWORK_SOCKET: NFC.hasNetworkSocket,
+    EquipmentType.LIGHTING_POINT: NFC.hasLightingPoint,
+    EquipmentType.SWITCH: NFC.hasSwitch,
+    EquipmentType.SPECIALIZED_EQUIPMENT: NFC.hasSpecializedEquipment,
+}
+
+# A double / triple outlet physically embeds 2 or 3 normal 2P+T sockets
+SOCKET_MULTIPLIERS: Dict[EquipmentType, int] = {
+    EquipmentType.DOUBLE_SOCKET: 2,
+    EquipmentType.TRIPLE_SOCKET: 3,
+}
+
+# Equipment nodes of each (room id, equipment type) line, one entry per unit
+# (the kind node repeated in the compact encoding), in request order
+UnitNodes = Dict[Tuple[str, EquipmentType], List[BNode]]
+
+# nfc:circuitType of the circuits of each kind: "lighting" and "socket" as
+# before the circuit plan, the kind for the circuits added with it
+CIRCUIT_KIND_LITERALS: Dict[CircuitKind, Literal] = {
+    **{kind: Literal(kind.value) for kind in CircuitKind},
+    CircuitKind.LIGHTING: Literal("lighting"),
+    CircuitKind.SOCKETS: Literal("socket"),
+    CircuitKind.KITCHEN_SOCKETS: Literal("socket"),
+    CircuitKind.OVEN_SOCKET: Literal("socket"),
+}
+
+# Network socket technical specifications expected by the dimensioning shapes
+NETWORK_SOCKET_SPECS: Tuple[Tuple[URIRef, Literal], ...] = (
+    (PRINCIPAL_REFERENCE, Literal("SCH5520476")),
+    (ENCLOSURE_BOX, Literal("EUR52061")),
+    (CABLE_TYPE, Literal("RJ45")),
+)
+
+# Terms only found in the complete installation graph: the dimensioning
+# additions and the network socket specifications
+DIMENSIONING_TERMS: FrozenSet[URIRef] = frozenset({
+    HAS_CIRCUIT,
+    HAS_PROTECTION,
+    HAS_GROUNDING_SYSTEM,
+    HAS_SURGE_PROTECTOR,
+    CIRCUIT_TYPE,
+    SUPPLIED_BY_CIRCUIT,
+    GROUND_RESISTANCE,
+    LIGHTNING_RISK_ASSESSMENT,
+    PROTECTION_TYPE,
+    RATING,
+    POSTAL_CODE,
+    NFC.Circuit,
+    NFC.CircuitBreaker,
+    NFC.Protection,
+    NFC.GroundingSystem,
+    NFC.SurgeProtectionDevice,
+    *(predicate for predicate, _ in NETWORK_SOCKET_SPECS),
+})
+
+SPECIALISED_SOCKET_TYPES = {
+    EquipmentType.OVEN_SOCKET,
+    EquipmentType.HIGH_CURRENT_SOCKET,
+    EquipmentType.TV_SOCKET,
+}
+
+
+@lru_cache(maxsize=None)
+def vocabulary_term(name: str) -> URIRef:
+    """Interned ``nfc:`` IRI for a class or property local name."""
+    return NFC[name]
+
+
+def data_base_iri() -> str:
+    """Base IRI used to resolve room and installation identifiers.
+
+    Matches what rdflib's JSON-LD parser used for relative ``@id``s, so focus
+    nodes reported to clients keep the same form.
+    """
+    return Path.cwd().as_uri().rstrip("/") + "/"
+
+
+def socket_specifications(eq_type: EquipmentType, specifications: Any) -> Tuple[Any, Any]:
+    """Return the ``(current, socketType)`` of a socket, with defaults for specialised outlets."""
+    # Récupère les specs fournies (peut être None ou non-dict)
+    specs = specifications if isinstance(specifications, dict) else {}
+    current = specs.get("current")
+    socket_type = specs.get("socketType")
+
+    # Cas prise plaque (OvenSocket) → 32 A par défaut
+    if eq_type == EquipmentType.OVEN_SOCKET:
+        current = current or 32
+        socket_type = socket_type or "32A"
+
+    # Cas prise hotte (ExtractorSocket) → prise simple 16 A sur circuit dédié
+    if eq_type == EquipmentType.EXTRACTOR_SOCKET:
+        current = current or 16
+        socket_type = socket_type or "2P+T"
+
+    # Cas prise simple 20A dédiée (Dedicated20ASocket)
+    if eq_type == EquipmentType.DEDICATED_20A_SOCKET:
+        current = current or 20
+        socket_type = socket_type or "20A"  # Marquer comme 20A pour exclure du minimum de prises cuisine
+
+    # Autres prises spécialisées (≠ simple/double) → 20 A par défaut
+    if eq_type in SPECIALISED_SOCKET_TYPES and (current is None and socket_type is None):
+        current = 20
+        socket_type = "20A"
+
+    return current, socket_type
+
+
+def socket_count_properties(current: Optional[Literal], socket_type: Optional[Literal]) -> Iterator[URIRef]:
+    """Yield the room count properties a socket with these attributes contributes to.
+
+    Mirrors the filters of the per-node counting shapes: standard sockets have
+    no socket type or a plain type other than 20A/32A, 20 A and 32 A sockets are
+    matched on the exact ``nfc:current`` literal.
+    """
+    yield SOCKET_COUNT
+    if socket_type is None or (
+        socket_type.datatype is None and socket_type not in (SOCKET_TYPE_20A, SOCKET_TYPE_32A)
+    ):
+        yield STANDARD_SOCKET_COUNT
+    if current == CURRENT_20:
+        yield SOCKET_20A_COUNT
+        if socket_type in (SOCKET_TYPE_20A, SOCKET_TYPE_SPECIALIZED):
+            yield SPECIALIZED_20A_SOCKET_COUNT
+        if socket_type == SOCKET_TYPE_SPECIALIZED:
+            yield SPECIALIZED_SOCKET_COUNT
+    if current == CURRENT_32 and socket_type == SOCKET_TYPE_32A:
+        yield COOKTOP_SOCKET_COUNT
+
+
+def has_multi_socket_outlets(rooms: Iterable[AnyRoom]) -> bool:
+    """True if an outlet of ``rooms`` embeds several sockets (double / triple)."""
+    return any(
+        quantity and eq_type in SOCKET_MULTIPLIERS
+        for room in rooms
+        for eq_type, quantity, _ in room.equipment_items()
+    )
+
+
+def room_equipment_counts(
+    room: AnyRoom,
+    parent_type_of: Callable[[EquipmentType], EquipmentType],
+    multiply_sockets: bool = True,
+) -> Dict[URIRef, int]:
+    """Unit counts of ``room`` for every count property of the compact encoding."""
+    counts = dict.fromkeys(ROOM_COUNT_PROPERTIES, 0)
+    for eq_type, quantity, specifications in room.equipment_items():
+        parent_eq_type = parent_type_of(eq_type)
+        if parent_eq_type == EquipmentType.SOCKET:
+            multiplier = SOCKET_MULTIPLIERS.get(eq_type, 1) if multiply_sockets else 1
+            current, socket_type = socket_specifications(eq_type, specifications)
+            for count_property in socket_count_properties(
+                Literal(current) if current is not None else None,
+                Literal(socket_type) if socket_type is not None else None,
+            ):
+                counts[count_property] += quantity * multiplier
+        elif parent_eq_type in EQUIPMENT_COUNT_PROPERTIES:
+            counts[EQUIPMENT_COUNT_PROPERTIES[parent_eq_type]] += quantity
+    return counts
+
+
+class InstallationGraphBuilder:
+    """Build the RDF data graph of an installation from the room equipment payload."""
+
+    def __init__(
+        self,
+        ruleset: CompiledRuleset,
+        parent_type_of: Callable[[EquipmentType], EquipmentType],
+        infer_types: bool = True,
+        encoding: str = NODES_ENCODING,
+    ):
+        """
+        Args:
+            ruleset: Ruleset providing the RDFS superclass closure
+            parent_type_of: Mapping from equipment subtypes to the ontology parent class
+            infer_types: Emit the inferred superclass ``rdf:type`` triples of every node
+            encoding: ``"nodes"`` (one node per unit) or ``"compact"`` (per-room counts)
+        """
+        self.ruleset = ruleset
+        self.parent_type_of = parent_type_of
+        self.infer_types = infer_types
+        self.encoding = encoding
+        self.base_iri = data_base_iri()
+
+    def _add_type(self, graph: Graph, node, type_name: str) -> None:
+        class_uri = vocabulary_term(type_name)
+        if self.infer_types:
+            for type_uri in self.ruleset.types_for(class_uri):
+                graph.add((node, RDF.type, type_uri))
+        else:
+            graph.add((node, RDF.type, class_uri))
+
+    def room_iri(self, room_id: str) -> URIRef:
+        """IRI of the room node, as reported in ``focus_node``."""
+        return URIRef(norm_url(self.base_iri, room_id))
+
+    def _installation_node(self, rooms: List[AnyRoom]) -> Tuple[URIRef, str]:
+        # Derived from the content so identical payloads give identical graphs
+        installation_id = installation_uuid(rooms)
+        return URIRef(norm_url(self.base_iri, installation_id)), installation_id
+
+    def _new_installation(self, graph: Graph, rooms: List[AnyRoom]) -> Tuple[URIRef, str]:
+        installation, installation_id = self._installation_node(rooms)
+        self._add_type(graph, installation, "ElectricalInstallation")
+        return installation, installation_id
+
+    def _room_counts(self, rooms: List[AnyRoom], multiply_sockets: bool) -> Dict[URIRef, Dict[URIRef, int]]:
+        """Compact encoding counts per room node (rooms sharing an id are merged)."""
+        room_counts: Dict[URIRef, Dict[URIRef, int]] = {}
+        for room in rooms:
+            counts = room_counts.setdefault(self.room_iri(room.room_id), dict.fromkeys(ROOM_COUNT_PROPERTIES, 0))
+            for count_property, count in room_equipment_counts(room, self.parent_type_of, multiply_sockets).items():
+                counts[count_property] += count
+        return room_counts
+
+    def _add_rooms(
+        self,
+        graph: Graph,
+        installation: URIRef,
+        rooms: List[AnyRoom],
+        multiply_sockets: bool,
+        network_specs: bool,
+        extra_units: Optional[List[BNode]] = None,
+        unit_nodes: Optional[UnitNodes] = None,
+    ) -> None:
+        compact = self.encoding == COMPACT_ENCODING
+        # Compact encoding: one node per distinct kind, unit counts added below
+        kind_nodes: Dict[Tuple, BNode] = {}
+        for room in rooms:
+            room_type_str = room.room_type.value if hasattr(room.room_type, "value") else str(room.room_type)
+            room_node = self.room_iri(room.room_id)
+            graph.add((installation, HAS_ROOM, room_node))
+            self._add_type(graph, room_node, room_type_str)
+
+            if room.room_area is not None:
+                graph.add((room_node, ROOM_AREA, Literal(room.room_area)))
+
+            for eq_type, quantity, specifications in room.equipment_items():
+                parent_eq_type = self.parent_type_of(eq_type)
+                prop = EQUIPMENT_PROPERTIES.get(parent_eq_type)
+                if not prop:
+                    continue  # Ignore unsupported equipment types for now
+
+                parent_type_str = parent_eq_type.value if hasattr(parent_eq_type, "value") else str(parent_eq_type)
+                multiplier = SOCKET_MULTIPLIERS.get(eq_type, 1) if multiply_sockets else 1
+
+                units = quantity * multiplier
+
+                socket_literals: List[Tuple[URIRef, Literal]] = []
+                if parent_eq_type == EquipmentType.SOCKET:
+                    current, socket_type = socket_specifications(eq_type, specifications)
+                    current_literal = Literal(current) if current is not None else None
+                    socket_type_literal = Literal(socket_type) if socket_type is not None else None
+                    if current_literal is not None:
+                        socket_literals.append((CURRENT, current_literal))
+                    if socket_type_literal is not None:
+                        socket_literals.append((SOCKET_TYPE, socket_type_literal))
+                elif parent_eq_type == EquipmentType.NETWORK_SOCKET and network_specs:
+                    socket_literals.extend(NETWORK_SOCKET_SPECS)
+
+                if compact:
+                    # Per-unit attribute rules still see one node of each kind
+                    kind = (room_node, prop, parent_type_str, tuple(socket_literals))
+                    if units == 0:
+                        continue
+                    if kind not in kind_nodes:
+                        equipment_node = kind_nodes[kind] = BNode()
+                        graph.add((room_node, prop, equipment_node))
+                        self._add_type(graph, equipment_node, parent_type_str)
+                        for predicate, literal in socket_literals:
+                            graph.add((equipment_node, predicate, literal))
+                    if unit_nodes is not None:
+                        unit_nodes.setdefault((room.room_id, eq_type), []).extend([kind_nodes[kind]] * quantity)
+                    continue
+
+                for unit in range(units):
+                    equipment_node = BNode()
+                    graph.add((room_node, prop, equipment_node))
+                    self._add_type(graph, equipment_node, parent_type_str)
+                    for predicate, literal in socket_literals:
+                        graph.add((equipment_node, predicate, literal))
+                    if extra_units is not None and unit >= quantity:
+                        extra_units.append(equipment_node)
+                    if unit_nodes is not None and unit < quantity:
+                        unit_nodes.setdefault((room.room_id, eq_type), []).append(equipment_node)
+
+        if compact:
+            for room_node, counts in self._room_counts(rooms, multiply_sockets).items():
+                for count_property, count in counts.items():
+                    graph.add((room_node, count_property, Literal(count)))
+
+    def estimate_triples(self, rooms: List[AnyRoom]) -> int:
+        """Triples of the :meth:`room_equipment_graph` of ``rooms``, counted
+        from the equipment lines without building it.
+
+        Exact when room ids are unique (repeated rooms are counted twice).
+        """
+        compact = self.encoding == COMPACT_ENCODING
+        type_counts: Dict[str, int] = {}
+
+        def types(type_name: str) -> int:
+            count = type_counts.get(type_name)
+            if count is None:
+                count = type_counts[type_name] = (
+                    len(self.ruleset.types_for(vocabulary_term(type_name))) if self.infer_types else 1
+                )
+            return count
+
+        triples = types("ElectricalInstallation")
+        kinds = set()
+        room_ids = set()
+        for room in rooms:
+            room_type_str = room.room_type.value if hasattr(room.room_type, "value") else str(room.room_type)
+            triples += 1 + types(room_type_str) + (room.room_area is not None)
+            room_ids.add(room.room_id)
+            for eq_type, quantity, specifications in room.equipment_items():
+                parent_eq_type = self.parent_type_of(eq_type)
+                if parent_eq_type not in EQUIPMENT_PROPERTIES:
+                    continue
+                units = quantity * SOCKET_MULTIPLIERS.get(eq_type, 1)
+                literals: Tuple[Any, ...] = ()
+                if parent_eq_type == EquipmentType.SOCKET:
+                    literals = tuple(value for value in socket_specifications(eq_type, specifications) if value is not None)
+                unit_triples = 1 + types(parent_eq_type.value) + len(literals)
+                if not compact:
+                    triples += units * unit_triples
+                elif units:
+                    kind = (room.room_id, parent_eq_type, socket_specifications(eq_type, specifications))
+                    if kind not in kinds:
+                        kinds.add(kind)
+                        triples += unit_triples
+        if compact:
+            triples += len(room_ids) * len(ROOM_COUNT_PROPERTIES)
+        return triples
+
+    def room_equipment_graph(
+        self,
+        rooms: List[AnyRoom],
+        extra_units: Optional[List[BNode]] = None,
+        unit_nodes: Optional[UnitNodes] = None,
+    ) -> Graph:
+        """Graph validated by the room-equipment step.
+
+        Each plug of a double / triple outlet is materialised as its own
+        ``Socket`` node (or counted as one socket in the compact encoding) so
+        that cardinality constraints are evaluated correctly.  The nodes of the
+        second and third plugs are appended to ``extra_units`` if given, the
+        other nodes to ``unit_nodes``.
+        """
+        graph = Graph()
+        installation, _ = self._new_installation(graph, rooms)
+        self._add_rooms(
+            graph, installation, rooms, multiply_sockets=True, network_specs=False,
+            extra_units=extra_units, unit_nodes=unit_nodes,
+        )
+        return graph
+
+    def patch_room_equipment_graph(
+        self,
+        graph: Graph,
+        previous_rooms: List[AnyRoom],
+        rooms: List[AnyRoom],
+        changed_room_ids: Iterable[str],
+    ) -> Graph:
+        """Turn the :meth:`room_equipment_graph` of ``previous_rooms`` into the
+        one of ``rooms``, in place.
+
+        Rooms must have unique ids; those not in ``changed_room_ids`` are the
+        same in both lists.  The subgraphs of the changed rooms are dropped, the
+        installation node is renamed after the new content and the changed
+        rooms still present are added again.
+        """
+        changed_room_ids = set(changed_room_ids)
+        for room_id in changed_room_ids:
+            room_node = self.room_iri(room_id)
+            for equipment_node in set(graph.objects(room_node, None)):
+                if isinstance(equipment_node, BNode):
+                    graph.remove((equipment_node, None, None))
+            graph.remove((room_node, None, None))
+            graph.remove((None, HAS_ROOM, room_node))
+
+        previous, _ = self._installation_node(previous_rooms)
+        installation, _ = self._installation_node(rooms)
+        if installation != previous:
+            for predicate, obj in list(graph.predicate_objects(previous)):
+                graph.remove((previous, predicate, obj))
+                graph.add((installation, predicate, obj))
+
+        self._add_rooms(
+            graph,
+            installation,
+            [room for room in rooms if room.room_id in changed_room_ids],
+            multiply_sockets=True,
+            network_specs=False,
+        )
+        return graph
+
+    def complete_room_equipment_graph(
+        self,
+        graph: Graph,
+        rooms: List[AnyRoom],
+        dimensioning: DimensioningResult,
+        postal_code: Optional[str] = None,
+        extra_units: Iterable[BNode] = (),
+        unit_nodes: Optional[UnitNodes] = None,
+    ) -> Graph:
+        """Turn the :meth:`room_equipment_graph` of ``rooms`` into their
+        :meth:`complete_installation_graph`, in place.
+
+        ``extra_units`` and ``unit_nodes`` are the nodes collected while
+        building the room graph: the extra plugs are removed so that an outlet
+        is one socket again, the units are linked to their circuits.  Network
+        sockets get their specifications and the dimensioning triples are
+        added.  The result has the same triples as a complete graph built from
+        scratch, up to blank node labels.
+        """
+        installation, installation_id = self._installation_node(rooms)
+        for node in extra_units:
+            graph.remove((None, None, node))
+            graph.remove((node, None, None))
+        if self.encoding == COMPACT_ENCODING:
+            for room_node, counts in self._room_counts(rooms, multiply_sockets=False).items():
+                for count_property, count in counts.items():
+                    graph.set((room_node, count_property, Literal(count)))
+
+        network_property = EQUIPMENT_PROPERTIES[EquipmentType.NETWORK_SOCKET]
+        for network_socket in set(graph.objects(None, network_property)):
+            for predicate, literal in NETWORK_SOCKET_SPECS:
+                graph.add((network_socket, predicate, literal))
+
+        self._add_dimensioning(graph, installation, installation_id, dimensioning, postal_code, unit_nodes or {})
+        return graph
+
+    def complete_installation_graph(
+        self,
+        rooms: List[AnyRoom],
+        dimensioning: DimensioningResult,
+        postal_code: Optional[str] = None,
+    ) -> Graph:
+        """Graph of the full installation including the calculated dimensioning.
+
+        Adds the calculated circuits and protection devices, the grounding
+        system, the lightning risk assessment and equipment technical
+        specifications to the room equipment.
+        """
+        graph = Graph()
+        installation, installation_id = self._new_installation(graph, rooms)
+        unit_nodes: UnitNodes = {}
+        self._add_rooms(
+            graph, installation, rooms, multiply_sockets=False, network_specs=True, unit_nodes=unit_nodes
+        )
+        self._add_dimensioning(graph, installation, installation_id, dimensioning, postal_code, unit_nodes)
+        return graph
+
+    def _add_dimensioning(
+        self,
+        graph: Graph,
+        installation: URIRef,
+        installation_id: str,
+        dimensioning: DimensioningResult,
+        postal_code: Optional[str],
+        unit_nodes: UnitNodes,
+    ) -> None:
+        grounding = URIRef(norm_url(self.base_iri, f"{installation_id}_grounding"))
+        graph.add((installation, HAS_GROUNDING_SYSTEM, grounding))
+        self._add_type(graph, grounding, "GroundingSystem")
+        graph.add((grounding, GROUND_RESISTANCE, Literal(50)))  # Typical value ≤ 100Ω
+        graph.add((installation, LIGHTNING_RISK_ASSESSMENT, Literal(True)))
+
+        # One circuit per breaker, in the order of the circuit plan, linked
+        # to the equipment units it supplies (the next units of each line, all
+        # of them for the aggregated heating circuits)
+        supplied: Dict[Tuple[str, EquipmentType], int] = {}
+        circuits_of: Dict[BNode, List[URIRef]] = {}
+        supplied_units: Set[Tuple[Tuple[str, EquipmentType], int]] = set()
+        plan = dimensioning.circuit_plan
+        if plan is None:
+            # Dimensioning without a plan (batch): the kinds of its breakers
+            plan = [
+                PlannedCircuit(breaker.circuit_kind, breaker.rating, breaker.type)
+                for breaker in dimensioning.circuit_breakers
+                if breaker.circuit_kind is not None
+                for _ in range(breaker.quantity)
+            ]
+        for number, planned in enumerate(plan, 1):
+            circuit_id = f"{installation_id}_circuit_{number}"
+            circuit = URIRef(norm_url(self.base_iri, circuit_id))
+            protection = URIRef(norm_url(self.base_iri, f"{circuit_id}_protection"))
+            graph.add((installation, HAS_CIRCUIT, circuit))
+            self._add_type(graph, circuit, "Circuit")
+            graph.add((circuit, CIRCUIT_TYPE, CIRCUIT_KIND_LITERALS[planned.circuit_kind]))
+            graph.add((circuit, HAS_PROTECTION, protection))
+            self._add_type(graph, protection, "CircuitBreaker")
+            graph.add((protection, CURRENT, Literal(planned.rating)))
+            graph.add((protection, TYPE, Literal(planned.type)))
+            for load in planned.loads:
+                line = (load.room_id, load.equipment_type)
+                start = 0 if planned.circuit_kind == CircuitKind.HEATING else supplied.get(line, 0)
+                nodes = unit_nodes.get(line, [])
+                for index in range(start, min(start + load.quantity, len(nodes))):
+                    circuits_of.setdefault(nodes[index], []).append(circuit)
+                    supplied_units.add((line, index))
+                supplied[line] = start + load.quantity
+
+        # A compact kind node stands for all its units: linked only when they
+        # are all supplied, so that the equipment left out of the plan is
+        # reported in both encodings
+        units = Counter(node for nodes in unit_nodes.values() for node in nodes)
+        units.subtract(unit_nodes[line][index] for line, index in supplied_units)
+        for node, circuits in circuits_of.items():
+            if units[node] == 0:
+                for circuit in dict.fromkeys(circuits):
+                    graph.add((node, SUPPLIED_BY_CIRCUIT, circuit))
+
+        for spd in dimensioning.surge_protectors:
+            spd_node = URIRef(norm_url(self.base_iri, f"{installation_id}_spd_{spd.type.replace(' ', '_')}"))
+            graph.add((installation, HAS_SURGE_PROTECTOR, spd_node))
+            self._add_type(graph, spd_node, "SurgeProtectionDevice")
+            graph.add((spd_node, PROTECTION_TYPE, Literal(spd.type)))
+            graph.add((spd_node, RATING, Literal(spd.rating)))
+
+        # Postal code is used for surge protector obligation rules
+        if postal_code:
+            graph.add((installation, POSTAL_CODE, Literal(postal_code)))
+
+
+def graph_to_jsonld(graph: Graph) -> Dict[str, Any]:
+    """Debug export of a data graph as compacted JSON-LD."""
+    return json.loads(graph.serialize(format="json-ld", context={"@vocab": str(NFC)}, auto_compact=True))
@@ -0,0 +1,347 @@
+"""Single-pass equipment inventory of an installation.
+
+The dimensioning (circuit breakers, cables), the missing equipment of the rooms
+and the graph builder all read the rooms and equipment of a request.  They used
+to walk them once per quantity they needed, each time coercing the equipment
+type and mapping it to its parent category (which rebuilt five sets per call).
+:class:`EquipmentInventory` walks them once and keeps every aggregate these
+stages read; the parent categories come from the module-level
+:data:`PARENT_EQUIPMENT_TYPES` table.
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .compact_model import AnyRoom
+from .models import CircuitBreakerSpec, CircuitKind, CircuitLoad, EquipmentType, PlannedCircuit, RoomType
+
+_SUBTYPES: Dict[EquipmentType, Tuple[EquipmentType, ...]] = {
+    EquipmentType.SOCKET: (
+        EquipmentType.SIMPLE_SOCKET, EquipmentType.DOUBLE_SOCKET, EquipmentType.TRIPLE_SOCKET,
+        EquipmentType.WATERPROOF_SOCKET, EquipmentType.CHILDPROOF_SOCKET, EquipmentType.USB_SOCKET,
+        EquipmentType.HIGH_CURRENT_SOCKET, EquipmentType.TV_SOCKET, EquipmentType.OVEN_SOCKET,
+        EquipmentType.EXTRACTOR_SOCKET, EquipmentType.DEDICATED_20A_SOCKET,
+    ),
+    EquipmentType.SWITCH: (
+        EquipmentType.SIMPLE_SWITCH, EquipmentType.DOUBLE_SWITCH, EquipmentType.TRIPLE_SWITCH,
+        EquipmentType.DIM_SWITCH, EquipmentType.MOTION_SENSOR_SWITCH, EquipmentType.REMOTE_SWITCH,
+        EquipmentType.TIMER_SWITCH,
+    ),
+    EquipmentType.LIGHTING_POINT: (
+        EquipmentType.CEILING_LIGHTING, EquipmentType.WALL_LIGHTING, EquipmentType.SPOT_LIGHTING,
+        EquipmentType.EMERGENCY_LIGHTING, EquipmentType.EXTERIOR_LIGHTING,
+    ),
+    EquipmentType.NETWORK_SOCKET: (
+        EquipmentType.RJ45_SOCKET, EquipmentType.FIBER_SOCKET, EquipmentType.COAX_SOCKET,
+    ),
+    EquipmentType.SPECIALIZED_EQUIPMENT: (
+        # Parent categories
+        EquipmentType.ELECTRIC_HEATING, EquipmentType.WATER_HEATER, EquipmentType.VENTILATION,
+        EquipmentType.ALARM_SYSTEM, EquipmentType.INTERCOM,
+        # Additional specialized equipment
+        EquipmentType.ELECTRIC_OVEN, EquipmentType.DISHWASHER, EquipmentType.WASHING_MACHINE,
+        EquipmentType.DRYER, EquipmentType.COOKING_HOB, EquipmentType.AIR_CONDITIONING,
+        EquipmentType.CONVECTOR, EquipmentType.INERTIA_RADIATOR, EquipmentType.FLOOR_HEATING,
+        EquipmentType.DUCTED_HEAT_PUMP, EquipmentType.ELECTRIC_WATER_HEATER,
+        EquipmentType.INSTANTANEOUS_WATER_HEATER, EquipmentType.STORAGE_WATER_HEATER,
+        EquipmentType.VMC, EquipmentType.SIMPLE_FLOW_VMC, EquipmentType.DOUBLE_FLOW_VMC,
+    ),
+}
+
+# Equipment subtype -> parent class used for validation (parents map to themselves)
+PARENT_EQUIPMENT_TYPES: Dict[EquipmentType, EquipmentType] = {
+    equipment_type: equipment_type for equipment_type in EquipmentType
+}
+PARENT_EQUIPMENT_TYPES.update(
+    (subtype, parent) for parent, subtypes in _SUBTYPES.items() for subtype in subtypes
+)
+
+
+def parent_equipment_type(equipment_type: EquipmentType) -> EquipmentType:
+    """Map equipment subclasses to their parent classes for validation purposes."""
+    # Returned as-is if it's already a parent class or unknown
+    return PARENT_EQUIPMENT_TYPES.get(equipment_type, equipment_type)
+
+
+# Specialised sockets, never counted as standard sockets
+SPECIALISED_SOCKET_TYPES: FrozenSet[EquipmentType] = frozenset({
+    EquipmentType.DEDICATED_20A_SOCKET,
+    EquipmentType.OVEN_SOCKET,
+    EquipmentType.EXTRACTOR_SOCKET,
+    EquipmentType.HIGH_CURRENT_SOCKET,
+})
+
+# Standard 2P+T outlets checked by the room socket rules, with the number of
+# sockets of one outlet
+NORMAL_SOCKET_MULTIPLIERS: Dict[EquipmentType, int] = {
+    EquipmentType.SIMPLE_SOCKET: 1,
+    EquipmentType.DOUBLE_SOCKET: 2,
+    EquipmentType.TRIPLE_SOCKET: 3,
+    EquipmentType.WATERPROOF_SOCKET: 1,
+    EquipmentType.CHILDPROOF_SOCKET: 1,
+    EquipmentType.USB_SOCKET: 1,
+}
+
+KITCHEN_ROOM_TYPES: FrozenSet[RoomType] = frozenset({
+    RoomType.KITCHEN, RoomType.LIVING_ROOM_WITH_INTEGRATED_KITCHEN,
+})
+# Rooms whose sockets go on the regular 16 A socket circuits
+REGULAR_SOCKET_ROOM_TYPES: FrozenSet[RoomType] = frozenset({
+    RoomType.LIVING_ROOM,  # salon
+    RoomType.BEDROOM,  # chambre
+    RoomType.OFFICE,  # bureau
+    RoomType.CIRCULATION_AREA,  # dégagement et locaux ≥ 4 m²
+    RoomType.WET_ROOM,  # salle de bain
+    RoomType.BATHROOM_WITH_WC,  # salle de bain avec WC
+})
+# Rooms left out of the living area (garage, exterior...)
+NON_LIVING_ROOM_TYPES: FrozenSet[RoomType] = frozenset({RoomType.OTHER, RoomType.EXTERIOR_SPACE})
+
+SPECIALISED_20A_TYPES: FrozenSet[EquipmentType] = frozenset({
+    EquipmentType.DISHWASHER, EquipmentType.WASHING_MACHINE, EquipmentType.DRYER,
+    EquipmentType.ELECTRIC_OVEN, EquipmentType.DEDICATED_20A_SOCKET,
+})
+VMC_TYPES: FrozenSet[EquipmentType] = frozenset({
+    EquipmentType.VMC, EquipmentType.SIMPLE_FLOW_VMC, EquipmentType.DOUBLE_FLOW_VMC,
+})
+WATER_HEATER_TYPES: FrozenSet[EquipmentType] = frozenset({
+    EquipmentType.WATER_HEATER, EquipmentType.ELECTRIC_WATER_HEATER,
+    EquipmentType.INSTANTANEOUS_WATER_HEATER, EquipmentType.STORAGE_WATER_HEATER,
+})
+# Heating equipment needing one circuit per unit (the others are aggregated)
+INDIVIDUAL_CIRCUIT_HEATING_TYPES: FrozenSet[EquipmentType] = frozenset({
+    EquipmentType.CONVECTOR, EquipmentType.INERTIA_RADIATOR,
+})
+# Specialised equipment with circuits of their own kind (besides heating)
+OWN_CIRCUIT_TYPES: FrozenSet[EquipmentType] = (
+    SPECIALISED_20A_TYPES | VMC_TYPES | WATER_HEATER_TYPES | SPECIALISED_SOCKET_TYPES
+    | {EquipmentType.COOKING_HOB}
+)
+
+# Circuit kind of the equipment with circuits of their own kind
+OWN_CIRCUIT_KINDS: Dict[EquipmentType, CircuitKind] = {
+    **{eq_type: CircuitKind.SPECIALISED_20A for eq_type in SPECIALISED_20A_TYPES},
+    **{eq_type: CircuitKind.VMC for eq_type in VMC_TYPES},
+    **{eq_type: CircuitKind.WATER_HEATER for eq_type in WATER_HEATER_TYPES},
+    EquipmentType.OVEN_SOCKET: CircuitKind.OVEN_SOCKET,
+    EquipmentType.COOKING_HOB: CircuitKind.COOKING_HOB,
+}
+
+# Units supplied by one circuit of a kind; the VMC and aggregated heating
+# circuits supply every unit of their type
+CIRCUIT_CAPACITIES: Dict[CircuitKind, Optional[int]] = {
+    CircuitKind.LIGHTING: 8,
+    CircuitKind.SOCKETS: 8,
+    CircuitKind.KITCHEN_SOCKETS: 6,
+    CircuitKind.VMC: None,
+    CircuitKind.HEATING: None,
+}
+
+
+def specified_power(specifications: Any) -> Optional[float]:
+    """Power in watts given by the specifications of an equipment line, if any."""
+    if not isinstance(specifications, dict):
+        return None
+    power = specifications.get("power_w") or specifications.get("powerW")
+    if power is None:
+        return None
+    try:
+        return float(power)
+    except (TypeError, ValueError):
+        return None
+
+
+def _circuit_kind(
+    eq_type: EquipmentType,
+    in_kitchen: bool,
+    regular_room: bool,
+    heating_types: FrozenSet[EquipmentType],
+) -> Optional[CircuitKind]:
+    """Kind of the circuits supplying ``eq_type`` (None if not dimensioned)."""
+    kind = OWN_CIRCUIT_KINDS.get(eq_type)
+    if kind is not None:
+        return kind
+    parent_type = parent_equipment_type(eq_type)
+    if parent_type == EquipmentType.LIGHTING_POINT:
+        return CircuitKind.LIGHTING
+    if parent_type == EquipmentType.SOCKET:
+        if eq_type in SPECIALISED_SOCKET_TYPES:
+            return None
+        return CircuitKind.KITCHEN_SOCKETS if in_kitchen else CircuitKind.SOCKETS if regular_room else None
+    if eq_type in heating_types:
+        return CircuitKind.INDIVIDUAL_HEATING if eq_type in INDIVIDUAL_CIRCUIT_HEATING_TYPES else CircuitKind.HEATING
+    if parent_type == EquipmentType.SPECIALIZED_EQUIPMENT and eq_type not in OWN_CIRCUIT_TYPES:
+        return CircuitKind.DEDICATED
+    return None
+
+
+class RoomInventory:
+    """Equipment counts of one room."""
+
+    def __init__(self, room: AnyRoom):
+        self.room = room
+        # Units per equipment category of the rule catalog ("socket", "32A socket", ...)
+        self.category_counts: Dict[str, int] = {}
+
+    def _add(self, eq_type: EquipmentType, parent_type: EquipmentType, quantity: int, specifications: Any) -> None:
+        counts = self.category_counts
+        if parent_type == EquipmentType.SOCKET:
+            # Double / triple outlets count for 2 / 3 standard sockets;
+            # specialised sockets only count as 32A sockets (oven)
+            multiplier = NORMAL_SOCKET_MULTIPLIERS.get(eq_type)
+            if multiplier is not None:
+                counts["socket"] = counts.get("socket", 0) + quantity * multiplier
+            if eq_type == EquipmentType.OVEN_SOCKET:
+                specs = specifications if isinstance(specifications, dict) else {}
+                if specs.get("current", 32) == 32:  # 32 A by default for an oven socket
+                    counts["32A socket"] = counts.get("32A socket", 0) + quantity
+        elif parent_type == EquipmentType.NETWORK_SOCKET:
+            counts["network socket"] = counts.get("network socket", 0) + quantity
+        elif parent_type == EquipmentType.LIGHTING_POINT:
+            counts["lighting point"] = counts.get("lighting point", 0) + quantity
+        elif parent_type == EquipmentType.SWITCH:
+            counts["switch"] = counts.get("switch", 0) + quantity
+
+    @classmethod
+    def of(cls, room: AnyRoom) -> "RoomInventory":
+        """Inventory of a single room."""
+        inventory = cls(room)
+        for eq_type, quantity, specifications in room.equipment_items():
+            inventory._add(eq_type, parent_equipment_type(eq_type), quantity, specifications)
+        return inventory
+
+
+class EquipmentInventory:
+    """Equipment counts of an installation, per room and in total.
+
+    ``heating_types`` are the heating equipment types dimensioned from the
+    area they heat (the keys of the validator's heating rating table).
+    """
+
+    def __init__(self, rooms: Iterable[AnyRoom], heating_types: Iterable[EquipmentType] = ()):
+        heating_types = self.heating_types = frozenset(heating_types)
+        # One entry per room, in request order
+        self.rooms: List[RoomInventory] = []
+        # Units per parent class, plus the TV and coaxial sockets (cables)
+        self.totals: Dict[EquipmentType, int] = {}
+        self.regular_socket_count = 0
+        self.kitchen_socket_count = 0
+        self.specialised_20a_count = 0
+        self.cooking_hob_count = 0
+        self.oven_socket_count = 0
+        self.water_heater_count = 0
+        self.vmc_types: Set[EquipmentType] = set()
+        # Heated area per aggregated heating type
+        self.heating_areas: Dict[EquipmentType, float] = {}
+        # One (type, room area, room id) entry per unit of individually protected heating
+        self.individual_heating: List[Tuple[EquipmentType, float, str]] = []
+        # (type, specified power or None, quantity) of the other specialised
+        # equipment, each on a dedicated circuit
+        self.dedicated_equipment: List[Tuple[EquipmentType, Optional[float], int]] = []
+        self.total_area = 0.0
+        self.total_living_area = 0.0
+        self.kitchen_area = 0.0
+        self.has_kitchen = False
+
+        totals = self.totals
+        for room in rooms:
+            room_inventory = RoomInventory(room)
+            self.rooms.append(room_inventory)
+            area = room.room_area or 0.0
+            self.total_area += area
+            if room.room_type not in NON_LIVING_ROOM_TYPES:
+                self.total_living_area += area
+            if room.room_type == RoomType.KITCHEN:
+                self.has_kitchen = True
+                self.kitchen_area += area
+            in_kitchen = room.room_type in KITCHEN_ROOM_TYPES
+            regular_room = room.room_type in REGULAR_SOCKET_ROOM_TYPES
+
+            for eq_type, quantity, specifications in room.equipment_items():
+                parent_type = parent_equipment_type(eq_type)
+                room_inventory._add(eq_type, parent_type, quantity, specifications)
+                totals[parent_type] = totals.get(parent_type, 0) + quantity
+                if eq_type in (EquipmentType.TV_SOCKET, EquipmentType.COAX_SOCKET):
+                    totals[eq_type] = totals.get(eq_type, 0) + quantity
+
+                if parent_type == EquipmentType.SOCKET and eq_type not in SPECIALISED_SOCKET_TYPES:
+                    if in_kitchen:
+                        self.kitchen_socket_count += quantity
+                    elif regular_room:
+                        self.regular_socket_count += quantity
+                if eq_type in SPECIALISED_20A_TYPES:
+                    self.specialised_20a_count += quantity
+                if eq_type == EquipmentType.COOKING_HOB:
+                    self.cooking_hob_count += quantity
+                elif eq_type == EquipmentType.OVEN_SOCKET:
+                    self.oven_socket_count += quantity
+                elif eq_type in VMC_TYPES:
+                    self.vmc_types.add(eq_type)
+                elif eq_type in WATER_HEATER_TYPES:
+                    self.water_heater_count += quantity
+
+                if eq_type in heating_types:
+                    if quantity > 0:
+                        if eq_type in INDIVIDUAL_CIRCUIT_HEATING_TYPES:
+                            self.individual_heating.extend((eq_type, area, room.room_id) for _ in range(quantity))
+                        else:
+                            self.heating_areas[eq_type] = self.heating_areas.get(eq_type, 0.0) + area
+                elif parent_type == EquipmentType.SPECIALIZED_EQUIPMENT and eq_type not in OWN_CIRCUIT_TYPES:
+                    self.dedicated_equipment.append((eq_type, specified_power(specifications), quantity))
+
+    def circuit_loads(self) -> Dict[CircuitKind, List[Tuple[str, EquipmentType, int]]]:
+        """``(room id, type, quantity)`` of the equipment lines supplied by
+        each kind of circuit, in request order."""
+        loads: Dict[CircuitKind, List[Tuple[str, EquipmentType, int]]] = {}
+        for room_inventory in self.rooms:
+            room = room_inventory.room
+            in_kitchen = room.room_type in KITCHEN_ROOM_TYPES
+            regular_room = room.room_type in REGULAR_SOCKET_ROOM_TYPES
+            for eq_type, quantity, _ in room.equipment_items():
+                if quantity > 0:
+                    kind = _circuit_kind(eq_type, in_kitchen, regular_room, self.heating_types)
+                    if kind is not None:
+                        loads.setdefault(kind, []).append((room.room_id, eq_type, quantity))
+        return loads
+
+    def circuit_plan(self, breakers: Iterable[CircuitBreakerSpec]) -> List[PlannedCircuit]:
+        """One circuit per unit of ``breakers`` (dimensioned from this
+        inventory), with the equipment it supplies.
+
+        The equipment of a kind fills the circuits of that kind in request
+        order, up to :data:`CIRCUIT_CAPACITIES` units per circuit (one unit
+        by default); circuits beyond the equipment (the minimum of 3
+        specialised circuits) supply nothing, and the equipment of a kind
+        without circuits (cooking hobs next to 32A oven sockets) is left out.
+        """
+        # Per kind: the lines left to supply, next one last (its quantity is
+        # what is left of it)
+        pending = {kind: [list(load) for load in reversed(loads)] for kind, loads in self.circuit_loads().items()}
+        plan: List[PlannedCircuit] = []
+        for spec in breakers:
+            kind = spec.circuit_kind
+            if kind is None:
+                continue
+            lines = pending.get(kind, [])
+            capacity = CIRCUIT_CAPACITIES.get(kind, 1)
+            for _ in range(spec.quantity):
+                if kind == CircuitKind.HEATING:
+                    # Aggregated heating: every unit of the type of the circuit
+                    loads = [
+                        CircuitLoad(room_id, eq_type, quantity)
+                        for room_id, eq_type, quantity in reversed(lines)
+                        if eq_type.value == spec.circuit_detail
+                    ]
+                else:
+                    loads = []
+                    left = capacity
+                    while lines and (left is None or left > 0):
+                        room_id, eq_type, quantity = line = lines[-1]
+                        taken = quantity if left is None else min(left, quantity)
+                        loads.append(CircuitLoad(room_id, eq_type, taken))
+                        line[2] -= taken
+                        if left is not None:
+                            left -= taken
+                        if line[2] == 0:
+                            lines.pop()
+                plan.append(PlannedCircuit(kind, spec.rating, spec.type, tuple(loads)))
+        return plan
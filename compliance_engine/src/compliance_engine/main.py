@@ -1,12 +1,14 @@
 """FastAPI application for NF C 15-100 electrical installation compliance validation."""
 
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import FastAPI, HTTPException, File, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, ValidationError
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Union
 import json
 import logging
+import secrets
+import time
 from datetime import datetime
 from fastapi import BackgroundTasks
 
@@ -14,13 +16,28 @@ from .models import (
     ValidationRequest, 
     ValidationResponse, 
     ValidationResult,
+    ValidationViolation,
+    SeverityLevel,
     RoomEquipmentValidationRequest,
     RoomEquipmentValidationResponse,
     GlobalValidationWithDimensioningResponse,
+    DimensioningResponse,
+    DimensioningResult,
+    ComplianceCheckResponse,
+    SessionPatchRequest,
+    SessionPatchResponse,
     GlobalComplianceResult,
     ComplianceStatus
 )
-from .validators import NFC15100Validator
+from .validators import CIRCUIT_BREAKER_OUTPUTS, NFC15100Validator
+from .batch_dimensioning import dimension_batch
+from .ruleset import EQUIPMENT_ENCODINGS, RULE_GROUPS, RulesetLoadError, reload_ruleset
+from .executors import ExecutorSaturatedError, StageTimeoutError, get_executor, map_unordered
+from .admission import COST_HEADER, AdmissionError, admit, admit_batch, admit_jsonld
+from .metrics import LatencyMetrics
+from .result_cache import ResultCache, request_fingerprint
+from .compact_model import AnyRoom, compact_rooms
+from .sessions import InstallationSession, SessionError, SessionStore, apply_deltas
 from .config import get_settings
 
 # Configure logging
@@ -59,6 +76,135 @@ app.add_middleware(
 
 # Initialize validators
 validator = NFC15100Validator()
+executor = get_executor()
+result_cache = ResultCache.from_settings(settings)
+sessions = SessionStore.from_settings(settings)
+latency = LatencyMetrics()
+
+
+@app.on_event("shutdown")
+async def shutdown_executor() -> None:
+    """Stop the stage executor workers."""
+    executor.shutdown()
+
+
+def _saturated_error(e: ExecutorSaturatedError) -> HTTPException:
+    logger.warning(f"⏳ Rejecting request, executor saturated: {e}")
+    return HTTPException(status_code=503, detail="Serveur surchargé, veuillez réessayer plus tard")
+
+
+def _timeout_error(e: StageTimeoutError) -> HTTPException:
+    logger.warning(f"⌛ Validation abandoned: {e}")
+    return HTTPException(status_code=504, detail="Délai de validation dépassé, veuillez réessayer plus tard")
+
+
+def _equipment_encoding(request: RoomEquipmentValidationRequest) -> Optional[str]:
+    """Equipment encoding requested through ``validation_options`` (server default if absent)."""
+    encoding = (request.validation_options or {}).get("equipment_encoding")
+    if encoding is not None and encoding not in EQUIPMENT_ENCODINGS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Encodage des équipements inconnu : {encoding} (valeurs possibles : {', '.join(EQUIPMENT_ENCODINGS)})",
+        )
+    return encoding
+
+
+def _admit(rooms: List[AnyRoom], encoding: Optional[str], passes: int, response: Response) -> Optional[str]:
+    """Admission control of a request validating ``passes`` times the graph of
+    ``rooms`` (see ``admission``): 413 beyond the limits, otherwise the encoding
+    to validate with and the ``X-Validation-Cost`` header of ``response``."""
+    try:
+        estimate = admit(validator, rooms, encoding, passes, settings)
+    except AdmissionError as e:
+        raise _admission_error(e)
+    response.headers[COST_HEADER] = estimate.header()
+    return estimate.encoding if encoding is None else encoding
+
+
+def _admission_error(e: AdmissionError, index: Optional[int] = None) -> HTTPException:
+    """413 answer of a request (or of the batch item ``index``) over the admission limits."""
+    if index is None:
+        logger.warning(f"🚫 Rejecting request over the admission limits: {e}")
+        detail = e.detail()
+    else:
+        logger.warning(f"🚫 Rejecting batch item {index} over the admission limits: {e}")
+        detail = {**e.detail(), "index": index}
+    headers = {COST_HEADER: e.estimate.header()} if e.estimate is not None else None
+    return HTTPException(status_code=413, detail=detail, headers=headers)
+
+
+def _admit_batch(size: int) -> None:
+    """413 when a batch request has more than ``settings.max_batch_size`` items."""
+    try:
+        admit_batch(size, settings)
+    except AdmissionError as e:
+        raise _admission_error(e)
+
+
+def _rule_groups(validation_options: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """Rule groups requested through ``validation_options`` (all rules if absent)."""
+    rule_groups = (validation_options or {}).get("rule_groups")
+    if rule_groups is None:
+        return None
+    if isinstance(rule_groups, str):
+        rule_groups = [rule_groups]
+    if not isinstance(rule_groups, list) or not rule_groups or any(group not in RULE_GROUPS for group in rule_groups):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Groupes de règles invalides : {rule_groups} (valeurs possibles : {', '.join(RULE_GROUPS)})",
+        )
+    return rule_groups
+
+
+def _circuit_breaker_output(validation_options: Optional[Dict[str, Any]]) -> str:
+    """Circuit breaker output format requested through ``validation_options`` (server default if absent)."""
+    output = (validation_options or {}).get("circuit_breaker_output", settings.circuit_breaker_output)
+    if output not in CIRCUIT_BREAKER_OUTPUTS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Format des disjoncteurs inconnu : {output} (valeurs possibles : {', '.join(CIRCUIT_BREAKER_OUTPUTS)})",
+        )
+    return output
+
+
+def _shaped_dimensioning(dimensioning: DimensioningResult, output: str) -> DimensioningResult:
+    """``dimensioning`` in the requested circuit breaker output format."""
+    return validator.grouped_dimensioning(dimensioning) if output == "grouped" else dimensioning
+
+
+def _cache_key(
+    endpoint: str, request: RoomEquipmentValidationRequest, encoding: Optional[str], ordered: bool = False
+) -> str:
+    return request_fingerprint(
+        endpoint,
+        request.rooms,
+        validator.ruleset.version,
+        encoding=encoding or settings.equipment_encoding,
+        postal_code=request.postal_code,
+        number_of_people=request.number_of_people,
+        validation_options=request.validation_options,
+        ordered=ordered,
+    )
+
+
+def _is_cacheable(response: RoomEquipmentValidationResponse) -> bool:
+    """System errors are reported as violations: never keep them."""
+    violations = list(response.global_compliance.violations)
+    for room_result in response.room_results:
+        violations.extend(room_result.violations)
+    return not any(v.rule_id == "SYSTEM-ERROR" for v in violations)
+
+
+def _cached_response(response, request: RoomEquipmentValidationRequest):
+    """Stored ``response`` rewritten for ``request`` (identifier, timestamp, room order)."""
+    results_by_room: Dict[str, List] = {}
+    for room_result in response.room_results:
+        results_by_room.setdefault(room_result.room_id, []).append(room_result)
+    return response.model_copy(update={
+        "installation_id": request.installation_id,
+        "timestamp": datetime.utcnow(),
+        "room_results": [results_by_room[room.room_id].pop(0) for room in request.rooms],
+    })
 
 
 @app.get("/")
@@ -87,21 +233,35 @@ async def health_check() -> Dict[str, str]:
 
 
 @app.post("/validate", response_model=ValidationResponse)
-async def validate_installation(request: ValidationRequest) -> ValidationResponse:
+async def validate_installation(request: ValidationRequest, response: Response) -> ValidationResponse:
     """
     Validate an electrical installation against NF C 15-100 standards.
     
+    Documents over ``settings.max_jsonld_triples``, when set, are answered 413
+    (see ``admission``).
+    
     Args:
         request: ValidationRequest containing JSON-LD data
         
     Returns:
         ValidationResponse with validation results
     """
+    try:
+        estimate = admit_jsonld(request.jsonld_data, settings)
+    except AdmissionError as e:
+        raise _admission_error(e)
+    response.headers[COST_HEADER] = estimate.header()
+    return await _validate_jsonld(request)
+
+
+async def _validate_jsonld(request: ValidationRequest) -> ValidationResponse:
+    """SHACL validation of an admitted JSON-LD request."""
+    rule_groups = _rule_groups(request.validation_options)
     try:
         logger.info(f"Starting validation for installation: {request.installation_id}")
         
         # Perform SHACL validation
-        validation_result = await validator.validate(request.jsonld_data)
+        validation_result = await validator.validate(request.jsonld_data, rule_groups=rule_groups)
         
         # Create response
         response = ValidationResponse(
@@ -115,6 +275,10 @@ async def validate_installation(request: ValidationRequest) -> ValidationRespons
         logger.info(f"Validation completed for {request.installation_id}: {'PASS' if response.is_valid else 'FAIL'}")
         return response
         
+    except ExecutorSaturatedError as e:
+        raise _saturated_error(e)
+    except StageTimeoutError as e:
+        raise _timeout_error(e)
     except ValidationError as e:
         logger.error(f"Validation error for {request.installation_id}: {e}")
         raise HTTPException(status_code=422, detail=f"Erreur de validation : {e}")
@@ -125,6 +289,7 @@ async def validate_installation(request: ValidationRequest) -> ValidationRespons
 
 @app.post("/validate/file", response_model=ValidationResponse)
 async def validate_installation_file(
+    response: Response,
     file: UploadFile = File(...),
     installation_id: Optional[str] = None
 ) -> ValidationResponse:
@@ -155,7 +320,7 @@ async def validate_installation_file(
         )
         
         # Validate
-        return await validate_installation(request)
+        return await validate_installation(request, response)
         
     except HTTPException:
         raise
@@ -175,6 +340,79 @@ async def get_validation_rules() -> Dict[str, Any]:
     return validator.get_rules_info()
 
 
+LOOPBACK_HOSTS = frozenset({"127.0.0.1", "::1", "localhost"})
+
+
+def _require_admin(http_request: Request) -> None:
+    """403 unless the request carries ``settings.admin_token`` in ``X-Admin-Token``,
+    or, when no token is configured, comes from the loopback interface."""
+    if settings.admin_token:
+        allowed = secrets.compare_digest(http_request.headers.get("x-admin-token", ""), settings.admin_token)
+    else:
+        allowed = http_request.client is not None and http_request.client.host in LOOPBACK_HOSTS
+    if not allowed:
+        logger.warning(f"🔒 Admin request refused from {http_request.client.host if http_request.client else None}")
+        raise HTTPException(status_code=403, detail="Accès réservé à l'administration")
+
+
+@app.post("/rules/reload")
+async def reload_validation_rules(http_request: Request) -> Dict[str, str]:
+    """
+    Reload the ontology and SHACL shapes from disk without restarting the worker.
+
+    The new ruleset is compiled first and then swapped in atomically; validations
+    already in progress finish with the previous version.  If the files cannot
+    be loaded the previous ruleset stays in place and the answer is a 500.
+    Reserved to administrators (``X-Admin-Token``, see ``settings.admin_token``).
+
+    Returns:
+        Dictionary containing the previous and new ruleset version hashes
+    """
+    _require_admin(http_request)
+    previous_version = validator.ruleset.version
+    try:
+        ruleset = reload_ruleset()
+        # Process workers hold their own copy of the ruleset: recycle them
+        if executor.mode == "process":
+            executor.restart()
+        # Entries are keyed by ruleset version: the old ones can no longer be hit
+        result_cache.clear()
+        validator.room_verdicts.clear()
+    except RulesetLoadError as e:
+        logger.error(f"❌ Ruleset reload failed, keeping version {previous_version}: {e}")
+        raise HTTPException(status_code=500, detail="Règles invalides, les règles précédentes restent en vigueur")
+    except Exception as e:
+        logger.error(f"Error reloading ruleset: {e}")
+        raise HTTPException(status_code=500, detail="Erreur lors du rechargement des règles")
+    return {
+        "previous_version": previous_version,
+        "version": ruleset.version,
+    }
+
+
+@app.get("/cache")
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get the size, TTL and hit/miss counters of the validation response cache
+    and of the room verdict memo (``room_verdicts``).
+
+    Returns:
+        Dictionary containing the cache statistics
+    """
+    return {**result_cache.stats(), "room_verdicts": validator.room_verdicts.stats()}
+
+
+@app.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Get the latency statistics of the validation endpoints, per endpoint.
+
+    Returns:
+        Dictionary containing the count, mean, percentiles and maximum latency of each endpoint
+    """
+    return {"latency": latency.stats()}
+
+
 @app.get("/ontology")
 async def get_ontology() -> Dict[str, Any]:
     """
@@ -186,35 +424,74 @@ async def get_ontology() -> Dict[str, Any]:
     return validator.get_ontology_info()
 
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _validate_batch_item(index: int, request: ValidationRequest) -> ValidationResponse:
+    """Validate one batch item, reporting its failure in the response instead of raising."""
+    try:
+        return await _validate_jsonld(request)
+    except Exception as e:
+        # Create error response for failed validations
+        return ValidationResponse(
+            installation_id=request.installation_id,
+            is_valid=False,
+            validation_results=[],
+            timestamp=datetime.utcnow(),
+            total_violations=0,
+            error=str(e)
+        )
+
+
 @app.post("/validate/batch", response_model=List[ValidationResponse])
-async def validate_batch(requests: List[ValidationRequest]) -> List[ValidationResponse]:
+async def validate_batch(
+    requests: List[ValidationRequest], http_request: Request
+) -> Union[List[ValidationResponse], StreamingResponse]:
     """
     Validate multiple electrical installations in batch.
     
+    Up to ``settings.batch_concurrency`` installations are validated at once on
+    the stage executor.  With ``Accept: application/x-ndjson`` each response is
+    streamed as one JSON line as soon as it is ready, in completion order, with
+    an ``index`` field giving its position in the request.  A batch of more
+    than ``settings.max_batch_size`` items, or with an item over
+    ``settings.max_jsonld_triples``, is rejected as a whole (413, with the
+    ``index`` of the item).
+    
     Args:
         requests: List of ValidationRequest objects
         
     Returns:
-        List of ValidationResponse objects
+        List of ValidationResponse objects (request order), or an NDJSON stream
     """
+    _admit_batch(len(requests))
+    for index, request in enumerate(requests):
+        try:
+            admit_jsonld(request.jsonld_data, settings)
+        except AdmissionError as e:
+            raise _admission_error(e, index)
+    concurrency = max(1, settings.batch_concurrency)
+    start_time = time.time()
+
+    if NDJSON_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        async def lines() -> AsyncIterator[str]:
+            async for index, response in map_unordered(_validate_batch_item, requests, concurrency):
+                yield json.dumps({"index": index, **response.model_dump(mode="json")}, ensure_ascii=False) + "\n"
+            logger.info(
+                f"📦 Streamed batch of {len(requests)} validations in {(time.time() - start_time) * 1000:.0f} ms "
+                f"(concurrency {concurrency})"
+            )
+
+        return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
     try:
-        results = []
-        for request in requests:
-            try:
-                result = await validate_installation(request)
-                results.append(result)
-            except Exception as e:
-                # Create error response for failed validations
-                error_response = ValidationResponse(
-                    installation_id=request.installation_id,
-                    is_valid=False,
-                    validation_results=[],
-                    timestamp=datetime.utcnow(),
-                    total_violations=0,
-                    error=str(e)
-                )
-                results.append(error_response)
-        
+        results: List[Optional[ValidationResponse]] = [None] * len(requests)
+        async for index, response in map_unordered(_validate_batch_item, requests, concurrency):
+            results[index] = response
+        logger.info(
+            f"📦 Batch of {len(requests)} validations in {(time.time() - start_time) * 1000:.0f} ms "
+            f"(concurrency {concurrency})"
+        )
         return results
         
     except Exception as e:
@@ -222,7 +499,7 @@ async def validate_batch(requests: List[ValidationRequest]) -> List[ValidationRe
         raise HTTPException(status_code=500, detail="Erreur lors de la validation par lot")
 
 @app.post("/validate/room-equipment", response_model=RoomEquipmentValidationResponse)
-async def validate_room_equipment(request: RoomEquipmentValidationRequest) -> RoomEquipmentValidationResponse:
+async def validate_room_equipment(request: RoomEquipmentValidationRequest, response: Response) -> RoomEquipmentValidationResponse:
     """
     Step 2: Validate equipment selection by rooms and globally according to NF C 15-100.
     
@@ -237,14 +514,26 @@ async def validate_room_equipment(request: RoomEquipmentValidationRequest) -> Ro
     Returns:
         RoomEquipmentValidationResponse with room-by-room and global compliance results
     """
+    start_time = time.time()
+    rooms = compact_rooms(request.rooms)
+    encoding = _admit(rooms, _equipment_encoding(request), 1, response)
+    rule_groups = _rule_groups(request.validation_options)
+    cache_key = _cache_key("room-equipment", request, encoding)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"♻️ Room equipment validation served from cache for installation: {request.installation_id}")
+        latency.record("room-equipment", (time.time() - start_time) * 1000)
+        return _cached_response(cached, request)
     try:
         logger.info(f"Starting room equipment validation for installation: {request.installation_id}")
         
         # Perform room-by-room validation
-        global_compliance, room_results = await validator.validate_room_equipment(request.rooms)
+        global_compliance, room_results = await validator.validate_room_equipment(
+            rooms, encoding=encoding, rule_groups=rule_groups
+        )
         
         # Create response
-        response = RoomEquipmentValidationResponse(
+        validation_response = RoomEquipmentValidationResponse(
             installation_id=request.installation_id,
             global_compliance=global_compliance,
             room_results=room_results,
@@ -258,8 +547,15 @@ async def validate_room_equipment(request: RoomEquipmentValidationRequest) -> Ro
                    f"{compliant_rooms}/{total_rooms} rooms compliant, "
                    f"global status: {global_compliance.overall_status.value}")
         
-        return response
+        if _is_cacheable(validation_response):
+            result_cache.put(cache_key, validation_response)
+        latency.record("room-equipment", (time.time() - start_time) * 1000)
+        return validation_response
         
+    except ExecutorSaturatedError as e:
+        raise _saturated_error(e)
+    except StageTimeoutError as e:
+        raise _timeout_error(e)
     except ValidationError as e:
         logger.error(f"Validation error for {request.installation_id}: {e}")
         raise HTTPException(status_code=422, detail=f"Erreur de validation : {e}")
@@ -268,8 +564,73 @@ async def validate_room_equipment(request: RoomEquipmentValidationRequest) -> Ro
         raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de la validation de l'équipement des pièces")
 
 
+def _first_blocking_violation(response: RoomEquipmentValidationResponse) -> Optional[ValidationViolation]:
+    """First ``ERROR`` violation of a full room-equipment report."""
+    violations = list(response.global_compliance.violations)
+    for room_result in response.room_results:
+        violations.extend(room_result.violations)
+    return next((v for v in violations if v.severity == SeverityLevel.ERROR), None)
+
+
+@app.post("/validate/is-compliant", response_model=ComplianceCheckResponse)
+async def check_room_equipment_compliance(
+    request: RoomEquipmentValidationRequest, response: Response
+) -> ComplianceCheckResponse:
+    """
+    Yes/no room-equipment compliance, for callers that only gate on it (e.g. a quote).
+
+    Same rules as ``/validate/room-equipment``, but the validation stops at the
+    first blocking (``error``) violation: the native room rules first, then the
+    SHACL shapes cheapest first.  The installation is compliant when the full
+    validation would report no ``error`` violation.  Latencies are reported
+    under ``is-compliant`` by ``/metrics``.
+    
+    Args:
+        request: RoomEquipmentValidationRequest containing room equipment selections
+        
+    Returns:
+        ComplianceCheckResponse with the answer and the violation that decided it
+    """
+    start_time = time.time()
+    rooms = compact_rooms(request.rooms)
+    encoding = _admit(rooms, _equipment_encoding(request), 1, response)
+    rule_groups = _rule_groups(request.validation_options)
+    try:
+        # A peek: the cache statistics are those of the full validations
+        cached = result_cache.peek(_cache_key("room-equipment", request, encoding))
+        if cached is not None:
+            reason = _first_blocking_violation(cached)
+        else:
+            reason = await validator.first_violation(rooms, encoding=encoding, rule_groups=rule_groups)
+    except ExecutorSaturatedError as e:
+        raise _saturated_error(e)
+    except StageTimeoutError as e:
+        raise _timeout_error(e)
+    except Exception as e:
+        logger.error(f"Unexpected error during compliance check: {e}")
+        raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de la vérification de conformité")
+
+    room_id = None
+    if reason is not None and reason.focus_node:
+        room_id = next((room.room_id for room in request.rooms if room.room_id in reason.focus_node), None)
+    check_time = (time.time() - start_time) * 1000
+    latency.record("is-compliant", check_time)
+    logger.info(f"⚡ Compliance check for {request.installation_id}: "
+                f"{'PASS' if reason is None else 'FAIL'} in {check_time:.1f} ms")
+    return ComplianceCheckResponse(
+        installation_id=request.installation_id,
+        is_compliant=reason is None,
+        reason=reason,
+        room_id=room_id,
+        check_time_ms=check_time,
+        timestamp=datetime.utcnow(),
+    )
+
+
 @app.post("/validate/global-with-dimensioning", response_model=GlobalValidationWithDimensioningResponse)
-async def validate_global_with_dimensioning(request: RoomEquipmentValidationRequest) -> GlobalValidationWithDimensioningResponse:
+async def validate_global_with_dimensioning(
+    request: RoomEquipmentValidationRequest, response: Response
+) -> GlobalValidationWithDimensioningResponse:
     """
     Step 3: Global validation with electrical dimensioning calculations.
     
@@ -285,31 +646,35 @@ async def validate_global_with_dimensioning(request: RoomEquipmentValidationRequ
     Returns:
         GlobalValidationWithDimensioningResponse with compliance results and dimensioning
     """
+    start_time = time.time()
+    rooms = compact_rooms(request.rooms)
+    # Two passes: the room-equipment graph, then the completed installation graph
+    encoding = _admit(rooms, _equipment_encoding(request), 2, response)
+    rule_groups = _rule_groups(request.validation_options)
+    output = _circuit_breaker_output(request.validation_options)
+    # The dimensioning lists circuits and cables in the order of the rooms and
+    # their equipment: equally ordered requests only share an entry
+    cache_key = _cache_key("global-with-dimensioning", request, encoding, ordered=True)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"♻️ Global validation with dimensioning served from cache for installation: {request.installation_id}")
+        cached = _cached_response(cached, request)
+        latency.record("global-with-dimensioning", (time.time() - start_time) * 1000)
+        return cached.model_copy(update={"dimensioning": _shaped_dimensioning(cached.dimensioning, output)})
     try:
         logger.info(f"Starting global validation with dimensioning for installation: {request.installation_id}")
         
-        # Step 1: Perform basic room-by-room validation (exclude dimensioning rules)
-        basic_compliance, room_results = await validator.validate_room_equipment(request.rooms, include_dimensioning_rules=False)
-        
-        # Step 2: Calculate electrical dimensioning based on equipment
-        dimensioning = validator.calculate_dimensioning(
-            request.rooms,
-            basic_compliance,
+        # Steps 1-3: room-by-room validation (basic equipment rules only), dimensioning
+        # calculation and final validation of the complete installation graph
+        basic_compliance, room_results, dimensioning, final_validation = await validator.validate_global_with_dimensioning(
+            rooms,
             postal_code=request.postal_code,
             number_of_people=request.number_of_people,
+            encoding=encoding,
+            rule_groups=rule_groups,
         )
         
-        # Step 3: Create enhanced JSON-LD with calculated dimensioning for final validation
-        enhanced_jsonld = validator.create_complete_installation_jsonld(
-            request.rooms,
-            dimensioning,
-            postal_code=request.postal_code,
-        )
-        
-        # Step 4: Final validation with complete installation (including dimensioning)
-        final_validation = await validator.validate(enhanced_jsonld, focus_area=None)
-        
-        # Step 5: Create final compliance result
+        # Step 4: Create final compliance result
         final_compliance = GlobalComplianceResult(
             overall_status=ComplianceStatus.COMPLIANT if final_validation.is_valid else ComplianceStatus.NON_COMPLIANT,
             violations=final_validation.violations or [],
@@ -318,7 +683,7 @@ async def validate_global_with_dimensioning(request: RoomEquipmentValidationRequ
         )
         
         # Create response
-        response = GlobalValidationWithDimensioningResponse(
+        validation_response = GlobalValidationWithDimensioningResponse(
             installation_id=request.installation_id,
             global_compliance=final_compliance,
             room_results=room_results,
@@ -333,8 +698,16 @@ async def validate_global_with_dimensioning(request: RoomEquipmentValidationRequ
                    f"global status: {final_compliance.overall_status.value}, "
                    f"{total_breakers} circuit breakers, {total_cables} cable types")
         
-        return response
+        # The cache keeps the verbose dimensioning, shaped for each request
+        if _is_cacheable(validation_response):
+            result_cache.put(cache_key, validation_response)
+        latency.record("global-with-dimensioning", (time.time() - start_time) * 1000)
+        return validation_response.model_copy(update={"dimensioning": _shaped_dimensioning(dimensioning, output)})
         
+    except ExecutorSaturatedError as e:
+        raise _saturated_error(e)
+    except StageTimeoutError as e:
+        raise _timeout_error(e)
     except ValidationError as e:
         logger.error(f"Validation error for {request.installation_id}: {e}")
         raise HTTPException(status_code=422, detail=f"Erreur de validation : {e}")
@@ -343,6 +716,248 @@ async def validate_global_with_dimensioning(request: RoomEquipmentValidationRequ
         raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de la validation globale avec dimensionnement")
 
 
+@app.post("/dimensioning", response_model=DimensioningResponse)
+async def dimension_installation(request: RoomEquipmentValidationRequest, response: Response) -> DimensioningResponse:
+    """
+    Electrical dimensioning of an installation, without the SHACL validations.
+
+    Only the equipment inventory and the dimensioning run. The room-equipment
+    compliance is checked only with ``validation_options.check_compliance``:
+    it is then returned as ``global_compliance`` and a non-compliant
+    installation gets the same note as with ``/validate/global-with-dimensioning``.
+
+    Args:
+        request: RoomEquipmentValidationRequest containing room equipment selections
+
+    Returns:
+        DimensioningResponse with the dimensioning (and the compliance when checked)
+    """
+    check_compliance = bool((request.validation_options or {}).get("check_compliance", False))
+    # The inventory reads the request models as well; compact rooms only pay off
+    # for the validation
+    rooms = compact_rooms(request.rooms) if check_compliance else request.rooms
+    encoding = _admit(rooms, _equipment_encoding(request), 1 if check_compliance else 0, response)
+    rule_groups = _rule_groups(request.validation_options)
+    output = _circuit_breaker_output(request.validation_options)
+    try:
+        dimensioning, global_compliance = await validator.dimension(
+            rooms,
+            postal_code=request.postal_code,
+            number_of_people=request.number_of_people,
+            check_compliance=check_compliance,
+            encoding=encoding,
+            rule_groups=rule_groups,
+        )
+        return DimensioningResponse(
+            installation_id=request.installation_id,
+            dimensioning=_shaped_dimensioning(dimensioning, output),
+            global_compliance=global_compliance,
+            timestamp=datetime.utcnow(),
+        )
+
+    except ExecutorSaturatedError as e:
+        raise _saturated_error(e)
+    except StageTimeoutError as e:
+        raise _timeout_error(e)
+    except Exception as e:
+        logger.error(f"Unexpected error during dimensioning: {e}")
+        raise HTTPException(status_code=500, detail="Erreur interne du serveur lors du dimensionnement")
+
+
+@app.post("/dimensioning/batch", response_model=List[DimensioningResponse])
+async def dimension_installations(requests: List[RoomEquipmentValidationRequest]) -> List[DimensioningResponse]:
+    """
+    Electrical dimensioning of many installations at once, without compliance validation.
+
+    Each item takes the body of ``/validate/global-with-dimensioning``; the
+    installations are dimensioned together on NumPy arrays
+    (``batch_dimensioning``), with the same results as the dimensioning of
+    that endpoint except for the non-compliance note (compliance is not checked).
+    A batch of more than ``settings.max_batch_size`` items, or with an item
+    over the room or equipment limits, is rejected as a whole (413, with the
+    ``index`` of the item).
+
+    Args:
+        requests: List of RoomEquipmentValidationRequest objects
+
+    Returns:
+        List of DimensioningResponse objects (request order)
+    """
+    _admit_batch(len(requests))
+    outputs = [_circuit_breaker_output(request.validation_options) for request in requests]
+    for index, request in enumerate(requests):
+        try:
+            admit(validator, request.rooms, None, 0, settings)
+        except AdmissionError as e:
+            raise _admission_error(e, index)
+    start_time = time.time()
+    try:
+        dimensionings = await executor.run(
+            dimension_batch,
+            validator,
+            [compact_rooms(request.rooms) for request in requests],
+            [request.postal_code for request in requests],
+            [request.number_of_people for request in requests],
+        )
+        timestamp = datetime.utcnow()
+        logger.info(f"📐 Dimensioned {len(requests)} installations in {(time.time() - start_time) * 1000:.0f} ms")
+        return [
+            DimensioningResponse(
+                installation_id=request.installation_id,
+                dimensioning=_shaped_dimensioning(dimensioning, output),
+                timestamp=timestamp,
+            )
+            for request, dimensioning, output in zip(requests, dimensionings, outputs)
+        ]
+
+    except ExecutorSaturatedError as e:
+        raise _saturated_error(e)
+    except StageTimeoutError as e:
+        raise _timeout_error(e)
+    except Exception as e:
+        logger.error(f"Error in batch dimensioning: {e}")
+        raise HTTPException(status_code=500, detail="Erreur lors du dimensionnement par lot")
+
+
+def _session_or_404(installation_id: str) -> InstallationSession:
+    session = sessions.get(installation_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session introuvable : {installation_id}")
+    return session
+
+
+def _session_response(session: InstallationSession) -> RoomEquipmentValidationResponse:
+    return RoomEquipmentValidationResponse(
+        installation_id=session.installation_id,
+        global_compliance=session.global_compliance,
+        room_results=session.results(),
+        timestamp=datetime.utcnow(),
+    )
+
+
+@app.post("/sessions", response_model=RoomEquipmentValidationResponse)
+async def create_session(request: RoomEquipmentValidationRequest, response: Response) -> RoomEquipmentValidationResponse:
+    """
+    Open (or replace) the validation session of an installation.
+
+    The session keeps the rooms, the data graph and the results so that
+    ``PATCH /sessions/{installation_id}`` only revalidates what an edit changes.
+
+    Args:
+        request: RoomEquipmentValidationRequest of the whole installation
+
+    Returns:
+        RoomEquipmentValidationResponse of the whole installation
+    """
+    if not sessions.enabled:
+        raise HTTPException(status_code=404, detail="Les sessions sont désactivées")
+    encoding = _admit(request.rooms, _equipment_encoding(request), 1, response)
+    rule_groups = _rule_groups(request.validation_options)
+    try:
+        session = InstallationSession(request.installation_id, request.rooms, encoding, rule_groups)
+    except SessionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        async with session.lock:
+            await session.validate(validator, executor)
+    except ExecutorSaturatedError as e:
+        raise _saturated_error(e)
+    except StageTimeoutError as e:
+        raise _timeout_error(e)
+    except Exception as e:
+        logger.error(f"Unexpected error while opening session {request.installation_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de l'ouverture de la session")
+    sessions.put(session)
+    logger.info(f"🗂️ Session opened for installation {request.installation_id}: {len(request.rooms)} rooms, {session.size} triples")
+    return _session_response(session)
+
+
+@app.get("/sessions")
+async def get_session_stats() -> Dict[str, Any]:
+    """
+    Get the number, size and eviction counters of the installation sessions.
+
+    Returns:
+        Dictionary containing the session store statistics
+    """
+    return sessions.stats()
+
+
+@app.get("/sessions/{installation_id}", response_model=RoomEquipmentValidationResponse)
+async def get_session(installation_id: str) -> RoomEquipmentValidationResponse:
+    """
+    Get the last results of an installation session.
+
+    Returns:
+        RoomEquipmentValidationResponse of the whole installation
+    """
+    return _session_response(_session_or_404(installation_id))
+
+
+@app.patch("/sessions/{installation_id}", response_model=SessionPatchResponse)
+async def patch_session(installation_id: str, request: SessionPatchRequest, response: Response) -> SessionPatchResponse:
+    """
+    Apply room-level edits to an installation session and revalidate it.
+
+    Only the edited rooms are validated against the room-local rules; the
+    installation rules run on the patched data graph.
+
+    Args:
+        installation_id: Installation of the session
+        request: SessionPatchRequest with the edits, applied in order
+
+    Returns:
+        SessionPatchResponse with the global result and the room results that changed
+    """
+    session = _session_or_404(installation_id)
+    start_time = time.time()
+    async with session.lock:
+        try:
+            rooms, touched = apply_deltas(session.rooms, request.operations)
+        except SessionError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        # The encoding of a session is fixed: no switch to the compact one
+        _admit(rooms, session.builder.encoding, 1, response)
+        remaining = {room.room_id for room in rooms}
+        removed = [room.room_id for room in session.rooms if room.room_id not in remaining]
+        try:
+            changed = await session.validate(validator, executor, rooms, touched)
+        except Exception as e:
+            # The graph may be half patched: the client has to open the session again
+            sessions.remove(installation_id)
+            if isinstance(e, ExecutorSaturatedError):
+                raise _saturated_error(e)
+            if isinstance(e, StageTimeoutError):
+                raise _timeout_error(e)
+            logger.error(f"Unexpected error while patching session {installation_id}: {e}")
+            raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de la mise à jour de la session")
+    sessions.update(session)
+    logger.info(
+        f"✏️ Session {installation_id}: {len(request.operations)} edits, {len(changed)} room results changed "
+        f"in {(time.time() - start_time) * 1000:.0f} ms"
+    )
+    return SessionPatchResponse(
+        installation_id=installation_id,
+        global_compliance=session.global_compliance,
+        room_results=changed,
+        removed_rooms=removed,
+        timestamp=datetime.utcnow(),
+    )
+
+
+@app.delete("/sessions/{installation_id}")
+async def delete_session(installation_id: str) -> Dict[str, Any]:
+    """
+    Close an installation session.
+
+    Returns:
+        Dictionary with the installation identifier
+    """
+    if not sessions.remove(installation_id):
+        raise HTTPException(status_code=404, detail=f"Session introuvable : {installation_id}")
+    return {"installation_id": installation_id, "deleted": True}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,48 @@
+"""Latency of the validation endpoints.
+
+Each endpoint records its latencies under its own name, so the fail-fast check
+is reported apart from the full validations.  ``GET /metrics`` gives, per
+endpoint, the request count and the mean, maximum and percentiles of the
+latencies over the last ``window`` requests.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class LatencyMetrics:
+    """Thread-safe latency samples per endpoint name."""
+
+    def __init__(self, window: int = 1024):
+        self.window = max(1, window)
+        self._counts: Dict[str, int] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, milliseconds: float) -> None:
+        with self._lock:
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(milliseconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                endpoint: _summary(self._counts[endpoint], sorted(samples))
+                for endpoint, samples in self._samples.items()
+            }
+
+
+def _summary(count: int, samples: list) -> Dict[str, Any]:
+    def percentile(q: float) -> float:
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    return {
+        "count": count,
+        "window": len(samples),
+        "mean_ms": sum(samples) / len(samples),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": samples[-1],
+    }
@@ -1,7 +1,7 @@
 """Pydantic models for the NF C 15-100 compliance engine."""
 
-from pydantic import BaseModel, Field, validator
-from typing import Dict, Any, List, Optional, Union
+from pydantic import BaseModel, Field, SkipValidation, validator
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple, Union
 from datetime import datetime
 from enum import Enum
 
@@ -155,6 +155,12 @@ class RoomEquipment(BaseModel):
     class Config:
         extra = "allow"
 
+    def equipment_items(self) -> Iterator[Tuple[EquipmentType, int, Any]]:
+        """``(type, quantity, specifications)`` of every equipment line, in order
+        (same interface as ``compact_model.CompactRoom``)."""
+        for item in self.equipment:
+            yield EquipmentType(item.equipment_type), item.quantity, item.specifications
+
 
 class RoomComplianceResult(BaseModel):
     """Compliance result for a single room."""
@@ -242,11 +248,82 @@ class RoomEquipmentValidationResponse(BaseModel):
     global_compliance: GlobalComplianceResult = Field(..., description="Global compliance result")
     room_results: List[RoomComplianceResult] = Field(..., description="Individual room compliance results")
     timestamp: datetime = Field(..., description="When the validation was performed")
-    
+
     class Config:
         extra = "allow"
 
 
+class ComplianceCheckResponse(BaseModel):
+    """Response model for the fail-fast compliance check."""
+
+    installation_id: str = Field(..., description="Installation identifier")
+    is_compliant: bool = Field(..., description="True if no room-equipment rule reports a blocking violation")
+    reason: Optional[ValidationViolation] = Field(None, description="First blocking violation found")
+    room_id: Optional[str] = Field(None, description="Room the violation concerns, if any")
+    check_time_ms: float = Field(..., description="Time taken for the check in milliseconds")
+    timestamp: datetime = Field(..., description="When the check was performed")
+
+
+class RoomDeltaOperation(str, Enum):
+    """Room-level edits of an installation session."""
+    ADD_ROOM = "add_room"
+    REMOVE_ROOM = "remove_room"
+    UPDATE_ROOM = "update_room"
+    SET_EQUIPMENT_QUANTITY = "set_equipment_quantity"
+
+
+class RoomDelta(BaseModel):
+    """Single edit of a session: ``room`` for add_room / update_room, ``room_id``
+    for remove_room, ``room_id``, ``equipment_type`` and ``quantity`` (plus
+    optional ``specifications`` to pick the item) for set_equipment_quantity."""
+
+    op: RoomDeltaOperation = Field(..., description="Edit to apply")
+    room_id: Optional[str] = Field(None, description="Room to remove or whose equipment changes")
+    room: Optional[RoomEquipment] = Field(None, description="Room to add, or new content of an existing room")
+    equipment_type: Optional[EquipmentType] = Field(None, description="Equipment whose quantity changes")
+    quantity: Optional[int] = Field(
+        None, description="New quantity (0 removes the item)", ge=0
+    )
+    specifications: Optional[Dict[str, Any]] = Field(None, description="Specifications of the item to change")
+
+
+class SessionPatchRequest(BaseModel):
+    """Edits applied in order to an installation session."""
+
+    operations: List[RoomDelta] = Field(..., description="Room-level edits, applied in order")
+
+    class Config:
+        extra = "allow"
+
+
+class SessionPatchResponse(BaseModel):
+    """Results changed by a session edit."""
+
+    installation_id: str = Field(..., description="Installation identifier")
+    global_compliance: GlobalComplianceResult = Field(..., description="Global compliance result")
+    room_results: List[RoomComplianceResult] = Field(..., description="Results of the rooms whose result changed")
+    removed_rooms: List[str] = Field(default=[], description="Rooms removed by the edit")
+    timestamp: datetime = Field(..., description="When the validation was performed")
+
+    class Config:
+        extra = "allow"
+
+
+class CircuitKind(str, Enum):
+    """Kinds of circuits protected by the dimensioned breakers."""
+    LIGHTING = "lighting"
+    SOCKETS = "sockets"
+    KITCHEN_SOCKETS = "kitchen_sockets"
+    SPECIALISED_20A = "specialised_20a"
+    OVEN_SOCKET = "oven_socket"
+    COOKING_HOB = "cooking_hob"
+    VMC = "vmc"
+    HEATING = "heating"  # aggregated heating of one equipment type
+    INDIVIDUAL_HEATING = "individual_heating"  # one convector / inertia radiator
+    DEDICATED = "dedicated"  # other specialised equipment
+    WATER_HEATER = "water_heater"
+
+
 class CircuitBreakerSpec(BaseModel):
     """Circuit breaker specification."""
     
@@ -254,6 +331,46 @@ class CircuitBreakerSpec(BaseModel):
     type: str = Field(..., description="Breaker type (e.g., 'Type C')")
     quantity: int = Field(..., description="Number of breakers needed", ge=0)
     description: str = Field(..., description="Description of what this breaker protects")
+    # Set by the dimensioning for the grouped output, not serialised
+    circuit_kind: Optional[CircuitKind] = Field(None, description="Kind of circuit", exclude=True)
+    circuit_detail: Optional[str] = Field(
+        None, description="What distinguishes this circuit from the others of its kind", exclude=True
+    )
+
+
+class CircuitBreakerGroup(BaseModel):
+    """Circuit breakers of the same rating, type and circuit kind (grouped output)."""
+
+    rating: int = Field(..., description="Current rating in amperes")
+    type: str = Field(..., description="Breaker type (e.g., 'Type C')")
+    circuit_kind: Optional[CircuitKind] = Field(None, description="Kind of the circuits")
+    quantity: int = Field(..., description="Number of breakers (one per circuit)", ge=1)
+    description: str = Field(..., description="Description of the circuits")
+    circuits: Optional[List[str]] = Field(
+        None, description="Detail of each circuit (equipment, room), when they differ"
+    )
+
+
+class CircuitLoad(NamedTuple):
+    """Equipment of a room supplied by a planned circuit."""
+
+    room_id: str
+    equipment_type: EquipmentType
+    quantity: int  # units supplied by the circuit
+
+
+class PlannedCircuit(NamedTuple):
+    """Circuit of the circuit plan of a dimensioning (internal, not serialised)."""
+
+    circuit_kind: CircuitKind
+    rating: int  # of its breaker, in amperes
+    type: str  # of its breaker (e.g. "Type C")
+    loads: Tuple[CircuitLoad, ...] = ()  # equipment supplied, per room
+
+    @property
+    def room_ids(self) -> List[str]:
+        """Rooms supplied by the circuit, in order."""
+        return list(dict.fromkeys(load.room_id for load in self.loads))
 
 
 class SurgeProtectorSpec(BaseModel):
@@ -287,6 +404,14 @@ class DimensioningResult(BaseModel):
     """Electrical dimensioning calculation results."""
     
     circuit_breakers: List[CircuitBreakerSpec] = Field(..., description="Required circuit breakers")
+    circuit_breaker_groups: Optional[List[CircuitBreakerGroup]] = Field(
+        None, description="Circuit breakers grouped by rating, type and circuit kind (grouped output only)"
+    )
+    # One entry per circuit breaker; built by the dimensioning for the complete
+    # installation graph, neither validated nor serialised
+    circuit_plan: SkipValidation[Optional[List[PlannedCircuit]]] = Field(
+        None, description="Circuits protected by the breakers, with the equipment they supply", exclude=True
+    )
     surge_protectors: List[SurgeProtectorSpec] = Field(..., description="Required surge protectors")
     electrical_panels: List[ElectricalPanelSpec] = Field(..., description="Required electrical panels")
     cables: List[CableSpec] = Field(..., description="Required cables")
@@ -294,6 +419,20 @@ class DimensioningResult(BaseModel):
     installation_notes: List[str] = Field(default=[], description="Installation notes and recommendations")
 
 
+class DimensioningResponse(BaseModel):
+    """Response model for dimensioning without compliance validation."""
+
+    installation_id: str = Field(..., description="Installation identifier")
+    dimensioning: DimensioningResult = Field(..., description="Electrical dimensioning calculations")
+    global_compliance: Optional[GlobalComplianceResult] = Field(
+        None, description="Room-equipment compliance, when it was checked"
+    )
+    timestamp: datetime = Field(..., description="When the dimensioning was performed")
+
+    class Config:
+        extra = "allow"
+
+
 class GlobalValidationWithDimensioningResponse(BaseModel):
     """Response model for global validation with dimensioning calculations."""
     
@@ -314,6 +453,8 @@ class ValidationResult(BaseModel):
     violations: Optional[List[ValidationViolation]] = Field(default=[], description="List of violations found")
     rules_checked: List[str] = Field(default=[], description="List of rules that were checked")
     validation_time_ms: Optional[float] = Field(None, description="Time taken for validation in milliseconds")
+    setup_time_ms: Optional[float] = Field(None, description="Time spent before the SHACL evaluation (graph building, entailment) in milliseconds")
+    evaluation_time_ms: Optional[float] = Field(None, description="Time spent in the SHACL evaluation in milliseconds")
     
     class Config:
         extra = "allow"
@@ -390,6 +531,10 @@ class RuleInfo(BaseModel):
     category: str = Field(..., description="Rule category")
     severity: SeverityLevel = Field(..., description="Default severity level")
     article_reference: Optional[str] = Field(None, description="Reference to NF C 15-100 article")
+    source_shape: Optional[str] = Field(None, description="IRI of the SHACL shape declaring the rule")
+    suggested_fix: Optional[str] = Field(None, description="Suggested fix for a violation of the rule")
+    required_count: Optional[int] = Field(None, description="Minimum number of equipment units required by the rule")
+    equipment_category: Optional[str] = Field(None, description="Equipment category counted by the rule")
     
     class Config:
         extra = "allow"
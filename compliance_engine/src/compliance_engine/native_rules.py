@@ -0,0 +1,360 @@
+"""Native evaluation of the per-room cardinality rules.
+
+Most room rules of NF C 15-100 read "a room of type X (with an area in range Y)
+has at least N pieces of equipment of category Z".  Running them through
+pyshacl means building one node per equipment unit and evaluating a SPARQL
+query per shape.  These constraints are marked in the shapes with explicit
+annotations (``nfc15100_shapes.ttl``)::
+
+    sh:targetClass nfc:X ;                  # single target class of the shape
+    ... [
+        nfc:countProperty nfc:xCount ;      # one of ROOM_COUNT_PROPERTIES
+        nfc:requiredCount N ;
+        [nfc:areaAbove A ; nfc:areaAtMost B ; ...]  # see ruleset.AREA_BOUNDS
+        [nfc:excludedClass nfc:Y]
+    ]
+
+on a property shape (``sh:path P ; sh:minCount N``: the path is kept in the
+report, no value) or on a ``sh:sparql`` constraint (the focus node is reported
+as value).  The annotations must restate the constraint they sit on: the
+``sh:minCount`` / ``sh:qualifiedMinCount`` of a property shape, or the outer
+``FILTER`` conjuncts of the ``sh:select`` query (``?area`` comparisons,
+``?count < N`` or ``FILTER NOT EXISTS { ... }`` for N = 1, ``FILTER NOT
+EXISTS { $this a nfc:Y }``), so that the native and pyshacl evaluations cannot
+drift apart.  At ruleset load they are compiled into :class:`CardinalityRule`
+rows, which also generate the count query of the compact encoding
+(:meth:`CardinalityRule.count_query`); an annotated constraint that does not
+compile, or disagrees with its constraint, fails the load.  The rules are checked in plain Python over the count
+vector of each room (:func:`room_equipment_counts`).
+
+Any other constraint (per-unit attributes, installation-wide aggregates, ...)
+is left to pyshacl: the compiled constraints are removed from the shapes graph
+it receives and both result sets are merged.  Shapes and compiled constraints
+are matched by shape IRI and message, which the compact variant of a
+constraint shares with its per-node version.
+"""
+
+import logging
+import operator
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from rdflib import Graph, Literal, URIRef, Variable
+from rdflib.namespace import RDF
+from rdflib.plugins.sparql.parserutils import CompValue
+
+from .graph_builder import ROOM_COUNT_PROPERTIES, room_equipment_counts, vocabulary_term
+from .compact_model import AnyRoom
+from .models import EquipmentType
+from .ruleset import AREA_BOUNDS, NFC, SH, RulesetLoadError
+from .shacl_engine import prepared_query
+
+logger = logging.getLogger(__name__)
+
+# (shape IRI, message) of a constraint
+ConstraintKey = Tuple[URIRef, str]
+
+AREA_OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class CardinalityRule(NamedTuple):
+    """A compiled "at least ``min_count`` units of ``count_property``" room rule."""
+
+    shape: URIRef
+    target_class: URIRef
+    count_property: URIRef
+    min_count: int
+    message: str
+    severity: URIRef
+    area_tests: Tuple[Tuple[str, float], ...] = ()  # (comparison, bound) on nfc:roomArea
+    excluded_class: Optional[URIRef] = None
+    path: Optional[URIRef] = None  # property form: reported path, no value
+
+    @property
+    def key(self) -> ConstraintKey:
+        return (self.shape, self.message)
+
+    @property
+    def requires_area(self) -> bool:
+        return bool(self.area_tests)
+
+    def area_matches(self, areas: Iterable[float]) -> bool:
+        """True if one of the room's ``nfc:roomArea`` values satisfies the area tests."""
+        if not self.area_tests:
+            return True
+        return any(
+            all(AREA_OPERATORS[comparison](area, bound) for comparison, bound in self.area_tests)
+            for area in areas
+        )
+
+    def count_query(self) -> str:
+        """SPARQL query of the rule over the room count literals of the compact encoding."""
+        count = f"{_prefixed(self.count_property)} ?count"
+        if self.path is not None:
+            body = [f"$this {count} ."]
+        else:
+            patterns = [f"a {_prefixed(self.target_class)}"]
+            if self.area_tests:
+                patterns.append("nfc:roomArea ?area")
+            body = ["$this " + " ;\n          ".join([*patterns, count]) + " ."]
+            if self.excluded_class is not None:
+                body.append(f"FILTER NOT EXISTS {{ $this a {_prefixed(self.excluded_class)} }}")
+            if self.area_tests:
+                tests = " && ".join(f"?area {comparison} {bound:g}" for comparison, bound in self.area_tests)
+                body.append(f"FILTER({tests})")
+        body.append(f"FILTER(?count < {self.min_count})")
+        return "\nSELECT $this WHERE {\n" + "".join(f"    {line}\n" for line in body) + "}\n"
+
+
+class NativeRuleTable:
+    """Compiled cardinality rules indexed by target class."""
+
+    def __init__(self, rules: Iterable[CardinalityRule]):
+        self.rules: Tuple[CardinalityRule, ...] = tuple(rules)
+        self.keys: FrozenSet[ConstraintKey] = frozenset(rule.key for rule in self.rules)
+        self.by_class: Dict[URIRef, List[CardinalityRule]] = {}
+        for rule in self.rules:
+            self.by_class.setdefault(rule.target_class, []).append(rule)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def restricted_to(self, shapes: Iterable[URIRef]) -> "NativeRuleTable":
+        """Table holding only the rules of ``shapes``."""
+        shapes = set(shapes)
+        return NativeRuleTable(rule for rule in self.rules if rule.shape in shapes)
+
+    def violations(
+        self,
+        rooms: List[AnyRoom],
+        room_iri: Callable[[str], URIRef],
+        types_for: Callable[[URIRef], Tuple[URIRef, ...]],
+        parent_type_of: Callable[[EquipmentType], EquipmentType],
+        multiply_sockets: bool = True,
+    ) -> Iterator[Tuple[CardinalityRule, URIRef]]:
+        """Yield ``(rule, room IRI)`` for every rule violated by ``rooms``.
+
+        Rooms sharing an id form a single node in the data graph: their types,
+        areas and counts are merged the same way here.
+        """
+        nodes: Dict[URIRef, Tuple[set, set, Dict[URIRef, int]]] = {}
+        for room in rooms:
+            room_type = room.room_type.value if hasattr(room.room_type, "value") else str(room.room_type)
+            types, areas, counts = nodes.setdefault(
+                room_iri(room.room_id), (set(), set(), dict.fromkeys(ROOM_COUNT_PROPERTIES, 0))
+            )
+            types.update(types_for(vocabulary_term(room_type)))
+            if room.room_area is not None:
+                areas.add(room.room_area)
+            for count_property, count in room_equipment_counts(room, parent_type_of, multiply_sockets).items():
+                counts[count_property] += count
+
+        for node, (types, areas, counts) in nodes.items():
+            for class_uri in types:
+                for rule in self.by_class.get(class_uri, ()):
+                    if counts[rule.count_property] >= rule.min_count:
+                        continue
+                    if rule.excluded_class is not None and rule.excluded_class in types:
+                        continue
+                    if not rule.area_matches(areas):
+                        continue
+                    yield rule, node
+
+
+def compile_cardinality_rules(shapes_graph: Graph) -> NativeRuleTable:
+    """Compile the constraints of ``shapes_graph`` annotated with ``nfc:countProperty``.
+
+    Raises:
+        RulesetLoadError: an annotated constraint does not compile
+    """
+    rules: List[CardinalityRule] = []
+    compiled = set()
+    for shape in sorted(set(shapes_graph.subjects(RDF.type, SH.NodeShape))):
+        constraints = [(constraint, False) for constraint in shapes_graph.objects(shape, SH.sparql)]
+        constraints += [(property_shape, True) for property_shape in shapes_graph.objects(shape, SH.property)]
+        for constraint, property_form in constraints:
+            rule = cardinality_rule(shapes_graph, shape, constraint, property_form)
+            if rule is not None:
+                rules.append(rule)
+                compiled.add(constraint)
+
+    stray = set(shapes_graph.subjects(NFC.countProperty)) - compiled
+    if stray:
+        raise RulesetLoadError(f"nfc:countProperty outside a constraint of a node shape: {sorted(map(str, stray))}")
+    table = NativeRuleTable(rules)
+    logger.info(f"⚡ Compiled {len(table)} cardinality rules for native evaluation")
+    return table
+
+
+def cardinality_rule(
+    shapes_graph: Graph, shape: URIRef, constraint, property_form: bool = False
+) -> Optional[CardinalityRule]:
+    """Rule annotated on ``constraint`` of ``shape`` (a SPARQL constraint, or a
+    property shape with ``property_form``), None if it has no ``nfc:countProperty``.
+
+    Raises:
+        RulesetLoadError: the annotations do not describe a cardinality rule
+    """
+    count_property = shapes_graph.value(constraint, NFC.countProperty)
+    if count_property is None:
+        return None
+    messages = list(shapes_graph.objects(constraint, SH.message))
+    where = f"{shape} ({messages[0] if messages else constraint})"
+    if count_property not in ROOM_COUNT_PROPERTIES:
+        raise RulesetLoadError(f"{where}: {count_property} is not a room count property")
+    if len(messages) != 1:
+        raise RulesetLoadError(f"{where}: a cardinality rule needs a single sh:message")
+    target_classes = list(shapes_graph.objects(shape, SH.targetClass))
+    if len(target_classes) != 1 or not _in_nfc(target_classes[0]):
+        raise RulesetLoadError(f"{where}: a cardinality rule needs a single nfc: sh:targetClass")
+
+    min_count = _number(shapes_graph, constraint, NFC.requiredCount, where)
+    if min_count is None or min_count != int(min_count):
+        raise RulesetLoadError(f"{where}: a cardinality rule needs an integer nfc:requiredCount")
+    area_tests = tuple(
+        (comparison, bound)
+        for predicate, comparison in AREA_BOUNDS.items()
+        for bound in (_number(shapes_graph, constraint, predicate, where),)
+        if bound is not None
+    )
+    excluded_class = shapes_graph.value(constraint, NFC.excludedClass)
+    if excluded_class is not None and not _in_nfc(excluded_class):
+        raise RulesetLoadError(f"{where}: nfc:excludedClass {excluded_class} is not an nfc: class")
+
+    path = None
+    if property_form:
+        if area_tests or excluded_class is not None:
+            raise RulesetLoadError(f"{where}: area bounds and excluded classes need a SPARQL constraint")
+        path = shapes_graph.value(constraint, SH.path)
+        if not isinstance(path, URIRef):
+            raise RulesetLoadError(f"{where}: a property cardinality rule needs a predicate sh:path")
+        cardinality = _number(shapes_graph, constraint, SH.minCount, where)
+        if cardinality is None:
+            cardinality = _number(shapes_graph, constraint, SH.qualifiedMinCount, where)
+        if cardinality != min_count:
+            raise RulesetLoadError(f"{where}: nfc:requiredCount differs from the minimum count of the property shape")
+    else:
+        query = shapes_graph.value(constraint, SH.select)
+        if query is None:
+            raise RulesetLoadError(f"{where}: a SPARQL cardinality rule needs a sh:select query")
+        query_count, query_area_tests, query_excluded_class = query_bounds(shapes_graph, str(query), where)
+        if query_count != min_count:
+            raise RulesetLoadError(f"{where}: nfc:requiredCount {min_count:g} disagrees with the query ({query_count})")
+        if sorted(query_area_tests) != sorted(area_tests):
+            raise RulesetLoadError(f"{where}: area bounds {area_tests} disagree with the query {query_area_tests}")
+        if query_excluded_class != excluded_class:
+            raise RulesetLoadError(
+                f"{where}: nfc:excludedClass {excluded_class} disagrees with the query ({query_excluded_class})"
+            )
+
+    return CardinalityRule(
+        shape=shape,
+        target_class=target_classes[0],
+        count_property=count_property,
+        min_count=int(min_count),
+        message=str(messages[0]),
+        severity=shapes_graph.value(constraint, SH.severity) or SH.Violation,
+        area_tests=area_tests,
+        excluded_class=excluded_class,
+        path=path,
+    )
+
+
+def query_bounds(
+    shapes_graph: Graph, query: str, where: str
+) -> Tuple[Optional[int], Tuple[Tuple[str, float], ...], Optional[URIRef]]:
+    """Minimum count, area tests and excluded class stated by the outer
+    ``FILTER`` conjuncts of a cardinality ``sh:select`` query (see module
+    docstring); the filters of subqueries and optional parts are not read.
+
+    Raises:
+        RulesetLoadError: the query does not parse, or has another outer filter
+    """
+    namespaces = tuple(sorted((prefix, str(namespace)) for prefix, namespace in shapes_graph.namespaces()))
+    try:
+        algebra = prepared_query(query, namespaces).algebra
+    except Exception as e:
+        raise RulesetLoadError(f"{where}: invalid sh:select query: {e}") from e
+
+    min_count: Optional[int] = None
+    area_tests: List[Tuple[str, float]] = []
+    excluded_class: Optional[URIRef] = None
+    for condition in _outer_filters(algebra.p):
+        if condition.name == "RelationalExpression" and isinstance(condition.expr, Variable):
+            bound = condition.other
+            if not isinstance(bound, Literal) or not isinstance(bound.toPython(), (int, float)):
+                raise RulesetLoadError(f"{where}: FILTER on ?{condition.expr} is not against a number")
+            if condition.expr == Variable("area"):
+                area_tests.append((condition.op, float(bound.toPython())))
+            elif condition.op in ("<", "<="):
+                min_count = int(bound.toPython()) + (condition.op == "<=")
+            else:
+                raise RulesetLoadError(f"{where}: unsupported count FILTER ?{condition.expr} {condition.op} {bound}")
+        elif condition.name == "Builtin_NOTEXISTS":
+            triples = _pattern_triples(condition.graph)
+            if triples is not None and len(triples) == 1 and triples[0][:2] == (Variable("this"), RDF.type):
+                excluded_class = triples[0][2]
+            else:
+                # No unit matching the pattern: at least one is required
+                min_count = 1
+        else:
+            raise RulesetLoadError(f"{where}: unsupported FILTER in a cardinality query: {condition.name}")
+    return min_count, tuple(area_tests), excluded_class
+
+
+def _outer_filters(node) -> Iterator[CompValue]:
+    """Conjuncts of the filters of the outer group of a query algebra."""
+    if not isinstance(node, CompValue):
+        return
+    if node.name == "Filter":
+        yield from _conjuncts(node.expr)
+        yield from _outer_filters(node.p)
+    elif node.name == "Join":
+        yield from _outer_filters(node.p1)
+        yield from _outer_filters(node.p2)
+    elif node.name in ("Project", "Distinct", "Reduced", "Slice", "OrderBy", "Extend"):
+        yield from _outer_filters(node.p)
+
+
+def _conjuncts(expression) -> Iterator[CompValue]:
+    if isinstance(expression, CompValue) and expression.name == "ConditionalAndExpression":
+        yield from _conjuncts(expression.expr)
+        for other in expression.other:
+            yield from _conjuncts(other)
+    else:
+        yield expression
+
+
+def _pattern_triples(pattern) -> Optional[List[tuple]]:
+    """Triples of a basic graph pattern, None if it holds anything else."""
+    if pattern.name == "BGP":
+        return [tuple(triple) for triple in pattern.triples]
+    if pattern.name == "Join":
+        left, right = _pattern_triples(pattern.p1), _pattern_triples(pattern.p2)
+        return None if left is None or right is None else left + right
+    if pattern.name == "GroupGraphPatternSub" and all(part.name == "TriplesBlock" for part in pattern.part):
+        return [tuple(triple) for part in pattern.part for triple in part.triples]
+    return None
+
+
+def _number(shapes_graph: Graph, node, predicate: URIRef, where: str) -> Optional[float]:
+    value = shapes_graph.value(node, predicate)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError as e:
+        raise RulesetLoadError(f"{where}: {predicate} is not a number: {value}") from e
+
+
+def _in_nfc(term) -> bool:
+    return isinstance(term, URIRef) and term.startswith(str(NFC))
+
+
+def _prefixed(term: URIRef) -> str:
+    """``nfc:`` prefixed name of ``term``."""
+    return "nfc:" + term[len(str(NFC)):]
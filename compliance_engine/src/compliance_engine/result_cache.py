@@ -0,0 +1,171 @@
+"""Content-addressed cache of validation responses.
+
+The frontend re-sends the same room equipment payload many times while users
+browse.  Validation is deterministic for a given payload and ruleset, so the
+responses of ``/validate/room-equipment`` and
+``/validate/global-with-dimensioning`` are kept in an in-process LRU cache with
+a TTL, keyed by a canonical hash of the request:
+
+- rooms sorted by id and equipment items sorted, enums reduced to their values
+  and specification keys sorted, so that key order and list order do not matter;
+  the global validation keeps the request order of rooms and equipment, which
+  its dimensioning (circuit and cable lists) follows
+- ``postal_code``, ``number_of_people`` and ``validation_options``
+- the equipment encoding and the version hash of the compiled ruleset, so a
+  rules reload never serves a stale report
+
+``installation_id`` is not part of the key: a hit returns the stored response
+with ``installation_id`` and ``timestamp`` rewritten.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import Settings, get_settings
+from .compact_model import AnyRoom, room_json
+
+
+def _canonical_json(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def canonical_rooms(rooms: Iterable[AnyRoom], ordered: bool = False) -> List[Dict[str, Any]]:
+    """Order-independent JSON view of ``rooms`` (with ``ordered``, rooms and
+    equipment keep the request order).
+
+    Rooms keep the request order when one id is a substring of another:
+    violations are attributed to rooms by id substring, first room first.
+    """
+    canonical = [room_json(room) for room in rooms]
+    if ordered:
+        return canonical
+    for data in canonical:
+        data["equipment"] = sorted(data.get("equipment") or [], key=_canonical_json)
+
+    room_ids = [room["room_id"] for room in canonical]
+    ambiguous = any(a != b and a in b for a in room_ids for b in room_ids)
+    if not ambiguous:
+        canonical.sort(key=lambda room: (room["room_id"], _canonical_json(room)))
+    return canonical
+
+
+def rooms_fingerprint(rooms: Iterable[AnyRoom]) -> str:
+    """SHA-256 of the canonical form of ``rooms``."""
+    return hashlib.sha256(_canonical_json(canonical_rooms(rooms)).encode("utf-8")).hexdigest()
+
+
+def installation_uuid(rooms: Iterable[AnyRoom]) -> str:
+    """Deterministic installation identifier (UUID-shaped) derived from the rooms."""
+    return str(uuid.UUID(hex=rooms_fingerprint(rooms)[:32]))
+
+
+def request_fingerprint(
+    endpoint: str,
+    rooms: Iterable[AnyRoom],
+    ruleset_version: str,
+    encoding: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    number_of_people: Optional[int] = None,
+    validation_options: Optional[Dict[str, Any]] = None,
+    ordered: bool = False,
+) -> str:
+    """Cache key of a validation request (``installation_id`` excluded).
+
+    With ``ordered`` the order of rooms and equipment is part of the key, for
+    responses that depend on it.
+    """
+    payload = {
+        "endpoint": endpoint,
+        "rooms": canonical_rooms(rooms, ordered),
+        "postal_code": postal_code,
+        "number_of_people": number_of_people,
+        "validation_options": validation_options or {},
+        "encoding": encoding,
+        "ruleset": ruleset_version,
+    }
+    return hashlib.sha256(_canonical_json(payload).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries expire ``ttl_seconds`` after insertion.
+
+    A ``max_entries`` of 0 disables caching.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300):
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Settings] = None) -> "ResultCache":
+        settings = settings or get_settings()
+        return cls(max_entries=settings.result_cache_size, ttl_seconds=settings.result_cache_ttl)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the live entry for ``key`` (marking it recently used) or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the live entry for ``key`` or None, leaving the hit/miss
+        counters and the LRU order untouched (lookups of other endpoints)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
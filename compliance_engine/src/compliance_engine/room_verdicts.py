@@ -0,0 +1,124 @@
+"""Memo of the room-local verdicts of rooms.
+
+The room-local shapes (see ``CompiledRuleset.room_local_shapes``) only read a
+room's type, its area and its equipment.  Their area tests are comparisons with
+a few constants taken from the shapes (``CompiledRuleset.area_breakpoints``,
+e.g. 4, 20 and 24 m²), so two rooms agree on every room-local rule when they
+have:
+
+- the same room type
+- the same area bucket: position of the area relative to each breakpoint, the
+  exact area when the shapes read it in another way, no area at all
+- the same equipment vector: unit count per equipment type and socket
+  specification (``current`` and ``socketType``, the only specifications
+  written to the graph and read by the missing-equipment counts)
+
+Together with the ruleset version, equipment encoding, focus area, rule groups
+and native-rules flag this forms the key of a :class:`RoomVerdict`, the room's
+room-local violations and the ``missing_equipment`` entries they give.  Stored
+violations refer to the room that produced them and are rewritten for the room
+they are served to (:func:`retarget_verdict`).
+"""
+
+import bisect
+import json
+import math
+import uuid
+from typing import Any, Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+from .config import Settings, get_settings
+from .compact_model import AnyRoom
+from .models import ValidationViolation
+from .result_cache import ResultCache
+
+
+class RoomVerdict(NamedTuple):
+    """Room-local outcome of one room."""
+
+    room_iri: str  # IRI of the room the violations refer to
+    room_violations: Tuple[ValidationViolation, ...]  # focus on the room itself
+    equipment_violations: Tuple[ValidationViolation, ...]  # focus on one of its equipment nodes
+    missing_equipment: Tuple[str, ...]  # derived from ``room_violations`` and the room's equipment
+
+
+def room_verdict_cache(settings: Optional[Settings] = None) -> ResultCache:
+    """LRU memo of room verdicts (``settings.room_verdict_cache_size``, 0 disables it).
+
+    Keys hold the ruleset version, so entries never go stale and do not expire.
+    """
+    settings = settings or get_settings()
+    return ResultCache(max_entries=settings.room_verdict_cache_size, ttl_seconds=math.inf)
+
+
+def area_bucket(area: Optional[float], breakpoints: Optional[Sequence[float]]) -> Optional[float]:
+    """Bucket of ``area``: 2·i for areas between breakpoints i-1 and i, 2·i + 1
+    on breakpoint i; the area itself without breakpoints, None without area."""
+    if area is None or breakpoints is None:
+        return area
+    index = bisect.bisect_left(breakpoints, area)
+    on_breakpoint = index < len(breakpoints) and breakpoints[index] == area
+    return 2 * index + on_breakpoint
+
+
+def equipment_vector(room: AnyRoom) -> Tuple[Tuple[str, str, str, int], ...]:
+    """Sorted unit counts of ``room`` per equipment type and socket specification."""
+    counts: Dict[Tuple[str, str, str], int] = {}
+    for eq_type, quantity, specifications in room.equipment_items():
+        if not quantity:
+            continue
+        specs = specifications if isinstance(specifications, dict) else {}
+        kind = (eq_type.value, _json(specs.get("current")), _json(specs.get("socketType")))
+        counts[kind] = counts.get(kind, 0) + quantity
+    return tuple(sorted(kind + (count,) for kind, count in counts.items()))
+
+
+def room_verdict_key(
+    room: AnyRoom,
+    breakpoints: Optional[Sequence[float]],
+    context: Tuple[Hashable, ...],
+) -> Tuple[Hashable, ...]:
+    """Memo key of ``room``; ``context`` identifies the ruleset version and shapes selection."""
+    room_type = room.room_type.value if hasattr(room.room_type, "value") else str(room.room_type)
+    return context + (room_type, area_bucket(room.room_area, breakpoints), equipment_vector(room))
+
+
+def memoizable(rooms: Iterable[AnyRoom]) -> bool:
+    """True if no two rooms share an id (such rooms form a single node)."""
+    room_ids = [room.room_id for room in rooms]
+    return len(set(room_ids)) == len(room_ids)
+
+
+def verdict_owners(rooms: Sequence[AnyRoom], room_iri: Callable[[str], Any]) -> Dict[str, str]:
+    """Room each room's own violations are reported under.
+
+    Violations are attributed to the first room whose id is a substring of
+    their focus node: ``bedroom1`` receives those of ``bedroom10`` if listed
+    first.
+    """
+    owners = {}
+    for room in rooms:
+        iri = str(room_iri(room.room_id))
+        owners[room.room_id] = next(other.room_id for other in rooms if other.room_id in iri)
+    return owners
+
+
+def retarget_verdict(verdict: RoomVerdict, room_iri: str) -> RoomVerdict:
+    """Copy of ``verdict`` for the room ``room_iri``, with new violation ids."""
+    def retarget(violation: ValidationViolation) -> ValidationViolation:
+        focus_node = room_iri if violation.focus_node == verdict.room_iri else violation.focus_node
+        return violation.model_copy(update={
+            "violation_id": str(uuid.uuid4()),
+            "focus_node": focus_node,
+            "value": room_iri if violation.value == verdict.room_iri else violation.value,
+        })
+
+    return RoomVerdict(
+        room_iri,
+        tuple(retarget(violation) for violation in verdict.room_violations),
+        tuple(retarget(violation) for violation in verdict.equipment_violations),
+        verdict.missing_equipment,
+    )
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
@@ -0,0 +1,170 @@
+"""Catalog of the NF C 15-100 rules declared by the SHACL shapes.
+
+A rule is one constraint of a shape, identified like the compiled native rules
+by ``(shape, message)``: the per-node and compact versions of a shape declare
+the same constraints with the same messages.  The catalog is built once per
+ruleset and also indexes the constraint nodes pyshacl reports as
+``sh:sourceShape`` / ``sh:sourceConstraint`` (property shapes, SPARQL
+constraints), so a result is mapped to its rule with dictionary lookups.
+
+The metadata of a rule is read from annotations of its constraint (or of the
+property shape and node shape holding it).  Every constraint declares its
+stable ``nfc:ruleId`` and its ``nfc:suggestedFix``; ``nfc:articleReference``,
+``nfc:requiredCount`` and ``nfc:equipmentCategory`` are optional, the article
+being otherwise read from the message and the required count from
+``sh:minCount``.
+"""
+
+import logging
+import re
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, RDFS, SH
+
+from .models import RuleInfo
+from .shacl_report import severity_level
+
+logger = logging.getLogger(__name__)
+
+NFC = Namespace("http://ontology.nfc15100.fr#")
+
+# Rule annotations of the shapes, ignored by pyshacl
+RULE_ANNOTATIONS = frozenset({
+    NFC.ruleId,
+    NFC.articleReference,
+    NFC.suggestedFix,
+    NFC.requiredCount,
+    NFC.equipmentCategory,
+})
+
+# Values of nfc:equipmentCategory, as counted per room by the validator
+EQUIPMENT_CATEGORIES = frozenset({"socket", "32A socket", "network socket", "lighting point", "switch"})
+
+_ARTICLE = re.compile(r"NF C 15-100(?:-\d+)?")
+_TRAILING_REFERENCE = re.compile(r"\s*\([^()]*\)\s*$")
+
+RuleKey = Tuple[str, str]  # (shape IRI, message)
+
+
+def _constraints(graph: Graph, shape: URIRef) -> Iterator[Tuple[object, Tuple[object, ...]]]:
+    """Constraint nodes of a node shape that declare messages, each with the
+    nodes its annotations are looked up on (itself first)."""
+    if any(True for _ in graph.objects(shape, SH.message)):
+        yield shape, (shape,)
+    for constraint in graph.objects(shape, SH.sparql):
+        yield constraint, (constraint, shape)
+    for property_shape in graph.objects(shape, SH.property):
+        yield property_shape, (property_shape, shape)
+        for constraint in graph.objects(property_shape, SH.sparql):
+            yield constraint, (constraint, property_shape, shape)
+
+
+def _annotation(graph: Graph, nodes: Sequence[object], predicate: URIRef) -> Optional[Literal]:
+    for node in nodes:
+        value = graph.value(node, predicate)
+        if value is not None:
+            return value
+    return None
+
+
+class RuleCatalog:
+    """Rules of one or more shapes graphs (the encodings of a ruleset).
+
+    ``shape_groups`` gives the rule group of every shape, used as category.
+
+    Raises:
+        ValueError: a constraint lacks its ``nfc:ruleId`` or
+            ``nfc:suggestedFix``, or two constraints share a rule id
+    """
+
+    def __init__(self, shapes_graphs: Iterable[Graph], shape_groups: Dict[URIRef, str]):
+        # (shape, message) -> graph and annotation nodes of its first declaration
+        declared: Dict[RuleKey, Tuple[Graph, Tuple[object, ...]]] = {}
+        messages_by_shape: Dict[URIRef, List[str]] = {}
+        # Reported source node -> IRI of its node shape
+        self.shape_of_node: Dict[str, str] = {}
+        for graph in shapes_graphs:
+            for shape in sorted(set(graph.subjects(RDF.type, SH.NodeShape))):
+                self.shape_of_node[str(shape)] = str(shape)
+                for constraint, nodes in _constraints(graph, shape):
+                    self.shape_of_node[str(constraint)] = str(shape)
+                    for message in graph.objects(constraint, SH.message):
+                        key = (str(shape), str(message))
+                        if key not in declared:
+                            declared[key] = (graph, nodes)
+                            messages_by_shape.setdefault(shape, []).append(str(message))
+
+        self.rules: Dict[str, RuleInfo] = {}
+        self.by_key: Dict[RuleKey, RuleInfo] = {}
+        self.rule_ids_by_shape: Dict[URIRef, Tuple[str, ...]] = {}
+        for shape, messages in messages_by_shape.items():
+            rule_ids = []
+            for message in sorted(messages):
+                graph, nodes = declared[(str(shape), message)]
+                rule = self._rule(graph, nodes, shape, message, shape_groups.get(shape))
+                if rule.rule_id in self.rules:
+                    raise ValueError(f"Duplicate rule id {rule.rule_id} ({shape})")
+                self.rules[rule.rule_id] = rule
+                self.by_key[(str(shape), message)] = rule
+                rule_ids.append(rule.rule_id)
+            self.rule_ids_by_shape[shape] = tuple(rule_ids)
+
+    @staticmethod
+    def _rule(
+        graph: Graph,
+        nodes: Tuple[object, ...],
+        shape: URIRef,
+        message: str,
+        category: Optional[str],
+    ) -> RuleInfo:
+        rule_id = _annotation(graph, nodes[:-1] or nodes, NFC.ruleId)
+        fix = _annotation(graph, nodes, NFC.suggestedFix)
+        if rule_id is None or fix is None:
+            missing = [str(name) for name, value in ((NFC.ruleId, rule_id), (NFC.suggestedFix, fix)) if value is None]
+            raise ValueError(f"Constraint without {', '.join(missing)} ({shape}: {message})")
+        title = _annotation(graph, nodes, SH.name) or _annotation(graph, nodes, RDFS.label)
+        severity = _annotation(graph, nodes, SH.severity)
+        article = _annotation(graph, nodes, NFC.articleReference)
+        if article is None:
+            match = _ARTICLE.search(message)
+            article = match.group(0) if match else None
+        required_count = _annotation(graph, nodes, NFC.requiredCount)
+        if required_count is None:
+            required_count = _annotation(graph, nodes, SH.minCount)
+        equipment_category = _annotation(graph, nodes, NFC.equipmentCategory)
+        if equipment_category is not None and str(equipment_category) not in EQUIPMENT_CATEGORIES:
+            logger.warning(f"⚠️ Unknown equipment category {equipment_category!s} ({shape}: {message})")
+        return RuleInfo(
+            rule_id=str(rule_id),
+            title=str(title) if title is not None else _TRAILING_REFERENCE.sub("", message),
+            description=message,
+            category=category or "",
+            severity=severity_level(str(severity) if severity is not None else str(SH.Violation)),
+            article_reference=str(article) if article is not None else None,
+            source_shape=str(shape),
+            suggested_fix=str(fix),
+            required_count=int(required_count) if required_count is not None else None,
+            equipment_category=str(equipment_category) if equipment_category is not None else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def rule(self, shape: Optional[str], message: str) -> Optional[RuleInfo]:
+        """Rule declaring ``message`` in ``shape``."""
+        return self.by_key.get((shape or "", message))
+
+    def lookup(
+        self, source_shape: Optional[str], source_constraint: Optional[str], message: str
+    ) -> Optional[RuleInfo]:
+        """Rule of a pyshacl result from its source shape / constraint nodes."""
+        shape = self.shape_of_node.get(source_constraint or "") or self.shape_of_node.get(source_shape or "")
+        return self.by_key.get((shape, message)) if shape is not None else None
+
+    def rule_ids_for(self, shapes: Iterable[URIRef]) -> Tuple[str, ...]:
+        """Ids of the rules of ``shapes``, in catalog order."""
+        shapes: FrozenSet[URIRef] = frozenset(shapes)
+        return tuple(
+            rule_id for shape, rule_ids in self.rule_ids_by_shape.items() if shape in shapes for rule_id in rule_ids
+        )
@@ -0,0 +1,882 @@
+"""Compiled NF C 15-100 ruleset shared by every validator of the process.
+
+Parsing the ontology and the SHACL shapes is by far the most expensive part of a
+small validation.  The :class:`CompiledRuleset` holds everything derived from the
+Turtle files (parsed graphs, focus-area subgraphs, rule metadata) and is built
+once per process.  Validators always read the *current* ruleset through
+:func:`get_ruleset`; :func:`reload_ruleset` builds a new one and swaps it in
+atomically so rules can be updated without restarting the workers.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF, RDFS, XSD
+
+from .config import Settings, get_settings, resolve_path
+from .models import RuleInfo
+from .rule_catalog import RULE_ANNOTATIONS, RuleCatalog
+from .shacl_engine import PreparedShapes
+
+if TYPE_CHECKING:
+    from .native_rules import NativeRuleTable
+
+logger = logging.getLogger(__name__)
+
+# Define NF C 15-100 namespace - MUST match the ontology files
+NFC = Namespace("http://ontology.nfc15100.fr#")
+SH = Namespace("http://www.w3.org/ns/shacl#")
+
+# Focus areas for which a filtered shapes graph is precompiled
+ROOM_EQUIPMENT_FOCUS = "room-equipment"
+# Partition used by the incremental global validation: the room-equipment
+# shapes reading only rooms and their equipment, the other room-equipment
+# shapes, and every shape but the equipment-only ones
+EQUIPMENT_ONLY_FOCUS = "equipment-only"
+ROOM_EQUIPMENT_REMAINDER_FOCUS = "room-equipment-remainder"
+DIMENSIONING_PASS_FOCUS = "dimensioning-pass"
+FOCUS_AREAS = (
+    ROOM_EQUIPMENT_FOCUS,
+    EQUIPMENT_ONLY_FOCUS,
+    ROOM_EQUIPMENT_REMAINDER_FOCUS,
+    DIMENSIONING_PASS_FOCUS,
+)
+
+# Shape scopes: shapes checking one room from its own subgraph, and the others
+ROOM_LOCAL_SCOPE = "room-local"
+INSTALLATION_SCOPE = "installation"
+SCOPES = (ROOM_LOCAL_SCOPE, INSTALLATION_SCOPE)
+
+# Equipment encodings of the data graph, each validated by its own shapes graph
+NODES_ENCODING = "nodes"
+COMPACT_ENCODING = "compact"
+EQUIPMENT_ENCODINGS = (NODES_ENCODING, COMPACT_ENCODING)
+
+# Annotations of the constraints counting equipment nodes, declaring how their
+# compact variant reads the count literals (see _compact_shapes).  The room area
+# bounds map to SPARQL comparisons.
+AREA_BOUNDS: Dict[URIRef, str] = {
+    NFC.areaAbove: ">",
+    NFC.areaAtLeast: ">=",
+    NFC.areaBelow: "<",
+    NFC.areaAtMost: "<=",
+}
+COUNT_ANNOTATIONS = frozenset({NFC.countProperty, NFC.countQuery, NFC.excludedClass, *AREA_BOUNDS})
+# Cardinality of a property shape, replaced by the count query of its compact variant
+CARDINALITY_PREDICATES = frozenset({
+    SH.minCount,
+    SH.qualifiedMinCount,
+    SH.qualifiedValueShape,
+    SH.qualifiedValueShapesDisjoint,
+})
+
+# Messages that indicate dimensioning rules to exclude from room-equipment validation
+DIMENSIONING_KEYWORDS = [
+    "Installation doit avoir système de mise à la terre",
+    "Prise réseau doit utiliser référence SCH5520476",
+    "Prise réseau doit utiliser boîte encastement EUR52061",
+    "Prise réseau nécessite câble type RJ45",
+    "Installation : circuits d'éclairage insuffisants",
+    "L'installation électrique doit comporter au moins un circuit",
+    "Installation : nombre de circuits 16A",
+    "Évaluation du risque foudre obligatoire",
+    "nécessite section câble",
+    "doit utiliser référence SCH",
+    "doit utiliser boîte encastement EUR",
+    "circuits 16A (prises) inférieur",
+    "circuits 16A (prises) insuffisant",
+    "circuits d'éclairage insuffisants",
+    "minimum 2 circuits d'éclairage",
+    "Parafoudre obligatoire",
+    "nombre de disjoncteurs",
+    "Les équipements spécialisés doivent avoir un circuit dédié",
+]
+
+
+# Named rule groups, selectable through ``validation_options.rule_groups``
+ROOM_EQUIPMENT_GROUP = "room-equipment"
+DIMENSIONING_GROUP = "dimensioning"
+PROTECTION_GROUP = "protection"
+NETWORK_GROUP = "network"
+GLOBAL_INSTALLATION_GROUP = "global-installation"
+RULE_GROUPS = (
+    ROOM_EQUIPMENT_GROUP,
+    DIMENSIONING_GROUP,
+    PROTECTION_GROUP,
+    NETWORK_GROUP,
+    GLOBAL_INSTALLATION_GROUP,
+)
+
+# Messages of the communication network rules (RJ45, TV sockets)
+NETWORK_KEYWORDS = [
+    "réseau",
+    "RJ45",
+    "Prise TV",
+]
+
+# Messages of the protection rules (surge, lightning, grounding, breakers)
+PROTECTION_KEYWORDS = [
+    "Parafoudre",
+    "foudre",
+    "surtensions",
+    "mise à la terre",
+    "Résistance de terre",
+    "dispositif de protection",
+    "calibre du disjoncteur",
+    "protégés par gaine",
+]
+
+
+class RulesetLoadError(RuntimeError):
+    """Raised when the ontology or the shapes of a ruleset cannot be loaded."""
+
+
+def _parse_turtle(path: Path, label: str, digest: Any) -> Graph:
+    """Parse the Turtle file ``path`` and add its content to ``digest``."""
+    if not path.exists():
+        raise RulesetLoadError(f"{label} file not found: {path}")
+    data = path.read_bytes()
+    graph = Graph()
+    try:
+        graph.parse(data=data, format="turtle")
+    except Exception as e:
+        raise RulesetLoadError(f"Error parsing the {label} file {path}: {e}") from e
+    digest.update(data)
+    digest.update(b"\0")
+    return graph
+
+
+class ShapesSelection(NamedTuple):
+    """Shapes validated for a (focus area, encoding, rule groups) selection."""
+
+    graph: Graph
+    native_rules: "NativeRuleTable"
+    native_graph: Graph  # ``graph`` without the natively evaluated constraints
+    prepared: PreparedShapes
+    native_prepared: PreparedShapes
+    rule_ids: Tuple[str, ...]  # catalog rules of ``graph``
+
+
+class CompiledRuleset:
+    """Immutable bundle of the parsed ontology, shapes and derived lookup tables.
+
+    Instances are never mutated after construction: a reload builds a new
+    ruleset and swaps it in, so a validation that captured a ruleset keeps a
+    consistent view even if a reload happens concurrently.  The only state
+    filled after construction is the memo of rule-group combinations
+    (:meth:`selection`), derived from the immutable shapes.
+    """
+
+    def __init__(
+        self,
+        ontology_graph: Graph,
+        shapes_graph: Graph,
+        version: str,
+        count_shapes_graph: Optional[Graph] = None,
+    ):
+        self.ontology_graph = ontology_graph
+        self.shapes_graph = shapes_graph
+        self.version = version
+
+        # The compact encoding needs the count queries of the installation-wide
+        # aggregates; without them only the per-node encoding is available
+        self.encoding_graphs: Dict[str, Graph] = {NODES_ENCODING: shapes_graph}
+        if count_shapes_graph is not None:
+            self.encoding_graphs[COMPACT_ENCODING] = _compact_shapes(shapes_graph, count_shapes_graph)
+
+        # RDFS closure of the ontology, used to materialise inferred triples
+        # directly instead of running a full RDFS expansion on every request
+        self.superclasses = _transitive_closure(ontology_graph, RDFS.subClassOf)
+        self.superproperties = _transitive_closure(ontology_graph, RDFS.subPropertyOf)
+        self.domain_types = self._closed_property_classes(RDFS.domain)
+        self.range_types = self._closed_property_classes(RDFS.range)
+
+        # Precompile the focus-area subgraphs once instead of on every request
+        self.focus_graphs: Dict[Tuple[str, str], Graph] = {}
+        for encoding, graph in self.encoding_graphs.items():
+            focus_graph = _filter_shapes_by_keywords(graph, DIMENSIONING_KEYWORDS)
+            self.focus_graphs[(ROOM_EQUIPMENT_FOCUS, encoding)] = focus_graph
+            logger.info(
+                f"🔍 Compiled focus area {ROOM_EQUIPMENT_FOCUS} ({encoding}): kept "
+                f"{len(focus_graph)} triples from {len(graph)}"
+            )
+
+        # Rule group of every shape, explicit (nfc:ruleGroup) or derived
+        self.shape_groups: Dict[URIRef, str] = {}
+        for graph in self.encoding_graphs.values():
+            for shape_node in sorted(set(graph.subjects(RDF.type, SH.NodeShape))):
+                self.shape_groups.setdefault(shape_node, self._shape_group(graph, shape_node))
+
+        # Rules declared by the shapes, indexed by shape / constraint node
+        try:
+            self.rule_catalog = RuleCatalog(self.encoding_graphs.values(), self.shape_groups)
+        except ValueError as e:
+            raise RulesetLoadError(str(e)) from e
+        self.rules_info: Dict[str, RuleInfo] = self.rule_catalog.rules
+        logger.info(f"📚 Rule catalog: {len(self.rule_catalog)} rules")
+
+        # Room-equipment shapes whose results carry over from the room-equipment
+        # graph to the complete one (same rooms and equipment, the dimensioning
+        # only adds installation-level triples)
+        from .graph_builder import DIMENSIONING_TERMS, HAS_ROOM
+
+        self.equipment_only_shapes: Dict[str, FrozenSet[URIRef]] = {}
+        # Shapes that can be validated on the subgraph of each room on its own
+        self.room_local_shapes: Dict[str, FrozenSet[URIRef]] = {}
+        # Room areas the room-local shapes compare against, None if they read
+        # the area otherwise
+        self.area_breakpoints: Dict[str, Optional[Tuple[float, ...]]] = {}
+        for encoding, graph in self.encoding_graphs.items():
+            room_graph = self.focus_graphs[(ROOM_EQUIPMENT_FOCUS, encoding)]
+            equipment_only = self._equipment_only_shapes(room_graph, DIMENSIONING_TERMS)
+            self.equipment_only_shapes[encoding] = equipment_only
+            room_shapes = frozenset(room_graph.subjects(RDF.type, SH.NodeShape))
+            all_shapes = frozenset(graph.subjects(RDF.type, SH.NodeShape))
+            self.focus_graphs[(EQUIPMENT_ONLY_FOCUS, encoding)] = _select_shapes(room_graph, equipment_only)
+            self.focus_graphs[(ROOM_EQUIPMENT_REMAINDER_FOCUS, encoding)] = _select_shapes(
+                room_graph, room_shapes - equipment_only
+            )
+            self.focus_graphs[(DIMENSIONING_PASS_FOCUS, encoding)] = _select_shapes(graph, all_shapes - equipment_only)
+            logger.info(
+                f"🔍 {len(equipment_only)} of {len(room_shapes)} room-equipment shapes ({encoding}) "
+                f"read only rooms and their equipment"
+            )
+            room_local = self._equipment_only_shapes(graph, DIMENSIONING_TERMS | {HAS_ROOM}, same_room=True)
+            self.room_local_shapes[encoding] = room_local
+            logger.info(f"🏠 {len(room_local)} of {len(all_shapes)} shapes ({encoding}) are room-local")
+
+        # Room cardinality rules evaluated natively (see native_rules), the
+        # shapes left to pyshacl once their constraints are removed, and the
+        # pyshacl shapes graphs wrapped and harvested once (see shacl_engine)
+        from .native_rules import compile_cardinality_rules
+
+        self.cardinality_rules = compile_cardinality_rules(shapes_graph)
+        native_bounds = {bound for rule in self.cardinality_rules.rules for _comparison, bound in rule.area_tests}
+        for encoding, graph in self.encoding_graphs.items():
+            breakpoints = self._area_breakpoints(graph, self.room_local_shapes[encoding])
+            if breakpoints is not None:
+                breakpoints = tuple(sorted(native_bounds.union(breakpoints)))
+            self.area_breakpoints[encoding] = breakpoints
+            logger.info(f"📐 Room-local area breakpoints ({encoding}): {breakpoints}")
+        self._selections: Dict[
+            Tuple[Optional[str], str, Optional[FrozenSet[str]], Optional[str]], ShapesSelection
+        ] = {}
+        self._selections_lock = threading.Lock()
+        for encoding in self.encoding_graphs:
+            for focus_area in (None, ROOM_EQUIPMENT_FOCUS):
+                for rule_groups in (None, *((group,) for group in RULE_GROUPS)):
+                    self.selection(focus_area, encoding, rule_groups)
+            for focus_area in (EQUIPMENT_ONLY_FOCUS, ROOM_EQUIPMENT_REMAINDER_FOCUS, DIMENSIONING_PASS_FOCUS):
+                self.selection(focus_area, encoding)
+            for focus_area in (None, ROOM_EQUIPMENT_FOCUS):
+                for scope in SCOPES:
+                    self.selection(focus_area, encoding, scope=scope)
+        logger.info(f"🧩 Prepared {len(self._selections)} shapes selections")
+
+    @classmethod
+    def load(cls, settings: Optional[Settings] = None) -> "CompiledRuleset":
+        """Parse the ontology and SHACL shapes configured in ``settings``.
+
+        Raises:
+            RulesetLoadError: the ontology or shapes file is missing or does not
+                parse, the shapes file declares no shape, or a count annotation
+                of a shape is invalid.  There is no fallback: an empty ruleset
+                would report every installation as compliant.  A missing count
+                shapes file only disables the compact encoding.
+        """
+        settings = settings or get_settings()
+        digest = hashlib.sha256()
+
+        ontology_graph = _parse_turtle(resolve_path(settings.ontology_path), "ontology", digest)
+        logger.info(f"✅ Loaded ontology from {settings.ontology_path} ({len(ontology_graph)} triples)")
+        shapes_graph = _parse_turtle(resolve_path(settings.shapes_path), "SHACL shapes", digest)
+        if next(shapes_graph.subjects(RDF.type, SH.NodeShape), None) is None:
+            raise RulesetLoadError(f"No sh:NodeShape in the SHACL shapes file {settings.shapes_path}")
+        logger.info(f"✅ Loaded SHACL shapes from {settings.shapes_path} ({len(shapes_graph)} triples)")
+
+        count_shapes_path = resolve_path(settings.count_shapes_path)
+        if count_shapes_path.exists():
+            count_shapes_graph = _parse_turtle(count_shapes_path, "count shapes", digest)
+            logger.info(f"✅ Loaded count shapes from {count_shapes_path} ({len(count_shapes_graph)} triples)")
+        else:
+            logger.error(f"❌ Count shapes file not found: {count_shapes_path}, compact encoding disabled")
+            count_shapes_graph = None
+
+        return cls(
+            ontology_graph,
+            shapes_graph,
+            version=digest.hexdigest()[:16],
+            count_shapes_graph=count_shapes_graph,
+        )
+
+    def encoding_for(self, encoding: Optional[str]) -> str:
+        """Return ``encoding`` if this ruleset can validate it, else the per-node encoding."""
+        if encoding in self.encoding_graphs:
+            return encoding
+        if encoding is not None and encoding != NODES_ENCODING:
+            logger.warning(f"⚠️ Equipment encoding {encoding!r} unavailable, falling back to {NODES_ENCODING}")
+        return NODES_ENCODING
+
+    def selection(
+        self,
+        focus_area: Optional[str],
+        encoding: str = NODES_ENCODING,
+        rule_groups: Optional[Iterable[str]] = None,
+        scope: Optional[str] = None,
+    ) -> ShapesSelection:
+        """Shapes of ``focus_area`` (all shapes by default) matching the equipment
+        ``encoding`` of the data graph, restricted to ``rule_groups`` and to the
+        room-local or installation ``scope`` if given.
+
+        Selections are built once and shared; combinations of several groups
+        are built on first use.
+        """
+        encoding = self.encoding_for(encoding)
+        if (focus_area, encoding) not in self.focus_graphs:
+            focus_area = None
+        groups = frozenset(rule_groups) if rule_groups is not None else None
+        if groups is not None:
+            unknown = groups - set(RULE_GROUPS)
+            if unknown:
+                raise ValueError(f"Unknown rule groups: {sorted(unknown)}")
+            if groups == set(RULE_GROUPS):
+                groups = None
+        if scope is not None and scope not in SCOPES:
+            raise ValueError(f"Unknown shape scope: {scope!r}")
+
+        key = (focus_area, encoding, groups, scope)
+        selection = self._selections.get(key)
+        if selection is None:
+            with self._selections_lock:
+                selection = self._selections.get(key)
+                if selection is None:
+                    selection = self._selections[key] = self._build_selection(*key)
+        return selection
+
+    def shapes_for(
+        self,
+        focus_area: Optional[str],
+        encoding: str = NODES_ENCODING,
+        native: bool = False,
+        rule_groups: Optional[Iterable[str]] = None,
+        scope: Optional[str] = None,
+    ) -> Graph:
+        """Return the precompiled shapes graph of :meth:`selection`.
+
+        With ``native`` the constraints of :meth:`native_rules_for` are left out.
+        """
+        selection = self.selection(focus_area, encoding, rule_groups, scope)
+        return selection.native_graph if native else selection.graph
+
+    def prepared_shapes_for(
+        self,
+        focus_area: Optional[str],
+        encoding: str = NODES_ENCODING,
+        native: bool = False,
+        rule_groups: Optional[Iterable[str]] = None,
+        scope: Optional[str] = None,
+    ) -> PreparedShapes:
+        """:class:`PreparedShapes` of :meth:`shapes_for` (same arguments)."""
+        selection = self.selection(focus_area, encoding, rule_groups, scope)
+        return selection.native_prepared if native else selection.prepared
+
+    def native_rules_for(
+        self,
+        focus_area: Optional[str],
+        encoding: str = NODES_ENCODING,
+        rule_groups: Optional[Iterable[str]] = None,
+        scope: Optional[str] = None,
+    ) -> "NativeRuleTable":
+        """Cardinality rules of the selection evaluated without pyshacl."""
+        return self.selection(focus_area, encoding, rule_groups, scope).native_rules
+
+    def shapes_in_groups(self, rule_groups: Iterable[str]) -> FrozenSet[URIRef]:
+        """IRIs of the shapes belonging to ``rule_groups``."""
+        rule_groups = set(rule_groups)
+        return frozenset(shape for shape, group in self.shape_groups.items() if group in rule_groups)
+
+    def _build_selection(
+        self, focus_area: Optional[str], encoding: str, groups: Optional[FrozenSet[str]], scope: Optional[str]
+    ) -> ShapesSelection:
+        graph = self.focus_graphs.get((focus_area, encoding), self.encoding_graphs[encoding])
+        if groups is not None:
+            graph = _select_shapes(graph, self.shapes_in_groups(groups))
+        if scope is not None:
+            shapes = frozenset(graph.subjects(RDF.type, SH.NodeShape))
+            room_local = self.room_local_shapes[encoding]
+            graph = _select_shapes(graph, shapes & room_local if scope == ROOM_LOCAL_SCOPE else shapes - room_local)
+        shapes = frozenset(graph.subjects(RDF.type, SH.NodeShape))
+        native_rules = self.cardinality_rules.restricted_to(shapes)
+        native_graph = _without_constraints(graph, native_rules.keys)
+        return ShapesSelection(
+            graph=graph,
+            native_rules=native_rules,
+            native_graph=native_graph,
+            prepared=PreparedShapes(graph),
+            native_prepared=PreparedShapes(native_graph),
+            rule_ids=self.rule_catalog.rule_ids_for(shapes),
+        )
+
+    def _shape_group(self, shapes_graph: Graph, shape_node) -> str:
+        """Rule group of a shape: its ``nfc:ruleGroup`` if any, else derived from
+        its messages (network, protection, dimensioning keywords) and target."""
+        explicit = shapes_graph.value(shape_node, NFC.ruleGroup)
+        if explicit is not None and str(explicit) in RULE_GROUPS:
+            return str(explicit)
+
+        messages = _shape_messages(shapes_graph, shape_node)
+        for group, keywords in (
+            (NETWORK_GROUP, NETWORK_KEYWORDS),
+            (PROTECTION_GROUP, PROTECTION_KEYWORDS),
+            (DIMENSIONING_GROUP, DIMENSIONING_KEYWORDS),
+        ):
+            if any(keyword in message for message in messages for keyword in keywords):
+                return group
+
+        targets = set(shapes_graph.objects(shape_node, SH.targetClass))
+        if NFC.ElectricalInstallation in targets:
+            return GLOBAL_INSTALLATION_GROUP
+        # Rooms and the placement of their sockets
+        for target in targets:
+            if {NFC.Room, NFC.Socket} & set(self.types_for(target)):
+                return ROOM_EQUIPMENT_GROUP
+        return DIMENSIONING_GROUP
+
+    def _equipment_only_shapes(
+        self, shapes_graph: Graph, excluded_terms: FrozenSet[URIRef], same_room: bool = False
+    ) -> FrozenSet[URIRef]:
+        """Shapes of ``shapes_graph`` that read only rooms and their equipment.
+
+        A shape qualifies if it targets classes none of the ``excluded_terms``
+        classes (nor the installation) can be an instance of, and if neither its
+        paths nor its SPARQL queries use one of ``excluded_terms``.  With
+        ``same_room`` its queries must not match rooms by class either, so that
+        only the focus room is read.  Shapes referring to one another
+        (``sh:node``) qualify together or not at all.
+        """
+        shapes = set(shapes_graph.subjects(RDF.type, SH.NodeShape))
+        excluded_types = {NFC.ElectricalInstallation}
+        for term in excluded_terms:
+            excluded_types.update(self.types_for(term))
+        term_pattern = re.compile(
+            r"\bnfc:(?:" + "|".join(sorted(re.escape(term.split("#")[-1]) for term in excluded_terms)) + r")\b"
+        )
+
+        qualifying = set()
+        components = {shape: {shape} for shape in shapes}
+        for shape in sorted(shapes):
+            triples = Graph()
+            _copy_shape_triples(shapes_graph, triples, shape)
+            terms = set(triples.predicates()) | {o for o in triples.objects() if isinstance(o, URIRef)}
+            for other in terms & shapes:
+                merged = components[shape] | components[other]
+                for member in merged:
+                    components[member] = merged
+
+            targets = set(triples.objects(shape, SH.targetClass))
+            if not targets or set(triples.predicates(shape)) & {SH.targetNode, SH.targetSubjectsOf, SH.targetObjectsOf}:
+                continue
+            if targets & excluded_types or terms & excluded_terms:
+                continue
+            queries = [*triples.objects(None, SH.select), *triples.objects(None, SH.ask)]
+            if any(term_pattern.search(str(query)) for query in queries):
+                continue
+            if same_room and any(
+                NFC.Room in self.types_for(NFC[name])
+                for query in queries
+                for name in _TYPED_VARIABLE.findall(str(query))
+            ):
+                continue
+            qualifying.add(shape)
+
+        return frozenset(shape for shape in qualifying if components[shape] <= qualifying)
+
+    def _area_breakpoints(
+        self, shapes_graph: Graph, shape_nodes: FrozenSet[URIRef]
+    ) -> Optional[Tuple[float, ...]]:
+        """Areas the ``nfc:roomArea`` of a room is compared with by ``shape_nodes``.
+
+        Rooms on the same side of (or equal to) every breakpoint get the same
+        results from these shapes.  None if a shape reads the area other than
+        through ``FILTER(?area OP number)`` comparisons in its SPARQL queries.
+        """
+        breakpoints = set()
+        for shape in sorted(shape_nodes):
+            triples = Graph()
+            _copy_shape_triples(shapes_graph, triples, shape)
+            if NFC.roomArea in set(triples.predicates()) | set(triples.objects()):
+                return None
+            messages = [str(message) for message in triples.objects(None, SH.message)]
+            for query in (*triples.objects(None, SH.select), *triples.objects(None, SH.ask)):
+                query = str(query)
+                variables = _AREA_VARIABLE.findall(query)
+                if query.count("nfc:roomArea") != len(variables):
+                    return None
+                for variable in set(variables):
+                    comparisons = [
+                        float(number)
+                        for pattern in _area_comparisons(variable)
+                        for number in pattern.findall(query)
+                    ]
+                    uses = len(re.findall(r"[?$]" + variable + r"\b", query))
+                    # A projected variable only matters to message templates
+                    head = query.split("WHERE", 1)[0] if "SELECT" in query else ""
+                    projected = len(re.findall(r"[?$]" + variable + r"\b", head))
+                    if projected and any(
+                        marker + variable + "}" in message for marker in ("{?", "{$") for message in messages
+                    ):
+                        return None
+                    if uses != projected + variables.count(variable) + len(comparisons):
+                        return None
+                    breakpoints.update(comparisons)
+        return tuple(sorted(breakpoints))
+
+    def types_for(self, class_uri: URIRef) -> Tuple[URIRef, ...]:
+        """Return ``class_uri`` followed by all its (transitive) superclasses."""
+        return (class_uri,) + tuple(sorted(self.superclasses.get(class_uri, ())))
+
+    def entail(self, data_graph: Graph) -> Graph:
+        """Add the RDFS-inferred triples of ``data_graph`` in place.
+
+        Applies subPropertyOf, domain, range and subClassOf entailment in a
+        single pass using the closures computed at load time, which yields the
+        same instance typing as pyshacl's ``inference='rdfs'``.
+        """
+        inferred = []
+        for s, p, o in data_graph:
+            for super_property in self.superproperties.get(p, ()):
+                inferred.append((s, super_property, o))
+            for class_uri in self.domain_types.get(p, ()):
+                inferred.append((s, RDF.type, class_uri))
+            if not isinstance(o, Literal):
+                for class_uri in self.range_types.get(p, ()):
+                    inferred.append((o, RDF.type, class_uri))
+            if p == RDF.type:
+                for class_uri in self.superclasses.get(o, ()):
+                    inferred.append((s, RDF.type, class_uri))
+        for triple in inferred:
+            data_graph.add(triple)
+        return data_graph
+
+    def _closed_property_classes(self, predicate: URIRef) -> Dict[URIRef, FrozenSet[URIRef]]:
+        """Map each property to the classes implied by ``predicate`` (domain/range),
+        including those inherited from superproperties and their superclasses."""
+        direct: Dict[URIRef, set] = {}
+        for prop, class_uri in self.ontology_graph.subject_objects(predicate):
+            direct.setdefault(prop, set()).add(class_uri)
+
+        closed: Dict[URIRef, FrozenSet[URIRef]] = {}
+        properties = set(direct) | set(self.superproperties)
+        for prop in properties:
+            classes = set()
+            for p in (prop, *self.superproperties.get(prop, ())):
+                for class_uri in direct.get(p, ()):
+                    classes.add(class_uri)
+                    classes.update(self.superclasses.get(class_uri, ()))
+            # Literal ranges (xsd:*) never type a node
+            classes = {c for c in classes if not str(c).startswith(str(XSD))}
+            if classes:
+                closed[prop] = frozenset(classes)
+        return closed
+
+
+# Class of a variable other than the focus node in a SPARQL query ("?room a nfc:Bedroom")
+_TYPED_VARIABLE = re.compile(r"\?\w+\s+(?:a|rdf:type)\s+nfc:(\w+)")
+
+# Variable bound to a room area in a SPARQL query ("?room nfc:roomArea ?area")
+_AREA_VARIABLE = re.compile(r"nfc:roomArea\s+\?(\w+)")
+_COMPARISON_OPERATOR = r"(?:<=|>=|!=|<|>|=)"
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+
+
+def _area_comparisons(variable: str) -> Tuple["re.Pattern[str]", "re.Pattern[str]"]:
+    """Patterns of ``?variable OP number`` and ``number OP ?variable``."""
+    return (
+        re.compile(r"[?$]" + variable + r"\s*" + _COMPARISON_OPERATOR + r"\s*" + _NUMBER + r"\b"),
+        re.compile(_NUMBER + r"\s*" + _COMPARISON_OPERATOR + r"\s*[?$]" + variable + r"\b"),
+    )
+
+
+def _transitive_closure(graph: Graph, predicate: URIRef) -> Dict[URIRef, FrozenSet[URIRef]]:
+    """Return, for each subject of ``predicate``, every node reachable through it."""
+    direct: Dict[URIRef, set] = {}
+    for child, parent in graph.subject_objects(predicate):
+        if child != parent:
+            direct.setdefault(child, set()).add(parent)
+
+    closure: Dict[URIRef, FrozenSet[URIRef]] = {}
+    for node in direct:
+        reachable = set()
+        stack = list(direct[node])
+        while stack:
+            parent = stack.pop()
+            if parent in reachable or parent == node:
+                continue
+            reachable.add(parent)
+            stack.extend(direct.get(parent, ()))
+        closure[node] = frozenset(reachable)
+    return closure
+
+
+def _shape_messages(shapes_graph: Graph, shape_node) -> List[str]:
+    """Messages of the nested property and SPARQL constraints of a shape."""
+    messages = []
+    for constraint_predicate in (SH.property, SH.sparql):
+        for constraint in shapes_graph.objects(shape_node, constraint_predicate):
+            for message in shapes_graph.objects(constraint, SH.message):
+                if isinstance(message, Literal):
+                    messages.append(str(message))
+    return messages
+
+
+def _select_shapes(shapes_graph: Graph, shape_nodes: FrozenSet[URIRef]) -> Graph:
+    """Copy the NodeShapes of ``shapes_graph`` listed in ``shape_nodes``."""
+    selected_graph = Graph()
+    for ns_prefix, ns_uri in shapes_graph.namespaces():
+        selected_graph.bind(ns_prefix, ns_uri)
+    for shape_node in set(shapes_graph.subjects(RDF.type, SH.NodeShape)) & shape_nodes:
+        _copy_shape_triples(shapes_graph, selected_graph, shape_node)
+    return selected_graph
+
+
+def _filter_shapes_by_keywords(shapes_graph: Graph, keywords: List[str]) -> Graph:
+    """Copy every NodeShape whose property/SPARQL messages match none of ``keywords``.
+
+    Used for room-equipment focus to exclude dimensioning-related rules like:
+    - Technical specifications (references, cables, enclosures)
+    - Circuit calculations (circuit counts, breaker sizing)
+    - Global installation rules (grounding, lightning protection)
+    """
+    filtered_graph = Graph()
+
+    # Copy namespace declarations
+    for ns_prefix, ns_uri in shapes_graph.namespaces():
+        filtered_graph.bind(ns_prefix, ns_uri)
+
+    for shape_node in set(shapes_graph.subjects(RDF.type, SH.NodeShape)):
+        # Check nested property and SPARQL constraint messages of this shape
+        should_exclude = any(
+            keyword in message for message in _shape_messages(shapes_graph, shape_node) for keyword in keywords
+        )
+
+        # If this shape should be included, copy all its triples
+        if not should_exclude:
+            _copy_shape_triples(shapes_graph, filtered_graph, shape_node)
+
+    return filtered_graph
+
+
+def _compact_shapes(shapes_graph: Graph, count_queries_graph: Graph) -> Graph:
+    """Copy ``shapes_graph`` with the constraints counting equipment nodes
+    rewritten to read the per-room count literals of the compact encoding.
+
+    A constraint declares its compact variant with annotations, so that its
+    message, severity and rule annotations are written once and shared:
+
+    - ``nfc:countProperty``: "at least ``nfc:requiredCount`` units", possibly
+      restricted by the ``AREA_BOUNDS`` annotations and ``nfc:excludedClass``;
+      the query is generated;
+    - ``nfc:countQuery``: a node of ``count_queries_graph`` holding the
+      ``sh:select`` to run instead.
+
+    A property shape (``sh:minCount`` form) keeps its path, the rest moves to
+    the SPARQL constraint replacing its cardinality.
+
+    Raises:
+        RulesetLoadError: an annotation is invalid, a count query is missing
+            or referenced by no constraint
+    """
+    result = Graph()
+    for graph in (shapes_graph, count_queries_graph):
+        for ns_prefix, ns_uri in graph.namespaces():
+            result.bind(ns_prefix, ns_uri)
+    for triple in shapes_graph:
+        result.add(triple)
+
+    referenced = set()
+    rewritten = 0
+    for shape in sorted(set(shapes_graph.subjects(RDF.type, SH.NodeShape))):
+        for constraint in shapes_graph.objects(shape, SH.sparql):
+            query = _count_query(shapes_graph, count_queries_graph, shape, constraint, referenced)
+            if query is None:
+                continue
+            rewritten += 1
+            for predicate in COUNT_ANNOTATIONS:
+                result.remove((constraint, predicate, None))
+            result.set((constraint, SH.select, Literal(query)))
+
+        for property_shape in shapes_graph.objects(shape, SH.property):
+            query = _count_query(shapes_graph, count_queries_graph, shape, property_shape, referenced, property_form=True)
+            if query is None:
+                continue
+            rewritten += 1
+            constraint = BNode()
+            for predicate, value in shapes_graph.predicate_objects(property_shape):
+                if predicate == SH.path:
+                    continue
+                result.remove((property_shape, predicate, value))
+                if predicate == SH.qualifiedValueShape and isinstance(value, BNode):
+                    nested = Graph()
+                    _copy_shape_triples(shapes_graph, nested, value)
+                    for triple in nested:
+                        result.remove(triple)
+                elif predicate not in CARDINALITY_PREDICATES | COUNT_ANNOTATIONS:
+                    result.add((constraint, predicate, value))
+            result.add((property_shape, SH.sparql, constraint))
+            result.add((constraint, SH.select, Literal(query)))
+
+    unused = set(count_queries_graph.subjects(SH.select)) - referenced
+    if unused:
+        raise RulesetLoadError(f"Count queries referenced by no constraint: {sorted(str(node) for node in unused)}")
+    logger.info(f"🔢 Compact encoding: {rewritten} constraints rewritten to read the room counts")
+    return result
+
+
+def _count_query(
+    shapes_graph: Graph,
+    count_queries_graph: Graph,
+    shape: URIRef,
+    constraint,
+    referenced: set,
+    property_form: bool = False,
+) -> Optional[str]:
+    """Compact query of ``constraint`` (a SPARQL constraint, or a property
+    shape with ``property_form``), None if it declares none.  Referenced count
+    queries are added to ``referenced``."""
+    from .native_rules import cardinality_rule
+
+    count_query = shapes_graph.value(constraint, NFC.countQuery)
+    count_property = shapes_graph.value(constraint, NFC.countProperty)
+    if count_query is None and count_property is None:
+        return None
+    where = f"{shape} ({shapes_graph.value(constraint, SH.message)})"
+
+    if count_query is not None:
+        if count_property is not None or property_form:
+            raise RulesetLoadError(f"{where}: nfc:countQuery needs a SPARQL constraint without nfc:countProperty")
+        select = count_queries_graph.value(count_query, SH.select)
+        if select is None:
+            raise RulesetLoadError(f"{where}: count query {count_query} not found")
+        referenced.add(count_query)
+        return str(select)
+
+    return cardinality_rule(shapes_graph, shape, constraint, property_form).count_query()
+
+
+def _without_constraints(shapes_graph: Graph, constraint_keys) -> Graph:
+    """Copy ``shapes_graph`` without the constraints identified by ``(shape, message)``.
+
+    A matching ``sh:sparql`` constraint is dropped on its own, a property shape
+    whose own message matches is dropped as a whole (``sh:minCount`` form), and
+    so is a node shape left with nothing to check.
+    """
+    result = Graph()
+    for ns_prefix, ns_uri in shapes_graph.namespaces():
+        result.bind(ns_prefix, ns_uri)
+    if not constraint_keys:
+        for triple in shapes_graph:
+            result.add(triple)
+        return result
+
+    def compiled(shape_node, constraint) -> bool:
+        return any(
+            (shape_node, str(message)) in constraint_keys
+            for message in shapes_graph.objects(constraint, SH.message)
+        )
+
+    removed = Graph()
+    for shape_node in set(shapes_graph.subjects(RDF.type, SH.NodeShape)):
+        dropped = []
+        for constraint in shapes_graph.objects(shape_node, SH.sparql):
+            if compiled(shape_node, constraint):
+                dropped.append((shape_node, SH.sparql, constraint))
+        for property_shape in shapes_graph.objects(shape_node, SH.property):
+            if compiled(shape_node, property_shape):
+                dropped.append((shape_node, SH.property, property_shape))
+                continue
+            for constraint in shapes_graph.objects(property_shape, SH.sparql):
+                if compiled(shape_node, constraint):
+                    dropped.append((property_shape, SH.sparql, constraint))
+                    # Only the path would be left to check
+                    if set(shapes_graph.predicates(property_shape)) <= {SH.path, SH.sparql} | RULE_ANNOTATIONS:
+                        dropped.append((shape_node, SH.property, property_shape))
+        for triple in dropped:
+            removed.add(triple)
+            _copy_shape_triples(shapes_graph, removed, triple[2])
+
+        kept = {p for p, o in shapes_graph.predicate_objects(shape_node) if (shape_node, p, o) not in removed}
+        if kept <= {RDF.type, SH.targetClass, RDFS.label, RDFS.comment, NFC.ruleGroup} | RULE_ANNOTATIONS:
+            _copy_shape_triples(shapes_graph, removed, shape_node)
+
+    for triple in shapes_graph:
+        if triple not in removed:
+            result.add(triple)
+    return result
+
+
+def _copy_shape_triples(source_graph: Graph, target_graph: Graph, shape_node) -> None:
+    """Recursively copy all triples related to a shape node."""
+    visited = set()
+
+    def copy_node_triples(node):
+        if node in visited:
+            return
+        visited.add(node)
+
+        # Copy all triples where this node is the subject
+        for s, p, o in source_graph.triples((node, None, None)):
+            target_graph.add((s, p, o))
+
+            # If object is a blank node, recursively copy its triples
+            if isinstance(o, BNode):
+                copy_node_triples(o)
+
+    copy_node_triples(shape_node)
+
+
+_current_ruleset: Optional[CompiledRuleset] = None
+_ruleset_lock = threading.Lock()
+
+
+def get_ruleset() -> CompiledRuleset:
+    """Return the process-wide ruleset, loading it on first use."""
+    ruleset = _current_ruleset
+    if ruleset is not None:
+        return ruleset
+    with _ruleset_lock:
+        if _current_ruleset is None:
+            _swap(CompiledRuleset.load())
+        return _current_ruleset
+
+
+def swap_ruleset(ruleset: CompiledRuleset) -> Optional[CompiledRuleset]:
+    """Atomically replace the process-wide ruleset and return the previous one."""
+    with _ruleset_lock:
+        return _swap(ruleset)
+
+
+def reload_ruleset(settings: Optional[Settings] = None) -> CompiledRuleset:
+    """Re-read the ontology and shapes from disk and swap the new ruleset in.
+
+    The new ruleset is fully built before the swap, so in-flight validations
+    keep using the previous version and new ones see the reloaded rules.  If
+    loading raises (:class:`RulesetLoadError`), the previous ruleset stays in place.
+    """
+    ruleset = CompiledRuleset.load(settings)
+    previous = swap_ruleset(ruleset)
+    logger.info(
+        f"🔄 Ruleset reloaded: {previous.version if previous else None} -> {ruleset.version}"
+    )
+    return ruleset
+
+
+def _swap(ruleset: CompiledRuleset) -> Optional[CompiledRuleset]:
+    global _current_ruleset
+    previous = _current_ruleset
+    _current_ruleset = ruleset
+    return previous
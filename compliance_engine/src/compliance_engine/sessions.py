@@ -0,0 +1,297 @@
+"""Server-side installation sessions for incremental revalidation.
+
+The editor revalidates an installation after every change.  A session, keyed by
+``installation_id``, keeps the rooms of the installation (``CompactRoom``
+records), their room-equipment data graph, the room-local verdict of every room
+(see ``room_verdicts``) and the last results.  An edit is a list of room-level deltas (:class:`RoomDelta`): the
+graph is patched in place
+(:meth:`InstallationGraphBuilder.patch_room_equipment_graph`), the room-local
+shapes are validated for the edited rooms only, the installation shapes on the
+patched graph, and only the results that changed are returned.
+
+Sessions live in the API process.  The store keeps at most
+``session_max_count`` sessions and ``session_max_triples`` graph triples in
+total, evicting the least recently used first, and drops the sessions idle for
+more than ``session_idle_timeout`` seconds.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from rdflib import Graph
+
+from .compact_model import AnyRoom, CompactRoom, compact_room, compact_rooms
+from .config import Settings, get_settings
+from .executors import StageExecutor
+from .graph_builder import InstallationGraphBuilder
+from .models import (
+    EquipmentItem,
+    GlobalComplianceResult,
+    RoomComplianceResult,
+    RoomDelta,
+    RoomDeltaOperation,
+)
+from .room_verdicts import RoomVerdict
+from .validators import NFC15100Validator
+
+
+class SessionError(ValueError):
+    """Raised when a delta cannot be applied to a session."""
+
+
+def _result_signature(result: Any) -> str:
+    """Comparable view of a room or global result, violation ids excluded."""
+    data = result.model_dump(mode="json")
+    for violation in data.get("violations") or []:
+        violation.pop("violation_id", None)
+    data["violations"] = sorted(json.dumps(v, sort_keys=True) for v in data.get("violations") or [])
+    return json.dumps(data, sort_keys=True)
+
+
+def apply_deltas(
+    rooms: Sequence[AnyRoom], operations: Sequence[RoomDelta]
+) -> Tuple[List[CompactRoom], Set[str]]:
+    """Rooms (compacted) after applying ``operations`` in order, and the ids of
+    the rooms they touched.  Raises :class:`SessionError` on an invalid delta."""
+    rooms_by_id: "OrderedDict[str, CompactRoom]" = OrderedDict(
+        (room.room_id, compact_room(room)) for room in rooms
+    )
+    touched: Set[str] = set()
+    for index, delta in enumerate(operations):
+        if delta.op in (RoomDeltaOperation.ADD_ROOM, RoomDeltaOperation.UPDATE_ROOM):
+            if delta.room is None:
+                raise SessionError(f"Opération {index} ({delta.op.value}) : champ 'room' manquant")
+            room_id = delta.room.room_id
+            if delta.op == RoomDeltaOperation.ADD_ROOM and room_id in rooms_by_id:
+                raise SessionError(f"Opération {index} : la pièce {room_id} existe déjà")
+            if delta.op == RoomDeltaOperation.UPDATE_ROOM and room_id not in rooms_by_id:
+                raise SessionError(f"Opération {index} : pièce inconnue {room_id}")
+            rooms_by_id[room_id] = compact_room(delta.room)
+            touched.add(room_id)
+            continue
+
+        room_id = delta.room_id
+        if room_id is None or room_id not in rooms_by_id:
+            raise SessionError(f"Opération {index} ({delta.op.value}) : pièce inconnue {room_id}")
+        if delta.op == RoomDeltaOperation.REMOVE_ROOM:
+            del rooms_by_id[room_id]
+            touched.add(room_id)
+            continue
+
+        if delta.equipment_type is None or delta.quantity is None:
+            raise SessionError(
+                f"Opération {index} ({delta.op.value}) : champs 'equipment_type' et 'quantity' obligatoires"
+            )
+        room = rooms_by_id[room_id].to_model()
+        equipment = list(room.equipment)
+        position = next(
+            (
+                i for i, item in enumerate(equipment)
+                if item.equipment_type == delta.equipment_type
+                and (delta.specifications is None or (item.specifications or {}) == delta.specifications)
+            ),
+            None,
+        )
+        if position is None:
+            if delta.quantity:
+                equipment.append(EquipmentItem(
+                    equipment_type=delta.equipment_type,
+                    quantity=delta.quantity,
+                    specifications=delta.specifications or {},
+                ))
+        elif delta.quantity:
+            equipment[position] = equipment[position].model_copy(update={"quantity": delta.quantity})
+        else:
+            del equipment[position]
+        rooms_by_id[room_id] = compact_room(room.model_copy(update={"equipment": equipment}))
+        touched.add(room_id)
+    return list(rooms_by_id.values()), touched
+
+
+class InstallationSession:
+    """Rooms, data graph, verdicts and last results of one installation.
+
+    Edits of a session are serialised by :attr:`lock`.
+    """
+
+    def __init__(
+        self,
+        installation_id: str,
+        rooms: List[AnyRoom],
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ):
+        room_ids = [room.room_id for room in rooms]
+        if len(set(room_ids)) != len(room_ids):
+            raise SessionError("Les identifiants de pièce d'une session doivent être uniques")
+        self.installation_id = installation_id
+        self.rooms = compact_rooms(rooms)
+        self.encoding = encoding
+        self.rule_groups = list(rule_groups) if rule_groups is not None else None
+        self.builder: Optional[InstallationGraphBuilder] = None
+        self.graph: Optional[Graph] = None
+        self.verdicts: Dict[str, RoomVerdict] = {}
+        self.global_compliance = GlobalComplianceResult(overall_status="compliant")
+        self.room_results: Dict[str, RoomComplianceResult] = {}
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of triples of the data graph."""
+        return len(self.graph) if self.graph is not None else 0
+
+    def results(self) -> List[RoomComplianceResult]:
+        """Last result of every room, in room order."""
+        return [self.room_results[room.room_id] for room in self.rooms]
+
+    async def validate(
+        self,
+        validator: NFC15100Validator,
+        executor: StageExecutor,
+        rooms: Optional[List[CompactRoom]] = None,
+        changed_room_ids: AbstractSet[str] = frozenset(),
+    ) -> List[RoomComplianceResult]:
+        """Move the session to ``rooms`` (the current rooms by default), of which
+        only ``changed_room_ids`` differ, and revalidate it.
+
+        The graph is rebuilt from scratch on the first validation or when the
+        ruleset was reloaded since.  Returns the room results that changed.
+        The session is left inconsistent if this raises: drop it.
+        """
+        rooms = self.rooms if rooms is None else rooms
+        if self.builder is None or self.builder.ruleset.version != validator.ruleset.version:
+            self.builder = validator.graph_builder(encoding=self.encoding)
+            self.graph = await executor.run_local(self.builder.room_equipment_graph, rooms)
+            self.verdicts = {}
+        elif changed_room_ids:
+            await executor.run_local(
+                self.builder.patch_room_equipment_graph, self.graph, self.rooms, rooms, changed_room_ids
+            )
+        self.rooms = rooms
+
+        known_verdicts = {
+            room_id: verdict for room_id, verdict in self.verdicts.items() if room_id not in changed_room_ids
+        }
+        global_compliance, room_results, self.verdicts = await validator.validate_session_graph(
+            executor, self.builder, self.graph, rooms, known_verdicts, rule_groups=self.rule_groups
+        )
+
+        changed: List[RoomComplianceResult] = []
+        previous_results = self.room_results
+        self.room_results = {}
+        for result in room_results:
+            previous = previous_results.get(result.room_id)
+            if (
+                previous is not None
+                and result.room_id not in changed_room_ids
+                and _result_signature(previous) == _result_signature(result)
+            ):
+                # Unchanged: keep the reported violation ids
+                result = previous
+            else:
+                changed.append(result)
+            self.room_results[result.room_id] = result
+        if _result_signature(global_compliance) != _result_signature(self.global_compliance):
+            self.global_compliance = global_compliance
+        self.last_used = time.monotonic()
+        return changed
+
+
+class SessionStore:
+    """Sessions of the API process, bounded in count and total graph triples,
+    expiring after ``idle_timeout`` seconds without use.
+
+    A ``max_sessions`` of 0 disables sessions.
+    """
+
+    def __init__(self, max_sessions: int = 128, max_triples: int = 2_000_000, idle_timeout: float = 1800):
+        self.max_sessions = max(0, max_sessions)
+        self.max_triples = max(0, max_triples)
+        self.idle_timeout = idle_timeout
+        self.evictions = 0
+        self.expirations = 0
+        self._sessions: "OrderedDict[str, InstallationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Settings] = None) -> "SessionStore":
+        settings = settings or get_settings()
+        return cls(
+            max_sessions=settings.session_max_count,
+            max_triples=settings.session_max_triples,
+            idle_timeout=settings.session_idle_timeout,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_sessions > 0
+
+    def get(self, installation_id: str) -> Optional[InstallationSession]:
+        """Return the live session of ``installation_id`` (marking it used) or None."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(installation_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(installation_id)
+            return session
+
+    def put(self, session: InstallationSession) -> None:
+        """Store ``session`` (replacing the previous one of its installation)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._sessions[session.installation_id] = session
+            self._sessions.move_to_end(session.installation_id)
+            self._evict(keep=session.installation_id)
+
+    def update(self, session: InstallationSession) -> None:
+        """Account for the new size of ``session`` after an edit, if still stored."""
+        with self._lock:
+            if self._sessions.get(session.installation_id) is session:
+                self._evict(keep=session.installation_id)
+
+    def remove(self, installation_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(installation_id, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        for installation_id in [i for i, session in self._sessions.items() if session.last_used < deadline]:
+            del self._sessions[installation_id]
+            self.expirations += 1
+
+    def _evict(self, keep: str) -> None:
+        """Drop the least recently used sessions (but ``keep``) beyond the caps."""
+        self._expire()
+        triples = sum(session.size for session in self._sessions.values())
+        for installation_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions and triples <= self.max_triples:
+                break
+            if installation_id == keep:
+                continue
+            triples -= self._sessions.pop(installation_id).size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            return {
+                "enabled": self.enabled,
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "triples": sum(session.size for session in self._sessions.values()),
+                "max_triples": self.max_triples,
+                "idle_timeout_seconds": self.idle_timeout,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,221 @@
+"""pyshacl run on shapes prepared once per ruleset.
+
+``pyshacl.validate`` rebuilds everything derived from the shapes graph on each
+call: the :class:`ShapesGraph` wrapper, the harvest of its shapes and, for
+every focus node of every SPARQL-based constraint, the parse and algebra
+translation of the query text.  Parsing alone accounts for most of a
+room-equipment validation.
+
+:class:`PreparedShapes` holds a :class:`ShapesGraph` whose shapes are harvested
+at ruleset load; a request only wraps its data graph and runs the evaluation.
+The data graph is queried through a :class:`PreparedQueryGraph`, which maps the
+query texts built by pyshacl (they do not depend on the focus node, which is
+passed as an initial binding) to queries parsed once per process.
+
+The constraint component objects themselves are still built by pyshacl on every
+``Shape.validate`` call (it has no hook for them); their construction is cheap
+once the SPARQL parsing is out of the way.
+
+Wrapping the data graph as a ``DataGraph`` needs pyshacl 0.40 or later (the
+floor of ``pyproject.toml``).
+
+A fail-fast run (``PreparedShapes.validate(..., fail_fast=True)``) only looks
+for one ``sh:Violation``: the shapes that can report one are validated in
+increasing estimated cost (focus nodes in the data graph times the weight of
+their constraints) and pyshacl stops after the first non-conforming shape.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from pyshacl import Validator
+from pyshacl.graph_abstraction import DataGraph
+from pyshacl.shapes_graph import ShapesGraph
+from rdflib import BNode, Graph, URIRef
+from rdflib.namespace import RDF, SH
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.sparql import Query
+
+# Namespace bindings a query was prepared with, as sorted (prefix, namespace) pairs
+NamespaceKey = Tuple[Tuple[str, str], ...]
+
+# Query texts come from the shapes, so the table only grows with the rulesets
+# loaded; the bound guards against reloads piling up versions
+MAX_PREPARED_QUERIES = 4096
+
+TARGET_PREDICATES = (SH.targetNode, SH.targetClass, SH.targetSubjectsOf, SH.targetObjectsOf)
+
+_prepared_queries: Dict[Tuple[str, NamespaceKey], Query] = {}
+_prepared_lock = threading.Lock()
+
+
+def prepared_query(text: str, namespaces: NamespaceKey) -> Query:
+    """Return ``text`` parsed and translated with ``namespaces`` (cached per process)."""
+    key = (text, namespaces)
+    query = _prepared_queries.get(key)
+    if query is None:
+        # The pyparsing grammar of rdflib is not thread-safe: parse under the lock
+        with _prepared_lock:
+            query = _prepared_queries.get(key)
+            if query is None:
+                query = prepareQuery(text, initNs=dict(namespaces))
+                if len(_prepared_queries) >= MAX_PREPARED_QUERIES:
+                    _prepared_queries.clear()
+                _prepared_queries[key] = query
+    return query
+
+
+class PreparedQueryGraph(Graph):
+    """View of a data graph (same store, same triples) whose SPARQL string
+    queries are served from :func:`prepared_query`.
+
+    String queries are resolved with the namespaces of the graph, as rdflib
+    does; they are captured when the view is created.
+    """
+
+    def __init__(self, graph: Graph):
+        super().__init__(store=graph.store, identifier=graph.identifier, namespace_manager=graph.namespace_manager)
+        self.namespace_key: NamespaceKey = tuple(
+            sorted((prefix, str(namespace)) for prefix, namespace in graph.namespaces())
+        )
+
+    def query(
+        self,
+        query_object: Union[str, Query],
+        processor: str = "sparql",
+        result: str = "sparql",
+        initNs: Optional[Mapping[str, Any]] = None,  # noqa: N803
+        initBindings: Optional[Mapping[str, Any]] = None,  # noqa: N803
+        use_store_provided: bool = True,
+        **kwargs: Any,
+    ):
+        if isinstance(query_object, str) and processor == "sparql" and not initNs and not kwargs:
+            query_object = prepared_query(query_object, self.namespace_key)
+        return super().query(
+            query_object, processor, result, initNs, initBindings, use_store_provided, **kwargs
+        )
+
+
+class FailFastShape(NamedTuple):
+    """A targeted shape able to report a ``sh:Violation``."""
+
+    shape: URIRef
+    targets: Tuple[Tuple[URIRef, Any], ...]  # (target predicate, object)
+    weight: int  # relative cost of one focus node, see shape_weight
+
+
+def shape_weight(shapes_graph: Graph, nodes: Sequence[Any]) -> int:
+    """Relative cost of validating one focus node against a shape given its
+    node and property shape ``nodes``: 1, plus 4 per SPARQL query and per
+    sub-select or EXISTS in it."""
+    weight = 1
+    for node in nodes:
+        for constraint in shapes_graph.objects(node, SH.sparql):
+            query = str(shapes_graph.value(constraint, SH.select) or shapes_graph.value(constraint, SH.ask) or "")
+            query = query.upper()
+            weight += 4 * max(1, query.count("SELECT") + query.count("EXISTS"))
+    return weight
+
+
+def fail_fast_shapes(shapes_graph: Graph) -> Optional[List[FailFastShape]]:
+    """Targeted shapes of ``shapes_graph`` whose node or property shapes have
+    the ``sh:Violation`` severity (the default).
+
+    None if one of them is a blank node: pyshacl only selects shapes by IRI.
+    """
+    targeted = {shape for predicate in TARGET_PREDICATES for shape in shapes_graph.subjects(predicate, None)}
+    shapes = []
+    for shape in sorted(targeted, key=str):
+        nodes = [shape, *shapes_graph.objects(shape, SH.property)]
+        if all(shapes_graph.value(node, SH.severity, default=SH.Violation) != SH.Violation for node in nodes):
+            continue
+        if isinstance(shape, BNode):
+            return None
+        targets = tuple(
+            (predicate, target) for predicate in TARGET_PREDICATES for target in shapes_graph.objects(shape, predicate)
+        )
+        shapes.append(FailFastShape(shape, targets, shape_weight(shapes_graph, nodes)))
+    return shapes
+
+
+def focus_estimate(data_graph: Graph, targets: Sequence[Tuple[URIRef, Any]]) -> int:
+    """Upper estimate of the focus nodes of ``targets`` (instances counted on
+    their materialised ``rdf:type``)."""
+    count = 0
+    for predicate, target in targets:
+        if predicate == SH.targetNode:
+            count += 1
+        elif predicate == SH.targetClass:
+            count += sum(1 for _ in data_graph.subjects(RDF.type, target))
+        else:
+            count += sum(1 for _ in data_graph.triples((None, target, None)))
+    return count
+
+
+class ShaclRun(NamedTuple):
+    """Outcome of :meth:`PreparedShapes.validate`."""
+
+    conforms: bool
+    results_graph: Graph
+    results_text: str
+    evaluation_start: float  # time.time() when pyshacl started evaluating
+    evaluation_time_ms: float
+
+
+class PreparedShapes:
+    """A shapes graph wrapped and harvested once, validated against many data graphs.
+
+    Shapes are only read during a validation, so a single instance is shared by
+    concurrent requests.
+    """
+
+    def __init__(self, shapes_graph: Graph):
+        self.graph = shapes_graph
+        self.shapes_graph = ShapesGraph(shapes_graph)
+        self.shape_count = len(self.shapes_graph.shapes)  # triggers the harvest
+        self.fail_fast_shapes = fail_fast_shapes(shapes_graph)
+
+    def fail_fast_order(self, data_graph: Graph) -> Optional[List[str]]:
+        """IRIs of the shapes able to report a violation on ``data_graph``,
+        cheapest first; None to validate all shapes in harvest order."""
+        if self.fail_fast_shapes is None:
+            return None
+        costs = []
+        for shape in self.fail_fast_shapes:
+            focus_nodes = focus_estimate(data_graph, shape.targets)
+            # Shapes without focus node cannot fail, keep them for the end
+            costs.append(((focus_nodes == 0, focus_nodes * shape.weight), str(shape.shape)))
+        return [shape for _cost, shape in sorted(costs)]
+
+    def validate(self, data_graph: Graph, debug: bool = False, fail_fast: bool = False) -> ShaclRun:
+        """Validate ``data_graph`` in place, without inference.
+
+        The data graph must already hold the inferred triples and the ontology
+        prefixes the SPARQL constraints rely on.  With ``fail_fast`` only
+        ``sh:Violation`` results make the graph non-conforming and the
+        evaluation stops at the end of the first shape reporting one.
+        """
+        options: Dict[str, Any] = {"inference": "none", "inplace": True, "debug": debug}
+        if fail_fast:
+            options.update(abort_on_first=True, allow_warnings=True)
+            order = self.fail_fast_order(data_graph)
+            if order == []:
+                # pyshacl reads an empty selection as all shapes
+                return ShaclRun(True, Graph(), "", evaluation_start=time.time(), evaluation_time_ms=0.0)
+            options["use_shapes"] = order
+        validator = Validator(
+            DataGraph.from_rdflib(PreparedQueryGraph(data_graph)),
+            shacl_graph=self.graph,
+            options=options,
+        )
+        validator.shacl_graph = self.shapes_graph
+        evaluation_start = time.time()
+        conforms, results_graph, results_text = validator.run()
+        return ShaclRun(
+            conforms,
+            results_graph,
+            results_text,
+            evaluation_start=evaluation_start,
+            evaluation_time_ms=(time.time() - evaluation_start) * 1000,
+        )
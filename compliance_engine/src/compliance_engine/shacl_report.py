@@ -0,0 +1,115 @@
+"""Conversion of pyshacl validation reports into violations.
+
+The report is read by walking its ``sh:ValidationResult`` nodes directly (one
+index lookup per result for all its properties) instead of a SPARQL ``SELECT``
+with ``OPTIONAL`` joins.  Everything that depends on the constraint of a
+result (rule id, suggested fix) comes from the rule catalog built at ruleset
+load (see ``rule_catalog``), found from the reported source shape and
+constraint.
+
+Violations are built with ``model_construct``: every field comes from the
+report or from the catalog, so validating them again is left to the response
+models at the API boundary.
+"""
+
+import itertools
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from rdflib import Graph
+from rdflib.namespace import RDF, SH
+
+from .models import RuleInfo, SeverityLevel, ValidationViolation, ViolationType
+
+if TYPE_CHECKING:
+    from .rule_catalog import RuleCatalog
+
+# Rule id and suggested fix of the results of constraints missing from the catalog
+GENERIC_RULE_ID = "NFC-15-100-GENERIC"
+GENERIC_SUGGESTED_FIX = "Consultez la norme NF C 15-100 pour les exigences spécifiques"
+
+_SEVERITY_LEVELS: Dict[str, SeverityLevel] = {
+    str(SH.Violation): SeverityLevel.ERROR,
+    str(SH.Warning): SeverityLevel.WARNING,
+    str(SH.Info): SeverityLevel.INFO,
+}
+
+
+def severity_level(severity: str) -> SeverityLevel:
+    """Map SHACL severity to our severity levels."""
+    level = _SEVERITY_LEVELS.get(severity)
+    if level is not None:
+        return level
+    if "Violation" in severity or "Error" in severity:
+        return SeverityLevel.ERROR
+    elif "Warning" in severity:
+        return SeverityLevel.WARNING
+    else:
+        return SeverityLevel.INFO
+
+
+def build_violation(
+    message: str,
+    focus_node: Optional[str],
+    path: Optional[str],
+    value: Optional[str],
+    severity: str,
+    rule: Optional[RuleInfo],
+) -> ValidationViolation:
+    """Violation object of a SHACL (or natively evaluated) result of ``rule``
+    (None if not in the catalog), unvalidated."""
+    return ValidationViolation.model_construct(
+        violation_id=str(uuid.uuid4()),
+        rule_id=rule.rule_id if rule is not None else GENERIC_RULE_ID,
+        severity=severity_level(severity),
+        violation_type=ViolationType.INSTALLATION,
+        message=message,
+        focus_node=focus_node,
+        path=path,
+        value=value,
+        suggested_fix=rule.suggested_fix if rule is not None else GENERIC_SUGGESTED_FIX,
+    )
+
+
+def report_violations(
+    results_graph: Graph,
+    catalog: "RuleCatalog",
+) -> List[ValidationViolation]:
+    """Violations of the results of a pyshacl report.
+
+    Like the former SPARQL query, results without focus node or message are
+    skipped and a result with several messages gives one violation each.
+    """
+    violations = []
+    for result in results_graph.subjects(RDF.type, SH.ValidationResult):
+        properties: Dict[object, List[object]] = {}
+        for predicate, obj in results_graph.predicate_objects(result):
+            properties.setdefault(predicate, []).append(obj)
+        focus_nodes = properties.get(SH.focusNode)
+        messages = properties.get(SH.resultMessage)
+        if not focus_nodes or not messages:
+            continue
+        source_shape = _first(properties.get(SH.sourceShape))
+        source_constraint = _first(properties.get(SH.sourceConstraint))
+        for focus, message, path, value, severity in itertools.product(
+            focus_nodes,
+            messages,
+            properties.get(SH.resultPath) or (None,),
+            properties.get(SH.value) or (None,),
+            properties.get(SH.resultSeverity) or (None,),
+        ):
+            focus_node = str(focus) if focus else None
+            message = str(message) if message else "Validation failed"
+            violations.append(build_violation(
+                message,
+                focus_node=focus_node,
+                path=str(path) if path else None,
+                value=str(value) if value else None,
+                severity=str(severity) if severity else "",
+                rule=catalog.lookup(source_shape, source_constraint, message),
+            ))
+    return violations
+
+
+def _first(values: Optional[List[object]]) -> Optional[str]:
+    return str(values[0]) if values else None
@@ -1,14 +1,14 @@
 """SHACL validators for NF C 15-100 electrical installation compliance."""
 
+import asyncio
 import os
 import time
 import uuid
-from typing import Dict, Any, List, Optional
-from pathlib import Path
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Sequence
 import logging
 import math
 
-from rdflib import Graph, Namespace, Literal, URIRef, BNode
+from rdflib import Graph, URIRef, BNode
 from rdflib.namespace import RDF, RDFS, XSD
 from pyshacl import validate
 import json
@@ -21,25 +21,52 @@ from .models import (
     RuleInfo,
     OntologyClass,
     OntologyProperty,
-    RoomEquipment,
     RoomComplianceResult,
     GlobalComplianceResult,
     ComplianceStatus,
-    RoomType,
     EquipmentType,
     DimensioningResult,
+    CircuitBreakerGroup,
     CircuitBreakerSpec,
+    CircuitKind,
     SurgeProtectorSpec,
     ElectricalPanelSpec,
     CableSpec
 )
 from .config import get_settings
+from .ruleset import (
+    DIMENSIONING_PASS_FOCUS,
+    EQUIPMENT_ONLY_FOCUS,
+    INSTALLATION_SCOPE,
+    NODES_ENCODING,
+    ROOM_EQUIPMENT_FOCUS,
+    ROOM_EQUIPMENT_REMAINDER_FOCUS,
+    ROOM_LOCAL_SCOPE,
+    RULE_GROUPS,
+    SH,
+    CompiledRuleset,
+    get_ruleset,
+)
+from .native_rules import CardinalityRule
+from .shacl_report import build_violation, report_violations
+from .executors import StageExecutor, get_executor
+from .graph_builder import InstallationGraphBuilder, UnitNodes, graph_to_jsonld, has_multi_socket_outlets
+from .compact_model import AnyRoom
+from .inventory import EquipmentInventory, RoomInventory, parent_equipment_type
+from .room_verdicts import (
+    RoomVerdict,
+    memoizable,
+    retarget_verdict,
+    room_verdict_cache,
+    room_verdict_key,
+    verdict_owners,
+)
 
 logger = logging.getLogger(__name__)
 
-# Define NF C 15-100 namespace - MUST match the ontology files
-NFC = Namespace("http://ontology.nfc15100.fr#")
 
+# Circuit breaker output formats of the dimensioning (``circuit_breaker_output``)
+CIRCUIT_BREAKER_OUTPUTS = ("verbose", "grouped")
 
 class NFC15100Validator:
     """Main validator for NF C 15-100 electrical installations."""
@@ -52,110 +79,66 @@ class NFC15100Validator:
         EquipmentType.AIR_CONDITIONING: [(44, 16), (56, 32), (63, 40)],
     }
     
+    # Generic notes closing every dimensioning
+    INSTALLATION_NOTES: tuple[str, ...] = (
+        "Tous les circuits doivent être protégés par un DDR 30 mA",
+        "Sections des conducteurs : 1,5 mm² pour l'éclairage et les prises classiques 16A, 2,5 mm² minimum pour les circuits cuisine",
+        "Les circuits dédiés de la cuisine nécessitent une protection 20 A",
+        "Les circuits de la salle de bains nécessitent des indices de protection IP adaptés",
+        "Les équipements spécialisés doivent avoir un circuit dédié",
+    )
+    NON_COMPLIANT_NOTE = "⚠️ Corrigez les non-conformités avant l'installation"
+
+    # Description of the circuit breaker groups of each kind (grouped output)
+    CIRCUIT_KIND_LABELS: dict[CircuitKind, str] = {
+        CircuitKind.LIGHTING: "Disjoncteurs éclairage (max 8 points lumineux)",
+        CircuitKind.SOCKETS: "Disjoncteurs prises classiques (max 8 prises, section 1,5 mm²)",
+        CircuitKind.KITCHEN_SOCKETS: "Disjoncteurs prises cuisine (max 6 prises)",
+        CircuitKind.SPECIALISED_20A: "Circuits spécialisés 20A",
+        CircuitKind.OVEN_SOCKET: "Circuits dédiés prise plaque 32A",
+        CircuitKind.COOKING_HOB: "Circuits dédiés plaque de cuisson",
+        CircuitKind.VMC: "Circuit VMC",
+        CircuitKind.HEATING: "Circuits de chauffage",
+        CircuitKind.INDIVIDUAL_HEATING: "Circuits de chauffage individuels (un circuit par équipement)",
+        CircuitKind.DEDICATED: "Circuits dédiés équipements spécialisés",
+        CircuitKind.WATER_HEATER: "Circuits chauffe-eau",
+    }
+
     def __init__(self):
-        """Initialize the validator with SHACL shapes and ontology."""
+        """Initialize the validator on top of the process-wide compiled ruleset."""
         self.settings = get_settings()
-        self.ontology_graph = Graph()
-        self.shapes_graph = Graph()
-        self.rules_info = {}
-        
-        # Initialize graphs
-        self._load_ontology()
-        self._load_shapes()
-        
-    def _load_ontology(self) -> None:
-        """Load the NF C 15-100 ontology."""
-        try:
-            # Try multiple possible paths for the ontology file
-            possible_paths = [
-                Path(self.settings.ontology_path),
-            ]
-            
-            ontology_loaded = False
-            for ontology_path in possible_paths:
-                if ontology_path.exists():
-                    self.ontology_graph.parse(str(ontology_path), format="turtle")
-                    logger.info(f"✅ Loaded ontology from {ontology_path} ({len(self.ontology_graph)} triples)")
-                    ontology_loaded = True
-                    break
-            
-            if not ontology_loaded:
-                logger.error(f"❌ Ontology file not found in any of these paths: {[str(p) for p in possible_paths]}")
-                self._create_basic_ontology()
-                
-        except Exception as e:
-            logger.error(f"❌ Error loading ontology: {e}")
-            self._create_basic_ontology()
-    
-    def _create_basic_ontology(self) -> None:
-        """Create a basic NF C 15-100 ontology structure."""
-        # Define basic classes
-        classes = [
-            ("ElectricalInstallation", "An electrical installation according to NF C 15-100"),
-            ("Room", "A room in a building"),
-            ("Kitchen", "Kitchen room"),
-            ("LivingRoom", "Living room"),
-            ("Bedroom", "Bedroom"),
-            ("Bathroom", "Bathroom"),
-            ("Circuit", "Electrical circuit"),
-            ("Socket", "Electrical socket outlet"),
-            ("Switch", "Electrical switch"),
-            ("Light", "Lighting point"),
-            ("Protection", "Electrical protection device"),
-            ("CircuitBreaker", "Circuit breaker"),
-            ("RCD", "Residual current device"),
-            ("Equipment", "Electrical equipment"),
-        ]
-        
-        # Add classes to ontology
-        for class_name, description in classes:
-            class_uri = NFC[class_name]
-            self.ontology_graph.add((class_uri, RDF.type, RDFS.Class))
-            self.ontology_graph.add((class_uri, RDFS.label, Literal(class_name)))
-            self.ontology_graph.add((class_uri, RDFS.comment, Literal(description)))
-        
-        # Define properties
-        properties = [
-            ("hasRoom", "Links installation to rooms"),
-            ("hasSocket", "Links room to sockets"),
-            ("hasCircuit", "Links installation to circuits"),
-            ("hasProtection", "Links circuit to protection"),
-            ("socketType", "Type of socket (e.g., 2P+T)"),
-            ("current", "Current rating in amperes"),
-            ("voltage", "Voltage rating in volts"),
-            ("height", "Height from floor in meters"),
-            ("wireSection", "Wire cross-section in mm²"),
-            ("roomArea", "Room area in square meters"),
-        ]
-        
-        # Add properties to ontology
-        for prop_name, description in properties:
-            prop_uri = NFC[prop_name]
-            self.ontology_graph.add((prop_uri, RDF.type, RDF.Property))
-            self.ontology_graph.add((prop_uri, RDFS.label, Literal(prop_name)))
-            self.ontology_graph.add((prop_uri, RDFS.comment, Literal(description)))
-    
-    def _load_shapes(self) -> None:
-        """Load SHACL shapes for NF C 15-100 validation."""
-        try:
-            possible_paths = [
-                Path(self.settings.shapes_path)
-            ]
-            
-            shapes_loaded = False
-            for shapes_path in possible_paths:
-                if shapes_path.exists():
-                    self.shapes_graph.parse(str(shapes_path), format="turtle")
-                    logger.info(f"✅ Loaded SHACL shapes from {shapes_path} ({len(self.shapes_graph)} triples)")
-                    shapes_loaded = True
-                    break
-            
-            if not shapes_loaded:
-                logger.error(f"❌ SHACL shapes file not found in any of these paths: {[str(p) for p in possible_paths]}")
-                
-        except Exception as e:
-            logger.error(f"❌ Error loading SHACL shapes: {e}")
-    
+        # Load (or reuse) the shared ruleset eagerly so the first request does not pay for it
+        get_ruleset()
+        # Room-local verdicts of the rooms already validated (see room_verdicts)
+        self.room_verdicts = room_verdict_cache(self.settings)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickled for the process executor: the memo stays in this process
+        state = self.__dict__.copy()
+        del state["room_verdicts"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.room_verdicts = room_verdict_cache(self.settings)
+
+    @property
+    def ruleset(self) -> CompiledRuleset:
+        """Current compiled ruleset (re-read on every access so reloads take effect)."""
+        return get_ruleset()
+
+    @property
+    def ontology_graph(self) -> Graph:
+        return self.ruleset.ontology_graph
+
+    @property
+    def shapes_graph(self) -> Graph:
+        return self.ruleset.shapes_graph
+
+    @property
+    def rules_info(self) -> Dict[str, RuleInfo]:
+        return self.ruleset.rules_info
+
     def validate_file(self, file_path: str, focus_area: Optional[str] = None) -> ValidationResult:
         """
         Validate electrical installation from TTL file.
@@ -218,19 +201,45 @@ class NFC15100Validator:
         """
         return await self.validate(jsonld_data, focus_area)
     
-    async def validate(self, jsonld_data: Dict[str, Any], focus_area: Optional[str] = None) -> ValidationResult:
+    async def validate(
+        self,
+        jsonld_data: Dict[str, Any],
+        focus_area: Optional[str] = None,
+        pre_inferred: bool = False,
+        inference: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> ValidationResult:
         """
         Validate electrical installation data against NF C 15-100 standards.
         
+        The SHACL evaluation runs on the configured stage executor so the event
+        loop stays free for other requests.
+        
         Args:
             jsonld_data: JSON-LD representation of electrical installation
             focus_area: Optional focus area (e.g., "room-equipment") to filter rules
+            pre_inferred: True when the data already carries the inferred rdf:type
+                triples (output of the internal builders)
+            inference: "none" or "rdfs", defaults to ``settings.validation_inference``
+            rule_groups: Optional rule groups (``RULE_GROUPS``) to restrict the shapes to
             
         Returns:
             ValidationResult with validation details
         """
+        return await get_executor().run(
+            self.validate_sync, jsonld_data, focus_area, pre_inferred, inference, rule_groups
+        )
+
+    def validate_sync(
+        self,
+        jsonld_data: Dict[str, Any],
+        focus_area: Optional[str] = None,
+        pre_inferred: bool = False,
+        inference: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> ValidationResult:
+        """Blocking SHACL validation of a JSON-LD document, see :meth:`validate`."""
         start_time = time.time()
-        
         try:
             # Convert JSON-LD to RDF graph 
             data_graph = Graph()
@@ -238,13 +247,48 @@ class NFC15100Validator:
             # Parse JSON-LD data
             json_str = json.dumps(jsonld_data)
             data_graph.parse(data=json_str, format="json-ld")
+        except Exception as e:
+            return self._system_error_result(e, start_time)
+
+        return self.validate_graph_sync(
+            data_graph, focus_area, pre_inferred, inference, start_time=start_time, rule_groups=rule_groups
+        )
+
+    def validate_graph_sync(
+        self,
+        data_graph: Graph,
+        focus_area: Optional[str] = None,
+        pre_inferred: bool = False,
+        inference: Optional[str] = None,
+        start_time: Optional[float] = None,
+        encoding: Optional[str] = None,
+        ruleset: Optional[CompiledRuleset] = None,
+        native: bool = False,
+        rule_groups: Optional[Sequence[str]] = None,
+        scope: Optional[str] = None,
+    ) -> ValidationResult:
+        """Blocking SHACL validation of an RDF data graph (modified in place).
+
+        ``encoding`` is the equipment encoding the graph was built with
+        ("nodes" or "compact"), it selects the matching shapes.  With ``native``
+        the rules evaluated by :meth:`validate_native_rules` are skipped.
+        ``rule_groups`` restricts the shapes of ``focus_area`` to those groups,
+        ``scope`` to the room-local or installation shapes.
+        """
+        start_time = start_time or time.time()
+        # Capture the ruleset once so a concurrent reload cannot mix two versions
+        ruleset = ruleset or self.ruleset
+        inference = inference or self.settings.validation_inference
+        
+        try:
+            # Filter shapes based on focus_area and equipment encoding
+            filtered_shapes_graph = ruleset.shapes_for(
+                focus_area, encoding or NODES_ENCODING, native=native, rule_groups=rule_groups, scope=scope
+            )
             
-            # Filter shapes based on focus_area
-            filtered_shapes_graph = self._filter_shapes_by_focus_area(self.shapes_graph, focus_area)
-            
-            logger.info(f"📊 Parsed data graph with {len(data_graph)} triples")
-            logger.info(f"📋 SHACL shapes graph has {len(filtered_shapes_graph)} triples (filtered from {len(self.shapes_graph)})")
-            logger.info(f"🏗️ Ontology graph has {len(self.ontology_graph)} triples")
+            logger.info(f"📊 Data graph has {len(data_graph)} triples")
+            logger.info(f"📋 SHACL shapes graph has {len(filtered_shapes_graph)} triples (filtered from {len(ruleset.shapes_graph)}, ruleset {ruleset.version})")
+            logger.info(f"🏗️ Ontology graph has {len(ruleset.ontology_graph)} triples")
             
             # Debug: Print some triples from data graph
             if self.settings.debug:
@@ -256,13 +300,43 @@ class NFC15100Validator:
                         break
             
             # Perform SHACL validation with filtered shapes
-            validation_result = validate(
-                data_graph=data_graph,
-                shacl_graph=filtered_shapes_graph,
-                ont_graph=self.ontology_graph,
-                inference='rdfs',
-                debug=self.settings.debug
-            )
+            evaluation_start = time.time()
+            evaluation_time = None
+            if inference == "rdfs":
+                validation_result = validate(
+                    data_graph=data_graph,
+                    shacl_graph=filtered_shapes_graph,
+                    ont_graph=ruleset.ontology_graph,
+                    inference='rdfs',
+                    debug=self.settings.debug
+                )
+            else:
+                # RDFS closure precomputed at load: only materialise what the
+                # builders did not already emit, no per-request expansion
+                if not pre_inferred:
+                    ruleset.entail(data_graph)
+                # SPARQL constraints rely on the data graph knowing the ontology
+                # prefixes (pyshacl used to get them by mixing the ontology in)
+                for prefix, namespace in ruleset.ontology_graph.namespaces():
+                    data_graph.bind(prefix, namespace)
+                if self.settings.persistent_shapes:
+                    shacl_run = ruleset.prepared_shapes_for(
+                        focus_area, encoding or NODES_ENCODING, native=native, rule_groups=rule_groups,
+                        scope=scope,
+                    ).validate(data_graph, debug=self.settings.debug)
+                    evaluation_start = shacl_run.evaluation_start
+                    evaluation_time = shacl_run.evaluation_time_ms
+                    validation_result = shacl_run[:3]
+                else:
+                    evaluation_start = time.time()
+                    validation_result = validate(
+                        data_graph=data_graph,
+                        shacl_graph=filtered_shapes_graph,
+                        inference='none',
+                        debug=self.settings.debug
+                    )
+            if evaluation_time is None:
+                evaluation_time = (time.time() - evaluation_start) * 1000
             
             # Check if validation failed completely (returns ValidationFailure object)
             if hasattr(validation_result, 'validation_errors'):
@@ -285,135 +359,86 @@ class NFC15100Validator:
             if results_text:
                 logger.info(f"📄 Results text: {results_text[:500]}...")  # First 500 chars
             
+            # Graph building, entailment and shapes selection vs pyshacl itself
+            setup_time = (evaluation_start - start_time) * 1000
+            logger.info(f"⏱️ SHACL setup {setup_time:.1f} ms, evaluation {evaluation_time:.1f} ms")
+            
             # Process validation results
-            violations = self._process_shacl_results(results_graph)
+            violations = self._process_shacl_results(results_graph, ruleset)
             
             validation_time = (time.time() - start_time) * 1000  # Convert to milliseconds
             
             return ValidationResult(
                 is_valid=conforms and len(violations) == 0,
                 violations=violations,
-                rules_checked=list(self.rules_info.keys()),
-                validation_time_ms=validation_time
+                rules_checked=list(ruleset.selection(
+                    focus_area, encoding or NODES_ENCODING, rule_groups, scope
+                ).rule_ids),
+                validation_time_ms=validation_time,
+                setup_time_ms=setup_time,
+                evaluation_time_ms=evaluation_time,
             )
             
         except Exception as e:
-            logger.error(f"Erreur du système de validation : {e}")
-            return ValidationResult(
-                is_valid=False,
-                violations=[
-                    ValidationViolation(
-                        violation_id=str(uuid.uuid4()),
-                        rule_id="SYSTEM-ERROR",
-                        severity=SeverityLevel.ERROR,
-                        violation_type=ViolationType.SAFETY,
-                        message=f"Erreur du système de validation : {str(e)}",
-                        suggested_fix="Vérifiez le format des données et réessayez"
-                    )
-                ],
-                rules_checked=[],
-                validation_time_ms=(time.time() - start_time) * 1000
-            )
-    
-    def _process_shacl_results(self, results_graph: Graph) -> List[ValidationViolation]:
-        """Process SHACL validation results into violation objects."""
-        violations = []
-        SH = Namespace("http://www.w3.org/ns/shacl#")
-        
-        # Query for validation results
-        query = """
-        PREFIX sh: <http://www.w3.org/ns/shacl#>
-        SELECT ?result ?focusNode ?resultPath ?value ?message ?severity
-        WHERE {
-            ?result a sh:ValidationResult ;
-                    sh:focusNode ?focusNode ;
-                    sh:resultMessage ?message .
-            OPTIONAL { ?result sh:resultPath ?resultPath }
-            OPTIONAL { ?result sh:value ?value }
-            OPTIONAL { ?result sh:resultSeverity ?severity }
-        }
-        """
-        
-        for row in results_graph.query(query):
-            message = str(row[4]) if row[4] else "Validation failed"
-            
-            # (Filtrage supprimé) On ne masque plus les violations IPX4
-            # if "IPX4" in message:
-            #     continue
-                
-            violation = ValidationViolation(
-                violation_id=str(uuid.uuid4()),
-                rule_id=self._map_focus_to_rule(str(row[1]) if row[1] else ""),
-                severity=self._map_severity(str(row[5]) if row[5] else ""),
-                violation_type=ViolationType.INSTALLATION,
-                message=message,
-                focus_node=str(row[1]) if row[1] else None,
-                path=str(row[2]) if row[2] else None,
-                value=str(row[3]) if row[3] else None,  # row[3] is value
-                suggested_fix=self._generate_suggested_fix(message)
-            )
-            violations.append(violation)
-        
-        return violations
-    
-    def _map_focus_to_rule(self, focus_node: str) -> str:
-        """Map SHACL focus node to NF C 15-100 rule ID."""
-        if "Kitchen" in focus_node:
-            return "NFC-15-100-KITCHEN-001"
-        elif "Socket" in focus_node:
-            return "NFC-15-100-SOCKET-001"
-        else:
-            return "NFC-15-100-GENERIC"
-    
-    def _map_severity(self, severity_uri: str) -> SeverityLevel:
-        """Map SHACL severity to our severity levels."""
-        if "Violation" in severity_uri or "Error" in severity_uri:
-            return SeverityLevel.ERROR
-        elif "Warning" in severity_uri:
-            return SeverityLevel.WARNING
-        else:
-            return SeverityLevel.INFO
+            return self._system_error_result(e, start_time)
+
+    def _system_error_result(self, error: Exception, start_time: float) -> ValidationResult:
+        logger.error(f"Erreur du système de validation : {error}")
+        return ValidationResult(
+            is_valid=False,
+            violations=[
+                ValidationViolation(
+                    violation_id=str(uuid.uuid4()),
+                    rule_id="SYSTEM-ERROR",
+                    severity=SeverityLevel.ERROR,
+                    violation_type=ViolationType.SAFETY,
+                    message=f"Erreur du système de validation : {str(error)}",
+                    suggested_fix="Vérifiez le format des données et réessayez"
+                )
+            ],
+            rules_checked=[],
+            validation_time_ms=(time.time() - start_time) * 1000
+        )
     
-    def _generate_suggested_fix(self, message: str) -> str:
-        """Generate suggested fix based on violation message."""
-        lower_msg = message.lower()
-        # Priorité : circuits spéciaux (20 A + 32 A)
-        if "circuits spéciaux" in lower_msg and ("20a" in lower_msg or "32a" in lower_msg):
-            return "Ajoutez au moins 3 prises spécialisées 20A et 1 prise 32A pour plaque de cuisson dans la cuisine, salle de bain ou circulation et locaux ≥ 4 m²"
-
-        if "socket" in lower_msg or "prise" in lower_msg:
-            # Kitchen rules
-            if "3 prises" in lower_msg and ("cuisine" in lower_msg or "cuisine" in lower_msg):
-                return "Ajoutez des prises supplémentaires afin d'atteindre le minimum de 3 prises exigé pour les petites cuisines (<4m²)"
-            elif "6 prises" in lower_msg and "cuisine" in lower_msg:
-                return "Ajoutez des prises supplémentaires afin d'atteindre le minimum de 6 prises exigé pour les cuisines de 4m² et plus"
-            # Living room rules
-            elif "5 prises" in lower_msg and "salon" in lower_msg:
-                return "Ajoutez des prises supplémentaires afin d'atteindre le minimum de 5 prises exigé pour les salons ≤20m²"
-            elif "6 prises" in lower_msg and "salon" in lower_msg:
-                return "Ajoutez des prises supplémentaires afin d'atteindre le minimum de 6 prises exigé pour les salons de 20-24m²"
-            elif "7 prises" in lower_msg and "salon" in lower_msg:
-                return "Ajoutez des prises supplémentaires afin d'atteindre le minimum de 7 prises exigé pour les salons >24m²"
-            # Wet room rules
-            elif ("salle d'eau" in lower_msg or "salle d'eau avec wc" in lower_msg) and "prise" in lower_msg:
-                return "Ajoutez 1 prise supplémentaire dans la salle d'eau"
-            else:
-                return "Vérifiez le nombre de prises requis selon le type de pièce et sa superficie"
-        elif "height" in lower_msg and "5cm" in lower_msg:
-            return "Ajustez la hauteur de la prise pour qu'elle soit d'au moins 5 cm au-dessus du sol"
-        elif ("salle d'eau" in lower_msg or "salle d'eau avec wc" in lower_msg) and ("éclairage" in lower_msg or "lighting" in lower_msg):
-            return "Ajoutez 1 point d'éclairage dans la salle d'eau"
-        elif ("salle d'eau" in lower_msg or "salle d'eau avec wc" in lower_msg) and "interrupteur" in lower_msg:
-            return "Ajoutez 1 interrupteur pour l'éclairage dans la salle d'eau"
-        else:
-            return "Consultez la norme NF C 15-100 pour les exigences spécifiques"
+    def _process_shacl_results(
+        self, results_graph: Graph, ruleset: Optional[CompiledRuleset] = None
+    ) -> List[ValidationViolation]:
+        """Process SHACL validation results into violation objects (see shacl_report)."""
+        ruleset = ruleset or self.ruleset
+        return report_violations(results_graph, ruleset.rule_catalog)
+
+    def _build_violation(
+        self,
+        message: str,
+        focus_node: Optional[str],
+        path: Optional[str],
+        value: Optional[str],
+        severity: str,
+        source_shape: Optional[str] = None,
+        ruleset: Optional[CompiledRuleset] = None,
+    ) -> ValidationViolation:
+        """Violation object of a SHACL (or natively evaluated) result."""
+        ruleset = ruleset or self.ruleset
+        return build_violation(
+            message,
+            focus_node=focus_node,
+            path=path,
+            value=value,
+            severity=severity,
+            rule=ruleset.rule_catalog.rule(source_shape, message),
+        )
     
     def get_rules_info(self) -> Dict[str, Any]:
         """Get information about available validation rules."""
         return {
+            "ruleset_version": self.ruleset.version,
             "total_rules": len(self.rules_info),
             "rules": {rule_id: rule_info.dict() for rule_id, rule_info in self.rules_info.items()},
-            "categories": list(set(rule.category for rule in self.rules_info.values()))
+            "categories": sorted(set(rule.category for rule in self.rules_info.values())),
+            "rule_groups": {
+                group: sorted(str(shape) for shape in self.ruleset.shapes_in_groups([group]))
+                for group in RULE_GROUPS
+            },
         }
     
     def get_ontology_info(self) -> Dict[str, Any]:
@@ -453,7 +478,13 @@ class NFC15100Validator:
         }
 
     
-    async def validate_room_equipment(self, rooms: List[RoomEquipment], include_dimensioning_rules: bool = False) -> tuple[GlobalComplianceResult, List[RoomComplianceResult]]:
+    async def validate_room_equipment(
+        self,
+        rooms: List[AnyRoom],
+        include_dimensioning_rules: bool = False,
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> tuple[GlobalComplianceResult, List[RoomComplianceResult]]:
         """Validate equipment for all rooms **via SHACL shapes**.
 
         The simplified `rooms` payload (list of `RoomEquipment`) is converted on the fly into a
@@ -464,130 +495,687 @@ class NFC15100Validator:
             rooms: List of room equipment configurations
             include_dimensioning_rules: If False, exclude dimensioning rules (for room-equipment validation)
                                       If True, include all rules (for global validation)
+            encoding: Equipment encoding of the graph, defaults to ``settings.equipment_encoding``
+            rule_groups: Optional rule groups (``RULE_GROUPS``) to restrict the rules to
         """
 
-        import asyncio
+        # ----------------------------------
+        # 1. Build the RDF graph and delegate to SHACL validator with appropriate focus
+        # ----------------------------------
+        focus_area = None if include_dimensioning_rules else ROOM_EQUIPMENT_FOCUS
+        executor = get_executor()
+        threshold = self.settings.parallel_room_threshold
+        verdicts = None
+        if self.room_verdicts.enabled and memoizable(rooms):
+            validation_result, verdicts = await self._validate_rooms_memoized(
+                executor, rooms, focus_area, encoding, rule_groups
+            )
+        elif executor.mode == "process" and 0 < threshold <= len(rooms):
+            validation_result = await self._validate_rooms_in_parallel(
+                executor, rooms, focus_area, encoding, rule_groups
+            )
+        else:
+            validation_result = await executor.run(
+                self.validate_rooms_sync, rooms, focus_area, encoding, rule_groups=rule_groups
+            )
 
         # ----------------------------------
-        # 1. Build a JSON-LD representation
+        # 2. Group violations per room so that existing response models stay intact
         # ----------------------------------
-        installation_id = str(uuid.uuid4())
+        return self._group_room_violations(rooms, validation_result, verdicts)
 
-        jsonld_data: Dict[str, Any] = {
-            "@context": {
-                "@vocab": "http://ontology.nfc15100.fr#",
-            },
-            "@id": installation_id,
-            "@type": "ElectricalInstallation",
-            "hasRoom": []
-        }
+    async def _validate_rooms_memoized(
+        self,
+        executor: StageExecutor,
+        rooms: List[AnyRoom],
+        focus_area: Optional[str],
+        encoding: Optional[str],
+        rule_groups: Optional[Sequence[str]],
+    ) -> tuple[ValidationResult, Dict[str, RoomVerdict]]:
+        """Validate the installation shapes on the whole graph and the room-local
+        shapes on the rooms missing from the verdict memo only.
+
+        Returns the installation result, holding the violations to group by
+        focus node, and the room-local verdicts of the rooms reporting their own
+        violations.
+        """
+        start_time = time.time()
+        builder = self.graph_builder(encoding=encoding)
+        results, verdicts = await self.room_verdicts_for(
+            executor, builder, rooms, focus_area, rule_groups,
+            installation=lambda: executor.run(
+                self.validate_rooms_sync, rooms, focus_area, builder.encoding, rule_groups=rule_groups,
+                scope=INSTALLATION_SCOPE,
+            ),
+        )
+        return self._verdict_report(builder, rooms, start_time, results, verdicts, focus_area, rule_groups)
+
+    async def validate_session_graph(
+        self,
+        executor: StageExecutor,
+        builder: InstallationGraphBuilder,
+        data_graph: Graph,
+        rooms: List[AnyRoom],
+        known_verdicts: Dict[str, RoomVerdict],
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> tuple[GlobalComplianceResult, List[RoomComplianceResult], Dict[str, RoomVerdict]]:
+        """Room-equipment validation of a session: the installation shapes on its
+        data graph (``builder.room_equipment_graph`` of ``rooms``, kept by the
+        session), the room-local shapes on the rooms without a known verdict.
+
+        Returns the compliance (global and per room) and the verdict of every room.
+        """
+        start_time = time.time()
+        results, verdicts = await self.room_verdicts_for(
+            executor, builder, rooms, ROOM_EQUIPMENT_FOCUS, rule_groups,
+            installation=lambda: executor.run_local(
+                self._validate_built_graph, builder, data_graph, rooms, ROOM_EQUIPMENT_FOCUS, time.time(),
+                multiply_sockets=True, rule_groups=rule_groups, scope=INSTALLATION_SCOPE,
+            ),
+            known_verdicts=known_verdicts,
+        )
+        validation_result, owned_verdicts = self._verdict_report(
+            builder, rooms, start_time, results, verdicts, ROOM_EQUIPMENT_FOCUS, rule_groups
+        )
+        global_compliance, room_results = self._group_room_violations(rooms, validation_result, owned_verdicts)
+        return global_compliance, room_results, verdicts
 
-        # Quick helper for blank nodes so that every equipment instance is unique
-        bnode_counter = 0
+    async def room_verdicts_for(
+        self,
+        executor: StageExecutor,
+        builder: InstallationGraphBuilder,
+        rooms: List[AnyRoom],
+        focus_area: Optional[str],
+        rule_groups: Optional[Sequence[str]],
+        installation: Callable[[], Awaitable[ValidationResult]],
+        known_verdicts: Optional[Dict[str, RoomVerdict]] = None,
+    ) -> tuple[List[ValidationResult], Dict[str, RoomVerdict]]:
+        """Room-local verdict of every room of ``rooms`` (unique ids).
+
+        Rooms of ``known_verdicts`` keep theirs, the others are looked up in the
+        memo.  Those missing from it are validated against the room-local shapes
+        concurrently with ``installation()``, the validation of the installation
+        shapes.  Returns the installation result followed by the room-local
+        results (holding the violations attributed to no room), and the verdicts.
+        """
+        ruleset = builder.ruleset
+        known_verdicts = known_verdicts or {}
+        context = (
+            ruleset.version, builder.encoding, focus_area,
+            tuple(sorted(rule_groups)) if rule_groups is not None else None, self.settings.native_rules,
+        )
+        breakpoints = ruleset.area_breakpoints.get(builder.encoding)
+        keys = {room.room_id: room_verdict_key(room, breakpoints, context) for room in rooms}
 
-        def _new_bnode(prefix: str) -> str:
-            nonlocal bnode_counter
-            bnode_counter += 1
-            return f"_:_{prefix}{bnode_counter}"
+        verdicts: Dict[str, RoomVerdict] = {}
+        missed: Dict[Any, AnyRoom] = {}
+        for room in rooms:
+            if room.room_id in known_verdicts:
+                verdicts[room.room_id] = known_verdicts[room.room_id]
+                continue
+            verdict = self.room_verdicts.get(keys[room.room_id])
+            if verdict is None:
+                missed.setdefault(keys[room.room_id], room)
+            else:
+                verdicts[room.room_id] = retarget_verdict(verdict, str(builder.room_iri(room.room_id)))
 
-        equipment_to_prop = {
-            EquipmentType.SOCKET: "hasSocket",
-            EquipmentType.NETWORK_SOCKET: "hasNetworkSocket",
-            EquipmentType.LIGHTING_POINT: "hasLightingPoint",
-            EquipmentType.SWITCH: "hasSwitch",
-            EquipmentType.SPECIALIZED_EQUIPMENT: "hasSpecializedEquipment",
+        missed_rooms = list(missed.values())
+        threshold = self.settings.parallel_room_threshold
+        if executor.mode == "process" and 0 < threshold <= len(missed_rooms):
+            room_chunks = self._room_chunks(missed_rooms, executor.max_workers)
+        else:
+            room_chunks = [missed_rooms] if missed_rooms else []
+        installation_result, *local_runs = await asyncio.gather(
+            installation(),
+            *(
+                executor.run(
+                    self.room_local_verdicts_sync, chunk, focus_area, builder.encoding, rule_groups=rule_groups
+                )
+                for chunk in room_chunks
+            ),
+        )
+
+        results = [installation_result]
+        for version, local_result, chunk_verdicts in local_runs:
+            results.append(local_result)
+            # Violations no room could be found for keep the chunk out of the memo
+            memoize = version == ruleset.version and not local_result.violations
+            for room_id, verdict in chunk_verdicts.items():
+                verdicts[room_id] = verdict
+                if memoize:
+                    self.room_verdicts.put(keys[room_id], verdict)
+        for room in rooms:
+            if room.room_id not in verdicts:
+                # Same key as a room validated by this request
+                verdict = verdicts[missed[keys[room.room_id]].room_id]
+                verdicts[room.room_id] = retarget_verdict(verdict, str(builder.room_iri(room.room_id)))
+        logger.info(
+            f"🧠 Room verdicts: {len(known_verdicts)} known, "
+            f"{len(rooms) - len(known_verdicts) - len(missed_rooms)} from the memo, {len(missed_rooms)} validated"
+        )
+        return results, verdicts
+
+    def _verdict_report(
+        self,
+        builder: InstallationGraphBuilder,
+        rooms: List[AnyRoom],
+        start_time: float,
+        results: List[ValidationResult],
+        verdicts: Dict[str, RoomVerdict],
+        focus_area: Optional[str],
+        rule_groups: Optional[Sequence[str]],
+    ) -> tuple[ValidationResult, Dict[str, RoomVerdict]]:
+        """Merge ``results`` with the violations of ``verdicts`` that are grouped by
+        focus node; returns the merged result and the verdicts left to their room."""
+        # Violations of a room reported under another one (see verdict_owners)
+        # are grouped by focus node like the installation ones
+        owners = verdict_owners(rooms, builder.room_iri)
+        owned_verdicts: Dict[str, RoomVerdict] = {}
+        regrouped: List[ValidationViolation] = []
+        for room in rooms:
+            verdict = verdicts[room.room_id]
+            regrouped.extend(verdict.equipment_violations)
+            if owners[room.room_id] == room.room_id:
+                owned_verdicts[room.room_id] = verdict
+            else:
+                regrouped.extend(verdict.room_violations)
+        merged = self._merged_result(start_time, regrouped, results)
+        is_valid = merged.is_valid and not any(verdict.room_violations for verdict in owned_verdicts.values())
+        # Memoized verdicts were checked against the room-local rules too
+        rules_checked = builder.ruleset.selection(focus_area, builder.encoding, rule_groups).rule_ids
+        return merged.model_copy(update={"is_valid": is_valid, "rules_checked": list(rules_checked)}), owned_verdicts
+
+    def room_local_verdicts_sync(
+        self,
+        rooms: List[AnyRoom],
+        focus_area: Optional[str] = None,
+        encoding: Optional[str] = None,
+        native_rules: Optional[bool] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> tuple[str, ValidationResult, Dict[str, RoomVerdict]]:
+        """Validate the room-local shapes on ``rooms`` (unique ids) and split the
+        violations into one verdict per room (blocking).
+
+        Returns the ruleset version used, the validation result holding the
+        violations attributed to no room, and the verdicts.
+        """
+        start_time = time.time()
+        builder = self.graph_builder(encoding=encoding)
+        data_graph = builder.room_equipment_graph(rooms)
+        result = self._validate_built_graph(
+            builder, data_graph, rooms, focus_area, start_time, multiply_sockets=True,
+            native_rules=native_rules, rule_groups=rule_groups, scope=ROOM_LOCAL_SCOPE,
+        )
+
+        room_ids = {str(builder.room_iri(room.room_id)): room.room_id for room in rooms}
+        room_violations: Dict[str, List[ValidationViolation]] = {room_id: [] for room_id in room_ids.values()}
+        equipment_violations: Dict[str, List[ValidationViolation]] = {room_id: [] for room_id in room_ids.values()}
+        unattributed = []
+        for violation in result.violations or []:
+            if violation.focus_node in room_ids:
+                room_violations[room_ids[violation.focus_node]].append(violation)
+                continue
+            owners = {
+                str(subject) for subject in data_graph.subjects(None, BNode(violation.focus_node or ""))
+            } & room_ids.keys()
+            if len(owners) == 1:
+                equipment_violations[room_ids[owners.pop()]].append(violation)
+            else:
+                unattributed.append(violation)
+
+        verdicts = {
+            room.room_id: RoomVerdict(
+                str(builder.room_iri(room.room_id)),
+                tuple(room_violations[room.room_id]),
+                tuple(equipment_violations[room.room_id]),
+                tuple(self._extract_missing_equipment(room_violations[room.room_id], room, builder.ruleset)),
+            )
+            for room in rooms
         }
+        return builder.ruleset.version, result.model_copy(update={"violations": unattributed}), verdicts
+
+    async def _validate_rooms_in_parallel(
+        self,
+        executor: StageExecutor,
+        rooms: List[AnyRoom],
+        focus_area: Optional[str],
+        encoding: Optional[str],
+        rule_groups: Optional[Sequence[str]],
+    ) -> ValidationResult:
+        """Validate the room-local shapes on chunks of rooms and the installation
+        shapes on the whole graph, as concurrent executor tasks."""
+        start_time = time.time()
+        room_chunks = self._room_chunks(rooms, executor.max_workers)
+        results = await asyncio.gather(
+            executor.run(
+                self.validate_rooms_sync, rooms, focus_area, encoding, rule_groups=rule_groups,
+                scope=INSTALLATION_SCOPE,
+            ),
+            *(
+                executor.run(
+                    self.validate_rooms_sync, chunk, focus_area, encoding, rule_groups=rule_groups,
+                    scope=ROOM_LOCAL_SCOPE,
+                )
+                for chunk in room_chunks
+            ),
+        )
+        logger.info(f"🏘️ Validated {len(rooms)} rooms as {len(room_chunks)} room-local tasks and one installation task")
+        return self._merged_result(start_time, [], list(results))
 
+    @staticmethod
+    def _room_chunks(rooms: List[AnyRoom], chunks: int) -> List[List[AnyRoom]]:
+        """Split ``rooms`` into at most ``chunks`` lists of similar equipment size.
+
+        Rooms sharing an id form a single node of the data graph and stay in the
+        same list.
+        """
+        by_id: Dict[str, List[AnyRoom]] = {}
         for room in rooms:
-            room_type_str = room.room_type.value if hasattr(room.room_type, "value") else str(room.room_type)
-
-            room_dict: Dict[str, Any] = {
-                "@id": room.room_id,
-                "@type": room_type_str,
-            }
-
-            if room.room_area is not None:
-                room_dict["roomArea"] = room.room_area
-
-            # Add equipment instances
-            for item in room.equipment:
-                eq_type_raw = item.equipment_type if hasattr(item.equipment_type, "value") else item.equipment_type
-                eq_type = EquipmentType(eq_type_raw) if isinstance(eq_type_raw, str) else eq_type_raw
-
-                parent_eq_type = self._map_to_parent_equipment_type(eq_type)
-                prop = equipment_to_prop.get(parent_eq_type)
-                if not prop:
-                    continue  # Ignore unsupported equipment types for now
-
-                room_dict.setdefault(prop, [])
-                # ----------------- Socket multiplication ------------------
-                # A double / triple outlet physically embeds 2 or 3 normal
-                # 2P+T sockets. To keep SHACL rules simple we materialise each
-                # individual plug as its own `Socket` node so that cardinality
-                # constraints are evaluated correctly.
-                multiplier = 1
-                if eq_type == EquipmentType.DOUBLE_SOCKET:
-                    multiplier = 2
-                elif eq_type == EquipmentType.TRIPLE_SOCKET:
-                    multiplier = 3
-
-                for _ in range(item.quantity * multiplier):
-                    equipment_dict = {
-                        "@id": _new_bnode(prop),
-                        "@type": parent_eq_type.value if hasattr(parent_eq_type, "value") else str(parent_eq_type)
-                    }
-
-                    # Ajout d'attributs techniques si la prise est spécialisée
-                    if parent_eq_type == EquipmentType.SOCKET:
-                        # Récupère les specs fournies (peut être None ou non-dict)
-                        specs = item.specifications if isinstance(item.specifications, dict) else {}
-                        current = specs.get("current")
-                        socket_type = specs.get("socketType")
-
-                        # Cas prise plaque (OvenSocket) → 32 A par défaut
-                        if eq_type == EquipmentType.OVEN_SOCKET:
-                            current = current or 32
-                            socket_type = socket_type or "32A"
-
-                        # Cas prise hotte (ExtractorSocket) → prise simple 16 A sur circuit dédié
-                        if eq_type == EquipmentType.EXTRACTOR_SOCKET:
-                            current = current or 16
-                            socket_type = socket_type or "2P+T"
-
-                        # Cas prise simple 20A dédiée (Dedicated20ASocket)
-                        if eq_type == EquipmentType.DEDICATED_20A_SOCKET:
-                            current = current or 20
-                            socket_type = socket_type or "20A"  # Marquer comme 20A pour exclure du minimum de prises cuisine
-
-                        # Autres prises spécialisées (≠ simple/double) → 20 A par défaut
-                        specialised_socket_types = {
-                            EquipmentType.OVEN_SOCKET,
-                            EquipmentType.HIGH_CURRENT_SOCKET,
-                            EquipmentType.TV_SOCKET
-                        }
-                        if eq_type in specialised_socket_types and (current is None and socket_type is None):
-                            current = 20
-                            socket_type = "20A"
-
-                        if current is not None:
-                            equipment_dict["current"] = current
-                        if socket_type is not None:
-                            equipment_dict["socketType"] = socket_type
-
-                    room_dict[prop].append(equipment_dict)
-
-            jsonld_data["hasRoom"].append(room_dict)
+            by_id.setdefault(room.room_id, []).append(room)
+        weights = {
+            room_id: sum(1 + sum(quantity for _, quantity, _ in room.equipment_items()) for room in group)
+            for room_id, group in by_id.items()
+        }
+        chunk_rooms: List[List[AnyRoom]] = [[] for _ in range(min(max(1, chunks), len(by_id)))]
+        chunk_weights = [0] * len(chunk_rooms)
+        # Heaviest rooms first, each to the lightest chunk
+        for room_id in sorted(by_id, key=lambda room_id: -weights[room_id]):
+            index = chunk_weights.index(min(chunk_weights))
+            chunk_weights[index] += weights[room_id]
+            chunk_rooms[index].extend(by_id[room_id])
+        return chunk_rooms
+
+    def graph_builder(self, infer_types: bool = True, encoding: Optional[str] = None) -> InstallationGraphBuilder:
+        """Graph builder bound to the current ruleset.
+
+        ``encoding`` defaults to ``settings.equipment_encoding``; the compact
+        encoding falls back to per-node when the ruleset has no count shapes.
+        """
+        return InstallationGraphBuilder(
+            self.ruleset,
+            parent_equipment_type,
+            infer_types=infer_types,
+            encoding=self.ruleset.encoding_for(encoding or self.settings.equipment_encoding),
+        )
 
-        # ----------------------------------
-        # 2. Delegate to SHACL validator with appropriate focus
-        # ----------------------------------
-        shacl_validator = NFC15100Validator()
-        focus_area = None if include_dimensioning_rules else "room-equipment"
-        validation_result = await shacl_validator.validate(jsonld_data, focus_area=focus_area)
+    def validate_rooms_sync(
+        self,
+        rooms: List[AnyRoom],
+        focus_area: Optional[str] = None,
+        encoding: Optional[str] = None,
+        native_rules: Optional[bool] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+        scope: Optional[str] = None,
+    ) -> ValidationResult:
+        """Build the room-equipment graph of ``rooms`` and validate it (blocking).
+
+        With the room-local ``scope``, ``rooms`` may be any subset of the
+        installation (rooms sharing an id kept together).
+        """
+        start_time = time.time()
+        builder = self.graph_builder(encoding=encoding)
+        data_graph = builder.room_equipment_graph(rooms)
+        return self._validate_built_graph(
+            builder, data_graph, rooms, focus_area, start_time, multiply_sockets=True,
+            native_rules=native_rules, rule_groups=rule_groups, scope=scope,
+        )
 
-        # ----------------------------------
-        # 3. Group violations per room so that existing response models stay intact
-        # ----------------------------------
+    def _validate_built_graph(
+        self,
+        builder: InstallationGraphBuilder,
+        data_graph: Graph,
+        rooms: List[AnyRoom],
+        focus_area: Optional[str],
+        start_time: float,
+        multiply_sockets: bool,
+        native_rules: Optional[bool] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+        scope: Optional[str] = None,
+    ) -> ValidationResult:
+        """Validate a builder graph, with the room cardinality rules evaluated
+        natively unless disabled (``settings.native_rules``)."""
+        if native_rules is None:
+            native_rules = self.settings.native_rules
+        if not native_rules:
+            return self.validate_graph_sync(
+                data_graph, focus_area, pre_inferred=True, start_time=start_time,
+                encoding=builder.encoding, ruleset=builder.ruleset, rule_groups=rule_groups, scope=scope,
+            )
+
+        native_violations = self.validate_native_rules(
+            builder, rooms, focus_area, multiply_sockets=multiply_sockets, rule_groups=rule_groups, scope=scope
+        )
+        result = self.validate_graph_sync(
+            data_graph, focus_area, pre_inferred=True, start_time=start_time,
+            encoding=builder.encoding, ruleset=builder.ruleset, native=True, rule_groups=rule_groups, scope=scope,
+        )
+        return self._merged_result(start_time, native_violations, [result])
+
+    def _merged_result(
+        self,
+        start_time: float,
+        native_violations: List[ValidationViolation],
+        results: List[ValidationResult],
+    ) -> ValidationResult:
+        """Combine the reports of disjoint shape selections and of the native rules."""
+        return ValidationResult(
+            is_valid=all(result.is_valid for result in results) and not native_violations,
+            violations=native_violations + [v for result in results for v in result.violations or []],
+            rules_checked=list(dict.fromkeys(rule_id for result in results for rule_id in result.rules_checked)),
+            validation_time_ms=(time.time() - start_time) * 1000,
+            setup_time_ms=sum(result.setup_time_ms or 0 for result in results),
+            evaluation_time_ms=sum(result.evaluation_time_ms or 0 for result in results),
+        )
+
+    def validate_native_rules(
+        self,
+        builder: InstallationGraphBuilder,
+        rooms: List[AnyRoom],
+        focus_area: Optional[str] = None,
+        multiply_sockets: bool = True,
+        rule_groups: Optional[Sequence[str]] = None,
+        scope: Optional[str] = None,
+    ) -> List[ValidationViolation]:
+        """Evaluate the compiled room cardinality rules over the room counts.
+
+        Reports the same violations pyshacl would for the corresponding shapes
+        of ``builder.ruleset``.
+        """
+        ruleset = builder.ruleset
+        table = ruleset.native_rules_for(focus_area, builder.encoding, rule_groups, scope)
+        return [
+            self._native_violation(rule, room_node, ruleset)
+            for rule, room_node in table.violations(
+                rooms, builder.room_iri, ruleset.types_for, parent_equipment_type, multiply_sockets
+            )
+        ]
+
+    def _native_violation(
+        self, rule: CardinalityRule, room_node: URIRef, ruleset: Optional[CompiledRuleset] = None
+    ) -> ValidationViolation:
+        """Violation object of a native rule, as pyshacl would report it."""
+        focus_node = str(room_node)
+        return self._build_violation(
+            rule.message,
+            focus_node=focus_node,
+            path=str(rule.path) if rule.path is not None else None,
+            value=None if rule.path is not None else focus_node,
+            severity=str(rule.severity),
+            source_shape=str(rule.shape),
+            ruleset=ruleset,
+        )
+
+    async def first_violation(
+        self,
+        rooms: List[AnyRoom],
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> Optional[ValidationViolation]:
+        """First blocking violation of the room-equipment validation of ``rooms``,
+        None if it has none (see :meth:`first_violation_sync`)."""
+        return await get_executor().run(self.first_violation_sync, rooms, encoding, rule_groups)
+
+    def first_violation_sync(
+        self,
+        rooms: List[AnyRoom],
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> Optional[ValidationViolation]:
+        """Fail-fast room-equipment validation (blocking).
+
+        Looks for one violation of ``ERROR`` severity, the cheapest checks
+        first: the native cardinality rules on the room counts, before any
+        graph is built, then the pyshacl shapes in increasing estimated cost,
+        stopping at the first shape reporting one.  Returns None exactly when
+        the full validation reports no ``ERROR`` violation (warnings and infos
+        are not looked for).
+        """
+        start_time = time.time()
+        builder = self.graph_builder(encoding=encoding)
+        ruleset = builder.ruleset
+        native = self.settings.native_rules
+        try:
+            if native:
+                table = ruleset.native_rules_for(ROOM_EQUIPMENT_FOCUS, builder.encoding, rule_groups)
+                for rule, room_node in table.violations(
+                    rooms, builder.room_iri, ruleset.types_for, parent_equipment_type
+                ):
+                    if rule.severity == SH.Violation:
+                        return self._native_violation(rule, room_node, ruleset)
+
+            data_graph = builder.room_equipment_graph(rooms)
+            for prefix, namespace in ruleset.ontology_graph.namespaces():
+                data_graph.bind(prefix, namespace)
+            if self.settings.persistent_shapes:
+                results_graph = ruleset.prepared_shapes_for(
+                    ROOM_EQUIPMENT_FOCUS, builder.encoding, native=native, rule_groups=rule_groups
+                ).validate(data_graph, debug=self.settings.debug, fail_fast=True).results_graph
+            else:
+                _conforms, results_graph, _text = validate(
+                    data_graph=data_graph,
+                    shacl_graph=ruleset.shapes_for(
+                        ROOM_EQUIPMENT_FOCUS, builder.encoding, native=native, rule_groups=rule_groups
+                    ),
+                    inference='none',
+                    abort_on_first=True,
+                    allow_warnings=True,
+                    debug=self.settings.debug
+                )
+        except Exception as e:
+            return self._system_error_result(e, start_time).violations[0]
+
+        return next(
+            (v for v in self._process_shacl_results(results_graph, ruleset) if v.severity == SeverityLevel.ERROR),
+            None,
+        )
+
+    async def validate_complete_installation(
+        self,
+        rooms: List[AnyRoom],
+        dimensioning: DimensioningResult,
+        postal_code: Optional[str] | None = None,
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> ValidationResult:
+        """Validate the complete installation (equipment + calculated dimensioning) against all rules
+        (or those of ``rule_groups``)."""
+        return await get_executor().run(
+            self.validate_complete_installation_sync, rooms, dimensioning, postal_code, encoding,
+            rule_groups=rule_groups,
+        )
+
+    def validate_complete_installation_sync(
+        self,
+        rooms: List[AnyRoom],
+        dimensioning: DimensioningResult,
+        postal_code: Optional[str] | None = None,
+        encoding: Optional[str] = None,
+        native_rules: Optional[bool] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> ValidationResult:
+        """Blocking version of :meth:`validate_complete_installation`.
+
+        Without a circuit plan, the circuits of ``dimensioning`` are planned
+        here so that the equipment is linked to them.
+        """
+        start_time = time.time()
+        if dimensioning.circuit_plan is None:
+            plan = self.equipment_inventory(rooms).circuit_plan(dimensioning.circuit_breakers)
+            dimensioning = dimensioning.model_copy(update={"circuit_plan": plan})
+        builder = self.graph_builder(encoding=encoding)
+        data_graph = builder.complete_installation_graph(rooms, dimensioning, postal_code=postal_code)
+        return self._validate_built_graph(
+            builder, data_graph, rooms, None, start_time, multiply_sockets=False,
+            native_rules=native_rules, rule_groups=rule_groups,
+        )
+
+    async def validate_global_with_dimensioning(
+        self,
+        rooms: List[AnyRoom],
+        postal_code: Optional[str] = None,
+        number_of_people: Optional[int] = None,
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> tuple[GlobalComplianceResult, List[RoomComplianceResult], DimensioningResult, ValidationResult]:
+        """Room-equipment validation, dimensioning and validation of the complete
+        installation as a single executor task, sharing one data graph.
+
+        Returns the room-equipment compliance (global and per room), the
+        dimensioning and the validation of the complete installation.
+        """
+        return await get_executor().run(
+            self.validate_global_with_dimensioning_sync, rooms, postal_code, number_of_people, encoding,
+            rule_groups=rule_groups,
+        )
+
+    def validate_global_with_dimensioning_sync(
+        self,
+        rooms: List[AnyRoom],
+        postal_code: Optional[str] = None,
+        number_of_people: Optional[int] = None,
+        encoding: Optional[str] = None,
+        native_rules: Optional[bool] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+        incremental: Optional[bool] = None,
+    ) -> tuple[GlobalComplianceResult, List[RoomComplianceResult], DimensioningResult, ValidationResult]:
+        """Blocking version of :meth:`validate_global_with_dimensioning`.
+
+        Once the dimensioning is known, the room-equipment graph is completed in
+        place (:meth:`InstallationGraphBuilder.complete_room_equipment_graph`)
+        rather than rebuilt.  With ``incremental`` (default
+        ``settings.incremental_global_validation``) and no multi-socket outlet,
+        both graphs hold the same rooms and equipment: the results of the
+        equipment-only shapes carry over from step 1 and the second pass only
+        evaluates the other shapes.  Multi-socket outlets are one socket node
+        per plug in step 1 and one per outlet afterwards, so every shape is
+        evaluated again in that case.
+        """
+        if native_rules is None:
+            native_rules = self.settings.native_rules
+        if incremental is None:
+            incremental = self.settings.incremental_global_validation
+        start_time = time.time()
+        builder = self.graph_builder(encoding=encoding)
+        extra_units: List[BNode] = []
+        unit_nodes: UnitNodes = {}
+        data_graph = builder.room_equipment_graph(rooms, extra_units, unit_nodes)
+        carry_over = incremental and not has_multi_socket_outlets(rooms)
+
+        # Step 1: room-equipment rules, equipment-only shapes validated on their own
+        if carry_over:
+            native_violations = self.validate_native_rules(
+                builder, rooms, ROOM_EQUIPMENT_FOCUS, multiply_sockets=True, rule_groups=rule_groups
+            ) if native_rules else []
+            equipment_only = self.validate_graph_sync(
+                data_graph, EQUIPMENT_ONLY_FOCUS, pre_inferred=True, start_time=start_time,
+                encoding=builder.encoding, ruleset=builder.ruleset, native=native_rules, rule_groups=rule_groups,
+            )
+            remainder = self.validate_graph_sync(
+                data_graph, ROOM_EQUIPMENT_REMAINDER_FOCUS, pre_inferred=True, start_time=start_time,
+                encoding=builder.encoding, ruleset=builder.ruleset, native=native_rules, rule_groups=rule_groups,
+            )
+            room_validation = self._merged_result(start_time, native_violations, [equipment_only, remainder])
+        else:
+            room_validation = self._validate_built_graph(
+                builder, data_graph, rooms, ROOM_EQUIPMENT_FOCUS, start_time, multiply_sockets=True,
+                native_rules=native_rules, rule_groups=rule_groups,
+            )
+        inventory = self.equipment_inventory(rooms)
+        basic_compliance, room_results = self._group_room_violations(rooms, room_validation, inventory=inventory)
+
+        # Step 2: dimensioning
+        dimensioning = self.calculate_dimensioning(
+            rooms, basic_compliance, postal_code=postal_code, number_of_people=number_of_people,
+            inventory=inventory, plan_circuits=True,
+        )
+
+        # Step 3: complete installation
+        final_start = time.time()
+        builder.complete_room_equipment_graph(data_graph, rooms, dimensioning, postal_code, extra_units, unit_nodes)
+        if carry_over:
+            native_violations = self.validate_native_rules(
+                builder, rooms, None, multiply_sockets=False, rule_groups=rule_groups
+            ) if native_rules else []
+            dimensioning_pass = self.validate_graph_sync(
+                data_graph, DIMENSIONING_PASS_FOCUS, pre_inferred=True, start_time=final_start,
+                encoding=builder.encoding, ruleset=builder.ruleset, native=native_rules, rule_groups=rule_groups,
+            )
+            carried = equipment_only.model_copy(update={"setup_time_ms": None, "evaluation_time_ms": None})
+            final_validation = self._merged_result(final_start, native_violations, [dimensioning_pass, carried])
+        else:
+            final_validation = self._validate_built_graph(
+                builder, data_graph, rooms, None, final_start, multiply_sockets=False,
+                native_rules=native_rules, rule_groups=rule_groups,
+            )
+        logger.info(
+            f"🔁 Second pass {'incremental' if carry_over else 'on all shapes'}: "
+            f"{final_validation.validation_time_ms:.1f} ms (total {(time.time() - start_time) * 1000:.1f} ms)"
+        )
+        return basic_compliance, room_results, dimensioning, final_validation
+
+    async def dimension(
+        self,
+        rooms: List[AnyRoom],
+        postal_code: Optional[str] = None,
+        number_of_people: Optional[int] = None,
+        check_compliance: bool = False,
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> tuple[DimensioningResult, Optional[GlobalComplianceResult]]:
+        """Dimensioning of ``rooms`` without the SHACL validations of
+        :meth:`validate_global_with_dimensioning` (see :meth:`dimension_sync`)."""
+        if not check_compliance:
+            # Inventory and dimensioning only: cheaper than an executor round trip
+            return self.dimension_sync(rooms, postal_code, number_of_people)
+        return await get_executor().run(
+            self.dimension_sync, rooms, postal_code, number_of_people, True, encoding, rule_groups
+        )
+
+    def dimension_sync(
+        self,
+        rooms: List[AnyRoom],
+        postal_code: Optional[str] = None,
+        number_of_people: Optional[int] = None,
+        check_compliance: bool = False,
+        encoding: Optional[str] = None,
+        rule_groups: Optional[Sequence[str]] = None,
+    ) -> tuple[DimensioningResult, Optional[GlobalComplianceResult]]:
+        """Dimensioning of ``rooms`` and, only with ``check_compliance``, their
+        room-equipment compliance (blocking).
+
+        Without ``check_compliance`` only the inventory and dimensioning stages
+        run and the compliance is None.  With it, the rooms are validated as
+        in step 1 of :meth:`validate_global_with_dimensioning_sync`, whose
+        dimensioning is then returned unchanged; the complete installation is
+        not validated.
+        """
+        inventory = self.equipment_inventory(rooms)
+        global_compliance = None
+        if check_compliance:
+            room_validation = self.validate_rooms_sync(rooms, ROOM_EQUIPMENT_FOCUS, encoding, rule_groups=rule_groups)
+            global_compliance, _ = self._group_room_violations(rooms, room_validation, inventory=inventory)
+        dimensioning = self.calculate_dimensioning(
+            rooms, global_compliance, postal_code=postal_code, number_of_people=number_of_people, inventory=inventory
+        )
+        return dimensioning, global_compliance
+
+    def build_room_equipment_jsonld(self, rooms: List[AnyRoom]) -> Dict[str, Any]:
+        """Debug export of the room-equipment graph of ``rooms`` as JSON-LD."""
+        return graph_to_jsonld(self.graph_builder().room_equipment_graph(rooms))
+
+    def _group_room_violations(
+        self,
+        rooms: List[AnyRoom],
+        validation_result: ValidationResult,
+        verdicts: Optional[Dict[str, RoomVerdict]] = None,
+        inventory: Optional[EquipmentInventory] = None,
+    ) -> tuple[GlobalComplianceResult, List[RoomComplianceResult]]:
+        """Split SHACL violations between rooms (by focus node) and the installation.
+
+        ``verdicts`` are room-local verdicts to prepend to the violations and
+        missing equipment of their room.  ``inventory`` is the equipment
+        inventory of ``rooms``, if already built.
+        """
         room_results: List[RoomComplianceResult] = []
         violations_by_room: Dict[str, List[ValidationViolation]] = {}
         global_violations: List[ValidationViolation] = []
@@ -608,8 +1196,15 @@ class NFC15100Validator:
             if not assigned:
                 global_violations.append(v)
 
-        for room in rooms:
+        for index, room in enumerate(rooms):
             r_violations = violations_by_room.get(room.room_id, [])
+            missing_equipment = self._extract_missing_equipment(
+                r_violations, room, room_inventory=inventory.rooms[index] if inventory is not None else None
+            )
+            verdict = verdicts.get(room.room_id) if verdicts else None
+            if verdict is not None:
+                r_violations = list(verdict.room_violations) + r_violations
+                missing_equipment = list(verdict.missing_equipment) + missing_equipment
             status = ComplianceStatus.COMPLIANT
             if any(v.severity == SeverityLevel.ERROR for v in r_violations):
                 status = ComplianceStatus.NON_COMPLIANT
@@ -622,7 +1217,7 @@ class NFC15100Validator:
                 compliance_status=status,
                 violations=r_violations,
                 warnings=[],
-                missing_equipment=self._extract_missing_equipment(r_violations, room)
+                missing_equipment=missing_equipment
             ))
 
         overall_status = ComplianceStatus.COMPLIANT if validation_result.is_valid else ComplianceStatus.NON_COMPLIANT
@@ -636,162 +1231,45 @@ class NFC15100Validator:
 
         return global_result, room_results
     
-    def _map_to_parent_equipment_type(self, equipment_type: EquipmentType) -> EquipmentType:
-        """Map equipment subclasses to their parent classes for validation purposes."""
-        # Socket subclasses -> Socket
-        socket_subclasses = {
-            EquipmentType.SIMPLE_SOCKET, EquipmentType.DOUBLE_SOCKET, EquipmentType.TRIPLE_SOCKET,
-            EquipmentType.WATERPROOF_SOCKET, EquipmentType.CHILDPROOF_SOCKET, EquipmentType.USB_SOCKET,
-            EquipmentType.HIGH_CURRENT_SOCKET, EquipmentType.TV_SOCKET, EquipmentType.OVEN_SOCKET,
-            EquipmentType.EXTRACTOR_SOCKET, EquipmentType.DEDICATED_20A_SOCKET
-        }
-        
-        # Switch subclasses -> Switch
-        switch_subclasses = {
-            EquipmentType.SIMPLE_SWITCH, EquipmentType.DOUBLE_SWITCH, EquipmentType.TRIPLE_SWITCH,
-            EquipmentType.DIM_SWITCH, EquipmentType.MOTION_SENSOR_SWITCH, EquipmentType.REMOTE_SWITCH,
-            EquipmentType.TIMER_SWITCH
-        }
-        
-        # Lighting subclasses -> LightingPoint
-        lighting_subclasses = {
-            EquipmentType.CEILING_LIGHTING, EquipmentType.WALL_LIGHTING, EquipmentType.SPOT_LIGHTING,
-            EquipmentType.EMERGENCY_LIGHTING, EquipmentType.EXTERIOR_LIGHTING
-        }
-        
-        # Network subclasses -> NetworkSocket
-        network_subclasses = {
-            EquipmentType.RJ45_SOCKET, EquipmentType.FIBER_SOCKET, EquipmentType.COAX_SOCKET
-        }
-        
-        # Specialized equipment subclasses -> SpecializedEquipment
-        specialized_subclasses = {
-            # Parent categories
-            EquipmentType.ELECTRIC_HEATING, EquipmentType.WATER_HEATER, EquipmentType.VENTILATION,
-            EquipmentType.ALARM_SYSTEM, EquipmentType.INTERCOM,
-            # Additional specialized equipment
-            EquipmentType.ELECTRIC_OVEN, EquipmentType.DISHWASHER, EquipmentType.WASHING_MACHINE,
-            EquipmentType.DRYER, EquipmentType.COOKING_HOB, EquipmentType.AIR_CONDITIONING,
-            EquipmentType.CONVECTOR, EquipmentType.INERTIA_RADIATOR, EquipmentType.FLOOR_HEATING,
-            EquipmentType.DUCTED_HEAT_PUMP, EquipmentType.ELECTRIC_WATER_HEATER,
-            EquipmentType.INSTANTANEOUS_WATER_HEATER, EquipmentType.STORAGE_WATER_HEATER,
-            EquipmentType.VMC, EquipmentType.SIMPLE_FLOW_VMC, EquipmentType.DOUBLE_FLOW_VMC
-        }
-        
-        # Map to parent classes
-        if equipment_type in socket_subclasses:
-            return EquipmentType.SOCKET
-        elif equipment_type in switch_subclasses:
-            return EquipmentType.SWITCH
-        elif equipment_type in lighting_subclasses:
-            return EquipmentType.LIGHTING_POINT
-        elif equipment_type in network_subclasses:
-            return EquipmentType.NETWORK_SOCKET
-        elif equipment_type in specialized_subclasses:
-            return EquipmentType.SPECIALIZED_EQUIPMENT
-        else:
-            # Return as-is if it's already a parent class or unknown (will be handled elsewhere)
-            return equipment_type
-    
+    def equipment_inventory(self, rooms: List[AnyRoom]) -> EquipmentInventory:
+        """Equipment inventory of ``rooms``, shared by the dimensioning stages."""
+        return EquipmentInventory(rooms, self.HEATING_AREA_RATING_MAP.keys())
+
     def calculate_dimensioning(
         self,
-        rooms: List[RoomEquipment],
-        global_compliance: GlobalComplianceResult,
+        rooms: List[AnyRoom],
+        global_compliance: Optional[GlobalComplianceResult],
         postal_code: Optional[str] | None = None,
         number_of_people: Optional[int] | None = None,
+        inventory: Optional[EquipmentInventory] = None,
+        plan_circuits: bool = False,
     ) -> DimensioningResult:
-        """Calculate electrical dimensioning for an installation."""
+        """Calculate electrical dimensioning for an installation.
+
+        ``global_compliance`` only decides the note asking to fix the
+        non-compliances; None when compliance was not checked (no note).
+        ``inventory`` is the equipment inventory of ``rooms``, built here when
+        not given.  With ``plan_circuits`` the result also holds the circuit
+        plan (``circuit_plan``) the complete installation graph is built from.
+        """
         circuit_breakers = []
         surge_protectors = []
         electrical_panels = []
         cables = []
         installation_notes = []
 
-        total_equipment = {}
-        heating_areas: dict[EquipmentType, float] = {}
-        # Nouvelle structure pour stocker les équipements de chauffage individuels (un circuit par équipement)
-        individual_heating_equipment: list[tuple[EquipmentType, float, str]] = []  # (type, area, room_id)
-        heating_types_set = set(self.HEATING_AREA_RATING_MAP.keys())
-        # Types de chauffage nécessitant un circuit par équipement
-        individual_circuit_heating_types = {EquipmentType.CONVECTOR, EquipmentType.INERTIA_RADIATOR}
-        total_living_area = 0.0
-        non_living_room_types = {RoomType.OTHER, RoomType.EXTERIOR_SPACE}
+        if inventory is None:
+            inventory = self.equipment_inventory(rooms)
+        heating_areas = inventory.heating_areas
+        # Équipements de chauffage individuels (un circuit par équipement)
+        individual_heating_equipment = inventory.individual_heating
 
-        for room in rooms:
-            if room.room_type not in non_living_room_types:
-                total_living_area += room.room_area or 0.0
-            
-            for equipment in room.equipment:
-                eq_type = equipment.equipment_type if hasattr(equipment.equipment_type, 'value') else equipment.equipment_type
-                try:
-                    eq_type_enum = EquipmentType(eq_type)
-                except ValueError:
-                    eq_type_enum = EquipmentType.SPECIALIZED_EQUIPMENT
-
-                if eq_type_enum in heating_types_set and equipment.quantity > 0:
-                    # Pour les convecteurs et radiateurs à inertie : un circuit par équipement
-                    if eq_type_enum in individual_circuit_heating_types:
-                        for _ in range(equipment.quantity):
-                            individual_heating_equipment.append((eq_type_enum, room.room_area or 0.0, room.room_id))
-                    else:
-                        # Pour les autres types de chauffage : logique agrégée conservée
-                        heating_areas[eq_type_enum] = heating_areas.get(eq_type_enum, 0.0) + (room.room_area or 0.0)
-
-                # Compteurs spécifiques pour TV et coaxial (pour les câbles)
-                if eq_type_enum == EquipmentType.TV_SOCKET:
-                    total_equipment[EquipmentType.TV_SOCKET] = total_equipment.get(EquipmentType.TV_SOCKET, 0) + equipment.quantity
-                elif eq_type_enum == EquipmentType.COAX_SOCKET:
-                    total_equipment[EquipmentType.COAX_SOCKET] = total_equipment.get(EquipmentType.COAX_SOCKET, 0) + equipment.quantity
-
-                # Mapping vers les types parents (pour les disjoncteurs)
-                parent_type = self._map_to_parent_equipment_type(eq_type_enum)
-                total_equipment[parent_type] = total_equipment.get(parent_type, 0) + equipment.quantity
-        
-        circuit_breakers.extend(
-            self._calculate_circuit_breakers(total_equipment, rooms, number_of_people, heating_areas, total_living_area, individual_heating_equipment)
-        )
+        circuit_breakers.extend(self._calculate_circuit_breakers(inventory, number_of_people))
         
         # ------------------------------------------------------------------
         #  Surge protector (SPD) calculation – only in lightning-risk areas  
         # ------------------------------------------------------------------
-
-        # 1) Determine if SPD is mandatory
-        # NF C 15-100 makes the SPD mandatory when the installation is located
-        # in départements where the lightning density Ng > 2.5. The list below
-        # comes from the « Guide UTE C 15-443 » and covers the départements
-        # officially classified as "à risque foudre".
-        risk_departments: set[str] = {
-            "01", "03", "04", "05", "06", "07", "09", "11", "12", "13",
-            "14", "15", "16", "17", "19", "2A", "2B", "21", "23", "24",
-            "26", "27", "28", "30", "31", "32", "33", "34", "35", "36",
-            "37", "38", "39", "40", "41", "42", "43", "44", "45", "46",
-            "47", "48", "49", "50", "52", "53", "56", "57", "58", "59",
-            "60", "61", "62", "63", "64", "65", "66", "67", "68", "69",
-            "70", "71", "72", "73", "74", "79", "80", "81", "82", "83",
-            "84", "85", "86", "87", "88", "89", "90"
-        }
-
-        spd_required = True  # Conservative default
-
-        if postal_code:
-            # Extract the département number (first two characters, except for
-            # Corsica where it can be 2A/2B)
-            dept_code = postal_code.strip()[:2].upper()
-
-            # Special handling for Corsica postal codes (20 000 – 20 199 = 2A,
-            # 20 200 – 20 999 = 2B)
-            if dept_code == "20":
-                try:
-                    last_three = int(postal_code[2:5])
-                    dept_code = "2A" if last_three < 200 else "2B"
-                except ValueError:
-                    # If parsing fails, keep "20" which will not match
-                    # the risk list – safer to keep default (SPD required).
-                    dept_code = "20"
-
-            spd_required = dept_code in risk_departments
-
-        if spd_required:
+        if self._surge_protector_required(postal_code):
             surge_protectors.append(
                 SurgeProtectorSpec(
                     type="Parafoudre Type 2",
@@ -817,7 +1295,7 @@ class NFC15100Validator:
         ))
         
         # Calculate cable requirements
-        cables.extend(self._calculate_cables(rooms, total_equipment))
+        cables.extend(self._calculate_cables(inventory))
         
         # ------------------------------------------------------
         #  Additional installation notes (dimensioning warnings)
@@ -849,16 +1327,10 @@ class NFC15100Validator:
                 installation_notes.append("⚠️ Certains équipements de chauffage sont installés dans des pièces de grande superficie. Vérifiez que la puissance est adaptée.")
 
         # Add generic installation notes
-        installation_notes.extend([
-            "Tous les circuits doivent être protégés par un DDR 30 mA",
-            "Sections des conducteurs : 1,5 mm² pour l'éclairage et les prises classiques 16A, 2,5 mm² minimum pour les circuits cuisine",
-            "Les circuits dédiés de la cuisine nécessitent une protection 20 A",
-            "Les circuits de la salle de bains nécessitent des indices de protection IP adaptés",
-            "Les équipements spécialisés doivent avoir un circuit dédié",
-        ])
-
-        if not global_compliance.overall_status == ComplianceStatus.COMPLIANT:
-            installation_notes.append("⚠️ Corrigez les non-conformités avant l'installation")
+        installation_notes.extend(self.INSTALLATION_NOTES)
+
+        if global_compliance is not None and not global_compliance.overall_status == ComplianceStatus.COMPLIANT:
+            installation_notes.append(self.NON_COMPLIANT_NOTE)
         
         return DimensioningResult(
             circuit_breakers=circuit_breakers,
@@ -866,60 +1338,99 @@ class NFC15100Validator:
             electrical_panels=electrical_panels,
             cables=cables,
             total_estimated_cost=None,  # Could be calculated based on component costs
-            installation_notes=installation_notes
+            installation_notes=installation_notes,
+            circuit_plan=inventory.circuit_plan(circuit_breakers) if plan_circuits else None,
         )
     
-    def _calculate_circuit_breakers(self, total_equipment: Dict, rooms: List[RoomEquipment], number_of_people: Optional[int] = None, heating_areas: dict[EquipmentType, float] | None = None, total_living_area: float = 0.0, individual_heating_equipment: list[tuple[EquipmentType, float, str]] | None = None) -> List[CircuitBreakerSpec]:
-        breakers: list[CircuitBreakerSpec] = []
+    def grouped_dimensioning(self, dimensioning: DimensioningResult) -> DimensioningResult:
+        """``dimensioning`` with its circuit breakers grouped by rating, type and
+        circuit kind (``circuit_breaker_groups``, ``circuit_breakers`` emptied).
 
-        def _to_enum(raw):
-            if hasattr(raw, "value"): return raw
-            try: return EquipmentType(raw)
-            except Exception: return None
-
-        # --- Définitions communes ---
-        # Types de prises exclues (spécialisées)
-        excluded_socket_types = {
-            EquipmentType.DEDICATED_20A_SOCKET,
-            EquipmentType.OVEN_SOCKET,
-            EquipmentType.EXTRACTOR_SOCKET,
-            EquipmentType.HIGH_CURRENT_SOCKET
+        Groups come in the order of their first breaker; a group lists the
+        detail of each of its circuits (heated room, equipment...) when any
+        has one.
+        """
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for spec in dimensioning.circuit_breakers:
+            key = (spec.rating, spec.type, spec.circuit_kind)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "rating": spec.rating,
+                    "type": spec.type,
+                    "circuit_kind": spec.circuit_kind,
+                    "quantity": 0,
+                    "description": self.CIRCUIT_KIND_LABELS.get(spec.circuit_kind, spec.description),
+                    "details": [],
+                }
+            group["quantity"] += spec.quantity
+            group["details"].extend([spec.circuit_detail] * spec.quantity)
+        circuit_breaker_groups = []
+        for group in groups.values():
+            details = group.pop("details")
+            if group["quantity"] == 0:
+                continue
+            if any(detail is not None for detail in details):
+                group["circuits"] = [detail or "" for detail in details]
+            circuit_breaker_groups.append(CircuitBreakerGroup(**group))
+        return dimensioning.model_copy(update={"circuit_breakers": [], "circuit_breaker_groups": circuit_breaker_groups})
+
+    @staticmethod
+    def _surge_protector_required(postal_code: Optional[str]) -> bool:
+        """Whether the installation needs a surge protector (SPD)."""
+        # NF C 15-100 makes the SPD mandatory when the installation is located
+        # in départements where the lightning density Ng > 2.5. The list below
+        # comes from the « Guide UTE C 15-443 » and covers the départements
+        # officially classified as "à risque foudre".
+        risk_departments: set[str] = {
+            "01", "03", "04", "05", "06", "07", "09", "11", "12", "13",
+            "14", "15", "16", "17", "19", "2A", "2B", "21", "23", "24",
+            "26", "27", "28", "30", "31", "32", "33", "34", "35", "36",
+            "37", "38", "39", "40", "41", "42", "43", "44", "45", "46",
+            "47", "48", "49", "50", "52", "53", "56", "57", "58", "59",
+            "60", "61", "62", "63", "64", "65", "66", "67", "68", "69",
+            "70", "71", "72", "73", "74", "79", "80", "81", "82", "83",
+            "84", "85", "86", "87", "88", "89", "90"
         }
 
+        spd_required = True  # Conservative default
+
+        if postal_code:
+            # Extract the département number (first two characters, except for
+            # Corsica where it can be 2A/2B)
+            dept_code = postal_code.strip()[:2].upper()
+
+            # Special handling for Corsica postal codes (20 000 – 20 199 = 2A,
+            # 20 200 – 20 999 = 2B)
+            if dept_code == "20":
+                try:
+                    last_three = int(postal_code[2:5])
+                    dept_code = "2A" if last_three < 200 else "2B"
+                except ValueError:
+                    # If parsing fails, keep "20" which will not match
+                    # the risk list – safer to keep default (SPD required).
+                    dept_code = "20"
+
+            spd_required = dept_code in risk_departments
+        return spd_required
+
+    def _calculate_circuit_breakers(self, inventory: EquipmentInventory, number_of_people: Optional[int] = None) -> List[CircuitBreakerSpec]:
+        breakers: list[CircuitBreakerSpec] = []
+        total_equipment = inventory.totals
+        total_living_area = inventory.total_living_area
+
         # --- 1. Lighting ---
         # Nouveau dimensionnement : disjoncteurs 16A, division par 8 comme les prises
         lighting_points = total_equipment.get(EquipmentType.LIGHTING_POINT, 0)
         if lighting_points > 0:
             lighting_circuits = (lighting_points + 7) // 8  # Division par 8, arrondi supérieur
             for idx in range(lighting_circuits):
-                breakers.append(CircuitBreakerSpec(rating=16, type="Type C", quantity=1, description=f"Disjoncteur éclairage 16A {idx + 1} (max 8 points lumineux)"))
+                breakers.append(CircuitBreakerSpec(rating=16, type="Type C", quantity=1, description=f"Disjoncteur éclairage 16A {idx + 1} (max 8 points lumineux)", circuit_kind=CircuitKind.LIGHTING))
 
-        # --- 2. Count Regular Sockets (nouvelle logique) ---
-        # Compter seulement les prises classiques (hors spécialisées et cuisines)
-        # pour les typologies spécifiées
-        total_regular_socket_count = 0
-        
-        # Types de pièces autorisées pour les prises classiques
-        regular_socket_room_types = {
-            RoomType.LIVING_ROOM,  # salon
-            RoomType.BEDROOM,      # chambre
-            RoomType.OFFICE,       # bureau
-            RoomType.CIRCULATION_AREA,  # dégagement et locaux ≥ 4 m²
-            RoomType.WET_ROOM,     # salle de bain
-            RoomType.BATHROOM_WITH_WC,  # salle de bain avec WC
-        }
-
-        for room in rooms:
-            # Vérifier si la pièce est dans les typologies autorisées
-            if room.room_type in regular_socket_room_types:
-                for equipment in room.equipment:
-                    eq_enum = _to_enum(equipment.equipment_type)
-                    if eq_enum is None: continue
-
-                    # Compter les prises classiques seulement
-                    if (self._map_to_parent_equipment_type(eq_enum) == EquipmentType.SOCKET and 
-                        eq_enum not in excluded_socket_types):
-                        total_regular_socket_count += equipment.quantity
+        # --- 2. Regular Sockets ---
+        # Prises classiques seulement (hors spécialisées et cuisines) des
+        # typologies REGULAR_SOCKET_ROOM_TYPES
+        total_regular_socket_count = inventory.regular_socket_count
 
         # --- 3. Circuits pour prises classiques : tous en 16A, max 8 prises par disjoncteur ---
         if total_regular_socket_count > 0:
@@ -929,65 +1440,37 @@ class NFC15100Validator:
                     rating=16, 
                     type="Type C", 
                     quantity=1, 
-                    description=f"Disjoncteur prises classiques 16A {idx + 1} (max 8 prises, section 1,5 mm²)"
+                    description=f"Disjoncteur prises classiques 16A {idx + 1} (max 8 prises, section 1,5 mm²)",
+                    circuit_kind=CircuitKind.SOCKETS,
                 ))
 
         # --- 4. Circuits spécialisés et équipements dédiés (conservés) ---
-        kitchen_socket_count = 0
-        specialised_20a_count = 0
-        cooking_hob_count = 0
-        vmc_types_found: set[EquipmentType] = set()
-
-        kitchen_room_types = {RoomType.KITCHEN, RoomType.LIVING_ROOM_WITH_INTEGRATED_KITCHEN}
-        specialised_20a_types = {EquipmentType.DISHWASHER, EquipmentType.WASHING_MACHINE, EquipmentType.DRYER, EquipmentType.ELECTRIC_OVEN, EquipmentType.DEDICATED_20A_SOCKET}
-        vmc_equipment_types = {EquipmentType.VMC, EquipmentType.SIMPLE_FLOW_VMC, EquipmentType.DOUBLE_FLOW_VMC}
+        kitchen_socket_count = inventory.kitchen_socket_count
+        specialised_20a_count = inventory.specialised_20a_count
+        cooking_hob_count = inventory.cooking_hob_count
+        vmc_types_found = inventory.vmc_types
 
-        for room in rooms:
-            for equipment in room.equipment:
-                eq_enum = _to_enum(equipment.equipment_type)
-                if eq_enum is None: continue
-
-                # Count kitchen sockets (restent séparés)
-                if (room.room_type in kitchen_room_types and 
-                    self._map_to_parent_equipment_type(eq_enum) == EquipmentType.SOCKET and
-                    eq_enum not in excluded_socket_types):
-                    kitchen_socket_count += equipment.quantity
-                
-                # Count other specialized items
-                if eq_enum in specialised_20a_types:
-                    specialised_20a_count += equipment.quantity
-                if eq_enum == EquipmentType.COOKING_HOB:
-                    cooking_hob_count += equipment.quantity
-                if eq_enum in vmc_equipment_types:
-                    vmc_types_found.add(eq_enum)
-        
         # Sockets (Kitchen): 20A, max 6 (conservé)
         if kitchen_socket_count > 0:
             kitchen_circuits_20a = max(1, (kitchen_socket_count + 5) // 6)
             for idx in range(kitchen_circuits_20a):
-                breakers.append(CircuitBreakerSpec(rating=20, type="Type C", quantity=1, description=f"Disjoncteur prises cuisine {idx + 1} (max 6 prises)"))
+                breakers.append(CircuitBreakerSpec(rating=20, type="Type C", quantity=1, description=f"Disjoncteur prises cuisine {idx + 1} (max 6 prises)", circuit_kind=CircuitKind.KITCHEN_SOCKETS))
 
         # Specialised 20A (min 3) (conservé)
         specialised_circuits_needed = max(3, specialised_20a_count)
         for idx in range(specialised_circuits_needed):
-            breakers.append(CircuitBreakerSpec(rating=20, type="Type C", quantity=1, description=f"Circuit spécialisé 20A {idx + 1}"))
+            breakers.append(CircuitBreakerSpec(rating=20, type="Type C", quantity=1, description=f"Circuit spécialisé 20A {idx + 1}", circuit_kind=CircuitKind.SPECIALISED_20A))
 
         # Prises plaque (OVEN_SOCKET) - 1 disjoncteur 32A par prise
-        oven_socket_count = 0
-        for room in rooms:
-            for equipment in room.equipment:
-                eq_enum = _to_enum(equipment.equipment_type)
-                if eq_enum == EquipmentType.OVEN_SOCKET:
-                    oven_socket_count += equipment.quantity
-        
+        oven_socket_count = inventory.oven_socket_count
         for idx in range(oven_socket_count):
-            breakers.append(CircuitBreakerSpec(rating=32, type="Type C", quantity=1, description=f"Circuit dédié prise plaque 32A {idx + 1}"))
+            breakers.append(CircuitBreakerSpec(rating=32, type="Type C", quantity=1, description=f"Circuit dédié prise plaque 32A {idx + 1}", circuit_kind=CircuitKind.OVEN_SOCKET))
 
         # Cooking Hob (seulement si pas de prises plaque dédiées)
         if oven_socket_count == 0 and cooking_hob_count > 0:
             hob_circuits = max(1, cooking_hob_count)
             for idx in range(hob_circuits):
-                breakers.append(CircuitBreakerSpec(rating=32, type="Type C", quantity=1, description=f"Circuit dédié plaque de cuisson {idx + 1}"))
+                breakers.append(CircuitBreakerSpec(rating=32, type="Type C", quantity=1, description=f"Circuit dédié plaque de cuisson {idx + 1}", circuit_kind=CircuitKind.COOKING_HOB))
 
         # VMC Circuit
         if vmc_types_found:
@@ -1000,7 +1483,7 @@ class NFC15100Validator:
                 vmc_type_str = "Simple Flux"
                 vmc_rating = 6 if total_living_area >= 120 else 2
             if vmc_rating > 0:
-                breakers.append(CircuitBreakerSpec(rating=vmc_rating, type="Type C", quantity=1, description=f"Circuit VMC {vmc_type_str} - {vmc_rating}A"))
+                breakers.append(CircuitBreakerSpec(rating=vmc_rating, type="Type C", quantity=1, description=f"Circuit VMC {vmc_type_str} - {vmc_rating}A", circuit_kind=CircuitKind.VMC, circuit_detail=vmc_type_str))
 
         # Heating (Aggregated for non-individual types)
         def _rating_from_area(eq_type: EquipmentType, area: float | None) -> int:
@@ -1013,16 +1496,16 @@ class NFC15100Validator:
             return 20
 
         # Circuits de chauffage agrégés (autres que convecteurs et radiateurs à inertie)
-        if heating_areas:
-            for eq_enum, total_area in heating_areas.items():
+        if inventory.heating_areas:
+            for eq_enum, total_area in inventory.heating_areas.items():
                 if total_area <= 0: continue
                 rating = _rating_from_area(eq_enum, total_area)
-                breakers.append(CircuitBreakerSpec(rating=rating, type="Type C", quantity=1, description=f"Circuit {eq_enum.value} - {rating}A"))
+                breakers.append(CircuitBreakerSpec(rating=rating, type="Type C", quantity=1, description=f"Circuit {eq_enum.value} - {rating}A", circuit_kind=CircuitKind.HEATING, circuit_detail=eq_enum.value))
 
         # Circuits de chauffage individuels (un circuit par équipement pour convecteurs et radiateurs à inertie)
-        if individual_heating_equipment:
+        if inventory.individual_heating:
             equipment_counter = {}  # Pour numéroter les équipements du même type
-            for eq_type, area, room_id in individual_heating_equipment:
+            for eq_type, area, room_id in inventory.individual_heating:
                 # Compter les équipements du même type pour la numérotation
                 if eq_type not in equipment_counter:
                     equipment_counter[eq_type] = 0
@@ -1042,28 +1525,17 @@ class NFC15100Validator:
                     rating=rating, 
                     type="Type C", 
                     quantity=1, 
-                    description=f"Circuit {eq_type_display} {equipment_counter[eq_type]} - {rating}A{alert_suffix}"
+                    description=f"Circuit {eq_type_display} {equipment_counter[eq_type]} - {rating}A{alert_suffix}",
+                    circuit_kind=CircuitKind.INDIVIDUAL_HEATING,
+                    circuit_detail=f"{eq_type_display} {room_id}{alert_suffix}",
                 ))
         
         # Remaining Specialised Equipment (that are not sockets or otherwise counted)
-        heating_types_set = set(self.HEATING_AREA_RATING_MAP.keys())
-        remaining_skip_set = specialised_20a_types | heating_types_set | vmc_equipment_types | {EquipmentType.COOKING_HOB, EquipmentType.DEDICATED_20A_SOCKET, EquipmentType.WATER_HEATER, EquipmentType.ELECTRIC_WATER_HEATER, EquipmentType.INSTANTANEOUS_WATER_HEATER, EquipmentType.STORAGE_WATER_HEATER} | excluded_socket_types
-
-        for room in rooms:
-            for equipment in room.equipment:
-                eq_enum = _to_enum(equipment.equipment_type)
-                if eq_enum is None or self._map_to_parent_equipment_type(eq_enum) != EquipmentType.SPECIALIZED_EQUIPMENT: continue
-                if eq_enum in remaining_skip_set: continue
-                power_w: float | None = None
-                if hasattr(equipment, "specifications") and isinstance(equipment.specifications, dict):
-                    p = equipment.specifications.get("power_w") or equipment.specifications.get("powerW")
-                    if p is not None:
-                        try: power_w = float(p)
-                        except (TypeError, ValueError): power_w = None
-                if power_w is None: power_w = self._get_typical_power_consumption(eq_enum)
-                rating = self._determine_breaker_rating(power_w)
-                for _ in range(equipment.quantity):
-                    breakers.append(CircuitBreakerSpec(rating=rating, type="Type C", quantity=1, description=f"Circuit dédié {eq_enum.value} ({rating}A)"))
+        for eq_enum, power_w, quantity in inventory.dedicated_equipment:
+            if power_w is None: power_w = self._get_typical_power_consumption(eq_enum)
+            rating = self._determine_breaker_rating(power_w)
+            for _ in range(quantity):
+                breakers.append(CircuitBreakerSpec(rating=rating, type="Type C", quantity=1, description=f"Circuit dédié {eq_enum.value} ({rating}A)", circuit_kind=CircuitKind.DEDICATED, circuit_detail=eq_enum.value))
 
         # Water Heater
         def _wh_breaker_rating(n_people: int | None, area: float) -> int:
@@ -1073,14 +1545,9 @@ class NFC15100Validator:
             elif n_people == 4: return 25 if area > 110 else 20
             else: return 25
         
-        water_heater_types = {EquipmentType.WATER_HEATER, EquipmentType.ELECTRIC_WATER_HEATER, EquipmentType.INSTANTANEOUS_WATER_HEATER, EquipmentType.STORAGE_WATER_HEATER}
-        for room in rooms:
-            for equipment in room.equipment:
-                eq_enum = _to_enum(equipment.equipment_type)
-                if eq_enum not in water_heater_types: continue
-                rating = _wh_breaker_rating(number_of_people, total_living_area)
-                for _ in range(equipment.quantity):
-                    breakers.append(CircuitBreakerSpec(rating=rating, type="Type C", quantity=1, description=f"Circuit chauffe-eau ({rating}A) pour {number_of_people or '?'} pers. et {total_living_area:.0f}m²"))
+        rating = _wh_breaker_rating(number_of_people, total_living_area)
+        for _ in range(inventory.water_heater_count):
+            breakers.append(CircuitBreakerSpec(rating=rating, type="Type C", quantity=1, description=f"Circuit chauffe-eau ({rating}A) pour {number_of_people or '?'} pers. et {total_living_area:.0f}m²", circuit_kind=CircuitKind.WATER_HEATER, circuit_detail=f"{number_of_people or '?'} pers. et {total_living_area:.0f}m²"))
         
         return breakers
     
@@ -1114,7 +1581,7 @@ class NFC15100Validator:
         
         return power_map.get(equipment_type, 100)
     
-    def _calculate_cables(self, rooms: List[RoomEquipment], total_equipment: Dict) -> List[CableSpec]:
+    def _calculate_cables(self, inventory: EquipmentInventory) -> List[CableSpec]:
         """Calculate required cables.
         
         The previous implementation relied only on the **number** of lighting points,
@@ -1151,7 +1618,8 @@ class NFC15100Validator:
         # Câble d'alimentation principale supprimé selon les nouvelles spécifications
 
         # Surface totale (m²) – ne tient compte que des pièces ayant une area
-        total_area: float = sum((r.room_area or 0.0) for r in rooms)
+        total_area: float = inventory.total_area
+        total_equipment = inventory.totals
 
         # ------------------------------------------------------------------
         # 2. Éclairage (1,5 mm²)
@@ -1173,36 +1641,9 @@ class NFC15100Validator:
         # 3. Prises de courant - séparées par type (cuisine vs classiques)
         # ------------------------------------------------------------------
         
-        # Calculer les prises cuisine et classiques séparément
-        kitchen_sockets = 0
-        regular_sockets = 0
-        
-        kitchen_room_types = {RoomType.KITCHEN, RoomType.LIVING_ROOM_WITH_INTEGRATED_KITCHEN}
-        regular_socket_room_types = {
-            RoomType.LIVING_ROOM, RoomType.BEDROOM, RoomType.OFFICE,
-            RoomType.CIRCULATION_AREA, RoomType.WET_ROOM, RoomType.BATHROOM_WITH_WC
-        }
-        excluded_socket_types = {
-            EquipmentType.DEDICATED_20A_SOCKET, EquipmentType.OVEN_SOCKET,
-            EquipmentType.EXTRACTOR_SOCKET, EquipmentType.HIGH_CURRENT_SOCKET
-        }
-        
-        for room in rooms:
-            for equipment in room.equipment:
-                if hasattr(equipment.equipment_type, 'value'):
-                    eq_type = equipment.equipment_type
-                else:
-                    try:
-                        eq_type = EquipmentType(equipment.equipment_type)
-                    except:
-                        continue
-                        
-                if (self._map_to_parent_equipment_type(eq_type) == EquipmentType.SOCKET and 
-                    eq_type not in excluded_socket_types):
-                    if room.room_type in kitchen_room_types:
-                        kitchen_sockets += equipment.quantity
-                    elif room.room_type in regular_socket_room_types:
-                        regular_sockets += equipment.quantity
+        # Prises cuisine et classiques séparément
+        kitchen_sockets = inventory.kitchen_socket_count
+        regular_sockets = inventory.regular_socket_count
 
         # Prises cuisine : 2,5 mm² (circuits 20A)
         if kitchen_sockets > 0:
@@ -1251,10 +1692,9 @@ class NFC15100Validator:
         # ------------------------------------------------------------------
         # 6. Circuits spécialisés cuisine (4 mm²)
         # ------------------------------------------------------------------
-        kitchen_rooms = [r for r in rooms if r.room_type.value == "Kitchen"]
-        if kitchen_rooms:
+        if inventory.has_kitchen:
             # Longueur : 4 m de câble par m² de cuisine, min 60 m (ancienne valeur)
-            kitchen_area = sum((r.room_area or 0.0) for r in kitchen_rooms)
+            kitchen_area = inventory.kitchen_area
             if kitchen_area > 0:
                 length_estimate = max(60.0, kitchen_area * 4.0)
             else:
@@ -1266,20 +1706,7 @@ class NFC15100Validator:
         # ------------------------------------------------------------------
         # 7. Prises plaque dédiées (6 mm²) - 1 câble par prise plaque
         # ------------------------------------------------------------------
-        oven_socket_count = 0
-        for room in rooms:
-            for equipment in room.equipment:
-                if hasattr(equipment.equipment_type, 'value'):
-                    eq_type = equipment.equipment_type
-                else:
-                    try:
-                        eq_type = EquipmentType(equipment.equipment_type)
-                    except:
-                        continue
-                        
-                if eq_type == EquipmentType.OVEN_SOCKET:
-                    oven_socket_count += equipment.quantity
-
+        oven_socket_count = inventory.oven_socket_count
         if oven_socket_count > 0:
             # Estimation : 25 m de câble 6mm² par prise plaque 32A
             length_estimate = oven_socket_count * 25
@@ -1310,489 +1737,52 @@ class NFC15100Validator:
 
         return cables
 
-    def _extract_missing_equipment(self, violations: List[ValidationViolation], room: RoomEquipment) -> List[str]:
-        """Parse SHACL violation messages to generate a human-readable list of missing equipment.
-        Takes into account the existing equipment in the room to calculate the actual missing quantity.
+    def _extract_missing_equipment(
+        self,
+        violations: List[ValidationViolation],
+        room: AnyRoom,
+        ruleset: Optional[CompiledRuleset] = None,
+        room_inventory: Optional[RoomInventory] = None,
+    ) -> List[str]:
+        """Human-readable list of the equipment missing from ``room``.
+
+        The rule of each violation gives the required quantity and the
+        equipment category (``nfc:requiredCount`` / ``nfc:equipmentCategory``
+        of its shape); the missing quantity is the difference with the
+        equipment of that category already in the room (counted by
+        ``room_inventory``, built here when not given).
 
         Expected front-end format examples:
             "2 sockets", "1 network socket", "3 lighting points", "1 switch"
         """
-        import re
-
+        rules = (ruleset or self.ruleset).rules_info
         missing: List[str] = []
-
-        type_map = {
-            'prise réseau': 'network socket',
-            'prises réseau': 'network socket',
-            'network socket': 'network socket',
-            'prise 32a plaque': '32A socket',
-            'prises 32a plaque': '32A socket',
-            'prise 32a': '32A socket',
-            'prises 32a': '32A socket',
-            'prise': 'socket',
-            'prises': 'socket',
-            'socket': 'socket',
-            'point lumineux': 'lighting point',
-            'points lumineux': 'lighting point',
-            'lighting point': 'lighting point',
-            'point d\'éclairage': 'lighting point',
-            'points d\'éclairage': 'lighting point',
-            "point d'éclairage": 'lighting point',
-            "points d'éclairage": 'lighting point',
-            'éclairage': 'lighting point',
-            'interrupteur': 'switch',
-            'interrupteurs': 'switch',
-            'switch': 'switch',
-        }
-
-        # Count existing equipment in the room
-        existing_counts = self._count_existing_equipment(room)
-        logger.info(f"🔧 Room {room.room_id} existing equipment counts: {existing_counts}")
-
+        existing_counts = None
         for v in violations:
-            # Pattern 1: "…au moins X … (actuellement Y)" - with current count
-            match_with_current = re.search(r"au moins\s+(\d+)\s+([\w\s\']+?)\s*(?:\(actuellement\s+(\d+)\)|$)", v.message, re.IGNORECASE)
-            if match_with_current:
-                required = int(match_with_current.group(1))
-                current = int(match_with_current.group(3)) if match_with_current.group(3) else 0
-                diff = required - current
-                if diff > 0:
-                    french_type = match_with_current.group(2).strip().lower()
-                    french_type = re.sub(r"\s+", " ", french_type)
-                    
-                    english_type = self._map_french_to_english_equipment(french_type, type_map)
-                    if english_type:
-                        plural = 's' if diff > 1 and not english_type.endswith('s') else ''
-                        missing.append(f"{diff} {english_type}{plural}")
-                continue
-
-            # Pattern 2: "…au moins X …" or "…disposer d'un X…" - without current count (calculate from existing equipment)
-            # Examples: 
-            # - "La cuisine doit comporter au moins 6 prises 2P+T conformément à la NF C 15-100"
-            # - "La chambre doit comporter au moins 1 interrupteur pour le contrôle de l'éclairage (NF C 15-100)"
-            # - "La chambre/bureau doit comporter au moins 1 point d'éclairage (NF C 15-100)"
-            # - "Les zones de circulation de plus de 4 m² doivent disposer d'un point d'éclairage (NF C 15-100)"
-            match_without_current = re.search(r"(?:au moins\s+(\d+)|disposer d'un)\s+([\w\s\/\'\"\-]+?)(?:\s+(?:2P\+T|pour|conformément|au-dessus|près|\()|$)", v.message, re.IGNORECASE)
-            if match_without_current:
-                # If "disposer d'un", assume required = 1; otherwise use captured number
-                required = int(match_without_current.group(1)) if match_without_current.group(1) else 1
-                french_type = match_without_current.group(2).strip().lower()
-                french_type = re.sub(r"\s+", " ", french_type)
-                
-                logger.info(f"🔧 Pattern matched - Original: '{v.message}', Captured: '{french_type}'")
-                english_type = self._map_french_to_english_equipment(french_type, type_map)
-                logger.info(f"🔧 Mapping result: '{french_type}' -> '{english_type}'")
-                
-                if english_type:
-                    # Get existing count for this equipment type
-                    current = existing_counts.get(english_type, 0)
-                    diff = required - current
-                    logger.info(f"🔧 Equipment type '{english_type}': required={required}, current={current}, diff={diff}")
-                    if diff > 0:
-                        plural = 's' if diff > 1 and not english_type.endswith('s') else ''
-                        missing.append(f"{diff} {english_type}{plural}")
+            rule = rules.get(v.rule_id)
+            if rule is None or rule.required_count is None or rule.equipment_category is None:
                 continue
-            
-            # Pattern 3: Special case for network socket recommendation
-            # "Cette chambre devrait avoir une prise réseau (recommandation NF C 15-100)"
-            if "prise réseau" in v.message.lower():
-                current_network = existing_counts.get('network socket', 0)
-                if current_network == 0:
-                    missing.append("1 network socket")
-                continue
-
+            if existing_counts is None:
+                existing_counts = (room_inventory or RoomInventory.of(room)).category_counts
+            diff = rule.required_count - existing_counts.get(rule.equipment_category, 0)
+            if diff > 0:
+                plural = 's' if diff > 1 and not rule.equipment_category.endswith('s') else ''
+                missing.append(f"{diff} {rule.equipment_category}{plural}")
         return missing
     
-    def _count_existing_equipment(self, room: RoomEquipment) -> dict:
-        """Count existing equipment in a room by type (English names).
-
-        Normal socket counting rules (NF C 15-100):
-        • Only standard 2P+T outlets (simple, waterproof, child-proof, USB…) are
-          considered when verifying the minimum number of sockets.
-        • Specialised/dedicated outlets (oven, extractor hood, 20 A dedicated,
-          high-current, TV, etc.) must NOT be counted as standard sockets.
-        • A double outlet counts for 2 standard sockets, a triple outlet for 3.
-        """
-        counts = {}
-
-        # --- Helper for socket normalisation ---------------------------------
-        NORMAL_SOCKET_TYPES: set[EquipmentType] = {
-            EquipmentType.SIMPLE_SOCKET,
-            EquipmentType.DOUBLE_SOCKET,
-            EquipmentType.TRIPLE_SOCKET,
-            EquipmentType.WATERPROOF_SOCKET,
-            EquipmentType.CHILDPROOF_SOCKET,
-            EquipmentType.USB_SOCKET,
-        }
-
-        for equipment in room.equipment:
-            eq_type = equipment.equipment_type
-            parent_type = self._map_to_parent_equipment_type(eq_type)
-
-            # -------------------- SOCKETS -------------------------------------
-            if parent_type == EquipmentType.SOCKET:
-                # Count only *normal* sockets for the generic "socket" tally
-                if eq_type in NORMAL_SOCKET_TYPES:
-                    multiplier = 1
-                    if eq_type == EquipmentType.DOUBLE_SOCKET:
-                        multiplier = 2
-                    elif eq_type == EquipmentType.TRIPLE_SOCKET:
-                        multiplier = 3
-
-                    counts['socket'] = counts.get('socket', 0) + equipment.quantity * multiplier
-                
-                # Count 32A sockets specifically (for cooktop requirement)
-                if eq_type == EquipmentType.OVEN_SOCKET:
-                    # Check if socket specs indicate 32A (default for OvenSocket)
-                    specs = equipment.specifications if isinstance(equipment.specifications, dict) else {}
-                    current = specs.get("current", 32)  # Default to 32A for oven socket
-                    if current == 32:
-                        counts['32A socket'] = counts.get('32A socket', 0) + equipment.quantity
-                
-                # Specialised sockets are purposely ignored for the generic
-                # requirement counts (they may be checked by their own rules).
-                continue
-
-            # -------------------- NETWORK SOCKETS -----------------------------
-            if parent_type == EquipmentType.NETWORK_SOCKET:
-                counts['network socket'] = counts.get('network socket', 0) + equipment.quantity
-                continue
-
-            # -------------------- LIGHTING ------------------------------------
-            if parent_type == EquipmentType.LIGHTING_POINT:
-                counts['lighting point'] = counts.get('lighting point', 0) + equipment.quantity
-                continue
-
-            # -------------------- SWITCHES ------------------------------------
-            if parent_type == EquipmentType.SWITCH:
-                counts['switch'] = counts.get('switch', 0) + equipment.quantity
-                continue
-
-        return counts
-
-    def _map_french_to_english_equipment(self, french_type: str, type_map: dict) -> str:
-        """Map French equipment type to English equivalent."""
-        # Direct lookup
-        if french_type in type_map:
-            return type_map[french_type]
-        
-        # Partial matching - prioritize longest/most specific matches first
-        matches = []
-        for k, v_t in type_map.items():
-            if k in french_type or french_type in k:
-                matches.append((k, v_t, len(k)))  # Store key, value, and key length
-        
-        # Sort by key length descending (longest/most specific first)
-        matches.sort(key=lambda x: x[2], reverse=True)
-        
-        # Return the most specific match
-        if matches:
-            best_match = matches[0]
-            logger.info(f"🔧 Best match for '{french_type}': '{best_match[0]}' -> '{best_match[1]}' (length: {best_match[2]})")
-            return best_match[1]
-        
-        return None 
-
-    def _filter_shapes_by_focus_area(self, shapes_graph: Graph, focus_area: Optional[str]) -> Graph:
-        """Filter SHACL shapes based on the specified focus area.
-        
-        For room-equipment focus, exclude dimensioning-related rules like:
-        - Technical specifications (references, cables, enclosures)
-        - Circuit calculations (circuit counts, breaker sizing)
-        - Global installation rules (grounding, lightning protection)
-        """
-        if focus_area != "room-equipment":
-            # If not room-equipment focus, return all shapes
-            return shapes_graph
-            
-        filtered_graph = Graph()
-        
-        # Copy namespace declarations
-        for ns_prefix, ns_uri in shapes_graph.namespaces():
-            filtered_graph.bind(ns_prefix, ns_uri)
-        
-        # Messages that indicate dimensioning rules to exclude
-        dimensioning_keywords = [
-            "Installation doit avoir système de mise à la terre",
-            "Prise réseau doit utiliser référence SCH5520476",
-            "Prise réseau doit utiliser boîte encastement EUR52061",
-            "Prise réseau nécessite câble type RJ45",
-            "Installation : circuits d'éclairage insuffisants",
-            "L'installation électrique doit comporter au moins un circuit",
-            "Installation : nombre de circuits 16A",
-            "Évaluation du risque foudre obligatoire",
-            "nécessite section câble",
-            "doit utiliser référence SCH",
-            "doit utiliser boîte encastement EUR",
-            "circuits 16A (prises) inférieur",
-            "circuits 16A (prises) insuffisant",
-            "circuits d'éclairage insuffisants",
-            "minimum 2 circuits d'éclairage",
-            "Parafoudre obligatoire",
-            "nombre de disjoncteurs",
-
-
-            "Les équipements spécialisés doivent avoir un circuit dédié",
-        ]
-        
-        # Query for shapes and their messages
-        SH = Namespace("http://www.w3.org/ns/shacl#")
-        SHAPES = Namespace("http://example.org/shapes#")
-        
-        # Get all shape nodes
-        shape_nodes = set()
-        for s, p, o in shapes_graph.triples((None, RDF.type, SH.NodeShape)):
-            shape_nodes.add(s)
-        
-        for shape_node in shape_nodes:
-            should_exclude = False
-            
-            # Check all messages in this shape
-            for s, p, o in shapes_graph.triples((shape_node, None, None)):
-                # Check nested property messages
-                if p == SH.property:
-                    for prop_s, prop_p, prop_o in shapes_graph.triples((o, None, None)):
-                        if prop_p == SH.message and isinstance(prop_o, Literal):
-                            message = str(prop_o)
-                            if any(keyword in message for keyword in dimensioning_keywords):
-                                should_exclude = True
-                                break
-                
-                # Check SPARQL constraint messages
-                if p == SH.sparql:
-                    for sparql_s, sparql_p, sparql_o in shapes_graph.triples((o, None, None)):
-                        if sparql_p == SH.message and isinstance(sparql_o, Literal):
-                            message = str(sparql_o)
-                            if any(keyword in message for keyword in dimensioning_keywords):
-                                should_exclude = True
-                                break
-            
-            # If this shape should be included, copy all its triples
-            if not should_exclude:
-                # Copy all triples related to this shape
-                self._copy_shape_triples(shapes_graph, filtered_graph, shape_node)
-        
-        logger.info(f"🔍 Filtered shapes: kept {len(filtered_graph)} triples from {len(shapes_graph)} for focus_area={focus_area}")
-        
-        return filtered_graph
-    
-    def _copy_shape_triples(self, source_graph: Graph, target_graph: Graph, shape_node):
-        """Recursively copy all triples related to a shape node."""
-        SH = Namespace("http://www.w3.org/ns/shacl#")
-        
-        visited = set()
-        
-        def copy_node_triples(node):
-            if node in visited:
-                return
-            visited.add(node)
-            
-            # Copy all triples where this node is the subject
-            for s, p, o in source_graph.triples((node, None, None)):
-                target_graph.add((s, p, o))
-                
-                # If object is a blank node, recursively copy its triples
-                if isinstance(o, BNode):
-                    copy_node_triples(o)
-        
-        copy_node_triples(shape_node) 
-
     def create_complete_installation_jsonld(
         self,
-        rooms: List[RoomEquipment],
+        rooms: List[AnyRoom],
         dimensioning: DimensioningResult,
         postal_code: Optional[str] | None = None,
     ) -> Dict[str, Any]:
-        """Create a complete JSON-LD representation including calculated dimensioning.
-        
-        This method creates a full electrical installation representation that includes:
-        - Room equipment (from input)
-        - Calculated circuits and protection devices
-        - Grounding system
-        - Lightning protection assessment
-        - Technical specifications for equipment
-        
-        Args:
-            rooms: List of room equipment configurations
-            dimensioning: Calculated dimensioning result
-            postal_code: Optional postal code for surge protector obligation rules
-            
-        Returns:
-            Complete JSON-LD representation of the installation
+        """Debug export of the complete installation graph as JSON-LD.
+
+        Validation uses :meth:`InstallationGraphBuilder.complete_installation_graph`
+        directly; this export is only meant for inspecting what is validated.
         """
-        installation_id = str(uuid.uuid4())
-        
-        jsonld_data: Dict[str, Any] = {
-            "@context": {
-                "@vocab": "http://ontology.nfc15100.fr#",
-            },
-            "@id": installation_id,
-            "@type": "ElectricalInstallation",
-            "hasRoom": [],
-            "hasCircuit": [],
-            "hasGroundingSystem": {
-                "@id": f"{installation_id}_grounding",
-                "@type": "GroundingSystem",
-                "groundResistance": 50  # Typical value ≤ 100Ω
-            },
-            "lightningRiskAssessment": True,
-            "hasSurgeProtector": []
-        }
-        
-        # Quick helper for blank nodes
-        bnode_counter = 0
-        def _new_bnode(prefix: str) -> str:
-            nonlocal bnode_counter
-            bnode_counter += 1
-            return f"_:{prefix}{bnode_counter}"
-        
-        equipment_to_prop = {
-            EquipmentType.SOCKET: "hasSocket",
-            EquipmentType.NETWORK_SOCKET: "hasNetworkSocket", 
-            EquipmentType.LIGHTING_POINT: "hasLightingPoint",
-            EquipmentType.SWITCH: "hasSwitch",
-            EquipmentType.SPECIALIZED_EQUIPMENT: "hasSpecializedEquipment",
-        }
-        
-        # Add rooms with equipment
-        for room in rooms:
-            room_type_str = room.room_type.value if hasattr(room.room_type, "value") else str(room.room_type)
-            
-            room_dict: Dict[str, Any] = {
-                "@id": room.room_id,
-                "@type": room_type_str,
-            }
-            
-            if room.room_area is not None:
-                room_dict["roomArea"] = room.room_area
-            
-            # Add equipment instances with technical specifications
-            for item in room.equipment:
-                eq_type_raw = item.equipment_type if hasattr(item.equipment_type, "value") else item.equipment_type
-                eq_type = EquipmentType(eq_type_raw) if isinstance(eq_type_raw, str) else eq_type_raw
-                
-                parent_eq_type = self._map_to_parent_equipment_type(eq_type)
-                prop = equipment_to_prop.get(parent_eq_type)
-                if not prop:
-                    continue
-                
-                room_dict.setdefault(prop, [])
-                for _ in range(item.quantity):
-                    equipment_dict = {
-                        "@id": _new_bnode(prop),
-                        "@type": parent_eq_type.value if hasattr(parent_eq_type, "value") else str(parent_eq_type)
-                    }
-                    
-                    # Add technical specifications for network sockets
-                    if parent_eq_type == EquipmentType.NETWORK_SOCKET:
-                        equipment_dict.update({
-                            "principalReference": "SCH5520476",
-                            "enclosureBox": "EUR52061", 
-                            "cableType": "RJ45"
-                        })
-                    
-                    # Ajout d'attributs techniques si la prise est spécialisée
-                    if parent_eq_type == EquipmentType.SOCKET:
-                        # Récupère les specs fournies (peut être None ou non-dict)
-                        specs = item.specifications if isinstance(item.specifications, dict) else {}
-                        current = specs.get("current")
-                        socket_type = specs.get("socketType")
-
-                        # Cas prise plaque (OvenSocket) → 32 A par défaut
-                        if eq_type == EquipmentType.OVEN_SOCKET:
-                            current = current or 32
-                            socket_type = socket_type or "32A"
-
-                        # Cas prise hotte (ExtractorSocket) → prise simple 16 A sur circuit dédié
-                        if eq_type == EquipmentType.EXTRACTOR_SOCKET:
-                            current = current or 16
-                            socket_type = socket_type or "2P+T"
-
-                        # Cas prise simple 20A dédiée (Dedicated20ASocket)
-                        if eq_type == EquipmentType.DEDICATED_20A_SOCKET:
-                            current = current or 20
-                            socket_type = socket_type or "20A"  # Marquer comme 20A pour exclure du minimum de prises cuisine
-
-                        # Autres prises spécialisées (≠ simple/double) → 20 A par défaut
-                        specialised_socket_types = {
-                            EquipmentType.OVEN_SOCKET,
-                            EquipmentType.HIGH_CURRENT_SOCKET,
-                            EquipmentType.TV_SOCKET
-                        }
-                        if eq_type in specialised_socket_types and (current is None and socket_type is None):
-                            current = 20
-                            socket_type = "20A"
-
-                        if current is not None:
-                            equipment_dict["current"] = current
-                        if socket_type is not None:
-                            equipment_dict["socketType"] = socket_type
-                    
-                    room_dict[prop].append(equipment_dict)
-            
-            jsonld_data["hasRoom"].append(room_dict)
-        
-        # Add calculated circuits
-        circuit_counter = 1
-        lighting_points = sum(
-            sum(eq.quantity for eq in room.equipment if eq.equipment_type == EquipmentType.LIGHTING_POINT)
-            for room in rooms
-        )
-        socket_count = sum(
-            sum(eq.quantity for eq in room.equipment if eq.equipment_type == EquipmentType.SIMPLE_SOCKET)
-            for room in rooms
-        )
-        
-        # Add lighting circuits
-        for breaker in dimensioning.circuit_breakers:
-            if "éclairage" in breaker.description.lower():
-                circuit_id = f"{installation_id}_circuit_{circuit_counter}"
-                circuit_counter += 1
-                
-                jsonld_data["hasCircuit"].append({
-                    "@id": circuit_id,
-                    "@type": "Circuit",
-                    "circuitType": "lighting",
-                    "hasProtection": {
-                        "@id": f"{circuit_id}_protection", 
-                        "@type": "CircuitBreaker",
-                        "current": breaker.rating,
-                        "type": breaker.type
-                    }
-                })
-        
-        # Add socket circuits  
-        for breaker in dimensioning.circuit_breakers:
-            if "prise" in breaker.description.lower() and "éclairage" not in breaker.description.lower():
-                circuit_id = f"{installation_id}_circuit_{circuit_counter}"
-                circuit_counter += 1
-                
-                jsonld_data["hasCircuit"].append({
-                    "@id": circuit_id,
-                    "@type": "Circuit", 
-                    "circuitType": "socket",
-                    "hasProtection": {
-                        "@id": f"{circuit_id}_protection",
-                        "@type": "CircuitBreaker",
-                        "current": breaker.rating,
-                        "type": breaker.type
-                    }
-                })
-        
-        # Add surge protectors
-        for spd in dimensioning.surge_protectors:
-            jsonld_data["hasSurgeProtector"].append({
-                "@id": f"{installation_id}_spd_{spd.type.replace(' ', '_')}",
-                "@type": "SurgeProtectionDevice",
-                "protectionType": spd.type,
-                "rating": spd.rating
-            })
-        
-        # Add postal code if provided (used for surge protector obligation rules)
-        if postal_code:
-            jsonld_data["postalCode"] = postal_code
-        
-        return jsonld_data 
+        graph = self.graph_builder().complete_installation_graph(rooms, dimensioning, postal_code=postal_code)
+        return graph_to_jsonld(graph)
 
     def _determine_breaker_rating(self, power_w: float | None) -> int:
         """Return suitable breaker current (A) given appliance power in watts.
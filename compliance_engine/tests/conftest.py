@@ -0,0 +1,42 @@
+"""Shared fixtures of the compliance engine tests."""
+
+from pathlib import Path
+
+import pytest
+
+from compliance_engine.config import Settings
+from compliance_engine.validators import NFC15100Validator
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def project_settings() -> Settings:
+    """Settings pointing at the project's ontology and shapes (absolute paths)."""
+    return Settings(
+        ontology_path=str(PROJECT_ROOT / "ontologies" / "nfc15100_ontology.ttl"),
+        shapes_path=str(PROJECT_ROOT / "shapes" / "nfc15100_shapes.ttl"),
+        count_shapes_path=str(PROJECT_ROOT / "shapes" / "nfc15100_count_shapes.ttl"),
+    )
+
+
+@pytest.fixture(scope="session")
+def validator() -> NFC15100Validator:
+    """Validator shared by the tests that do not change its settings or caches."""
+    validator = NFC15100Validator()
+    # Two paths agreeing on empty reports would pass every differential test
+    assert validator.ruleset.rule_catalog.rules
+    return validator
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="also run the tests marked slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow, run with --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
@@ -0,0 +1,266 @@
+"""Reference corpus of the differential tests.
+
+Optimised code paths must report exactly what the reference implementation
+they replace reports on :data:`REFERENCE_INSTALLATIONS`: compliant and
+non-compliant dwellings of various sizes, explicit socket specifications,
+area boundaries, a missing area and rooms sharing an id.  Reports are
+compared through :func:`report_key`, which ignores random IRIs and timings.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+from rdflib import Graph
+
+from compliance_engine.models import (
+    ComplianceStatus,
+    DimensioningResult,
+    GlobalComplianceResult,
+    RoomComplianceResult,
+    RoomEquipment,
+    ValidationResult,
+)
+from compliance_engine.ruleset import NODES_ENCODING, ROOM_EQUIPMENT_FOCUS
+from compliance_engine.validators import NFC15100Validator
+
+_UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+_BNODE_RE = re.compile(r"^N[0-9a-f]{32}$")
+
+
+def normalise_node(node: Optional[str]) -> str:
+    """Hide random installation IRIs and blank node labels."""
+    return _BNODE_RE.sub("<bnode>", _UUID_RE.sub("<uuid>", node or ""))
+
+
+def _house(bedrooms: int = 2, socket_factor: int = 1, multi_outlets: bool = True) -> List[Dict[str, Any]]:
+    """Typical dwelling covering every room type and most equipment categories.
+
+    Without ``multi_outlets`` double and triple outlets become as many simple sockets.
+    """
+    rooms: List[Dict[str, Any]] = [
+        {"room_id": "kitchen1", "room_type": "Kitchen", "room_area": 10.0, "equipment": [
+            {"equipment_type": "DoubleSocket", "quantity": 2 * socket_factor},
+            {"equipment_type": "SimpleSocket", "quantity": 1},
+            {"equipment_type": "OvenSocket", "quantity": 1},
+            {"equipment_type": "Dedicated20ASocket", "quantity": 3},
+            {"equipment_type": "CeilingLighting", "quantity": 1},
+            {"equipment_type": "SimpleSwitch", "quantity": 1},
+            {"equipment_type": "Dishwasher", "quantity": 1},
+        ]},
+        {"room_id": "living1", "room_type": "LivingRoom", "room_area": 22.0, "equipment": [
+            {"equipment_type": "SimpleSocket", "quantity": 4 * socket_factor},
+            {"equipment_type": "RJ45Socket", "quantity": 1},
+            {"equipment_type": "TVSocket", "quantity": 1},
+            {"equipment_type": "CeilingLighting", "quantity": 2},
+            {"equipment_type": "Switch", "quantity": 1},
+            {"equipment_type": "Convector", "quantity": 2},
+        ]},
+        {"room_id": "wc1", "room_type": "WC", "room_area": 2.0, "equipment": [
+            {"equipment_type": "LightingPoint", "quantity": 1},
+        ]},
+        {"room_id": "hall1", "room_type": "CirculationArea", "room_area": 6.0, "equipment": [
+            {"equipment_type": "Socket", "quantity": 1},
+            {"equipment_type": "LightingPoint", "quantity": 1},
+            {"equipment_type": "SimpleSwitch", "quantity": 1},
+        ]},
+        {"room_id": "bath1", "room_type": "BathroomWithWC", "room_area": 6.0, "equipment": [
+            {"equipment_type": "WaterproofSocket", "quantity": 1},
+            {"equipment_type": "StorageWaterHeater", "quantity": 1},
+            {"equipment_type": "SimpleFlowVMC", "quantity": 1},
+        ]},
+        {"room_id": "wet1", "room_type": "WetRoom", "room_area": 4.0, "equipment": [
+            {"equipment_type": "LightingPoint", "quantity": 1},
+        ]},
+        {"room_id": "garage1", "room_type": "Other", "room_area": 15.0, "equipment": [
+            {"equipment_type": "WashingMachine", "quantity": 1},
+            {"equipment_type": "InertiaRadiator", "quantity": 1},
+            {"equipment_type": "AirConditioning", "quantity": 1, "specifications": {"power_w": 5000}},
+        ]},
+        {"room_id": "ext1", "room_type": "ExteriorSpace", "room_area": 30.0, "equipment": []},
+        {"room_id": "office1", "room_type": "Office", "room_area": 9.0, "equipment": [
+            {"equipment_type": "SimpleSocket", "quantity": 3},
+            {"equipment_type": "FloorHeating", "quantity": 1},
+        ]},
+        {"room_id": "lk1", "room_type": "LivingRoomWithIntegratedKitchen", "room_area": 30.0, "equipment": [
+            {"equipment_type": "TripleSocket", "quantity": 3},
+            {"equipment_type": "CookingHob", "quantity": 1},
+            {"equipment_type": "DoubleFlowVMC", "quantity": 1},
+            {"equipment_type": "SpotLighting", "quantity": 9},
+        ]},
+        {"room_id": "k2", "room_type": "Kitchen", "room_area": 3.0, "equipment": [
+            {"equipment_type": "SimpleSocket", "quantity": 2},
+        ]},
+    ]
+    for index in range(bedrooms):
+        rooms.append({"room_id": f"bedroom{index + 1}", "room_type": "Bedroom", "room_area": 11.0 + index, "equipment": [
+            {"equipment_type": "SimpleSocket", "quantity": 3 if index % 2 == 0 else 2},
+            {"equipment_type": "LightingPoint", "quantity": 1},
+            {"equipment_type": "SimpleSwitch", "quantity": 1},
+            {"equipment_type": "RJ45Socket", "quantity": 1 if index == 0 else 0},
+        ]})
+    if not multi_outlets:
+        for room in rooms:
+            for item in room["equipment"]:
+                plugs = {"DoubleSocket": 2, "TripleSocket": 3}.get(item["equipment_type"])
+                if plugs:
+                    item.update(equipment_type="SimpleSocket", quantity=item["quantity"] * plugs)
+    return rooms
+
+
+# Reference corpus: compliant and non-compliant installations of various sizes
+REFERENCE_INSTALLATIONS: List[Dict[str, Any]] = [
+    {"installation_id": "ref-t3", "rooms": _house(2), "postal_code": "75001", "number_of_people": 3},
+    {"installation_id": "ref-t2-risk", "rooms": _house(1), "postal_code": "13001", "number_of_people": 1},
+    {"installation_id": "ref-t4-corsica", "rooms": _house(3, 2), "postal_code": "20100", "number_of_people": 5},
+    {"installation_id": "ref-studio", "rooms": _house(0), "postal_code": None, "number_of_people": None},
+    {"installation_id": "ref-t3-simple-outlets", "rooms": _house(2, multi_outlets=False), "postal_code": "33000",
+     "number_of_people": 4},
+    {"installation_id": "ref-empty-room", "rooms": [
+        {"room_id": "lonely", "room_type": "LivingRoom", "room_area": 18.0, "equipment": []},
+    ]},
+    # Explicit socket specifications and large quantities
+    {"installation_id": "ref-custom-specs", "postal_code": "06000", "number_of_people": 2, "rooms": [
+        {"room_id": "kitchen1", "room_type": "Kitchen", "room_area": 12.0, "equipment": [
+            {"equipment_type": "TripleSocket", "quantity": 40},
+            {"equipment_type": "Socket", "quantity": 2, "specifications": {"current": 20, "socketType": "specialized"}},
+            {"equipment_type": "Socket", "quantity": 1, "specifications": {"current": 32, "socketType": "32A"}},
+            {"equipment_type": "Socket", "quantity": 3, "specifications": {"current": 10, "socketType": "2P"}},
+            {"equipment_type": "LightingPoint", "quantity": 0},
+        ]},
+        {"room_id": "living1", "room_type": "LivingRoom", "room_area": 19.0, "equipment": [
+            {"equipment_type": "Socket", "quantity": 4, "specifications": {"current": 20}},
+            {"equipment_type": "RJ45Socket", "quantity": 2},
+            {"equipment_type": "SpotLighting", "quantity": 12},
+            {"equipment_type": "Switch", "quantity": 2},
+        ]},
+        {"room_id": "bedroom1", "room_type": "Bedroom", "room_area": 10.0, "equipment": [
+            {"equipment_type": "DoubleSocket", "quantity": 1},
+            {"equipment_type": "RJ45Socket", "quantity": 1},
+        ]},
+        {"room_id": "wc1", "room_type": "WC", "room_area": 5.0, "equipment": [
+            {"equipment_type": "Switch", "quantity": 1},
+        ]},
+        {"room_id": "hall1", "room_type": "CirculationArea", "room_area": 8.0, "equipment": [
+            {"equipment_type": "Dedicated20ASocket", "quantity": 2},
+        ]},
+        {"room_id": "bath1", "room_type": "WetRoom", "room_area": 5.0, "equipment": [
+            {"equipment_type": "ExtractorSocket", "quantity": 1},
+            {"equipment_type": "LightingPoint", "quantity": 1},
+        ]},
+    ]},
+    # Area boundaries, missing area and rooms sharing an id
+    {"installation_id": "ref-edge-rooms", "postal_code": "59000", "number_of_people": 1, "rooms": [
+        {"room_id": "kitchen4", "room_type": "Kitchen", "room_area": 4.0, "equipment": [
+            {"equipment_type": "DoubleSocket", "quantity": 1},
+        ]},
+        {"room_id": "living20", "room_type": "LivingRoom", "room_area": 20.0, "equipment": [
+            {"equipment_type": "DoubleSocket", "quantity": 2},
+        ]},
+        {"room_id": "living24", "room_type": "LivingRoomWithIntegratedKitchen", "room_area": 24.0, "equipment": [
+            {"equipment_type": "TripleSocket", "quantity": 2},
+            {"equipment_type": "OvenSocket", "quantity": 1},
+        ]},
+        {"room_id": "hall", "room_type": "CirculationArea", "equipment": []},
+        {"room_id": "wc", "room_type": "WC", "room_area": 4.0, "equipment": []},
+        {"room_id": "wc", "room_type": "WC", "room_area": 4.5, "equipment": [
+            {"equipment_type": "LightingPoint", "quantity": 1},
+        ]},
+    ]},
+]
+
+
+def _installation_id(installation: Dict[str, Any]) -> str:
+    return installation["installation_id"]
+
+
+# Runs a test once per reference installation
+each_installation = pytest.mark.parametrize("installation", REFERENCE_INSTALLATIONS, ids=_installation_id)
+
+
+def reference_rooms(installation: Dict[str, Any]) -> List[RoomEquipment]:
+    return [RoomEquipment(**room) for room in installation["rooms"]]
+
+
+def reference_dimensioning(validator: NFC15100Validator, installation: Dict[str, Any]) -> DimensioningResult:
+    return validator.calculate_dimensioning(
+        reference_rooms(installation),
+        GlobalComplianceResult(overall_status=ComplianceStatus.COMPLIANT),
+        postal_code=installation.get("postal_code"),
+        number_of_people=installation.get("number_of_people"),
+        plan_circuits=True,
+    )
+
+
+def report_key(result: ValidationResult, distinct: bool = False) -> List[Tuple]:
+    """Order-independent view of a report, ignoring random IRIs and timings
+    (and repeated violations if ``distinct``)."""
+    key = [
+        (
+            normalise_node(v.focus_node),
+            v.path or "",
+            normalise_node(v.value),
+            v.message,
+            v.severity.value,
+            v.rule_id,
+        )
+        for v in result.violations or []
+    ]
+    return sorted(set(key) if distinct else key)
+
+
+def grouped_key(grouped: Tuple[GlobalComplianceResult, List[RoomComplianceResult]]) -> List[Tuple]:
+    """Order-independent view of a room-equipment response, room by room."""
+    global_result, room_results = grouped
+    return sorted([("<installation>", global_result.overall_status.value, tuple(report_key(global_result)), ())] + [
+        (
+            room.room_id,
+            room.compliance_status.value,
+            tuple(report_key(room)),
+            tuple(sorted(room.missing_equipment)),
+        )
+        for room in room_results
+    ])
+
+
+GraphFactory = Callable[..., Graph]
+
+
+def installation_graphs(
+    validator: NFC15100Validator, installation: Dict[str, Any]
+) -> List[Tuple[str, GraphFactory, Optional[str]]]:
+    """Graph factories (``(infer_types, encoding) -> Graph``) of the documents
+    validated by the endpoints, with the focus area they are validated with."""
+    rooms = reference_rooms(installation)
+    dimensioning = reference_dimensioning(validator, installation)
+
+    def room_equipment(infer_types: bool, encoding: str = NODES_ENCODING) -> Graph:
+        return validator.graph_builder(infer_types, encoding).room_equipment_graph(rooms)
+
+    def complete(infer_types: bool, encoding: str = NODES_ENCODING) -> Graph:
+        return validator.graph_builder(infer_types, encoding).complete_installation_graph(
+            rooms, dimensioning, postal_code=installation.get("postal_code")
+        )
+
+    return [
+        ("room-equipment", room_equipment, ROOM_EQUIPMENT_FOCUS),
+        ("room-equipment/all-rules", room_equipment, None),
+        ("complete", complete, None),
+    ]
+
+
+def dimensioning_variants(
+    installation: Dict[str, Any],
+) -> List[Tuple[str, List[RoomEquipment], Optional[str], Optional[int]]]:
+    """``installation`` with scaled areas (heating, water heater and VMC
+    thresholds) and every household size."""
+    rooms = reference_rooms(installation)
+    variants = []
+    for scale in (1.0, 0.5, 3.0, 7.5):
+        scaled = [
+            room.model_copy(update={"room_area": room.room_area * scale if room.room_area is not None else None})
+            for room in rooms
+        ]
+        for number_of_people in (installation.get("number_of_people"), None, 2, 3, 4, 6):
+            variants.append((f"x{scale} ({number_of_people} pers.)", scaled, installation.get("postal_code"), number_of_people))
+    return variants
@@ -0,0 +1,164 @@
+"""Admission limits of the validation endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from compliance_engine import main
+from compliance_engine.admission import (
+    AdmissionError,
+    admit,
+    admit_batch,
+    admit_jsonld,
+    estimate_cost,
+    graph_triples_budget,
+    jsonld_triples,
+)
+from compliance_engine.compact_model import compact_rooms
+from compliance_engine.config import Settings
+from compliance_engine.models import RoomEquipment
+from compliance_engine.ruleset import COMPACT_ENCODING, EQUIPMENT_ENCODINGS, NODES_ENCODING
+from reference_corpus import each_installation, reference_rooms
+
+DOCUMENT = {
+    "@context": {"nfc": "http://example.org/nfc15100#"},
+    "@id": "nfc:installation",
+    "@type": "nfc:ElectricalInstallation",
+    "nfc:hasRoom": [
+        {"@id": "nfc:kitchen", "@type": "nfc:Kitchen", "nfc:roomArea": 9},
+        {"@id": "nfc:bedroom", "@type": "nfc:Bedroom", "nfc:roomArea": 11},
+    ],
+}
+
+# Integral CPU estimates: 2 passes over t triples cost 2 * (10 + t) ms
+INTEGRAL_COST = {"validation_pass_base_ms": 10.0, "validation_pass_triple_ms": 1.0}
+
+
+def _installation(rooms: int, sockets: int):
+    return [
+        RoomEquipment(
+            room_id=f"bedroom-{index}",
+            room_type="Bedroom",
+            room_area=12,
+            equipment=[{"equipment_type": "Socket", "quantity": sockets}],
+        )
+        for index in range(rooms)
+    ]
+
+
+def _reason(rooms, encoding, passes, settings) -> str:
+    with pytest.raises(AdmissionError) as error:
+        admit(main.validator, rooms, encoding, passes, settings)
+    return error.value.reason
+
+
+def test_graph_budget_is_the_largest_graph_of_one_pass():
+    settings = Settings()
+    budget = graph_triples_budget(settings)
+    assert budget == 9_063
+    at_budget, over_budget = (
+        settings.validation_pass_base_ms + settings.validation_pass_triple_ms * triples for triples in (budget, budget + 1)
+    )
+    assert at_budget <= settings.max_validation_cpu_ms < over_budget
+    assert graph_triples_budget(Settings(max_graph_triples=100)) == 100
+    assert graph_triples_budget(Settings(max_validation_cpu_ms=0)) == 0
+
+
+def test_default_budgets_stop_one_pass_by_size_and_two_passes_by_cpu():
+    settings = Settings()
+    largest = _installation(settings.max_rooms_per_validation, settings.max_equipment_per_room)
+    assert _reason(largest, NODES_ENCODING, 1, settings) == "graph_triples"
+    assert admit(main.validator, largest, None, 1, settings).encoding == COMPACT_ENCODING
+
+    # ~5 000 triples: one pass fits, two passes exceed the CPU budget
+    medium = _installation(25, 100)
+    assert admit(main.validator, medium, NODES_ENCODING, 1, settings).encoding == NODES_ENCODING
+    assert _reason(medium, NODES_ENCODING, 2, settings) == "cpu_ms"
+    assert admit(main.validator, medium, None, 2, settings).encoding == COMPACT_ENCODING
+
+
+def test_graph_budget_boundary():
+    rooms = _installation(3, 10)
+    triples = estimate_cost(main.validator, rooms, NODES_ENCODING, 1).triples
+    at_limit = Settings(max_graph_triples=triples, max_validation_cpu_ms=0)
+    assert admit(main.validator, rooms, NODES_ENCODING, 1, at_limit).triples == triples
+    below = Settings(max_graph_triples=triples - 1, max_validation_cpu_ms=0)
+    assert _reason(rooms, NODES_ENCODING, 1, below) == "graph_triples"
+
+
+def test_cpu_budget_boundary():
+    rooms = _installation(3, 10)
+    triples = estimate_cost(main.validator, rooms, NODES_ENCODING, 1).triples
+    cpu_ms = 2 * (10 + triples)
+    at_limit = Settings(max_graph_triples=0, max_validation_cpu_ms=cpu_ms, **INTEGRAL_COST)
+    assert admit(main.validator, rooms, NODES_ENCODING, 2, at_limit).cpu_ms == cpu_ms
+    below = Settings(max_graph_triples=0, max_validation_cpu_ms=cpu_ms - 1, **INTEGRAL_COST)
+    assert _reason(rooms, NODES_ENCODING, 2, below) == "cpu_ms"
+
+
+def test_jsonld_limit_is_opt_in():
+    # 3 rdf:type, 1 hasRoom per room, 2 roomArea
+    assert jsonld_triples(DOCUMENT) == 7
+    assert admit_jsonld(DOCUMENT, Settings(max_validation_cpu_ms=1)).triples == 7
+    assert admit_jsonld(DOCUMENT, Settings(max_jsonld_triples=7)).triples == 7
+    with pytest.raises(AdmissionError):
+        admit_jsonld(DOCUMENT, Settings(max_jsonld_triples=6))
+
+
+def test_batch_size_boundary():
+    admit_batch(2, Settings(max_batch_size=2))
+    admit_batch(1_000, Settings(max_batch_size=0))
+    with pytest.raises(AdmissionError) as error:
+        admit_batch(3, Settings(max_batch_size=2))
+    assert error.value.reason == "batch_size"
+
+
+def test_validate_endpoints_reject_documents_over_the_opt_in_limit(monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(main.settings, "max_jsonld_triples", 6)
+    body = {"installation_id": "too-large", "jsonld_data": DOCUMENT}
+    response = client.post("/validate", json=body)
+    assert response.status_code == 413
+    assert response.json()["detail"]["reason"] == "graph_triples"
+
+    response = client.post("/validate/batch", json=[body])
+    assert response.status_code == 413
+    assert response.json()["detail"]["index"] == 0
+
+
+def test_batch_endpoints_reject_too_many_items(monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(main.settings, "max_batch_size", 1)
+    body = {"installation_id": "batch-item", "jsonld_data": DOCUMENT}
+    response = client.post("/validate/batch", json=[body, body])
+    assert response.status_code == 413
+    assert response.json()["detail"]["reason"] == "batch_size"
+
+    item = {"installation_id": "batch-item", "rooms": []}
+    assert client.post("/dimensioning/batch", json=[item, item]).status_code == 413
+
+
+def test_large_equipment_lines_are_answered_by_admission():
+    client = TestClient(main.app)
+    rooms = [{"room_id": "bedroom", "room_type": "Bedroom", "room_area": 12,
+              "equipment": [{"equipment_type": "Socket", "quantity": 5_000}]}]
+    response = client.post("/dimensioning", json={"installation_id": "large-line", "rooms": rooms})
+    assert response.status_code == 413
+    assert response.json()["detail"]["reason"] == "equipment_per_room"
+
+
+@pytest.mark.parametrize("infer_types", [True, False])
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@pytest.mark.parametrize("scale", [1, 3])
+@each_installation
+def test_triple_estimate_is_the_size_of_the_room_equipment_graph(validator, installation, scale, encoding, infer_types):
+    rooms = reference_rooms(installation)
+    if len({room.room_id for room in rooms}) != len(rooms):
+        pytest.skip("repeated rooms share their nodes, which the estimate counts twice")
+    scaled = compact_rooms(
+        room.model_copy(update={"equipment": [
+            item.model_copy(update={"quantity": item.quantity * scale}) for item in room.equipment
+        ]})
+        for room in rooms
+    )
+    builder = validator.graph_builder(infer_types=infer_types, encoding=encoding)
+    assert builder.estimate_triples(scaled) == len(builder.room_equipment_graph(scaled))
@@ -0,0 +1,16 @@
+"""Compact (per-room counts) equipment encoding against the per-node one."""
+
+from compliance_engine.ruleset import COMPACT_ENCODING
+from reference_corpus import each_installation, installation_graphs, report_key
+
+
+@each_installation
+def test_compact_encoding_reports_like_the_nodes_encoding(validator, installation):
+    # One node per distinct kind of equipment: a per-unit violation is
+    # reported once per kind instead of once per unit
+    for name, build_graph, focus_area in installation_graphs(validator, installation):
+        nodes = validator.validate_graph_sync(build_graph(True), focus_area, pre_inferred=True)
+        compact = validator.validate_graph_sync(
+            build_graph(True, COMPACT_ENCODING), focus_area, pre_inferred=True, encoding=COMPACT_ENCODING
+        )
+        assert report_key(compact, distinct=True) == report_key(nodes, distinct=True), name
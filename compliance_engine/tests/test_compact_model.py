@@ -0,0 +1,50 @@
+"""Compact room records validate and dimension like the request models."""
+
+import asyncio
+import pickle
+
+import pytest
+
+from compliance_engine.compact_model import compact_rooms, room_json
+from compliance_engine.result_cache import ResultCache, installation_uuid
+from compliance_engine.ruleset import EQUIPMENT_ENCODINGS
+from compliance_engine.validators import NFC15100Validator
+from reference_corpus import each_installation, grouped_key, reference_rooms, report_key
+
+
+@pytest.fixture(scope="module")
+def uncached_validator():
+    validator = NFC15100Validator()
+    validator.room_verdicts = ResultCache(max_entries=0)
+    return validator
+
+
+@each_installation
+def test_compact_rooms_keep_the_request_json_and_id(installation):
+    rooms = reference_rooms(installation)
+    compact = pickle.loads(pickle.dumps(compact_rooms(rooms)))
+    assert [room_json(room) for room in compact] == [room.model_dump(mode="json") for room in rooms]
+    assert installation_uuid(compact) == installation_uuid(rooms)
+
+
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_compact_rooms_validate_like_the_request_models(uncached_validator, installation, encoding):
+    validator = uncached_validator
+    rooms = reference_rooms(installation)
+    compact = compact_rooms(rooms)
+    expected, actual = (
+        grouped_key(asyncio.run(validator.validate_room_equipment(payload, encoding=encoding)))
+        for payload in (rooms, compact)
+    )
+    assert actual == expected
+
+    postal_code = installation.get("postal_code")
+    number_of_people = installation.get("number_of_people")
+    expected_global, actual_global = (
+        validator.validate_global_with_dimensioning_sync(payload, postal_code, number_of_people, encoding)
+        for payload in (rooms, compact)
+    )
+    assert grouped_key(actual_global[:2]) == grouped_key(expected_global[:2])
+    assert actual_global[2].model_dump() == expected_global[2].model_dump()
+    assert report_key(actual_global[3]) == report_key(expected_global[3])
@@ -0,0 +1,125 @@
+"""Dimensioning: batch computation, grouped breakers, circuit plan and
+dimensioning without SHACL."""
+
+from collections import Counter
+
+import pytest
+
+from compliance_engine.batch_dimensioning import dimension_batch
+from compliance_engine.compact_model import compact_rooms
+from compliance_engine.graph_builder import CIRCUIT_KIND_LITERALS, CIRCUIT_TYPE
+from compliance_engine.inventory import CIRCUIT_CAPACITIES
+from compliance_engine.models import ComplianceStatus, GlobalComplianceResult
+from compliance_engine.ruleset import EQUIPMENT_ENCODINGS
+from reference_corpus import dimensioning_variants, each_installation, reference_rooms
+
+
+@each_installation
+def test_batch_dimensioning_matches_each_installation(validator, installation):
+    variants = dimensioning_variants(installation)
+    compliant = [index % 2 == 0 for index in range(len(variants))]
+    results = dimension_batch(
+        validator,
+        [compact_rooms(rooms) for _, rooms, _, _ in variants],
+        [postal_code for _, _, postal_code, _ in variants],
+        [number_of_people for _, _, _, number_of_people in variants],
+        compliant,
+    )
+    for (label, rooms, postal_code, number_of_people), is_compliant, actual in zip(variants, compliant, results):
+        expected = validator.calculate_dimensioning(
+            rooms,
+            GlobalComplianceResult(
+                overall_status=ComplianceStatus.COMPLIANT if is_compliant else ComplianceStatus.NON_COMPLIANT
+            ),
+            postal_code=postal_code,
+            number_of_people=number_of_people,
+        )
+        assert actual.model_dump(mode="json") == expected.model_dump(mode="json"), label
+        assert (
+            validator.grouped_dimensioning(actual).circuit_breaker_groups
+            == validator.grouped_dimensioning(expected).circuit_breaker_groups
+        ), label
+
+
+@each_installation
+def test_grouped_breakers_count_the_verbose_breakers(validator, installation):
+    for label, rooms, postal_code, number_of_people in dimensioning_variants(installation):
+        verbose = validator.calculate_dimensioning(rooms, None, postal_code=postal_code, number_of_people=number_of_people)
+        grouped = validator.grouped_dimensioning(verbose)
+        expected, actual = Counter(), Counter()
+        for spec in verbose.circuit_breakers:
+            assert spec.circuit_kind is not None, (label, spec.description)
+            expected[spec.rating, spec.type] += spec.quantity
+        for group in grouped.circuit_breaker_groups:
+            actual[group.rating, group.type] += group.quantity
+            assert group.circuits is None or len(group.circuits) == group.quantity, (label, group.description)
+        assert actual == +expected, label
+        assert not grouped.circuit_breakers
+        other_fields = {"circuit_breakers", "circuit_breaker_groups"}
+        assert grouped.model_dump(exclude=other_fields) == verbose.model_dump(exclude=other_fields), label
+
+
+@each_installation
+def test_circuit_plan_supplies_every_unit_once_within_capacity(validator, installation):
+    builder = validator.graph_builder()
+    for label, rooms, postal_code, number_of_people in dimensioning_variants(installation):
+        inventory = validator.equipment_inventory(rooms)
+        dimensioning = validator.calculate_dimensioning(
+            rooms, None, postal_code=postal_code, number_of_people=number_of_people,
+            inventory=inventory, plan_circuits=True,
+        )
+        plan = dimensioning.circuit_plan or []
+        breakers = [
+            (spec.circuit_kind, spec.rating, spec.type)
+            for spec in dimensioning.circuit_breakers
+            for _ in range(spec.quantity)
+        ]
+        assert [(circuit.circuit_kind, circuit.rating, circuit.type) for circuit in plan] == breakers, label
+
+        supplied = Counter()
+        for circuit in plan:
+            capacity = CIRCUIT_CAPACITIES.get(circuit.circuit_kind, 1)
+            assert capacity is None or sum(load.quantity for load in circuit.loads) <= capacity, label
+            for load in circuit.loads:
+                supplied[circuit.circuit_kind, load.room_id, load.equipment_type] += load.quantity
+        expected = Counter()
+        planned_kinds = {circuit.circuit_kind for circuit in plan}
+        for kind, loads in inventory.circuit_loads().items():
+            # Cooking hobs have no circuit of their own next to 32A oven sockets
+            if kind not in planned_kinds:
+                continue
+            for room_id, equipment_type, quantity in loads:
+                expected[kind, room_id, equipment_type] += quantity
+        assert supplied == expected, label
+
+        # Built from the plan or, for batch dimensioning, from the breakers alone
+        batch_dimensioning = dimension_batch(validator, [rooms], [postal_code], [number_of_people])[0]
+        planned_types = sorted(str(CIRCUIT_KIND_LITERALS[circuit.circuit_kind]) for circuit in plan)
+        for source in (dimensioning, batch_dimensioning):
+            graph = builder.complete_installation_graph(rooms, source, postal_code=postal_code)
+            assert sorted(str(kind) for kind in graph.objects(None, CIRCUIT_TYPE)) == planned_types, label
+
+
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_dimensioning_without_shacl_matches_the_global_validation(validator, installation, encoding):
+    rooms = reference_rooms(installation)
+    postal_code = installation.get("postal_code")
+    number_of_people = installation.get("number_of_people")
+    basic_compliance, _, expected, _ = validator.validate_global_with_dimensioning_sync(
+        rooms, postal_code, number_of_people, encoding
+    )
+
+    checked, compliance = validator.dimension_sync(
+        compact_rooms(rooms), postal_code, number_of_people, check_compliance=True, encoding=encoding
+    )
+    assert checked.model_dump() == expected.model_dump()
+    assert compliance.overall_status == basic_compliance.overall_status
+    assert sorted((v.message, v.severity.value) for v in compliance.violations) == sorted(
+        (v.message, v.severity.value) for v in basic_compliance.violations
+    )
+
+    unchecked, compliance = validator.dimension_sync(rooms, postal_code, number_of_people)
+    notes = [note for note in expected.installation_notes if note != validator.NON_COMPLIANT_NOTE]
+    assert compliance is None
+    assert unchecked.model_dump() == expected.model_copy(update={"installation_notes": notes}).model_dump()
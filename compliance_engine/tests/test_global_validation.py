@@ -0,0 +1,40 @@
+"""Global validation sharing one data graph across its two passes."""
+
+import pytest
+
+from compliance_engine.models import ComplianceStatus, ValidationResult
+from compliance_engine.ruleset import EQUIPMENT_ENCODINGS, ROOM_EQUIPMENT_FOCUS
+from reference_corpus import each_installation, reference_rooms, report_key
+
+
+@pytest.mark.parametrize("native_rules", [False, True])
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_incremental_global_validation_reports_like_separate_validations(
+    validator, installation, encoding, native_rules
+):
+    # Without multi-socket outlets the equipment-only results also carry over
+    rooms = reference_rooms(installation)
+    postal_code = installation.get("postal_code")
+    number_of_people = installation.get("number_of_people")
+    basic_compliance, room_results, dimensioning, final_validation = validator.validate_global_with_dimensioning_sync(
+        rooms, postal_code, number_of_people, encoding, native_rules=native_rules, incremental=True
+    )
+
+    room_validation = validator.validate_rooms_sync(rooms, ROOM_EQUIPMENT_FOCUS, encoding, native_rules=native_rules)
+    grouped = ValidationResult(
+        is_valid=basic_compliance.overall_status == ComplianceStatus.COMPLIANT,
+        violations=basic_compliance.violations + [v for room in room_results for v in room.violations],
+    )
+    # Rooms sharing an id are each given the violations of that id
+    assert report_key(grouped, distinct=True) == report_key(room_validation, distinct=True)
+
+    expected_dimensioning = validator.calculate_dimensioning(
+        rooms, validator._group_room_violations(rooms, room_validation)[0],
+        postal_code=postal_code, number_of_people=number_of_people,
+    )
+    assert dimensioning.model_dump() == expected_dimensioning.model_dump()
+    complete = validator.validate_complete_installation_sync(
+        rooms, expected_dimensioning, postal_code, encoding, native_rules=native_rules
+    )
+    assert report_key(final_validation) == report_key(complete)
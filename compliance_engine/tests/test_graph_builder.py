@@ -0,0 +1,65 @@
+"""Installation graphs: circuits of the complete graph and JSON-LD export."""
+
+import pytest
+from rdflib import Literal
+from rdflib.compare import isomorphic
+
+from compliance_engine.graph_builder import CIRCUIT_TYPE, HAS_CIRCUIT, SUPPLIED_BY_CIRCUIT, graph_to_jsonld
+from compliance_engine.models import RoomEquipment
+from compliance_engine.ruleset import COMPACT_ENCODING, NODES_ENCODING
+from reference_corpus import each_installation, installation_graphs, report_key
+
+ROOMS = [
+    RoomEquipment(
+        room_id="bedroom",
+        room_type="Bedroom",
+        room_area=12,
+        equipment=[
+            {"equipment_type": "Socket", "quantity": 10},
+            {"equipment_type": "DoubleSocket", "quantity": 2},
+            {"equipment_type": "LightingPoint", "quantity": 2},
+        ],
+    ),
+]
+
+
+def _circuit_types(graph):
+    return {circuit: graph.value(circuit, CIRCUIT_TYPE) for circuit in graph.objects(None, HAS_CIRCUIT)}
+
+
+def test_every_socket_and_lighting_point_is_supplied_by_a_circuit_of_its_kind(validator):
+    builder = validator.graph_builder(encoding=NODES_ENCODING)
+    dimensioning = validator.calculate_dimensioning(ROOMS, None, plan_circuits=True)
+    graph = builder.complete_installation_graph(ROOMS, dimensioning)
+    circuit_types = _circuit_types(graph)
+    supplied = {}
+    for unit, circuit in graph.subject_objects(SUPPLIED_BY_CIRCUIT):
+        supplied.setdefault(circuit_types[circuit], []).append(unit)
+
+    # 12 outlets on 2 circuits of at most 8, the 2 points on 1 lighting circuit
+    assert len(set(supplied[Literal("socket")])) == 12
+    assert len(set(supplied[Literal("lighting")])) == 2
+    socket_circuits = {graph.value(unit, SUPPLIED_BY_CIRCUIT) for unit in supplied[Literal("socket")]}
+    assert len(socket_circuits) == 2
+
+
+@pytest.mark.parametrize("encoding", [NODES_ENCODING, COMPACT_ENCODING])
+def test_completed_room_graph_links_the_same_units(validator, encoding):
+    builder = validator.graph_builder(encoding=encoding)
+    dimensioning = validator.calculate_dimensioning(ROOMS, None, plan_circuits=True)
+    extra_units: list = []
+    unit_nodes: dict = {}
+    graph = builder.room_equipment_graph(ROOMS, extra_units, unit_nodes)
+    builder.complete_room_equipment_graph(graph, ROOMS, dimensioning, None, extra_units, unit_nodes)
+
+    assert unit_nodes
+    assert isomorphic(graph, builder.complete_installation_graph(ROOMS, dimensioning))
+
+
+@each_installation
+def test_jsonld_export_validates_like_its_graph(validator, installation):
+    for name, build_graph, focus_area in installation_graphs(validator, installation):
+        graph = build_graph(True)
+        expected = validator.validate_graph_sync(graph, focus_area, pre_inferred=True)
+        exported = validator.validate_sync(graph_to_jsonld(graph), focus_area)
+        assert report_key(exported) == report_key(expected), name
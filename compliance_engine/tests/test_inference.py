@@ -0,0 +1,18 @@
+"""RDFS closure precomputed at ruleset load against pyshacl inference."""
+
+import pytest
+
+from reference_corpus import each_installation, installation_graphs, report_key
+
+
+@pytest.mark.slow
+@each_installation
+def test_precomputed_closure_reports_like_rdfs_inference(validator, installation):
+    # Types emitted by the builder (pre-inferred) or entailed by the ruleset
+    # (asserted types only) against inference='rdfs' on asserted types only
+    for name, build_graph, focus_area in installation_graphs(validator, installation):
+        expected = report_key(validator.validate_graph_sync(build_graph(False), focus_area, inference="rdfs"))
+        pre_inferred = validator.validate_graph_sync(build_graph(True), focus_area, pre_inferred=True, inference="none")
+        entailed = validator.validate_graph_sync(build_graph(False), focus_area, inference="none")
+        assert report_key(pre_inferred) == expected, name
+        assert report_key(entailed) == expected, name
@@ -0,0 +1,111 @@
+"""Compilation and evaluation of the annotated cardinality rules."""
+
+from pathlib import Path
+
+import pytest
+from rdflib import Graph, Literal
+
+from compliance_engine.native_rules import compile_cardinality_rules
+from compliance_engine.ruleset import EQUIPMENT_ENCODINGS, NFC, ROOM_EQUIPMENT_FOCUS, SH, RulesetLoadError
+from reference_corpus import each_installation, reference_dimensioning, reference_rooms, report_key
+
+
+@pytest.fixture
+def shapes_text(project_settings) -> str:
+    return Path(project_settings.shapes_path).read_text()
+
+
+def test_every_annotated_constraint_is_compiled(shapes_text):
+    shapes_graph = Graph().parse(data=shapes_text, format="turtle")
+    table = compile_cardinality_rules(shapes_graph)
+    assert len(table) == len(set(shapes_graph.subjects(NFC.countProperty)))
+    kitchen_rules = {rule.message: rule for rule in table.by_class[NFC.Kitchen]}
+    small_kitchen = next(rule for message, rule in kitchen_rules.items() if message.startswith("Les petites cuisines"))
+    assert small_kitchen.count_property == NFC.standardSocketCount
+    assert small_kitchen.min_count == 3
+    assert small_kitchen.area_tests == (("<=", 4.0),)
+    assert small_kitchen.path is None
+    lighting = next(rule for message, rule in kitchen_rules.items() if "éclairage" in message)
+    assert lighting.path == NFC.hasLightingPoint
+
+
+def test_count_query_reads_the_room_counts(shapes_text):
+    table = compile_cardinality_rules(Graph().parse(data=shapes_text, format="turtle"))
+    rule = next(rule for rule in table.by_class[NFC.LivingRoom] if rule.area_tests == ((">", 20.0), ("<=", 24.0)))
+    query = " ".join(rule.count_query().split())
+    assert query == (
+        "SELECT $this WHERE { $this a nfc:LivingRoom ; nfc:roomArea ?area ; nfc:socketCount ?count . "
+        "FILTER(?area > 20 && ?area <= 24) FILTER(?count < 6) }"
+    )
+
+
+@pytest.mark.parametrize(
+    "original, broken",
+    [
+        # nfc:requiredCount disagreeing with sh:minCount
+        ("sh:minCount 3 ;", "sh:minCount 2 ;"),
+        # Area bounds on a property shape
+        ("nfc:countProperty nfc:switchCount ;", "nfc:countProperty nfc:switchCount ; nfc:areaAbove 4 ;"),
+        # Not a room count property
+        ("nfc:countProperty nfc:lightingPointCount ;", "nfc:countProperty nfc:hasLightingPoint ;"),
+        # Non-numeric bound
+        ("nfc:areaAtLeast 4 ;", 'nfc:areaAtLeast "four" ;'),
+    ],
+)
+def test_annotated_rule_that_does_not_compile_fails(shapes_text, original, broken):
+    assert original in shapes_text
+    shapes_graph = Graph().parse(data=shapes_text.replace(original, broken, 1), format="turtle")
+    with pytest.raises(RulesetLoadError):
+        compile_cardinality_rules(shapes_graph)
+
+
+def test_stray_count_annotation_fails(shapes_text):
+    shapes_graph = Graph().parse(data=shapes_text, format="turtle")
+    # Property shape nested in the qualified value shape of the 32A socket rule
+    nested = next(shapes_graph.subjects(SH.hasValue, Literal(32)))
+    shapes_graph.add((nested, NFC.countProperty, NFC.socketCount))
+    with pytest.raises(RulesetLoadError, match="outside a constraint"):
+        compile_cardinality_rules(shapes_graph)
+
+
+@pytest.mark.parametrize(
+    "original, broken, match",
+    [
+        # Count threshold of the small kitchen query
+        ("FILTER(?socketCount < 3)", "FILTER(?socketCount < 4)", "requiredCount"),
+        # Area threshold of the WC query
+        ("FILTER(?area > 4)\n                {\n                    SELECT $this (COUNT(?socket) as ?socketCount) WHERE {\n"
+         "                        OPTIONAL { $this nfc:hasSocket ?socket }",
+         "FILTER(?area >= 4)\n                {\n                    SELECT $this (COUNT(?socket) as ?socketCount) WHERE {\n"
+         "                        OPTIONAL { $this nfc:hasSocket ?socket }", "area bounds"),
+        # Annotation without the matching exclusion in the query
+        ("FILTER NOT EXISTS { $this a nfc:LivingRoomWithIntegratedKitchen }", "", "excludedClass"),
+        # Annotation restating another threshold than the query
+        ("nfc:requiredCount 6 ;\n        nfc:countProperty nfc:standardSocketCount ;",
+         "nfc:requiredCount 5 ;\n        nfc:countProperty nfc:standardSocketCount ;", "requiredCount"),
+    ],
+)
+def test_annotation_disagreeing_with_its_query_fails(shapes_text, original, broken, match):
+    assert shapes_text.count(original) == 1
+    shapes_graph = Graph().parse(data=shapes_text.replace(original, broken), format="turtle")
+    with pytest.raises(RulesetLoadError, match=match):
+        compile_cardinality_rules(shapes_graph)
+
+
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_native_rules_report_like_pyshacl(validator, installation, encoding):
+    rooms = reference_rooms(installation)
+    dimensioning = reference_dimensioning(validator, installation)
+    postal_code = installation.get("postal_code")
+    for focus_area in (ROOM_EQUIPMENT_FOCUS, None):
+        reports = [
+            validator.validate_rooms_sync(rooms, focus_area, encoding, native_rules=native_rules)
+            for native_rules in (False, True)
+        ]
+        assert report_key(reports[1]) == report_key(reports[0]), focus_area
+    reports = [
+        validator.validate_complete_installation_sync(rooms, dimensioning, postal_code, encoding, native_rules=native_rules)
+        for native_rules in (False, True)
+    ]
+    assert report_key(reports[1]) == report_key(reports[0])
@@ -0,0 +1,46 @@
+"""Known violations of the reference installations.
+
+These fail on an empty or partially loaded ruleset, which the differential
+tests alone cannot detect (both sides would report nothing).
+"""
+
+import pytest
+
+from compliance_engine.compact_model import compact_rooms
+from compliance_engine.models import SeverityLevel
+from compliance_engine.ruleset import COMPACT_ENCODING, NODES_ENCODING
+from reference_corpus import REFERENCE_INSTALLATIONS, each_installation, reference_rooms
+
+INSTALLATIONS = {installation["installation_id"]: installation for installation in REFERENCE_INSTALLATIONS}
+
+# Error rules each installation is known to break (a subset of its report)
+KNOWN_ERRORS = {
+    "ref-t3": {"NFC-15-100-BEDROOM-NETWORK-SOCKET", "NFC-15-100-BATHROOM-WITH-WC-LIGHTING"},
+    "ref-studio": {"NFC-15-100-BATHROOM-WITH-WC-SWITCH", "NFC-15-100-GROUNDING-SYSTEM-1"},
+    "ref-empty-room": {"NFC-15-100-LIVING-ROOM-LIGHTING", "NFC-15-100-LIVING-ROOM-SOCKET-1"},
+    "ref-custom-specs": {"NFC-15-100-BEDROOM-SOCKET", "NFC-15-100-CIRCULATION-LIGHTING"},
+    "ref-edge-rooms": {"NFC-15-100-KITCHEN-COOKTOP-SOCKET32-A", "NFC-15-100-KITCHEN-SWITCH"},
+}
+
+
+def test_rule_catalog_is_loaded(validator):
+    rules = validator.ruleset.rule_catalog.rules
+    assert len(rules) > 0
+    assert set().union(*KNOWN_ERRORS.values()) <= set(rules)
+
+
+@pytest.mark.parametrize("native_rules", [True, False])
+@pytest.mark.parametrize("encoding", [NODES_ENCODING, COMPACT_ENCODING])
+@pytest.mark.parametrize("installation_id", sorted(KNOWN_ERRORS))
+def test_known_violations(validator, installation_id, encoding, native_rules):
+    rooms = compact_rooms(reference_rooms(INSTALLATIONS[installation_id]))
+    result = validator.validate_rooms_sync(rooms, encoding=encoding, native_rules=native_rules)
+    errors = {v.rule_id for v in result.violations if v.severity == SeverityLevel.ERROR}
+    assert not result.is_valid
+    assert KNOWN_ERRORS[installation_id] <= errors
+
+
+@each_installation
+def test_every_reference_installation_is_non_compliant(validator, installation):
+    result = validator.validate_rooms_sync(compact_rooms(reference_rooms(installation)))
+    assert any(v.severity == SeverityLevel.ERROR for v in result.violations)
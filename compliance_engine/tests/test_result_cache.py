@@ -0,0 +1,69 @@
+"""Cache keys of the validation responses."""
+
+from fastapi.testclient import TestClient
+
+from compliance_engine import main
+from compliance_engine.models import RoomEquipment
+from compliance_engine.result_cache import ResultCache, request_fingerprint
+
+
+def _rooms(*rooms):
+    return [RoomEquipment(**room) for room in rooms]
+
+
+KITCHEN = {
+    "room_id": "kitchen",
+    "room_type": "Kitchen",
+    "room_area": 9,
+    "equipment": [
+        {"equipment_type": "Socket", "quantity": 6},
+        {"equipment_type": "LightingPoint", "quantity": 1},
+    ],
+}
+BEDROOM = {
+    "room_id": "bedroom",
+    "room_type": "Bedroom",
+    "room_area": 11,
+    "equipment": [{"equipment_type": "Socket", "quantity": 3}],
+}
+KITCHEN_REORDERED = {**KITCHEN, "equipment": list(reversed(KITCHEN["equipment"]))}
+
+
+def test_unordered_key_ignores_room_and_equipment_order():
+    key = request_fingerprint("room-equipment", _rooms(KITCHEN, BEDROOM), "v1")
+    assert request_fingerprint("room-equipment", _rooms(BEDROOM, KITCHEN), "v1") == key
+    assert request_fingerprint("room-equipment", _rooms(KITCHEN_REORDERED, BEDROOM), "v1") == key
+
+
+def test_ordered_key_keeps_room_and_equipment_order():
+    key = request_fingerprint("global-with-dimensioning", _rooms(KITCHEN, BEDROOM), "v1", ordered=True)
+    assert request_fingerprint("global-with-dimensioning", _rooms(KITCHEN, BEDROOM), "v1", ordered=True) == key
+    assert request_fingerprint("global-with-dimensioning", _rooms(BEDROOM, KITCHEN), "v1", ordered=True) != key
+    assert request_fingerprint("global-with-dimensioning", _rooms(KITCHEN_REORDERED, BEDROOM), "v1", ordered=True) != key
+
+
+def _latency_count(client: TestClient, endpoint: str) -> int:
+    return client.get("/metrics").json()["latency"].get(endpoint, {}).get("count", 0)
+
+
+def test_global_validation_cache_hits_record_latency():
+    client = TestClient(main.app)
+    body = {"installation_id": "cached-global", "rooms": [KITCHEN, BEDROOM]}
+    before = _latency_count(client, "global-with-dimensioning")
+    assert client.post("/validate/global-with-dimensioning", json=body).status_code == 200
+    hits = main.result_cache.hits
+    assert client.post("/validate/global-with-dimensioning", json=body).status_code == 200
+    assert main.result_cache.hits == hits + 1
+    assert _latency_count(client, "global-with-dimensioning") == before + 2
+
+
+def test_peek_leaves_the_statistics_untouched():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.peek("a") == 1
+    assert cache.peek("missing") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+    # "a" was not marked recently used: it is evicted first
+    cache.put("c", 3)
+    assert cache.peek("a") is None and cache.peek("b") == 2
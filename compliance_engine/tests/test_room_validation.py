@@ -0,0 +1,89 @@
+"""Room-equipment validation: room-local scopes, room verdict memo and
+fail-fast compliance check."""
+
+import asyncio
+
+import pytest
+
+from compliance_engine.result_cache import ResultCache
+from compliance_engine.room_verdicts import room_verdict_cache
+from compliance_engine.ruleset import (
+    EQUIPMENT_ENCODINGS,
+    INSTALLATION_SCOPE,
+    ROOM_EQUIPMENT_FOCUS,
+    ROOM_LOCAL_SCOPE,
+    RULE_GROUPS,
+)
+from compliance_engine.validators import NFC15100Validator
+from reference_corpus import (
+    REFERENCE_INSTALLATIONS,
+    each_installation,
+    grouped_key,
+    normalise_node,
+    reference_rooms,
+    report_key,
+)
+
+
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_room_local_shapes_on_chunks_report_like_the_whole_graph(validator, installation, encoding):
+    rooms = reference_rooms(installation)
+    for focus_area in (ROOM_EQUIPMENT_FOCUS, None):
+        results = [validator.validate_rooms_sync(rooms, focus_area, encoding, scope=INSTALLATION_SCOPE)]
+        for chunk in validator._room_chunks(rooms, 3):
+            results.append(validator.validate_rooms_sync(chunk, focus_area, encoding, scope=ROOM_LOCAL_SCOPE))
+        expected = validator.validate_rooms_sync(rooms, focus_area, encoding)
+        assert report_key(validator._merged_result(0, [], results)) == report_key(expected), focus_area
+
+
+def test_room_verdict_memo_reports_like_every_room_validated():
+    # Cold, then warm on renamed rooms
+    reference = NFC15100Validator()
+    reference.room_verdicts = ResultCache(max_entries=0)
+    memoized = NFC15100Validator()
+    memoized.room_verdicts = room_verdict_cache()
+    for installation in REFERENCE_INSTALLATIONS:
+        rooms = reference_rooms(installation)
+        renamed = [room.model_copy(update={"room_id": f"{room.room_id}-bis"}) for room in rooms]
+        for encoding in EQUIPMENT_ENCODINGS:
+            for include_dimensioning_rules in (False, True):
+                for payload in (rooms, renamed):
+                    expected, actual = (
+                        grouped_key(asyncio.run(variant.validate_room_equipment(
+                            payload, include_dimensioning_rules, encoding
+                        )))
+                        for variant in (reference, memoized)
+                    )
+                    assert actual == expected, (installation["installation_id"], encoding, include_dimensioning_rules)
+    assert memoized.room_verdicts.stats()["hits"]
+
+
+def _variants(validator):
+    """Fail-fast validators, with the rule groups each is checked with."""
+    variants = []
+    for native_rules in (True, False):
+        for persistent_shapes in (True, False):
+            variant = NFC15100Validator()
+            variant.settings = validator.settings.model_copy(
+                update={"native_rules": native_rules, "persistent_shapes": persistent_shapes}
+            )
+            variants.append((variant, [None]))
+    variants[0][1].extend((group,) for group in RULE_GROUPS)
+    return variants
+
+
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_fail_fast_finds_a_blocking_violation_of_the_full_report(validator, installation, encoding):
+    rooms = reference_rooms(installation)
+    for variant, groups in _variants(validator):
+        for rule_groups in groups:
+            report = validator.validate_rooms_sync(rooms, ROOM_EQUIPMENT_FOCUS, encoding, rule_groups=rule_groups)
+            blocking = {(v.message, normalise_node(v.focus_node)) for v in report.violations if v.severity.value == "error"}
+            first = variant.first_violation_sync(rooms, encoding, rule_groups)
+            if blocking:
+                assert first is not None, rule_groups
+                assert (first.message, normalise_node(first.focus_node)) in blocking, rule_groups
+            else:
+                assert first is None, rule_groups
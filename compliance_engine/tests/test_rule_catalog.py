@@ -0,0 +1,53 @@
+"""Rule ids of the reported violations and rule group selection."""
+
+from functools import partial
+
+import pytest
+
+from compliance_engine.models import ValidationResult
+from compliance_engine.ruleset import (
+    EQUIPMENT_ENCODINGS,
+    NETWORK_GROUP,
+    ROOM_EQUIPMENT_FOCUS,
+    ROOM_EQUIPMENT_GROUP,
+    RULE_GROUPS,
+)
+from reference_corpus import each_installation, reference_dimensioning, reference_rooms, report_key
+
+
+def _validations(validator, installation):
+    rooms = reference_rooms(installation)
+    dimensioning = reference_dimensioning(validator, installation)
+    postal_code = installation.get("postal_code")
+    return {
+        "room-equipment": partial(validator.validate_rooms_sync, rooms, ROOM_EQUIPMENT_FOCUS),
+        "complete": partial(validator.validate_complete_installation_sync, rooms, dimensioning, postal_code),
+    }
+
+
+@pytest.mark.parametrize("native_rules", [False, True])
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_violations_carry_the_rule_declaring_their_message(validator, installation, encoding, native_rules):
+    rules = validator.ruleset.rules_info
+    for name, validate in _validations(validator, installation).items():
+        result = validate(encoding=encoding, native_rules=native_rules)
+        for violation in result.violations:
+            assert rules[violation.rule_id].description == violation.message, name
+            assert violation.rule_id in result.rules_checked, name
+
+
+def _merged(results):
+    return ValidationResult(
+        is_valid=all(result.is_valid for result in results),
+        violations=[violation for result in results for violation in result.violations],
+    )
+
+
+@each_installation
+def test_rule_groups_partition_the_rules(validator, installation):
+    for name, validate in _validations(validator, installation).items():
+        by_group = {group: validate(rule_groups=[group]) for group in RULE_GROUPS}
+        assert report_key(_merged(list(by_group.values()))) == report_key(validate()), name
+        pair = [ROOM_EQUIPMENT_GROUP, NETWORK_GROUP]
+        assert report_key(validate(rule_groups=pair)) == report_key(_merged([by_group[group] for group in pair])), name
@@ -0,0 +1,112 @@
+"""Loading and reloading of the compiled ruleset."""
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from rdflib import Graph
+
+from compliance_engine import main
+from compliance_engine.rule_catalog import RuleCatalog
+from compliance_engine.ruleset import (
+    COMPACT_ENCODING,
+    NFC,
+    NODES_ENCODING,
+    SH,
+    CompiledRuleset,
+    RulesetLoadError,
+    get_ruleset,
+    reload_ruleset,
+)
+
+
+def test_load_rejects_missing_shapes(project_settings, tmp_path):
+    settings = project_settings.model_copy(update={"shapes_path": str(tmp_path / "missing.ttl")})
+    with pytest.raises(RulesetLoadError):
+        CompiledRuleset.load(settings)
+
+
+def test_load_rejects_unparsable_ontology(project_settings, tmp_path):
+    ontology = tmp_path / "ontology.ttl"
+    ontology.write_text("@prefix nfc: <http://ontology.nfc15100.fr#> .\nnfc:Room a ")
+    with pytest.raises(RulesetLoadError):
+        CompiledRuleset.load(project_settings.model_copy(update={"ontology_path": str(ontology)}))
+
+
+def test_load_rejects_shapes_without_node_shape(project_settings, tmp_path):
+    shapes = tmp_path / "shapes.ttl"
+    shapes.write_text("@prefix sh: <http://www.w3.org/ns/shacl#> .\n")
+    with pytest.raises(RulesetLoadError):
+        CompiledRuleset.load(project_settings.model_copy(update={"shapes_path": str(shapes)}))
+
+
+def test_failed_reload_keeps_previous_ruleset(project_settings, tmp_path):
+    previous = get_ruleset()
+    settings = project_settings.model_copy(update={"shapes_path": str(tmp_path / "missing.ttl")})
+    with pytest.raises(RulesetLoadError):
+        reload_ruleset(settings)
+    assert get_ruleset() is previous
+    assert len(previous.rule_catalog.rules) > 0
+
+
+def test_reload_endpoint_requires_admin(monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(main.settings, "admin_token", "")
+    # The test client is not a loopback client
+    assert client.post("/rules/reload").status_code == 403
+    monkeypatch.setattr(main.settings, "admin_token", "secret")
+    assert client.post("/rules/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.post("/rules/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["version"] == get_ruleset().version
+
+
+def test_reload_endpoint_keeps_rules_on_invalid_files(monkeypatch, tmp_path):
+    client = TestClient(main.app)
+    previous = get_ruleset()
+    monkeypatch.setattr(main.settings, "admin_token", "secret")
+    monkeypatch.setattr(main.settings, "shapes_path", str(tmp_path / "missing.ttl"))
+    response = client.post("/rules/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 500
+    assert get_ruleset() is previous
+
+
+def test_compact_variants_share_rule_metadata(project_settings):
+    ruleset = get_ruleset()
+    count_queries = Graph().parse(project_settings.count_shapes_path)
+    assert not set(count_queries.objects(None, SH.message))
+    nodes, compact = (ruleset.encoding_graphs[encoding] for encoding in (NODES_ENCODING, COMPACT_ENCODING))
+    assert RuleCatalog([compact], ruleset.shape_groups).rules == RuleCatalog([nodes], ruleset.shape_groups).rules
+
+
+def test_load_rejects_invalid_count_annotation(project_settings, tmp_path):
+    shapes = tmp_path / "shapes.ttl"
+    text = Path(project_settings.shapes_path).read_text()
+    shapes.write_text(text.replace("nfc:countProperty nfc:switchCount", "nfc:countProperty nfc:roomArea", 1))
+    with pytest.raises(RulesetLoadError, match="not a room count property"):
+        CompiledRuleset.load(project_settings.model_copy(update={"shapes_path": str(shapes)}))
+
+
+def test_load_rejects_unreferenced_count_query(project_settings, tmp_path):
+    count_shapes = tmp_path / "count_shapes.ttl"
+    text = Path(project_settings.count_shapes_path).read_text()
+    count_shapes.write_text(text + '\nnfc:OrphanCountQuery sh:select "SELECT $this WHERE { }" .\n')
+    with pytest.raises(RulesetLoadError, match="referenced by no constraint"):
+        CompiledRuleset.load(project_settings.model_copy(update={"count_shapes_path": str(count_shapes)}))
+
+
+@pytest.mark.parametrize("annotation", ["nfc:ruleId", "nfc:suggestedFix"])
+def test_load_rejects_constraint_without_rule_annotation(project_settings, tmp_path, annotation):
+    shapes = tmp_path / "shapes.ttl"
+    lines = Path(project_settings.shapes_path).read_text().splitlines(keepends=True)
+    first = next(index for index, line in enumerate(lines) if line.lstrip().startswith(annotation + " "))
+    shapes.write_text("".join(lines[:first] + lines[first + 1:]))
+    with pytest.raises(RulesetLoadError, match=annotation.split(":")[1]):
+        CompiledRuleset.load(project_settings.model_copy(update={"shapes_path": str(shapes)}))
+
+
+def test_rule_ids_are_the_annotated_ones(project_settings):
+    shapes = Graph().parse(project_settings.shapes_path)
+    annotated = [str(rule_id) for rule_id in shapes.objects(None, NFC.ruleId)]
+    assert len(set(annotated)) == len(annotated)
+    assert set(get_ruleset().rule_catalog.rules) == set(annotated)
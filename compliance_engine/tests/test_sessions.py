@@ -0,0 +1,82 @@
+"""Installation sessions: incremental revalidation and endpoint error mapping."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from compliance_engine import main
+from compliance_engine.executors import StageTimeoutError, get_executor
+from compliance_engine.models import RoomDelta
+from compliance_engine.ruleset import EQUIPMENT_ENCODINGS
+from compliance_engine.sessions import InstallationSession, apply_deltas
+from reference_corpus import each_installation, grouped_key, reference_rooms
+
+BEDROOM = {
+    "room_id": "bedroom",
+    "room_type": "Bedroom",
+    "room_area": 11,
+    "equipment": [{"equipment_type": "Socket", "quantity": 3}],
+}
+
+
+def _time_out(*args, **kwargs):
+    raise StageTimeoutError("validation stage still running")
+
+
+def test_create_session_timeout_is_504(monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(InstallationSession, "validate", _time_out)
+    response = client.post("/sessions", json={"installation_id": "timeout-create", "rooms": [BEDROOM]})
+    assert response.status_code == 504
+    assert main.sessions.get("timeout-create") is None
+
+
+def test_patch_session_timeout_is_504_and_drops_the_session(monkeypatch):
+    client = TestClient(main.app)
+    response = client.post("/sessions", json={"installation_id": "timeout-patch", "rooms": [BEDROOM]})
+    assert response.status_code == 200
+
+    monkeypatch.setattr(InstallationSession, "validate", _time_out)
+    operations = [{"op": "set_equipment_quantity", "room_id": "bedroom", "equipment_type": "Socket", "quantity": 4}]
+    response = client.patch("/sessions/timeout-patch", json={"operations": operations})
+    assert response.status_code == 504
+    assert main.sessions.get("timeout-patch") is None
+
+
+def _session_edits(rooms):
+    """Successive edits of a session: equipment quantities, room removal,
+    addition and replacement."""
+    first, last = rooms[0], rooms[-1]
+    item = first.equipment[0] if first.equipment else None
+    edits = []
+    if item is not None:
+        edits.append([RoomDelta(
+            op="set_equipment_quantity", room_id=first.room_id, equipment_type=item.equipment_type,
+            quantity=item.quantity + 1, specifications=item.specifications,
+        )])
+    edits.append([RoomDelta(op="update_room", room=first.model_copy(update={"equipment": []}))])
+    edits.append([
+        RoomDelta(op="remove_room", room_id=last.room_id),
+        RoomDelta(op="add_room", room=last.model_copy(update={"room_id": f"{last.room_id}-copy"})),
+    ])
+    edits.append([RoomDelta(op="add_room", room=last)])
+    return edits
+
+
+@pytest.mark.parametrize("encoding", EQUIPMENT_ENCODINGS)
+@each_installation
+def test_session_edits_report_like_a_full_validation(validator, installation, encoding):
+    rooms = reference_rooms(installation)
+    if len({room.room_id for room in rooms}) != len(rooms):
+        pytest.skip("sessions key rooms by id")
+    executor = get_executor()
+    session = InstallationSession(installation["installation_id"], rooms, encoding)
+    asyncio.run(session.validate(validator, executor))
+    for step, edit in enumerate(_session_edits(rooms)):
+        edited_rooms, touched = apply_deltas(session.rooms, edit)
+        asyncio.run(session.validate(validator, executor, edited_rooms, touched))
+        expected = asyncio.run(validator.validate_room_equipment(
+            [room.to_model() for room in edited_rooms], encoding=encoding
+        ))
+        assert grouped_key((session.global_compliance, session.results())) == grouped_key(expected), step
@@ -0,0 +1,88 @@
+"""pyshacl engine against the locked pyshacl version, and the shapes
+prepared at load against plain ``pyshacl.validate``."""
+
+import re
+from importlib.metadata import version
+from pathlib import Path
+
+import pytest
+from packaging.version import Version
+from rdflib import Graph
+from rdflib.namespace import SH
+
+from compliance_engine.ruleset import EQUIPMENT_ENCODINGS
+from compliance_engine.shacl_engine import PreparedShapes
+from compliance_engine.validators import NFC15100Validator
+from reference_corpus import each_installation, installation_graphs, report_key
+
+LOCK_FILE = Path(__file__).resolve().parents[1] / "uv.lock"
+
+# Oldest pyshacl with ``pyshacl.graph_abstraction.DataGraph``, used by the engine
+MIN_PYSHACL = Version("0.40.0")
+
+SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix nfc: <http://ontology.nfc15100.fr#> .
+
+nfc:KitchenShape a sh:NodeShape ;
+    sh:targetClass nfc:Kitchen ;
+    sh:property [ sh:path nfc:hasSocket ; sh:minCount 1 ; sh:message "socket" ] ;
+    sh:sparql [
+        sh:message "lighting" ;
+        sh:select "SELECT $this WHERE { FILTER NOT EXISTS { $this nfc:hasLightingPoint ?point } }" ;
+    ] .
+"""
+
+DATA = """
+@prefix nfc: <http://ontology.nfc15100.fr#> .
+
+nfc:kitchen-1 a nfc:Kitchen ; nfc:hasSocket nfc:socket-1 ; nfc:hasLightingPoint nfc:point-1 .
+nfc:kitchen-2 a nfc:Kitchen .
+"""
+
+
+def _locked_version(package: str) -> Version:
+    lock = LOCK_FILE.read_text()
+    match = re.search(r'\[\[package\]\]\nname = "' + re.escape(package) + r'"\nversion = "([^"]+)"', lock)
+    assert match, f"{package} is not in uv.lock"
+    return Version(match.group(1))
+
+
+def test_locked_and_installed_pyshacl_support_the_engine():
+    assert _locked_version("pyshacl") >= MIN_PYSHACL
+    assert Version(version("pyshacl")) >= MIN_PYSHACL
+
+
+def test_prepared_shapes_validate_a_data_graph():
+    prepared = PreparedShapes(Graph().parse(data=SHAPES, format="turtle"))
+    run = prepared.validate(Graph().parse(data=DATA, format="turtle"))
+    assert not run.conforms
+    messages = sorted(str(message) for message in run.results_graph.objects(None, SH.resultMessage))
+    assert messages == ["lighting", "socket"]
+    focus_nodes = set(run.results_graph.objects(None, SH.focusNode))
+    assert {str(node).split("#")[-1] for node in focus_nodes} == {"kitchen-2"}
+
+
+def test_prepared_shapes_fail_fast():
+    prepared = PreparedShapes(Graph().parse(data=SHAPES, format="turtle"))
+    assert not prepared.validate(Graph().parse(data=DATA, format="turtle"), fail_fast=True).conforms
+    compliant = DATA.replace("nfc:kitchen-2 a nfc:Kitchen .", "")
+    assert prepared.validate(Graph().parse(data=compliant, format="turtle"), fail_fast=True).conforms
+
+
+@pytest.mark.slow
+@each_installation
+def test_prepared_shapes_report_like_plain_pyshacl(validator, installation):
+    plain, prepared = NFC15100Validator(), NFC15100Validator()
+    plain.settings = validator.settings.model_copy(update={"persistent_shapes": False})
+    prepared.settings = validator.settings.model_copy(update={"persistent_shapes": True})
+    for name, build_graph, focus_area in installation_graphs(validator, installation):
+        for encoding in EQUIPMENT_ENCODINGS:
+            for native in (False, True):
+                expected, actual = (
+                    variant.validate_graph_sync(
+                        build_graph(True, encoding), focus_area, pre_inferred=True, encoding=encoding, native=native
+                    )
+                    for variant in (plain, prepared)
+                )
+                assert report_key(actual) == report_key(expected), (name, encoding, native)